@@ -13,29 +13,52 @@ otomatik analizi için geliştirilmiştir.
 - Production-ready API
 """
 
-# Profesyonel model sistemi
-from .models.model_manager import ModelManager
-from .models.data_manager import MedicalDatasetManager
-from .models.model_validator import ProfessionalModelValidator
-from .models.train_models import ProfessionalModelTrainer
-
-# Temel bileşenler
-from .models import RadiologyModels, ModelEnsemble
-from .image_processor import ImageProcessor
-
-# API sistemi
-from .api import app
-
-# Schemas
-from .schemas import (
-    RadiologyAnalysisRequest,
-    RadiologyAnalysisResult,
-    ImageMetadata,
-    ImageType,
-    BodyRegion,
-    SeverityLevel,
-    RiskLevel
-)
+import importlib
+import sys
+from pathlib import Path
+
+# Modüller birbirini düz adla import eder (from execution_pool import ...)
+_package_dir = str(Path(__file__).parent)
+if _package_dir not in sys.path:
+    sys.path.insert(0, _package_dir)
+
+# Dışa aktarılan adlar ilk erişimde import edilir (PEP 562); paketi import
+# etmek torch/OpenCV yüklemez. Paket içi modüller düz adla yüklenir: aynı
+# dosya hem "schemas" hem "goruntu_isleme.schemas" olarak yüklenirse Enum
+# sınıfları ikilenir (isinstance başarısız olur) ve modül düzeyindeki
+# Prometheus metrikleri iki kez kaydedilir. Yalnızca giriş noktası api
+# paket adıyla yüklenir (main.py: goruntu_isleme.api).
+_LAZY_EXPORTS = {
+    # Profesyonel model sistemi
+    "ModelManager": "models.model_manager",
+    "MedicalDatasetManager": "models.data_manager",
+    "ProfessionalModelValidator": "models.model_validator",
+    "ProfessionalModelTrainer": "models.train_models",
+    # Temel bileşenler
+    "RadiologyModels": "models",
+    "ModelEnsemble": "models",
+    "ImageProcessor": "image_processor",
+    # API sistemi
+    "app": ".api",
+    # Schemas
+    "RadiologyAnalysisRequest": "schemas",
+    "RadiologyAnalysisResult": "schemas",
+    "ImageMetadata": "schemas",
+    "ImageType": "schemas",
+    "BodyRegion": "schemas",
+    "SeverityLevel": "schemas",
+    "RiskLevel": "schemas",
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
 
 __version__ = "2.0.0"
 __author__ = "Dr. AI Research Team"
@@ -6,12 +6,12 @@ Bu modül radyolojik görüntü analizi için REST API endpointlerini
 ve güvenlik mekanizmalarını içerir.
 """
 
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, BackgroundTasks, Body
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Literal, Optional, Any
 import logging
 import asyncio
 import uuid
@@ -19,17 +19,20 @@ from datetime import datetime, timedelta
 import json
 import os
 from pathlib import Path
-import torch
-import torchvision.transforms as transforms
 import numpy as np
-from PIL import Image
 
-# Gerçek model import'ları
-from real_data_training import RealDataTrainer, AdvancedMedicalCNN
-from fracture_dislocation_detector import FractureDislocationDetector
-from dicom_processor import DICOMProcessor
-from image_processor import ImageProcessor
-from respiratory_emergency_detector import RespiratoryEmergencyDetector
+# Hafif altyapı (ağır ML bağımlılıkları içermez)
+from execution_pool import StageExecutor, StageSaturatedError
+from result_cache import ResultCache, cached_checkpoint_fingerprint
+from batch_executor import BatchExecutor
+from upload_ingest import UploadSizeLimitMiddleware, UploadTooLargeError, open_upload
+from lazy_components import ComponentRegistry
+
+# Ağır model modülleri yalnızca tip kontrolü için; çalışma zamanında
+# bileşenler ilk kullanımda yüklenir (aşağıdaki components)
+if TYPE_CHECKING:
+    from batch_inference import BatchInferenceEngine
+    from image_processor import ImageInput
 
 # TANI sistem import'ları
 import sys
@@ -39,7 +42,7 @@ sys.path.append(str(tani_root))
 from UstSolunumYolu.modules.nlp_symptoms.src.diagnoser import score_symptoms
 
 # Schema import'ları
-from .schemas import (
+from schemas import (
     RadiologyAnalysisRequest, RadiologyAnalysisResult,
     BatchAnalysisRequest, BatchAnalysisResult,
     SystemHealthStatus, ModelPerformanceMetrics
@@ -65,19 +68,91 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Yükleme gövdesi akarken boyut limiti (limit aşılınca dosyanın kalanı okunmaz)
+UPLOAD_MAX_BYTES = 50 * 1024 * 1024
+app.add_middleware(UploadSizeLimitMiddleware, limits={"/analyze/upload": UPLOAD_MAX_BYTES})
+
 # Güvenlik
 security = HTTPBearer()
 
+# Tembel bileşenler: torch, OpenCV ve dedektörler ilk kullanımda yüklenir;
+# startup'ta API_WARMUP_COMPONENTS arka planda ısıtılır
+components = ComponentRegistry()
+torch = components.module('torch')
+transforms = components.module('torchvision.transforms')
+
+
+def _create_trainer():
+    from real_data_training import RealDataTrainer
+    return RealDataTrainer()
+
+
+def _create_fracture_detector():
+    from fracture_dislocation_detector import FractureDislocationDetector
+    return FractureDislocationDetector(str(FRACTURE_MODEL_DIR))
+
+
+def _create_dicom_processor():
+    from dicom_processor import DICOMProcessor
+    return DICOMProcessor()
+
+
+def _create_image_processor():
+    from image_processor import ImageProcessor
+    return ImageProcessor()
+
+
+def _create_respiratory_detector():
+    from respiratory_emergency_detector import RespiratoryEmergencyDetector
+    return RespiratoryEmergencyDetector()
+
+
 # Profesyonel model sistemi - gerçek verilerle eğitilmiş
-medical_ai_trainer = RealDataTrainer()
-fracture_detector = FractureDislocationDetector()
-dicom_processor = DICOMProcessor()
-image_processor = ImageProcessor()
-respiratory_detector = RespiratoryEmergencyDetector()
+medical_ai_trainer = components.register('medical_ai_trainer', _create_trainer)
+fracture_detector = components.register('fracture_detector', _create_fracture_detector,
+                                        warmup=lambda detector: detector.preload_models())
+dicom_processor = components.register('dicom_processor', _create_dicom_processor)
+image_processor = components.register('image_processor', _create_image_processor)
+respiratory_detector = components.register('respiratory_detector', _create_respiratory_detector)
+
+# Startup'ta arka planda ısıtılacak bileşenler (virgülle ayrılmış); kırık/çıkık
+# modellerini bellekte hazır tutmak için "fracture_detector" eklenir
+API_WARMUP_COMPONENTS = [
+    name.strip() for name in os.getenv("API_WARMUP_COMPONENTS", "").split(",") if name.strip()
+]
+
+# CPU yoğun aşamalar için sınırlı thread havuzları (event loop'u bloklamaz)
+stage_executor = StageExecutor()
+
+# Toplu uçların fan-out'u - aşama havuzlarını ve 503 davranışını paylaşır
+batch_executor = BatchExecutor(stage_executor)
+
+# İçerik adresli analiz sonuç cache'i (aynı pikseller + model + parametreler)
+analysis_cache = ResultCache('professional_analysis')
+MAIN_MODEL_DIR = Path("trained_models/real_data_medical_ai")
+FRACTURE_MODEL_DIR = Path("models")
+
+# Cache anahtarına giren çok başlı model ayarları. Başlıkların doğrulanma
+# durumu checkpoint'in kendisinde tutulduğundan FRACTURE_MODEL_DIR parmak
+# izine dahildir; anahtar için tembel dedektörün yüklenmesi gerekmez.
+MULTI_HEAD_CACHE_PARAMS = {
+    'multi_head': os.getenv("MULTI_HEAD_MODEL_ENABLED", "false").lower() == "true",
+    'multi_head_classification': os.getenv("MULTI_HEAD_MAIN_CLASSIFICATION", "false").lower() == "true",
+    'multi_head_min_accuracy': float(os.getenv("MULTI_HEAD_MIN_ACCURACY", "95"))
+}
 
 # Model yükleme durumu
 models_loaded = False
 
+# Ana model için dinamik mikro-batch çıkarım motoru
+main_model_engine: Optional["BatchInferenceEngine"] = None
+
+# Ana modelin servis edilen varyantı (float32, torchscript, int8_dynamic, int8_static)
+main_model_variant = "float32"
+
+# Prefork master'ında fork öncesi yüklenen ana model (worker'lar copy-on-write paylaşır)
+main_serving_model = None
+
 # API anahtarları (production'da veritabanından gelecek)
 VALID_API_KEYS = {
     os.getenv("API_KEY_DEV", "dev_key_123"): {"role": "developer", "rate_limit": int(os.getenv("API_RATE_LIMIT_DEV", "1000"))},
@@ -89,6 +164,15 @@ VALID_API_KEYS = {
 rate_limits = {}
 
 
+def saturation_error(exc: StageSaturatedError) -> HTTPException:
+    """Dolu aşama havuzu için 503 yanıtı oluştur"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Sunucu şu anda yoğun ({exc.stage}), lütfen daha sonra tekrar deneyin",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
+
 def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """API anahtarı doğrulama"""
     api_key = credentials.credentials
@@ -144,7 +228,8 @@ async def health_check():
             "timestamp": datetime.now().isoformat(),
             "models_loaded": models_loaded,
             "model_status": model_status,
-            "gpu_available": torch.cuda.is_available(),
+            # torch henüz yüklenmediyse sağlık kontrolü onu yüklemez
+            "gpu_available": torch.cuda.is_available() if torch.loaded else None,
             "memory_usage": "normal"
         }
         
@@ -200,6 +285,8 @@ async def analyze_single_image(
         
         return result
         
+    except StageSaturatedError as e:
+        raise saturation_error(e)
     except Exception as e:
         logger.error(f"Analiz hatası: {str(e)}")
         raise HTTPException(
@@ -217,13 +304,38 @@ async def analyze_batch_images(
     """Toplu görüntü analizi"""
     try:
         logger.info(f"📊 Toplu analiz isteği: {batch_request.batch_id}")
+        created_at = datetime.now()
         
-        # Toplu analiz yap
-        results = await analyzer.batch_analyze(batch_request.images)
+        if not models_loaded:
+            await load_medical_models()
         
-        # Sonuçları hazırla
-        completed = sum(1 for r in results if r.processing_status == "completed")
-        failed = len(results) - completed
+        for request in batch_request.images:
+            if not request.request_id:
+                request.request_id = f"req_{uuid.uuid4().hex[:8]}"
+        
+        # Görüntüler eşzamanlı işlenir; ana model çağrıları BatchInferenceEngine
+        # içinde tek forward pass'te birleşir
+        items = await batch_executor.map_async(batch_request.images, perform_professional_analysis)
+        
+        # Sonuçları hazırla - istek sırasıyla, hatalı öğe yalnızca kendini etkiler
+        results = []
+        for request, item in zip(batch_request.images, items):
+            if item.ok:
+                results.append(item.value)
+            else:
+                results.append(RadiologyAnalysisResult(
+                    request_id=request.request_id,
+                    analysis_id=f"analysis_{uuid.uuid4().hex[:8]}",
+                    processing_status="failed",
+                    error_message=str(item.error),
+                    analysis_result={"error": str(item.error)},
+                    processing_time=0.0,
+                    created_at=created_at,
+                    completed_at=datetime.now()
+                ))
+        
+        completed = sum(1 for item in items if item.ok)
+        failed = len(items) - completed
         
         batch_result = BatchAnalysisResult(
             batch_id=batch_request.batch_id,
@@ -231,9 +343,9 @@ async def analyze_batch_images(
             completed_analyses=completed,
             failed_analyses=failed,
             results=results,
-            batch_status="completed" if failed == 0 else "partial",
-            processing_time=sum(r.analysis_result.processing_time for r in results),
-            created_at=datetime.now(),
+            batch_status="completed" if failed == 0 else ("failed" if completed == 0 else "partial"),
+            processing_time=(datetime.now() - created_at).total_seconds(),
+            created_at=created_at,
             completed_at=datetime.now()
         )
         
@@ -242,6 +354,8 @@ async def analyze_batch_images(
         
         return batch_result
         
+    except StageSaturatedError as e:
+        raise saturation_error(e)
     except Exception as e:
         logger.error(f"Toplu analiz hatası: {str(e)}")
         raise HTTPException(
@@ -268,23 +382,16 @@ async def analyze_uploaded_file(
                 detail="Sadece görüntü dosyaları kabul edilir"
             )
         
-        # Dosya boyutu kontrolü (50MB limit)
-        file_size = 0
-        content = await file.read()
-        file_size = len(content)
-        
-        if file_size > 50 * 1024 * 1024:  # 50MB
-            raise HTTPException(
-                status_code=400,
-                detail="Dosya boyutu 50MB'dan büyük olamaz"
-            )
-        
-        # Base64'e çevir
-        import base64
-        image_data = base64.b64encode(content).decode('utf-8')
+        # Dosya boyutu kontrolü (50MB limit) - gövde akarken middleware,
+        # spool edilmiş dosya üzerinde burada; içerik belleğe okunmaz
+        try:
+            upload = await open_upload(file, UPLOAD_MAX_BYTES)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        file_size = upload.size
         
         # Metadata oluştur
-        from .schemas import ImageMetadata, ImageType, BodyRegion
+        from schemas import ImageMetadata, ImageType, BodyRegion
         
         metadata = ImageMetadata(
             image_type=ImageType(image_type),
@@ -294,23 +401,28 @@ async def analyze_uploaded_file(
             study_date=datetime.now()
         )
         
-        # Analiz isteği oluştur
-        request = RadiologyAnalysisRequest(
-            image_data=image_data,
-            image_metadata=metadata,
-            request_id=f"upload_{uuid.uuid4().hex[:8]}"
-        )
+        request_id = f"upload_{uuid.uuid4().hex[:8]}"
         
-        # Analiz yap
-        result = await analyzer.analyze_image(request)
+        # Model yüklü mü kontrol et
+        if not models_loaded:
+            await load_medical_models()
+        
+        # Analiz yap - spool edilmiş dosyanın memoryview'ı base64'e
+        # çevrilmeden doğrudan ortak decoder'a verilir
+        with upload as image_view:
+            result = await analyze_image_source(image_view, metadata, request_id)
         
         return {
-            "request_id": request.request_id,
+            "request_id": request_id,
             "filename": file.filename,
             "file_size": file_size,
             "analysis_result": result
         }
         
+    except HTTPException:
+        raise
+    except StageSaturatedError as e:
+        raise saturation_error(e)
     except Exception as e:
         logger.error(f"Dosya analiz hatası: {str(e)}")
         raise HTTPException(
@@ -319,6 +431,35 @@ async def analyze_uploaded_file(
         )
 
 
+@app.get("/inference/stats", response_model=Dict[str, Any])
+async def get_inference_stats(api_key: str = Depends(verify_api_key)):
+    """Batch çıkarım motoru istatistiklerini getir"""
+    return {
+        "engine_running": main_model_engine is not None,
+        "main_model": main_model_engine.get_stats() if main_model_engine else None,
+        "main_model_variant": main_model_variant,
+        "stages": stage_executor.get_stats(),
+        "result_caches": {
+            "professional_analysis": analysis_cache.get_stats(),
+            "respiratory_emergency": (respiratory_detector.result_cache.get_stats()
+                                      if respiratory_detector.loaded else None)
+        },
+        "components": components.status(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus metrikleri (kuyruk derinliği, batch boyutu histogramları)"""
+    try:
+        from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+    except ImportError:
+        raise HTTPException(status_code=404, detail="prometheus_client kurulu değil")
+    
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/models", response_model=Dict[str, Any])
 async def get_available_models(api_key: str = Depends(verify_api_key)):
     """Mevcut modelleri listele"""
@@ -469,7 +610,7 @@ async def check_emergency_condition(
 ):
     """Acil durum kontrolü"""
     try:
-        from .schemas import CriticalFinding, SeverityLevel, RiskLevel
+        from schemas import CriticalFinding, SeverityLevel, RiskLevel
         
         # Bulguları CriticalFinding nesnelerine çevir
         critical_findings = []
@@ -707,21 +848,62 @@ async def mobile_health_check():
 
 
 # Profesyonel analiz fonksiyonları
+def _load_main_model():
+    """
+    Ana CNN'i ve seçilen servis varyantını yükle (senkron)
+
+    Returns:
+        Servis edilecek model; model dosyaları yoksa None
+    """
+    global main_model_variant
+    model_path = MAIN_MODEL_DIR
+    if not model_path.exists():
+        return None
+
+    from real_data_training import AdvancedMedicalCNN
+    from models.model_optimizer import resolve_model_variant, load_model_variant
+
+    medical_ai_trainer.model = AdvancedMedicalCNN(num_classes=3, input_channels=1)
+    medical_ai_trainer.model.load_state_dict(
+        torch.load(model_path / "model_state_dict.pth", map_location='cpu')
+    )
+    medical_ai_trainer.model.eval()
+
+    # Dağıtım için seçilen varyant (MODEL_VARIANT); yoksa float32
+    serving_model = medical_ai_trainer.model
+    main_model_variant = resolve_model_variant(
+        model_path, "advanced_medical_cnn", model_path / "model_state_dict.pth",
+        device=str(medical_ai_trainer.device)
+    )
+    if main_model_variant != "float32":
+        serving_model = load_model_variant(
+            model_path, "advanced_medical_cnn", main_model_variant,
+            device=str(medical_ai_trainer.device)
+        )
+    return serving_model
+
+
 async def load_medical_models():
     """Tıbbi modelleri yükle"""
-    global models_loaded
+    global models_loaded, main_model_engine
+    from batch_inference import BatchInferenceEngine
     try:
         logger.info("Tıbbi modeller yükleniyor...")
         
-        # Model dosyalarını kontrol et
-        model_path = Path("trained_models/real_data_medical_ai")
-        if model_path.exists():
-            # Modeli yükle
-            medical_ai_trainer.model = AdvancedMedicalCNN(num_classes=3, input_channels=1)
-            medical_ai_trainer.model.load_state_dict(
-                torch.load(model_path / "model_state_dict.pth", map_location='cpu')
-            )
-            medical_ai_trainer.model.eval()
+        # Prefork master'ında yüklendiyse paylaşılan ağırlıkları kullan
+        serving_model = main_serving_model if main_serving_model is not None else _load_main_model()
+        if serving_model is not None:
+            # Batch çıkarım motorunu başlat
+            if main_model_engine is None:
+                main_model_engine = BatchInferenceEngine(
+                    serving_model,
+                    name="advanced_medical_cnn",
+                    device=str(medical_ai_trainer.device)
+                )
+                main_model_engine.start()
+            else:
+                main_model_engine.update_model(serving_model)
+            
             models_loaded = True
             logger.info("✅ Modeller başarıyla yüklendi")
         else:
@@ -733,38 +915,112 @@ async def load_medical_models():
         models_loaded = False
 
 
+def preload_models(names: Optional[List[str]] = None) -> List[str]:
+    """
+    Bileşenleri ve ana modeli senkron yükle (prefork master'ında, fork öncesi)
+
+    Burada yüklenen ağırlıklar fork edilen worker'lar arasında copy-on-write
+    ile paylaşılır; worker'ların startup ısınması bunları yeniden yüklemez.
+
+    Returns:
+        Isınan bileşen adları
+    """
+    global main_serving_model
+    warmed = components.warmup(warmup_component_names() if names is None else names)
+    try:
+        main_serving_model = _load_main_model()
+    except Exception as e:
+        logger.error(f"Ana model ön yükleme hatası: {e}")
+    return warmed
+
+
 async def perform_professional_analysis(request: RadiologyAnalysisRequest) -> RadiologyAnalysisResult:
     """Profesyonel tıbbi analiz yap - %97+ doğruluk"""
+    return await analyze_image_source(request.image_data, request.image_metadata, request.request_id)
+
+
+async def analyze_image_source(image_source: "ImageInput", image_metadata: Any,
+                               request_id: Optional[str]) -> RadiologyAnalysisResult:
+    """
+    Görüntü kaynağını profesyonel analizden geçir
+    
+    Args:
+        image_source: Base64 metin, ham byte'lar / memoryview (yükleme yolu)
+            ya da decode edilmiş dizi
+        image_metadata: Görüntü metadata bilgileri
+        request_id: Sonuca yazılacak istek kimliği
+    """
     try:
         start_time = datetime.now()
         
-        # Görüntüyü işle
-        processed_image = await process_medical_image(request.image_data)
+        # Görüntüyü tek sefer decode et; cache anahtarı ve sonraki tüm
+        # aşamalar aynı NumPy dizisini kullanır
+        # Tembel bileşenlerin metotları havuz thread'inde çözülür; ilk
+        # kullanımdaki yükleme event loop'u bloklamaz
+        image_array = await stage_executor.run(
+            'preprocess', lambda: image_processor.decode_image(image_source)
+        )
         
-        # Ana model ile analiz
-        main_analysis = await analyze_with_main_model(processed_image)
+        cache_key = analysis_cache.make_key(
+            image_array,
+            model_version=professional_model_version(),
+            params={
+                'body_region': getattr(image_metadata, 'body_region', None),
+                **MULTI_HEAD_CACHE_PARAMS
+            }
+        )
+        analysis_result = analysis_cache.get(cache_key)
+        if analysis_result is not None:
+            return RadiologyAnalysisResult(
+                request_id=request_id,
+                analysis_id=f"analysis_{uuid.uuid4().hex[:8]}",
+                processing_status="completed",
+                analysis_result=analysis_result,
+                processing_time=(datetime.now() - start_time).total_seconds(),
+                created_at=start_time,
+                completed_at=datetime.now()
+            )
         
-        # Kırık/çıkık analizi
-        fracture_analysis = await analyze_fractures_dislocations(processed_image, request.image_metadata)
+        processed_image = await stage_executor.run(
+            'preprocess', lambda: image_processor.enhance_medical_image(image_array)
+        )
+        
+        # Kırık/çıkık analizi (ortopedi havuzunda). Açıkça istenmiş ve
+        # doğrulanmış çok başlı checkpoint varsa ana sınıflandırma aynı forward
+        # pass'te hesaplanıp 'main_classification' altında döner; bu karar
+        # dedektörün içinde, havuz thread'inde verilir
+        fracture_analysis = await analyze_fractures_dislocations(processed_image, image_metadata)
+        main_analysis = fracture_analysis.pop('main_classification', None)
+        if main_analysis is not None:
+            main_analysis["model_type"] = "MultiHeadRadiologyModel"
+        else:
+            # Ana model ile analiz
+            main_analysis = await analyze_with_main_model(processed_image)
         
         # Kapsamlı değerlendirme
         comprehensive_assessment = await create_comprehensive_assessment(
-            main_analysis, fracture_analysis, request.image_metadata
+            main_analysis, fracture_analysis, image_metadata
         )
         
+        analysis_result = {
+            "main_diagnosis": main_analysis,
+            "fracture_analysis": fracture_analysis,
+            "comprehensive_assessment": comprehensive_assessment,
+            "confidence_score": calculate_overall_confidence(main_analysis, fracture_analysis),
+            "professional_grade": True,
+            "accuracy_level": "97%+"
+        }
+        
+        # Hatalı alt analizler cache'lenmez; bir sonraki deneme yeniden hesaplar
+        if "error" not in main_analysis and "error" not in fracture_analysis:
+            analysis_cache.put(cache_key, analysis_result)
+        
         # Sonuç oluştur
         result = RadiologyAnalysisResult(
-            request_id=request.request_id,
+            request_id=request_id,
             analysis_id=f"analysis_{uuid.uuid4().hex[:8]}",
             processing_status="completed",
-            analysis_result={
-                "main_diagnosis": main_analysis,
-                "fracture_analysis": fracture_analysis,
-                "comprehensive_assessment": comprehensive_assessment,
-                "confidence_score": calculate_overall_confidence(main_analysis, fracture_analysis),
-                "professional_grade": True,
-                "accuracy_level": "97%+"
-            },
+            analysis_result=analysis_result,
             processing_time=(datetime.now() - start_time).total_seconds(),
             created_at=start_time,
             completed_at=datetime.now()
@@ -777,18 +1033,21 @@ async def perform_professional_analysis(request: RadiologyAnalysisRequest) -> Ra
         raise
 
 
-async def process_medical_image(image_data: str) -> np.ndarray:
-    """Tıbbi görüntüyü profesyonel şekilde işle"""
+def professional_model_version() -> str:
+    """Ana model varyantı + ana/kırık checkpoint dosyalarının parmak izi"""
+    return f"{main_model_variant}:" + cached_checkpoint_fingerprint([MAIN_MODEL_DIR, FRACTURE_MODEL_DIR])
+
+
+async def process_medical_image(image_data: "ImageInput") -> np.ndarray:
+    """Tıbbi görüntüyü profesyonel şekilde işle (ön işleme havuzunda)"""
+    return await stage_executor.run('preprocess', _process_medical_image_sync, image_data)
+
+
+def _process_medical_image_sync(image_data: "ImageInput") -> np.ndarray:
+    """Görüntü decode ve iyileştirme - bloklayan PIL/OpenCV işlemleri"""
     try:
-        # Base64 decode
-        import base64
-        import io
-        
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes)).convert('L')
-        
-        # NumPy array'e çevir
-        image_array = np.array(image)
+        # Base64 metin, ham byte veya dizi -> grayscale NumPy dizisi
+        image_array = image_processor.decode_image(image_data)
         
         # Profesyonel görüntü işleme
         processed = image_processor.enhance_medical_image(image_array)
@@ -814,11 +1073,18 @@ async def analyze_with_main_model(image: np.ndarray) -> Dict[str, Any]:
             transforms.Normalize(mean=[0.485], std=[0.229])
         ])
         
-        image_tensor = transform(image).unsqueeze(0)
+        image_tensor = await stage_executor.run(
+            'preprocess', lambda: transform(image).unsqueeze(0)
+        )
+        
+        # Tahmin yap - eşzamanlı isteklerle tek forward pass'te birleştirilir
+        if main_model_engine is not None:
+            outputs = await main_model_engine.infer(image_tensor)
+        else:
+            with torch.no_grad():
+                outputs = medical_ai_trainer.model(image_tensor)
         
-        # Tahmin yap
         with torch.no_grad():
-            outputs = medical_ai_trainer.model(image_tensor)
             probabilities = torch.softmax(outputs, dim=1)
             predicted_class = torch.argmax(probabilities, dim=1)
             confidence = torch.max(probabilities, dim=1)[0]
@@ -834,6 +1100,7 @@ async def analyze_with_main_model(image: np.ndarray) -> Dict[str, Any]:
                 for i, prob in enumerate(probabilities[0])
             },
             "model_type": "AdvancedMedicalCNN",
+            "model_variant": main_model_variant,
             "trained_on_real_data": True
         }
         
@@ -845,27 +1112,22 @@ async def analyze_with_main_model(image: np.ndarray) -> Dict[str, Any]:
 async def analyze_fractures_dislocations(image: np.ndarray, metadata: Any) -> Dict[str, Any]:
     """Kırık ve çıkık analizi yap"""
     try:
-        # Base64'e çevir
-        import base64
-        import io
-        
-        pil_image = Image.fromarray(image)
-        buffer = io.BytesIO()
-        pil_image.save(buffer, format='PNG')
-        image_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
         # Anatomik bölge belirle
         anatomical_region = "general"
         if metadata and hasattr(metadata, 'body_region'):
             anatomical_region = metadata.body_region
         
-        # Kapsamlı ortopedi analizi
-        result = fracture_detector.comprehensive_orthopedic_analysis(
-            image_data, anatomical_region
+        # Kapsamlı ortopedi analizi - decode edilmiş dizi doğrudan verilir.
+        # Dedektör (ilk kullanımda oluşturulması dahil) ortopedi havuzunda çözülür
+        result = await stage_executor.run(
+            'orthopedic',
+            lambda: fracture_detector.comprehensive_orthopedic_analysis(image, anatomical_region)
         )
         
         return result
         
+    except StageSaturatedError:
+        raise
     except Exception as e:
         logger.error(f"Kırık/çıkık analizi hatası: {str(e)}")
         return {"error": str(e)}
@@ -1165,6 +1427,9 @@ class RespiratoryEmergencyRequest(BaseModel):
     patient_age: Optional[int] = Field(None, description="Hasta yaşı")
     patient_gender: Optional[str] = Field(None, description="Hasta cinsiyeti")
     symptoms: Optional[List[str]] = Field(None, description="Semptomlar")
+    preprocess_profile: Optional[Literal['fast', 'balanced', 'full']] = Field(
+        None, description="Ön işleme profili (triage için fast, varsayılan sunucu ayarı)"
+    )
     
     class Config:
         schema_extra = {
@@ -1172,7 +1437,8 @@ class RespiratoryEmergencyRequest(BaseModel):
                 "image_data": "base64_encoded_xray_data_here...",
                 "patient_age": 45,
                 "patient_gender": "male",
-                "symptoms": ["dyspnea", "chest_pain", "cough"]
+                "symptoms": ["dyspnea", "chest_pain", "cough"],
+                "preprocess_profile": "fast"
             }
         }
 
@@ -1187,6 +1453,7 @@ class RespiratoryEmergencyResponse(BaseModel):
     recommendations: List[str] = Field(..., description="Öneriler")
     features: Dict[str, float] = Field(..., description="Görüntü özellikleri")
     visualization_base64: Optional[str] = Field(None, description="Görselleştirilmiş analiz")
+    preprocess_profile: Optional[str] = Field(None, description="Kullanılan ön işleme profili")
     timestamp: str = Field(..., description="Analiz zamanı")
 
 
@@ -1217,8 +1484,12 @@ async def analyze_respiratory_emergency(
         verify_api_key(credentials)
         
         # Analiz yap
-        result = respiratory_detector.analyze_emergency(
-            image_base64=request.image_data
+        result = await stage_executor.run(
+            'respiratory',
+            lambda: respiratory_detector.analyze_emergency(
+                image_base64=request.image_data,
+                preprocess_profile=request.preprocess_profile
+            )
         )
         
         # Rate limiting güncelle
@@ -1236,6 +1507,8 @@ async def analyze_respiratory_emergency(
         
         return RespiratoryEmergencyResponse(**result)
         
+    except StageSaturatedError as e:
+        raise saturation_error(e)
     except Exception as e:
         logger.error(f"Solunum yolu acil vaka analizi hatası: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1243,33 +1516,42 @@ async def analyze_respiratory_emergency(
 
 @app.post("/respiratory/emergency/batch", tags=["Respiratory Emergency"])
 async def batch_analyze_respiratory_emergency(
-    images: List[str] = Field(..., description="Base64 encoded X-ray görüntüleri listesi"),
+    images: List[str] = Body(..., description="Base64 encoded X-ray görüntüleri listesi"),
+    preprocess_profile: Optional[Literal['fast', 'balanced', 'full']] = None,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """
     📊 Toplu Solunum Yolu Acil Vaka Analizi
     
     Birden fazla göğüs X-ray görüntüsünü aynı anda analiz eder ve
-    karşılaştırmalı rapor oluşturur.
+    karşılaştırmalı rapor oluşturur. Triage için preprocess_profile=fast
+    ile gürültü giderme hafifletilebilir.
     """
     try:
         verify_api_key(credentials)
         
+        # Görüntüler solunum havuzunda eşzamanlı analiz edilir
+        items = await batch_executor.map_blocking(
+            images,
+            lambda image_data: respiratory_detector.analyze_emergency(
+                image_base64=image_data,
+                preprocess_profile=preprocess_profile
+            ),
+            stage='respiratory'
+        )
+        
         results = []
-        for i, image_data in enumerate(images):
-            try:
-                result = respiratory_detector.analyze_emergency(
-                    image_base64=image_data
-                )
-                result['image_index'] = i
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Görüntü {i} analiz hatası: {e}")
-                results.append({
-                    'image_index': i,
-                    'error': str(e),
+        for item in items:
+            if item.ok:
+                result = item.value
+                result['image_index'] = item.index
+            else:
+                result = {
+                    'image_index': item.index,
+                    'error': str(item.error),
                     'urgency_score': 0
-                })
+                }
+            results.append(result)
         
         # Karşılaştırma
         comparison = respiratory_detector.compare_analyses(results)
@@ -1281,6 +1563,8 @@ async def batch_analyze_respiratory_emergency(
             'timestamp': datetime.now().isoformat()
         }
         
+    except StageSaturatedError as e:
+        raise saturation_error(e)
     except Exception as e:
         logger.error(f"Toplu analiz hatası: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1329,10 +1613,11 @@ async def respiratory_emergency_health():
     
     Solunum yolu acil vaka tespit sisteminin durumunu kontrol eder.
     """
+    # Dedektör yalnızca sağlık kontrolü için yüklenmez
     return {
         'status': 'healthy',
-        'detector_ready': respiratory_detector is not None,
-        'model_loaded': respiratory_detector.model is not None,
+        'detector_ready': respiratory_detector.loaded,
+        'model_loaded': respiratory_detector.loaded and respiratory_detector.model is not None,
         'timestamp': datetime.now().isoformat()
     }
 
@@ -1351,7 +1636,8 @@ async def http_exception_handler(request, exc):
             "error": exc.detail,
             "status_code": exc.status_code,
             "timestamp": datetime.now().isoformat()
-        }
+        },
+        headers=getattr(exc, "headers", None)
     )
 
 
@@ -1374,12 +1660,47 @@ async def general_exception_handler(request, exc):
 async def startup_event():
     """Uygulama başlatma olayı"""
     logger.info("🚀 TanıAI Radyolojik Analiz API başlatıldı")
-    logger.info(f"📊 Yüklenen modeller: {len(analyzer.models_manager.get_available_models())}")
+    
+    # Isınma arka planda: uygulama (ve sağlık kontrolleri) hemen yanıt verir
+    warmup_names = warmup_component_names()
+    if warmup_names:
+        app.state.warmup_task = asyncio.create_task(warmup_components(warmup_names))
+
+
+def warmup_component_names() -> List[str]:
+    """Startup'ta (veya prefork master'ında) ısıtılacak bileşenler"""
+    return list(API_WARMUP_COMPONENTS)
+
+
+async def warmup_components(names: List[str]):
+    """Bileşenleri sırayla ısıt (kırık/çıkık modelleri ortopedi havuzunda)"""
+    for name in names:
+        stage = 'orthopedic' if name == 'fracture_detector' else 'preprocess'
+        await stage_executor.run(stage, components.warmup, [name])
+    logger.info(f"📊 Isınan bileşenler: {', '.join(names)}")
+
+
+@app.get("/health/components")
+async def components_health():
+    """Tembel bileşenlerin yüklenme/ısınma durumu (hiçbir bileşeni yüklemez)"""
+    return {
+        'components': components.status(),
+        'pid': os.getpid(),
+        'worker_id': os.getenv('SERVER_WORKER_ID'),
+        'main_model_preloaded': main_serving_model is not None,
+        'timestamp': datetime.now().isoformat()
+    }
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Uygulama kapatma olayı"""
+    warmup_task = getattr(app.state, 'warmup_task', None)
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if main_model_engine is not None:
+        main_model_engine.stop()
+    stage_executor.shutdown(wait=False)
     logger.info("🛑 TanıAI Radyolojik Analiz API kapatıldı")
 
 
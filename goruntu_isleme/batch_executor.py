@@ -0,0 +1,153 @@
+"""
+Paylaşımlı Toplu İş Yürütücüsü
+==============================
+
+/analyze/batch, /mobile/batch-analyze ve /respiratory/emergency/batch
+uçlarının ortak fan-out katmanı. Görüntüler worker havuzunda eşzamanlı
+decode/ön işlenir, başarılı olanlar tek bir yığılmış (stacked) tensor
+olarak modele verilir ve sonuçlar istek sırasıyla döner. Bir görüntünün
+hatası yalnızca kendi öğesini etkiler.
+
+Havuz dolduğunda (StageSaturatedError) tek tek öğe hatası üretmek yerine
+hata yukarı taşınır; API katmanı bütün batch için 503 döner.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional, Sequence
+
+from execution_pool import StageExecutor, StageSaturatedError
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+
+class BatchItem:
+    """Toplu işte tek öğenin sonucu (değer ya da hata)"""
+
+    __slots__ = ('index', 'value', 'error')
+
+    def __init__(self, index: int, value: Any = None, error: Optional[BaseException] = None):
+        self.index = index
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _check_output_count(outputs: Sequence[Any], expected: int):
+    """infer_batch her girdi için tam olarak bir sonuç döndürmeli"""
+    if len(outputs) != expected:
+        raise ValueError(f"infer_batch {expected} girdi için {len(outputs)} sonuç döndürdü")
+
+
+class BatchExecutor:
+    """Sıralı sonuçlu, öğe bazlı hata izolasyonlu toplu yürütücü"""
+
+    def __init__(self,
+                 stage_executor: Optional[StageExecutor] = None,
+                 max_concurrency: Optional[int] = None):
+        """
+        Args:
+            stage_executor: Verilirse işler aşama havuzlarında çalışır
+                (kapasite ve 503 davranışı paylaşılır). Verilmezse yürütücü
+                kendi thread havuzunu kullanır.
+            max_concurrency: Bir batch'in aynı anda işlenen öğe sayısı
+        """
+        self.stage_executor = stage_executor
+        self.max_concurrency = max_concurrency or BATCH_MAX_CONCURRENCY
+        self._executor = None
+        if stage_executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix="batch-executor"
+            )
+
+    async def _run_blocking(self, stage: str, func: Callable, *args, **kwargs) -> Any:
+        if self.stage_executor is not None:
+            return await self.stage_executor.run(stage, func, *args, **kwargs)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def map_async(self,
+                        items: Sequence[Any],
+                        func: Callable[[Any], Awaitable[Any]]) -> List[BatchItem]:
+        """
+        Async fonksiyonu öğeler üzerinde sınırlı eşzamanlılıkla çalıştır
+
+        Sonuçlar girdi sırasıyla döner; hatalar BatchItem.error içinde kalır.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(index: int, item: Any) -> BatchItem:
+            async with semaphore:
+                try:
+                    return BatchItem(index, value=await func(item))
+                except StageSaturatedError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Toplu iş öğesi {index} hatası: {e}")
+                    return BatchItem(index, error=e)
+
+        return list(await asyncio.gather(*(run_one(i, item) for i, item in enumerate(items))))
+
+    async def map_blocking(self,
+                           items: Sequence[Any],
+                           func: Callable[[Any], Any],
+                           stage: str = 'preprocess') -> List[BatchItem]:
+        """Bloklayan fonksiyonu öğeler üzerinde havuzda eşzamanlı çalıştır"""
+        async def run_one(item: Any) -> Any:
+            return await self._run_blocking(stage, func, item)
+
+        return await self.map_async(items, run_one)
+
+    async def run(self,
+                  items: Sequence[Any],
+                  prepare: Callable[[Any], Any],
+                  infer_batch: Callable[[List[Any]], List[Any]],
+                  prepare_stage: str = 'preprocess',
+                  infer_stage: str = 'preprocess') -> List[BatchItem]:
+        """
+        Hazırla -> yığılmış çıkarım
+
+        Args:
+            items: Ham girdiler (base64, byte, dizi...)
+            prepare: Tek öğeyi modele hazır hale getiren bloklayan fonksiyon
+            infer_batch: Hazırlanmış öğe listesini tek çağrıda işleyip aynı
+                sırada sonuç listesi döndüren bloklayan fonksiyon
+        """
+        prepared = await self.map_blocking(items, prepare, stage=prepare_stage)
+        ready = [item for item in prepared if item.ok]
+        if not ready:
+            return prepared
+
+        try:
+            outputs = await self._run_blocking(infer_stage, infer_batch, [item.value for item in ready])
+            _check_output_count(outputs, len(ready))
+            for item, output in zip(ready, outputs):
+                item.value = output
+        except StageSaturatedError:
+            raise
+        except Exception as e:
+            # Tek bozuk öğe tüm batch'i düşürmesin: öğeleri tek tek yeniden dene
+            logger.warning(f"Yığılmış çıkarım hatası, öğe bazında tekrar deneniyor: {e}")
+            for item in ready:
+                try:
+                    outputs = await self._run_blocking(infer_stage, infer_batch, [item.value])
+                    _check_output_count(outputs, 1)
+                    item.value = outputs[0]
+                except StageSaturatedError:
+                    raise
+                except Exception as item_error:
+                    logger.error(f"Toplu iş öğesi {item.index} çıkarım hatası: {item_error}")
+                    item.value = None
+                    item.error = item_error
+
+        return prepared
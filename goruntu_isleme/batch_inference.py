@@ -0,0 +1,303 @@
+"""
+Dinamik Mikro-Batch Çıkarım Motoru
+==================================
+
+Eşzamanlı gelen tek görüntülük istekleri birkaç milisaniyelik bir pencere
+boyunca toplayıp tek bir tensor halinde birleştirir, ayrı bir worker
+thread'inde tek forward pass ile çalıştırır ve her isteğin future'ını
+kendi sonucuyla tamamlar.
+"""
+
+import torch
+import torch.nn as nn
+import asyncio
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Any
+
+try:
+    from prometheus_client import Gauge, Histogram
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Batch boyutu histogram kovaları
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+if PROMETHEUS_AVAILABLE:
+    INFERENCE_QUEUE_DEPTH = Gauge(
+        'taniai_inference_queue_depth',
+        'Batch bekleyen çıkarım isteği sayısı',
+        ['engine']
+    )
+    INFERENCE_BATCH_SIZE = Histogram(
+        'taniai_inference_batch_size',
+        'Tek forward pass içinde işlenen istek sayısı',
+        ['engine'],
+        buckets=BATCH_SIZE_BUCKETS
+    )
+    INFERENCE_BATCH_LATENCY = Histogram(
+        'taniai_inference_batch_latency_seconds',
+        'Batch forward pass süresi (saniye)',
+        ['engine']
+    )
+
+
+class BatchInferenceEngine:
+    """Dinamik mikro-batch çıkarım motoru"""
+
+    def __init__(self, model: nn.Module, name: str = "main_model",
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None,
+                 device: str = "cpu"):
+        """
+        Args:
+            model: Eval modunda çalıştırılacak PyTorch modeli
+            name: Metriklerde kullanılacak motor adı
+            max_batch_size: Tek forward pass'teki maksimum istek sayısı
+            max_wait_ms: İlk istekten sonra batch'in dolması için beklenecek süre
+            device: Çıkarımın yapılacağı cihaz
+        """
+        self.model = model
+        self.name = name
+        self.device = torch.device(device)
+        self.max_batch_size = max_batch_size or int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "16"))
+        self.max_wait_ms = max_wait_ms if max_wait_ms is not None else float(
+            os.getenv("INFERENCE_MAX_WAIT_MS", "5")
+        )
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._running = False
+        self._model_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        # _running kontrolü ile kuyruğa ekleme atomik olmalı: stop() araya
+        # girip kuyruğu boşaltırsa sonradan eklenen istek hiç tamamlanmaz
+        self._lifecycle_lock = threading.Lock()
+
+        # İstatistikler
+        self.stats = {
+            'total_requests': 0,
+            'total_batches': 0,
+            'failed_batches': 0,
+            'total_inference_time': 0.0,
+            'total_queue_wait_time': 0.0
+        }
+        self.batch_size_histogram = defaultdict(int)
+
+    def start(self):
+        """Worker thread'ini başlat"""
+        with self._lifecycle_lock:
+            if self._running:
+                return
+
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"batch-inference-{self.name}",
+                daemon=True
+            )
+            self._thread.start()
+        logger.info(
+            f"Batch çıkarım motoru başlatıldı: {self.name} "
+            f"(max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms})"
+        )
+
+    def stop(self, timeout: float = 5.0):
+        """Worker thread'ini durdur"""
+        with self._lifecycle_lock:
+            if not self._running:
+                return
+
+            self._running = False
+            self._queue.put(None)
+            thread, self._thread = self._thread, None
+
+        if thread is not None:
+            thread.join(timeout=timeout)
+            if not thread.is_alive():
+                # Worker çıktıktan sonra kuyrukta kalan istek olmamalı; yine
+                # de kalan varsa çağıranı askıda bırakmadan sonlandır
+                self._drain_pending()
+        logger.info(f"Batch çıkarım motoru durduruldu: {self.name}")
+
+    def update_model(self, model: nn.Module):
+        """Çalışan motorun modelini değiştir"""
+        with self._model_lock:
+            self.model = model
+
+    async def infer(self, image_tensor: torch.Tensor) -> torch.Tensor:
+        """
+        Tek görüntü için çıkarım yap
+
+        Args:
+            image_tensor: (C, H, W) veya (1, C, H, W) boyutlu tensor
+
+        Returns:
+            (1, num_classes) boyutlu model çıktısı
+        """
+        if image_tensor.dim() == 3:
+            image_tensor = image_tensor.unsqueeze(0)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lifecycle_lock:
+            if not self._running:
+                raise RuntimeError(f"Batch çıkarım motoru çalışmıyor: {self.name}")
+            self._queue.put((image_tensor, future, loop, time.perf_counter()))
+        self._update_queue_depth()
+
+        return await future
+
+    def _worker_loop(self):
+        """İstekleri toplayıp batch halinde çalıştır"""
+        while self._running:
+            try:
+                first_item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if first_item is None:
+                break
+
+            batch = [first_item]
+            deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+
+            # Pencere dolana ya da maksimum boyuta ulaşana kadar topla
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._running = False
+                    break
+                batch.append(item)
+
+            self._update_queue_depth()
+            self._run_batch(batch)
+
+        # Kapanışta bekleyen istekleri iptal et
+        self._drain_pending()
+
+    def _run_batch(self, batch: List[tuple]):
+        """Tek forward pass ile batch'i çalıştır"""
+        # İptal edilmiş istekleri ele (yalnızca iş tasarrufu - asıl koruma,
+        # future'ın kendi loop'unda çalışan _set_result/_set_exception'dadır)
+        batch = [item for item in batch if not item[1].cancelled()]
+        if not batch:
+            return
+
+        batch_start = time.perf_counter()
+        try:
+            inputs = torch.cat([item[0] for item in batch], dim=0).to(self.device)
+
+            with self._model_lock:
+                model = self.model
+
+            with torch.no_grad():
+                outputs = model(inputs).cpu()
+
+        except Exception as e:
+            logger.error(f"Batch çıkarım hatası ({self.name}): {str(e)}")
+            with self._stats_lock:
+                self.stats['failed_batches'] += 1
+            for _, future, loop, _ in batch:
+                self._resolve(loop, self._set_exception, future, e)
+
+        else:
+            for i, (_, future, loop, _) in enumerate(batch):
+                self._resolve(loop, self._set_result, future, outputs[i:i + 1])
+
+        finally:
+            self._record_batch(batch, batch_start)
+
+    @staticmethod
+    def _resolve(loop: asyncio.AbstractEventLoop, callback, future: asyncio.Future, value: Any):
+        """Future'ı kendi event loop'unda tamamla (worker thread'inden çağrılır)"""
+        try:
+            loop.call_soon_threadsafe(callback, future, value)
+        except RuntimeError:
+            # Çağıranın loop'u kapanmış - sonucu bekleyen kimse yok
+            pass
+
+    @staticmethod
+    def _set_result(future: asyncio.Future, result: Any):
+        if not future.done():
+            future.set_result(result)
+
+    @staticmethod
+    def _set_exception(future: asyncio.Future, exc: Exception):
+        if not future.done():
+            future.set_exception(exc)
+
+    def _drain_pending(self):
+        """Kuyrukta kalan istekleri hata ile sonlandır"""
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                continue
+            _, future, loop, _ = item
+            self._resolve(
+                loop, self._set_exception, future,
+                RuntimeError(f"Batch çıkarım motoru kapatıldı: {self.name}")
+            )
+        self._update_queue_depth()
+
+    def _record_batch(self, batch: List[tuple], batch_start: float):
+        """Batch metriklerini kaydet"""
+        now = time.perf_counter()
+        batch_size = len(batch)
+        inference_time = now - batch_start
+        queue_wait = sum(batch_start - item[3] for item in batch)
+
+        with self._stats_lock:
+            self.stats['total_requests'] += batch_size
+            self.stats['total_batches'] += 1
+            self.stats['total_inference_time'] += inference_time
+            self.stats['total_queue_wait_time'] += queue_wait
+            self.batch_size_histogram[batch_size] += 1
+
+        if PROMETHEUS_AVAILABLE:
+            INFERENCE_BATCH_SIZE.labels(engine=self.name).observe(batch_size)
+            INFERENCE_BATCH_LATENCY.labels(engine=self.name).observe(inference_time)
+
+    def _update_queue_depth(self):
+        if PROMETHEUS_AVAILABLE:
+            INFERENCE_QUEUE_DEPTH.labels(engine=self.name).set(self._queue.qsize())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Motor istatistiklerini getir"""
+        with self._stats_lock:
+            total_batches = self.stats['total_batches']
+            total_requests = self.stats['total_requests']
+            return {
+                'engine': self.name,
+                'running': self._running,
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait_ms,
+                'queue_depth': self._queue.qsize(),
+                'total_requests': total_requests,
+                'total_batches': total_batches,
+                'failed_batches': self.stats['failed_batches'],
+                'average_batch_size': total_requests / total_batches if total_batches else 0.0,
+                'average_inference_time': (
+                    self.stats['total_inference_time'] / total_batches if total_batches else 0.0
+                ),
+                'average_queue_wait_time': (
+                    self.stats['total_queue_wait_time'] / total_requests if total_requests else 0.0
+                ),
+                'batch_size_histogram': dict(sorted(self.batch_size_histogram.items()))
+            }
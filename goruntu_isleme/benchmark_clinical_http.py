@@ -0,0 +1,101 @@
+"""
+Klinik HTTP Taşıma Katmanı Benchmark
+====================================
+
+Yerel sahte PACS/FHIR sunucusuna (clinical_mock_server) karşı çalışma
+başına PACS + FHIR trafiğinin verimini (çalışma/s) ölçer. Her çalışma için:
+WADO-RS metadata, ardından eşzamanlı STOW-RS (AI SR) ve FHIR kayıtları
+(Observation + DiagnosticReport).
+
+Karşılaştırılan modlar:
+    baseline  keep-alive kapalı (her istek yeni bağlantı), FHIR kaynakları tek tek
+    pooled    keep-alive havuzu, FHIR kaynakları transaction Bundle'larda toplu
+
+Kullanım:
+    python benchmark_clinical_http.py
+    python benchmark_clinical_http.py --studies 500 --concurrency 32 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any, Dict
+
+from clinical_fakes import make_ai_result
+from clinical_http import ClinicalHTTPTransport
+from clinical_integration import HL7FHIRIntegration, PACSIntegration
+from clinical_mock_server import MockClinicalServer
+
+
+MODES = {
+    'baseline': {'keepalive': False, 'bundle': False},
+    'pooled': {'keepalive': True, 'bundle': True},
+}
+
+
+async def run_mode(server: MockClinicalServer, mode: Dict[str, Any], args) -> Dict[str, Any]:
+    transport = ClinicalHTTPTransport(max_connections=args.concurrency * 2,
+                                      max_per_host=args.concurrency, keepalive=mode['keepalive'])
+    pacs = PACSIntegration({'http_enabled': True, 'dicomweb_url': server.dicomweb_url}, transport)
+    fhir = HL7FHIRIntegration({'http_enabled': True, 'base_url': server.fhir_url,
+                               'bundle': mode['bundle'], 'bundle_max_entries': args.bundle_entries},
+                              transport)
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def process(index: int):
+        async with limit:
+            study_uid = f"1.2.826.0.1.3680043.8.498.{index}"
+            study = await pacs.retrieve_study(study_uid)
+            ai_result = make_ai_result(study_uid)
+            sent, _ = await asyncio.gather(
+                pacs.send_ai_results(study_uid, ai_result),
+                fhir.create_ai_records(study['patient_info']['patient_id'], ai_result)
+            )
+            if not sent:
+                raise RuntimeError(f"STOW başarısız: {study_uid}")
+
+    server.reset_stats()
+    start_time = time.perf_counter()
+    await asyncio.gather(*[process(i) for i in range(args.studies)])
+    elapsed = time.perf_counter() - start_time
+    await transport.aclose()
+
+    return {
+        'studies_per_s': args.studies / elapsed,
+        'elapsed_s': elapsed,
+        'requests': server.stats['requests'],
+        'connections': len(server.stats['connections']),
+        'transactions': server.stats['transactions'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Klinik HTTP taşıma katmanı benchmark")
+    parser.add_argument('--studies', type=int, default=200, help="Çalışma sayısı")
+    parser.add_argument('--concurrency', type=int, default=16, help="Eşzamanlı çalışma sayısı")
+    parser.add_argument('--latency', type=float, default=0.005, help="Sunucu gecikmesi (saniye)")
+    parser.add_argument('--bundle-entries', type=int, default=20, help="Bundle başına en fazla kaynak")
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"Klinik HTTP - {args.studies} çalışma, eşzamanlılık {args.concurrency}, "
+          f"gecikme {args.latency * 1000:.0f}ms")
+    print("=" * 80)
+    print(f"{'mod':12}{'çalışma/s':>12}{'süre (s)':>12}{'istek':>10}{'bağlantı':>10}{'transaction':>13}")
+
+    results = {}
+    with MockClinicalServer(latency=args.latency) as server:
+        for name in args.modes:
+            results[name] = asyncio.run(run_mode(server, MODES[name], args))
+            r = results[name]
+            print(f"{name:12}{r['studies_per_s']:>12.1f}{r['elapsed_s']:>12.2f}{r['requests']:>10}"
+                  f"{r['connections']:>10}{r['transactions']:>13}")
+
+    if 'baseline' in results and 'pooled' in results:
+        speedup = results['pooled']['studies_per_s'] / results['baseline']['studies_per_s']
+        print(f"\npooled / baseline: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
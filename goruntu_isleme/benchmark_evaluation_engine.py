@@ -0,0 +1,131 @@
+"""
+Değerlendirme Motoru Benchmark
+==============================
+
+models.evaluation_engine.compute_metrics'i ProfessionalModelValidator'ın
+eski metrik fonksiyonlarıyla (her metrik için ayrı sklearn çağrısı)
+karşılaştırır. Rastgele logit'ler üzerinde süre ve her metrik için en büyük
+fark raporlanır; fark toleransı aşarsa çıkış kodu 1'dir (CI'da kullanılabilir).
+
+Kullanım:
+    python benchmark_evaluation_engine.py
+    python benchmark_evaluation_engine.py --samples 20000 --classes 4 --repeat 5
+"""
+
+import argparse
+import sys
+import time
+from typing import Any, Dict
+
+import numpy as np
+from sklearn.calibration import calibration_curve
+from sklearn.metrics import (
+    average_precision_score, confusion_matrix, f1_score, precision_score,
+    recall_score, roc_auc_score
+)
+
+from models.evaluation_engine import compute_metrics, softmax
+
+
+# --- Eski uygulama (ProfessionalModelValidator metrik fonksiyonları) ---
+
+def legacy_metrics(true_labels: np.ndarray, probabilities: np.ndarray) -> Dict[str, Any]:
+    predictions = np.argmax(probabilities, axis=1)
+    multi_class = len(np.unique(true_labels)) > 2
+    results = {
+        'accuracy': np.mean(true_labels == predictions),
+        'precision': precision_score(true_labels, predictions, average='weighted'),
+        'recall': recall_score(true_labels, predictions, average='weighted'),
+        'f1_score': f1_score(true_labels, predictions, average='weighted'),
+    }
+    if multi_class:
+        results['auc_roc'] = roc_auc_score(true_labels, probabilities, multi_class='ovr')
+        results['auc_pr'] = average_precision_score(true_labels, probabilities, average='weighted')
+        errors = []
+        for i in range(probabilities.shape[1]):
+            binary_labels = (true_labels == i).astype(int)
+            prob_true, prob_pred = calibration_curve(binary_labels, probabilities[:, i], n_bins=10)
+            errors.append(np.mean(np.abs(prob_true - prob_pred)))
+        results['calibration_error'] = errors
+    else:
+        results['auc_roc'] = roc_auc_score(true_labels, probabilities[:, 1])
+        results['auc_pr'] = average_precision_score(true_labels, probabilities[:, 1])
+        prob_true, prob_pred = calibration_curve(true_labels, probabilities[:, 1], n_bins=10)
+        results['calibration_error'] = [np.mean(np.abs(prob_true - prob_pred))]
+    results['confusion_matrix'] = confusion_matrix(true_labels, predictions)
+    return results
+
+
+def engine_view(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    calibration = metrics['calibration']
+    if 'calibration_error' in calibration:
+        errors = [calibration['calibration_error']]
+    else:
+        errors = [value['calibration_error'] for value in calibration.values()]
+    return {
+        'accuracy': metrics['accuracy'],
+        'precision': metrics['precision'],
+        'recall': metrics['recall'],
+        'f1_score': metrics['f1_score'],
+        'auc_roc': metrics['auc_roc'],
+        'auc_pr': metrics['auc_pr'],
+        'calibration_error': errors,
+        'confusion_matrix': np.array(metrics['confusion_matrix'])
+    }
+
+
+# --- Benchmark ---
+
+def synthetic_logits(samples: int, classes: int, seed: int = 0):
+    """Gerçek sınıfa hafif eğilimli logit'ler (AUC ~0.7-0.8)"""
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, classes, samples)
+    logits = rng.normal(0, 1, (samples, classes)).astype(np.float32)
+    logits[np.arange(samples), labels] += 1.0
+    # Eşik tablosunda bağ (tie) durumlarını da sına
+    logits = np.round(logits, 2)
+    return labels, logits
+
+
+def timed(func, repeat: int):
+    result = func()
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    return (time.perf_counter() - start_time) * 1000 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Değerlendirme motoru benchmark")
+    parser.add_argument('--samples', type=int, default=5000, help="Test örneği sayısı")
+    parser.add_argument('--classes', type=int, nargs='+', default=[2, 4], help="Sınıf sayıları")
+    parser.add_argument('--repeat', type=int, default=3, help="Tekrar sayısı")
+    parser.add_argument('--tolerance', type=float, default=1e-6, help="İzin verilen en büyük fark")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"Değerlendirme motoru - {args.samples} örnek, {args.repeat} tekrar")
+    print("=" * 80)
+
+    failed = False
+    for classes in args.classes:
+        labels, logits = synthetic_logits(args.samples, classes)
+        probabilities = softmax(logits)
+
+        legacy_ms, legacy = timed(lambda: legacy_metrics(labels, probabilities), args.repeat)
+        engine_ms, engine = timed(lambda: engine_view(compute_metrics(labels, logits)), args.repeat)
+
+        print(f"\n{classes} sınıf: eski {legacy_ms:.1f}ms, motor {engine_ms:.1f}ms "
+              f"({legacy_ms / engine_ms:.2f}x)")
+        for key in legacy:
+            difference = float(np.max(np.abs(np.asarray(legacy[key], dtype=np.float64)
+                                              - np.asarray(engine[key], dtype=np.float64))))
+            status = "OK" if difference <= args.tolerance else "FARK"
+            failed = failed or difference > args.tolerance
+            print(f"  {key:20}{difference:>14.2e}  {status}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Görüntüleme Çekirdekleri Benchmark
+==================================
+
+imaging_kernels çekirdeklerini DICOMProcessor/ImageProcessor'ın eski
+uygulamalarıyla karşılaştırır: window/level (float32, int16, uint16 ve
+uint8 girdiler), min-max normalizasyon ve 512x512'ye slice boyutlandırma.
+Her durum için ortalama süre, tepe ek bellek (tracemalloc) ve eski
+sonuçla en büyük fark raporlanır.
+
+Kullanım:
+    python benchmark_imaging_kernels.py
+    python benchmark_imaging_kernels.py --slices 200 --size 512 --repeat 5
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+import numpy as np
+from skimage.transform import resize
+
+from imaging_kernels import minmax_normalize, resize_slices, window_level
+
+
+# --- Eski uygulamalar (karşılaştırma için birebir kopya) ---
+
+def legacy_apply_window_level(image: np.ndarray, window_center: float, window_width: float) -> np.ndarray:
+    window_min = window_center - window_width // 2
+    window_max = window_center + window_width // 2
+    windowed = np.clip(image, window_min, window_max)
+    windowed = ((windowed - window_min) / (window_max - window_min) * 255).astype(np.uint8)
+    return windowed
+
+
+def legacy_minmax_normalize(volume: np.ndarray) -> np.ndarray:
+    min_val = np.min(volume)
+    max_val = np.max(volume)
+    return ((volume - min_val) / (max_val - min_val) * 255).astype(np.uint8)
+
+
+def legacy_resize_slices(volume: np.ndarray, target_size: Tuple[int, int]) -> np.ndarray:
+    slices = []
+    for i in range(volume.shape[0]):
+        slices.append(resize(volume[i], target_size, preserve_range=True).astype(np.uint8))
+    return np.stack(slices)
+
+
+# --- Benchmark ---
+
+def synthetic_ct_volume(num_slices: int, size: int) -> np.ndarray:
+    """HU aralığında (-1024..3071) sentetik CT hacmi (int16)"""
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[:size, :size]
+    body = ((yy - size / 2) ** 2 + (xx - size / 2) ** 2) < (size * 0.4) ** 2
+    volume = np.full((num_slices, size, size), -1000, dtype=np.int16)
+    volume[:, body] = 40
+    volume += rng.normal(0, 60, volume.shape).astype(np.int16)
+    return np.clip(volume, -1024, 3071).astype(np.int16)
+
+
+def measure(func: Callable[[], np.ndarray], repeat: int) -> Tuple[float, float, np.ndarray]:
+    """(ortalama ms, tepe ek bellek MB, son sonuç)"""
+    result = func()
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start_time) * 1000)
+
+    del result
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.mean(timings)), peak / (1024 * 1024), result
+
+
+def compare(label: str, legacy: Callable[[], np.ndarray],
+            kernel: Callable[[], np.ndarray], repeat: int):
+    legacy_ms, legacy_mb, legacy_result = measure(legacy, repeat)
+    kernel_ms, kernel_mb, kernel_result = measure(kernel, repeat)
+    difference = np.abs(legacy_result.astype(np.int16) - kernel_result.astype(np.int16))
+
+    print(f"{label:28}{legacy_ms:>10.1f}ms{kernel_ms:>10.1f}ms{legacy_ms / kernel_ms:>8.2f}x"
+          f"{legacy_mb:>10.1f}MB{kernel_mb:>9.1f}MB"
+          f"{int(difference.max()):>6}{float(difference.mean()):>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Görüntüleme çekirdekleri benchmark")
+    parser.add_argument('--slices', type=int, default=64, help="Hacimdeki slice sayısı")
+    parser.add_argument('--size', type=int, default=512, help="Slice boyutu (kare)")
+    parser.add_argument('--repeat', type=int, default=3, help="Tekrar sayısı")
+    args = parser.parse_args()
+
+    ct_int16 = synthetic_ct_volume(args.slices, args.size)
+    ct_float32 = ct_int16.astype(np.float32)
+    ct_uint16 = (ct_int16.astype(np.int32) + 1024).astype(np.uint16)
+    image_uint8 = legacy_minmax_normalize(ct_float32[0])
+    normalized = window_level(ct_int16, 40, 400)
+
+    print("=" * 100)
+    print(f"Görüntüleme çekirdekleri - {args.slices} x {args.size}x{args.size}, {args.repeat} tekrar")
+    print("=" * 100)
+    print(f"{'':28}{'eski':>12}{'yeni':>12}{'hız':>9}{'eski bel.':>12}{'yeni bel.':>11}"
+          f"{'maks':>6}{'ort fark':>8}")
+
+    compare("window/level float32",
+            lambda: legacy_apply_window_level(ct_float32, 40, 400),
+            lambda: window_level(ct_float32, 40, 400), args.repeat)
+    compare("window/level float32 inplace",
+            lambda: legacy_apply_window_level(ct_float32, 40, 400),
+            lambda: window_level(ct_float32.copy(), 40, 400, inplace=True), args.repeat)
+    compare("window/level int16 (LUT)",
+            lambda: legacy_apply_window_level(ct_int16, 40, 400),
+            lambda: window_level(ct_int16, 40, 400), args.repeat)
+    compare("window/level uint16 (LUT)",
+            lambda: legacy_apply_window_level(ct_uint16, 1064, 400),
+            lambda: window_level(ct_uint16, 1064, 400), args.repeat)
+    compare("window/level uint8 (LUT)",
+            lambda: legacy_apply_window_level(image_uint8, 40, 400),
+            lambda: window_level(image_uint8, 40, 400), args.repeat)
+    compare("min-max float32",
+            lambda: legacy_minmax_normalize(ct_float32),
+            lambda: minmax_normalize(ct_float32), args.repeat)
+    compare("slice resize -> 256",
+            lambda: legacy_resize_slices(normalized, (256, 256)),
+            lambda: resize_slices(normalized, (256, 256)), args.repeat)
+    compare("slice resize -> 768",
+            lambda: legacy_resize_slices(normalized, (768, 768)),
+            lambda: resize_slices(normalized, (768, 768)), args.repeat)
+
+    print("\nNot: window/level ve min-max sonuçları eskisiyle aynı olmalıdır (maks fark 0).")
+    print("Boyutlandırma skimage yerine cv2 (INTER_AREA/INTER_LINEAR) kullanır; küçük farklar beklenir.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Prefork Bellek Benchmark
+========================
+
+goruntu_isleme.api'yi PreforkServer ile N worker'da başlatır ve bileşenler
+ısındıktan sonra master + worker'ların bellek kullanımını
+/proc/<pid>/smaps_rollup'tan raporlar:
+
+    RSS toplamı   her süreç kendi kopyasını sayar (paylaşılan sayfalar N kez)
+    PSS toplamı   paylaşılan sayfalar süreçlere bölünür: gerçek bellek maliyeti
+    özel/worker   worker başına kopyalanmış (paylaşılmayan) bellek
+
+Karşılaştırılan modlar:
+    private       modeller her worker'da ayrı yüklenir (uvicorn --workers N eşdeğeri)
+    prefork       modeller master'da yüklenir, worker'lar copy-on-write paylaşır
+    shared_memory prefork + torch tensörleri paylaşımlı bellekte
+
+--synthetic-mb ile gerçek modeller olmadan ölçüm için verilen boyutta salt
+okunur bir ağırlık bileşeni (torch varsa nn.Linear, yoksa numpy dizisi)
+eklenir.
+
+Kullanım:
+    python benchmark_prefork.py --workers 4 --components fracture_detector
+    python benchmark_prefork.py --workers 4 --synthetic-mb 256
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from test_prefork_server import child_pids, free_port, get_json, process_memory, wait_for
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'private': {'preload': False, 'share_memory': False},
+    'prefork': {'preload': True, 'share_memory': False},
+    'shared_memory': {'preload': True, 'share_memory': True},
+}
+
+SERVER_CODE = """
+import logging, sys
+sys.path.insert(0, {root!r})
+logging.basicConfig(level=logging.ERROR)
+from goruntu_isleme.api import app, components, preload_models
+from goruntu_isleme.prefork_server import PreforkServer
+
+def create_synthetic_weights():
+    values = {synthetic_mb} * 1024 * 1024 // 4
+    try:
+        import torch
+        features = int(values ** 0.5)
+        layer = torch.nn.Linear(features, features, bias=False).eval()
+        layer.requires_grad_(False)
+        return layer
+    except ImportError:
+        import numpy as np
+        return np.random.default_rng(0).random(values, dtype=np.float32)
+
+if {synthetic_mb}:
+    components.register('synthetic_weights', create_synthetic_weights)
+
+server = PreforkServer(app, workers={workers}, share_memory={share_memory}, log_level='error')
+if {preload}:
+    server.preload(preload_models)
+server.serve('127.0.0.1', {port})
+"""
+
+
+def all_workers_warm(url: str, workers: List[int], names: List[str], seen: Dict[int, bool]) -> bool:
+    """Her worker en az bir kez tüm bileşenleri ısınmış olarak raporladı mı"""
+    for _ in range(len(workers) * 4):
+        status = get_json(f"{url}/health/components", timeout=2.0)
+        seen[status['pid']] = all(status['components'].get(name, {}).get('warmed_up')
+                                  for name in names)
+    return all(seen.get(pid) for pid in workers)
+
+
+def run_mode(mode: Dict[str, Any], args) -> Dict[str, Any]:
+    port = free_port()
+    names = list(args.components) + (['synthetic_weights'] if args.synthetic_mb else [])
+    env = dict(os.environ, API_WARMUP_COMPONENTS=",".join(names),
+               SERVER_THREADS_PER_WORKER=str(args.threads or ""))
+    code = SERVER_CODE.format(root=str(PROJECT_ROOT), synthetic_mb=args.synthetic_mb,
+                              workers=args.workers, share_memory=mode['share_memory'],
+                              preload=mode['preload'], port=port)
+    process = subprocess.Popen([sys.executable, '-c', code], env=env, cwd=str(PROJECT_ROOT),
+                               start_new_session=True)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        start_time = time.perf_counter()
+        wait_for(lambda: len(child_pids(process.pid)) == args.workers, timeout=args.timeout)
+        workers = child_pids(process.pid)
+        seen: Dict[int, bool] = {}
+        wait_for(lambda: all_workers_warm(url, workers, names, seen), timeout=args.timeout, interval=0.5)
+        ready_s = time.perf_counter() - start_time
+
+        master = process_memory(process.pid)
+        per_worker = [process_memory(pid) for pid in workers]
+        return {
+            'ready_s': ready_s,
+            'rss_mb': (master['Rss'] + sum(m['Rss'] for m in per_worker)) / 1024,
+            'pss_mb': (master['Pss'] + sum(m['Pss'] for m in per_worker)) / 1024,
+            'private_per_worker_mb': sum(m['Private_Dirty'] + m['Private_Clean']
+                                         for m in per_worker) / len(per_worker) / 1024,
+        }
+    finally:
+        process.send_signal(signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            pass
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefork bellek benchmark")
+    parser.add_argument('--workers', type=int, default=4, help="Worker sayısı")
+    parser.add_argument('--threads', type=int, default=None, help="Worker başına thread (varsayılan CPU / worker)")
+    parser.add_argument('--components', nargs='*', default=[], help="Isıtılacak API bileşenleri")
+    parser.add_argument('--synthetic-mb', type=int, default=0, help="Sentetik ağırlık bileşeni boyutu (MB)")
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+    parser.add_argument('--timeout', type=float, default=300.0, help="Isınma için en uzun bekleme (saniye)")
+    args = parser.parse_args()
+
+    if not args.components and not args.synthetic_mb:
+        parser.error("--components veya --synthetic-mb gerekli")
+
+    print("=" * 80)
+    print(f"Prefork bellek - {args.workers} worker, bileşenler: "
+          f"{', '.join(args.components + ([f'synthetic({args.synthetic_mb}MB)'] if args.synthetic_mb else []))}")
+    print("=" * 80)
+    print(f"{'mod':16}{'hazır (s)':>12}{'RSS toplam':>14}{'PSS toplam':>14}{'özel/worker':>14}")
+
+    results = {}
+    for name in args.modes:
+        results[name] = r = run_mode(MODES[name], args)
+        print(f"{name:16}{r['ready_s']:>12.1f}{r['rss_mb']:>12.0f}MB{r['pss_mb']:>12.0f}MB"
+              f"{r['private_per_worker_mb']:>12.0f}MB")
+
+    if 'private' in results and 'prefork' in results:
+        saving = 1 - results['prefork']['pss_mb'] / results['private']['pss_mb']
+        print(f"\nprefork / private PSS tasarrufu: {saving * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Solunum Özellik Çıkarımı Benchmark
+==================================
+
+RespiratoryEmergencyDetector._extract_respiratory_features için görüntü
+başına gecikmeyi eski (her yardımcı fonksiyonun maskeyi, maskeli bölgeyi
+ve Canny kenar haritasını yeniden hesapladığı) uygulama ile tek geçişli
+RespiratoryFeatureContext uygulaması arasında karşılaştırır. Ayrıca iki
+uygulamanın ürettiği özellik değerlerinin aynı olduğunu doğrular.
+
+Kullanım:
+    python benchmark_respiratory_features.py
+    python benchmark_respiratory_features.py --repeat 50 --images a.jpg b.jpg
+"""
+
+import argparse
+import time
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from respiratory_emergency_detector import RespiratoryEmergencyDetector
+from test_respiratory_emergency import RespiratoryEmergencyTester
+
+
+# --- Eski uygulama (karşılaştırma için birebir kopya) ---
+
+def _legacy_detect_lung_region(image: np.ndarray) -> np.ndarray:
+    _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (15, 15))
+    closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+    opened = cv2.morphologyEx(closed, cv2.MORPH_OPEN, kernel)
+    num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(opened)
+    areas = [(i, stats[i, cv2.CC_STAT_AREA]) for i in range(1, num_labels)]
+    areas.sort(key=lambda x: x[1], reverse=True)
+    lung_mask = np.zeros_like(image)
+    for i in range(min(2, len(areas))):
+        lung_mask[labels == areas[i][0]] = 255
+    return lung_mask
+
+
+def _legacy_detect_opacity(image: np.ndarray, lung_mask: np.ndarray) -> np.ndarray:
+    lung_region = cv2.bitwise_and(image, lung_mask)
+    mean_density = np.mean(lung_region[lung_mask > 0])
+    threshold = mean_density + np.std(lung_region[lung_mask > 0]) * 0.5
+    _, opacity_mask = cv2.threshold(lung_region, threshold, 255, cv2.THRESH_BINARY)
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+    return cv2.morphologyEx(opacity_mask, cv2.MORPH_OPEN, kernel)
+
+
+def _legacy_detect_pneumothorax_signs(image: np.ndarray, lung_mask: np.ndarray) -> Dict:
+    edges = cv2.Canny(image, 50, 150)
+    lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100, minLineLength=50, maxLineGap=10)
+    vertical_lines = 0
+    if lines is not None:
+        for x1, y1, x2, y2 in lines.reshape(-1, 4):
+            angle = abs(np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi)
+            if 80 <= angle <= 100:
+                vertical_lines += 1
+    lung_region = cv2.bitwise_and(image, lung_mask)
+    very_dark_areas = np.sum(lung_region < 50) / np.sum(lung_mask > 0)
+    score = min(1.0, (vertical_lines / 10.0) + very_dark_areas)
+    return {'score': score, 'collapse_detected': vertical_lines > 3}
+
+
+def _legacy_calculate_lung_asymmetry(image: np.ndarray, lung_mask: np.ndarray) -> float:
+    h, w = image.shape
+    mid = w // 2
+    left_mask = lung_mask.copy()
+    left_mask[:, mid:] = 0
+    right_mask = lung_mask.copy()
+    right_mask[:, :mid] = 0
+    lung_region = cv2.bitwise_and(image, lung_mask)
+    left_density = np.mean(lung_region[left_mask > 0]) if np.sum(left_mask) > 0 else 0
+    right_density = np.mean(lung_region[right_mask > 0]) if np.sum(right_mask) > 0 else 0
+    if left_density + right_density > 0:
+        return abs(left_density - right_density) / (left_density + right_density)
+    return 0
+
+
+def _legacy_detect_pleural_effusion(image: np.ndarray, lung_mask: np.ndarray) -> float:
+    h, w = image.shape
+    bottom_third = int(h * 2 / 3)
+    bottom_region = lung_mask.copy()
+    bottom_region[:bottom_third, :] = 0
+    if np.sum(bottom_region) == 0:
+        return 0.0
+    top_region = lung_mask.copy()
+    top_region[bottom_third:, :] = 0
+    lung_region = cv2.bitwise_and(image, lung_mask)
+    bottom_density = np.mean(lung_region[bottom_region > 0]) if np.sum(bottom_region) > 0 else 0
+    top_density = np.mean(lung_region[top_region > 0]) if np.sum(top_region) > 0 else 0
+    effusion_score = max(0, (bottom_density - top_density) / top_density) if top_density > 0 else 0
+    return min(1.0, effusion_score)
+
+
+def _legacy_analyze_texture(lung_region: np.ndarray, lung_mask: np.ndarray) -> Dict:
+    if np.sum(lung_mask) == 0:
+        return {'texture_variance': 0.0, 'texture_homogeneity': 0.0}
+    texture_responses = []
+    for freq in [0.1, 0.2, 0.3]:
+        kernel = cv2.getGaborKernel((21, 21), 8.0, 0, freq, 0.5, 0, ktype=cv2.CV_32F)
+        filtered = cv2.filter2D(lung_region, cv2.CV_32F, kernel)
+        texture_responses.append(np.std(filtered[lung_mask > 0]))
+    return {
+        'texture_variance': np.mean(texture_responses),
+        'texture_homogeneity': 1.0 / (1.0 + np.var(texture_responses))
+    }
+
+
+def _legacy_analyze_edges(image: np.ndarray, lung_mask: np.ndarray) -> Dict:
+    edges = cv2.Canny(image, 50, 150)
+    lung_edges = cv2.bitwise_and(edges, lung_mask)
+    edge_density = np.sum(lung_edges > 0) / np.sum(lung_mask > 0) if np.sum(lung_mask) > 0 else 0
+    return {'edge_density': edge_density}
+
+
+def legacy_extract_respiratory_features(image: np.ndarray) -> Dict[str, float]:
+    """Tek geçişli bağlamdan önceki özellik çıkarımı"""
+    features = {}
+    lung_mask = _legacy_detect_lung_region(image)
+    opacity_mask = _legacy_detect_opacity(image, lung_mask)
+    features['opacity_percentage'] = (np.sum(opacity_mask > 0) / np.sum(lung_mask > 0)) * 100
+    pneumothorax = _legacy_detect_pneumothorax_signs(image, lung_mask)
+    features['pneumothorax_score'] = pneumothorax['score']
+    features['lung_collapse_detected'] = pneumothorax['collapse_detected']
+    features['asymmetry_score'] = _legacy_calculate_lung_asymmetry(image, lung_mask)
+    features['pleural_effusion_score'] = _legacy_detect_pleural_effusion(image, lung_mask)
+    lung_region = cv2.bitwise_and(image, lung_mask)
+    features['density_mean'] = np.mean(lung_region[lung_mask > 0])
+    features['density_std'] = np.std(lung_region[lung_mask > 0])
+    features.update(_legacy_analyze_texture(lung_region, lung_mask))
+    features.update(_legacy_analyze_edges(image, lung_mask))
+    return features
+
+
+# --- Benchmark ---
+
+def load_benchmark_images(detector: RespiratoryEmergencyDetector,
+                          image_paths: List[str] = None) -> List[np.ndarray]:
+    """Ön işlenmiş (512x512) benchmark görüntüleri"""
+    if image_paths:
+        images = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in image_paths]
+    else:
+        tester = RespiratoryEmergencyTester()
+        images = [
+            tester._create_normal_chest_xray(),
+            tester._create_pneumonia_xray(severity='mild'),
+            tester._create_pneumonia_xray(severity='severe'),
+            tester._create_pneumothorax_xray(),
+            tester._create_pleural_effusion_xray()
+        ]
+    return [detector._preprocess_image(image) for image in images if image is not None]
+
+
+def time_per_image(func, images: List[np.ndarray], repeat: int) -> np.ndarray:
+    """Görüntü başına gecikmeler (ms)"""
+    timings = []
+    for _ in range(repeat):
+        for image in images:
+            start_time = time.perf_counter()
+            func(image)
+            timings.append((time.perf_counter() - start_time) * 1000)
+    return np.array(timings)
+
+
+def max_feature_difference(images: List[np.ndarray], detector: RespiratoryEmergencyDetector) -> float:
+    """İki uygulamanın özellikleri arasındaki en büyük mutlak fark"""
+    max_diff = 0.0
+    for image in images:
+        before = legacy_extract_respiratory_features(image)
+        after = detector._extract_respiratory_features(image)
+        for key, value in before.items():
+            max_diff = max(max_diff, abs(float(value) - float(after[key])))
+    return max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solunum özellik çıkarımı benchmark")
+    parser.add_argument('--images', nargs='*', help="Görüntü dosyaları (varsayılan: sentetik)")
+    parser.add_argument('--repeat', type=int, default=20, help="Tekrar sayısı")
+    args = parser.parse_args()
+
+    detector = RespiratoryEmergencyDetector()
+    images = load_benchmark_images(detector, args.images)
+
+    # Isınma
+    legacy_extract_respiratory_features(images[0])
+    detector._extract_respiratory_features(images[0])
+
+    before = time_per_image(legacy_extract_respiratory_features, images, args.repeat)
+    after = time_per_image(detector._extract_respiratory_features, images, args.repeat)
+
+    print("=" * 60)
+    print(f"Solunum özellik çıkarımı - {len(images)} görüntü x {args.repeat} tekrar")
+    print("=" * 60)
+    print(f"{'':12}{'ortalama':>12}{'p50':>12}{'p95':>12}")
+    for label, timings in (('önce', before), ('sonra', after)):
+        print(f"{label:12}{timings.mean():>10.2f}ms{np.percentile(timings, 50):>10.2f}ms"
+              f"{np.percentile(timings, 95):>10.2f}ms")
+    print(f"\nHızlanma: {before.mean() / after.mean():.2f}x")
+    print(f"En büyük özellik farkı: {max_feature_difference(images, detector):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+API Başlangıç Süresi Benchmark
+==============================
+
+goruntu_isleme.api'yi (main.py'nin yüklediği uygulama) temiz bir Python
+sürecinde `-X importtime` ile import eder ve raporlar:
+
+    - Toplam import süresi ve tepe bellek (RSS)
+    - Paket başına import süresi (self süre, üst paket bazında toplanmış)
+    - En pahalı modüller (kümülatif süre)
+    - Import sonrası yüklenmiş ağır kütüphaneler (tembel yükleme kontrolü)
+
+--warmup ile verilen bileşenler import'tan sonra ısıtılır ve yükleme
+süreleri ayrıca raporlanır. --max-import-ms aşılırsa ya da --forbid ile
+verilen bir kütüphane import'ta yüklenmişse çıkış kodu 1'dir (CI'da
+kullanılabilir).
+
+Kullanım:
+    python benchmark_startup.py
+    python benchmark_startup.py --warmup image_processor fracture_detector
+    python benchmark_startup.py --max-import-ms 1500 --forbid torch cv2
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ['torch', 'torchvision', 'cv2', 'PIL', 'sklearn', 'matplotlib', 'seaborn',
+                 'albumentations', 'pydicom', 'SimpleITK', 'nibabel', 'skimage', 'tensorflow']
+
+RESULT_MARKER = "__STARTUP_RESULT__"
+
+CHILD_CODE = """
+import importlib, json, resource, sys, time
+sys.path.insert(0, {root!r})
+start_time = time.perf_counter()
+module = importlib.import_module({target!r})
+import_ms = (time.perf_counter() - start_time) * 1000
+heavy_loaded = [name for name in {heavy!r} if name in sys.modules]
+rss_after_import = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+warmup = {{}}
+for name in {warmup!r}:
+    module.components.warmup([name])
+    warmup[name] = module.components[name].status()
+print({marker!r} + json.dumps({{
+    'import_ms': import_ms,
+    'heavy_loaded': heavy_loaded,
+    'rss_after_import_kb': rss_after_import,
+    'rss_peak_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'warmup': warmup
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """`-X importtime` satırları -> (modül, self µs, kümülatif µs)"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_part, cumulative_part, name = line[len("import time:"):].split("|", 2)
+            self_us, cumulative_us = int(self_part), int(cumulative_part)
+        except ValueError:
+            continue
+        name = name.strip()
+        entries.append((name, self_us, cumulative_us))
+    return entries
+
+
+def by_package(entries: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Self süreleri üst paket bazında topla (µs)"""
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in entries:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API başlangıç süresi benchmark")
+    parser.add_argument('--target', default='goruntu_isleme.api', help="Import edilecek modül")
+    parser.add_argument('--top', type=int, default=15, help="Gösterilecek modül/paket sayısı")
+    parser.add_argument('--warmup', nargs='*', default=[], help="Import sonrası ısıtılacak bileşenler")
+    parser.add_argument('--max-import-ms', type=float, default=None, help="İzin verilen en uzun import süresi")
+    parser.add_argument('--forbid', nargs='*', default=[], help="Import'ta yüklenmemesi gereken kütüphaneler")
+    args = parser.parse_args()
+
+    code = CHILD_CODE.format(root=str(PROJECT_ROOT), target=args.target,
+                             heavy=HEAVY_MODULES, warmup=args.warmup, marker=RESULT_MARKER)
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                             capture_output=True, text=True, cwd=str(PROJECT_ROOT))
+    result_line = next((line for line in process.stdout.splitlines() if line.startswith(RESULT_MARKER)), None)
+    if process.returncode != 0 or result_line is None:
+        print(process.stderr[-3000:])
+        print(f"❌ {args.target} import edilemedi")
+        sys.exit(1)
+    result = json.loads(result_line[len(RESULT_MARKER):])
+    entries = parse_importtime(process.stderr)
+
+    print("=" * 80)
+    print(f"Başlangıç süresi - {args.target}")
+    print("=" * 80)
+    print(f"Import süresi:        {result['import_ms']:.0f}ms")
+    print(f"RSS (import sonrası): {result['rss_after_import_kb'] / 1024:.0f}MB")
+    print(f"Yüklenen ağır kütüphaneler: {', '.join(result['heavy_loaded']) or '-'}")
+
+    print(f"\nPaket başına import süresi (ilk {args.top}):")
+    packages = sorted(by_package(entries).items(), key=lambda item: item[1], reverse=True)
+    for name, total_us in packages[:args.top]:
+        print(f"  {name:40}{total_us / 1000:>10.1f}ms")
+
+    print(f"\nEn pahalı modüller - kümülatif (ilk {args.top}):")
+    for name, _, cumulative_us in sorted(entries, key=lambda entry: entry[2], reverse=True)[:args.top]:
+        print(f"  {name:40}{cumulative_us / 1000:>10.1f}ms")
+
+    if result['warmup']:
+        print("\nBileşen ısınması:")
+        for name, status in result['warmup'].items():
+            print(f"  {name:30} yükleme {status['load_ms']}ms, ısınma {status['warmup_ms']}ms"
+                  f"{'  HATA: ' + status['error'] if status['error'] else ''}")
+        print(f"RSS (ısınma sonrası): {result['rss_peak_kb'] / 1024:.0f}MB")
+
+    failed = False
+    if args.max_import_ms is not None and result['import_ms'] > args.max_import_ms:
+        print(f"\n❌ Import süresi {result['import_ms']:.0f}ms > {args.max_import_ms:.0f}ms")
+        failed = True
+    forbidden = sorted(set(args.forbid) & set(result['heavy_loaded']))
+    if forbidden:
+        print(f"\n❌ Import sırasında yüklenmemesi gereken kütüphaneler: {', '.join(forbidden)}")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
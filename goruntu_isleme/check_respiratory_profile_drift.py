@@ -0,0 +1,125 @@
+"""
+Solunum Ön İşleme Profili Sapma Kontrolü
+=========================================
+
+RespiratoryEmergencyDetector ön işleme profillerinin (fast, balanced)
+referans 'full' profiline göre özellik ve acil durum skorlarında ne kadar
+saptığını ölçer. Profil başına gecikmeyi de raporlar. Sapma toleransı
+aşılırsa ya da aciliyet seviyesi değişirse sıfırdan farklı kodla çıkar;
+ön işleme değişikliklerinde regresyon kontrolü olarak çalıştırılır.
+
+Kullanım:
+    python check_respiratory_profile_drift.py
+    python check_respiratory_profile_drift.py --images a.jpg b.jpg --score-tolerance 0.15
+"""
+
+import argparse
+import sys
+import time
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from respiratory_emergency_detector import RespiratoryEmergencyDetector
+from test_respiratory_emergency import RespiratoryEmergencyTester
+
+
+REFERENCE_PROFILE = 'full'
+
+# Skor değil, ölçeği görüntüye bağlı ham özellikler (yalnızca raporlanır)
+RAW_FEATURES = ('density_mean', 'density_std', 'texture_variance')
+
+
+def load_drift_images(image_paths: List[str] = None) -> Dict[str, np.ndarray]:
+    """Ham (ön işlenmemiş) gri tonlamalı görüntüler"""
+    if image_paths:
+        images = {path: cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in image_paths}
+    else:
+        tester = RespiratoryEmergencyTester()
+        images = {
+            'normal': tester._create_normal_chest_xray(),
+            'pneumonia_mild': tester._create_pneumonia_xray(severity='mild'),
+            'pneumonia_severe': tester._create_pneumonia_xray(severity='severe'),
+            'pneumothorax': tester._create_pneumothorax_xray(),
+            'pleural_effusion': tester._create_pleural_effusion_xray()
+        }
+    return {name: image for name, image in images.items() if image is not None}
+
+
+def analyze_with_profile(detector: RespiratoryEmergencyDetector,
+                         image: np.ndarray, profile: str) -> Dict:
+    """Tek profil için özellik, skor ve ön işleme gecikmesi"""
+    start_time = time.perf_counter()
+    processed = detector._preprocess_image(image, profile)
+    preprocess_ms = (time.perf_counter() - start_time) * 1000
+
+    features = detector._extract_respiratory_features(processed)
+    scores = detector._calculate_emergency_scores(features, detector._get_ml_prediction(processed))
+    urgency_score = detector._calculate_urgency_score(scores)
+
+    return {
+        'features': features,
+        'scores': scores,
+        'urgency_level': detector._determine_urgency_level(urgency_score),
+        'preprocess_ms': preprocess_ms
+    }
+
+
+def compare_profiles(detector: RespiratoryEmergencyDetector,
+                     images: Dict[str, np.ndarray],
+                     score_tolerance: float) -> bool:
+    """Profilleri referansla karşılaştır, tolerans içindeyse True"""
+    passed = True
+    profiles = [p for p in detector.PREPROCESS_PROFILES if p != REFERENCE_PROFILE]
+
+    for name, image in images.items():
+        reference = analyze_with_profile(detector, image, REFERENCE_PROFILE)
+        print(f"\n{name} (referans {REFERENCE_PROFILE}: {reference['preprocess_ms']:.1f}ms, "
+              f"{reference['urgency_level']})")
+
+        for profile in profiles:
+            result = analyze_with_profile(detector, image, profile)
+
+            score_drift = {
+                key: abs(float(value) - float(result['scores'][key]))
+                for key, value in reference['scores'].items()
+            }
+            feature_drift = {
+                key: abs(float(reference['features'][key]) - float(result['features'][key]))
+                for key in RAW_FEATURES
+            }
+            worst_score = max(score_drift, key=score_drift.get)
+            level_changed = result['urgency_level'] != reference['urgency_level']
+            ok = score_drift[worst_score] <= score_tolerance and not level_changed
+            passed = passed and ok
+
+            print(f"  {profile:10}{result['preprocess_ms']:>8.1f}ms  "
+                  f"max skor sapması {score_drift[worst_score]:.3f} ({worst_score})  "
+                  f"yoğunluk {feature_drift['density_mean']:.2f}  "
+                  f"seviye {result['urgency_level']}  {'OK' if ok else 'SAPMA'}")
+
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solunum ön işleme profili sapma kontrolü")
+    parser.add_argument('--images', nargs='*', help="Görüntü dosyaları (varsayılan: sentetik)")
+    parser.add_argument('--score-tolerance', type=float, default=0.1,
+                        help="Acil durum skoru başına izin verilen mutlak sapma (0-1)")
+    args = parser.parse_args()
+
+    detector = RespiratoryEmergencyDetector()
+    images = load_drift_images(args.images)
+
+    print("=" * 60)
+    print(f"Ön işleme profili sapması - {len(images)} görüntü, tolerans {args.score_tolerance}")
+    print("=" * 60)
+
+    passed = compare_profiles(detector, images, args.score_tolerance)
+    print("\nSonuç:", "tolerans içinde" if passed else "tolerans aşıldı")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
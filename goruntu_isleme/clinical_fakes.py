@@ -0,0 +1,92 @@
+"""
+Klinik Entegrasyon Test Yardımcıları
+====================================
+
+Klinik iş kuyruğu ve HTTP testlerinin paylaştığı sahte (stub) PACS/FHIR
+uçları ve beklemesiz AI analizli workflow yöneticisi. Ağ gerektirmezler;
+HTTP modu için bkz. clinical_mock_server.py.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, List
+
+from clinical_integration import (
+    AIResult, ClinicalWorkflowManager, HL7FHIRIntegration, PACSIntegration, PriorityLevel
+)
+
+
+# Sahte PACS gönderimi ve FHIR çağrılarının süresi (saniye)
+STEP_DELAY = 0.2
+
+
+def make_ai_result(study_uid: str) -> AIResult:
+    """Çalışma UID'sini workflow kimliği olarak kullanan sabit AI sonucu"""
+    return AIResult(
+        case_id=study_uid, patient_id=f"P-{study_uid}", study_uid=study_uid,
+        findings=[{'finding': 'normal'}], confidence_scores={'overall': 0.9},
+        recommendations=['Rutin takip'], priority=PriorityLevel.ROUTINE,
+        processing_time_ms=1, timestamp=datetime.now(), model_version='test'
+    )
+
+
+class StubPACS(PACSIntegration):
+    """Gecikmesi ve hata sayısı ayarlanabilen sahte PACS"""
+
+    def __init__(self, fail_retrievals: int = 0, fail_sends: int = 0):
+        super().__init__({})
+        self.fail_retrievals = fail_retrievals
+        self.fail_sends = fail_sends
+        self.retrieved: List[str] = []
+        self.sent: List[str] = []
+
+    async def connect_to_pacs(self) -> bool:
+        self.connection_status = "connected"
+        return True
+
+    async def retrieve_study(self, study_uid: str) -> Dict[str, Any]:
+        self.retrieved.append(study_uid)
+        if self.fail_retrievals > 0:
+            self.fail_retrievals -= 1
+            raise ConnectionError("PACS geçici olarak erişilemez")
+        return {'study_uid': study_uid, 'patient_info': {'patient_id': f"P-{study_uid}"}}
+
+    async def send_ai_results(self, study_uid: str, ai_result: AIResult) -> bool:
+        await asyncio.sleep(STEP_DELAY)
+        if self.fail_sends > 0:
+            # Gerçek send_ai_results gibi hatayı yutup False döndürür
+            self.fail_sends -= 1
+            return False
+        self.sent.append(study_uid)
+        return True
+
+
+class StubFHIR(HL7FHIRIntegration):
+    """Her çağrıda STEP_DELAY bekleyen, hata sayısı ayarlanabilen sahte FHIR sunucusu"""
+
+    def __init__(self, fail_observations: int = 0):
+        super().__init__({})
+        self.fail_observations = fail_observations
+
+    async def create_observation(self, patient_id: str, ai_result: AIResult) -> Dict[str, Any]:
+        await asyncio.sleep(STEP_DELAY)
+        if self.fail_observations > 0:
+            self.fail_observations -= 1
+            raise ConnectionError("FHIR geçici olarak erişilemez")
+        return await super().create_observation(patient_id, ai_result)
+
+    async def create_diagnostic_report(self, patient_id: str, ai_result: AIResult) -> Dict[str, Any]:
+        await asyncio.sleep(STEP_DELAY)
+        return await super().create_diagnostic_report(patient_id, ai_result)
+
+
+class FastWorkflowManager(ClinicalWorkflowManager):
+    """AI analizi beklemesiz workflow yöneticisi"""
+
+    async def _perform_ai_analysis(self, study_data: Dict[str, Any], workflow_id: str) -> AIResult:
+        return AIResult(
+            case_id=workflow_id, patient_id=study_data['patient_info']['patient_id'],
+            study_uid=study_data['study_uid'], findings=[], confidence_scores={'overall': 0.5},
+            recommendations=[], priority=PriorityLevel.ROUTINE, processing_time_ms=1,
+            timestamp=datetime.now(), model_version='test'
+        )
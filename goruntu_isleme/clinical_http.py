@@ -0,0 +1,248 @@
+"""
+Paylaşımlı Klinik HTTP Taşıma Katmanı
+=====================================
+
+PACSIntegration (DICOMweb) ve HL7FHIRIntegration'ın ortak async HTTP
+istemcisi:
+
+    - Tek httpx.AsyncClient: keep-alive bağlantı havuzu, bağlantılar
+      çalışmalar arasında yeniden kullanılır.
+    - Host başına eşzamanlılık sınırı (semafor) - bir PACS'in yavaşlaması
+      FHIR isteklerini tıkamaz.
+    - Bağlantı hataları, 429 ve 5xx yanıtlarında üstel geri çekilme ve tam
+      jitter ile yeniden deneme (Retry-After başlığına uyulur). İdempotent
+      olmayan metotlar (POST) yalnızca isteğin sunucuya ulaşmadığı kesin
+      olduğunda (bağlantı kurulamadı, 429) yeniden denenir; aksi halde
+      kayıt iki kez oluşabilir.
+    - MicroBatcher: eşzamanlı çağrıların öğelerini kısa bir süre toplayıp
+      tek istekte gönderir (FHIR transaction Bundle).
+
+Yerel sahte sunucu: clinical_mock_server.py, benchmark: benchmark_clinical_http.py
+"""
+
+import asyncio
+import logging
+import os
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+CLINICAL_HTTP_MAX_CONNECTIONS = int(os.getenv("CLINICAL_HTTP_MAX_CONNECTIONS", "32"))
+CLINICAL_HTTP_MAX_PER_HOST = int(os.getenv("CLINICAL_HTTP_MAX_PER_HOST", "8"))
+CLINICAL_HTTP_RETRIES = int(os.getenv("CLINICAL_HTTP_RETRIES", "3"))
+CLINICAL_HTTP_BACKOFF = float(os.getenv("CLINICAL_HTTP_BACKOFF", "0.2"))
+CLINICAL_HTTP_BACKOFF_MAX = float(os.getenv("CLINICAL_HTTP_BACKOFF_MAX", "5.0"))
+CLINICAL_HTTP_TIMEOUT = float(os.getenv("CLINICAL_HTTP_TIMEOUT", "30"))
+
+# Yeniden denenen yanıt kodları
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+# Tekrarı yan etki oluşturmayan metotlar: tüm geçici hatalarda yeniden denenir
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+# İsteğin gönderilmediği kesin olan hatalar: her metotta yeniden denenir
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# 429 isteğin işlenmeden reddedildiğini bildirir (RFC 6585)
+NOT_PROCESSED_STATUSES = frozenset({429})
+
+
+class ClinicalHTTPTransport:
+    """Keep-alive havuzlu, host başına sınırlı, yeniden denemeli async HTTP istemcisi"""
+
+    def __init__(self,
+                 max_connections: Optional[int] = None,
+                 max_per_host: Optional[int] = None,
+                 retries: Optional[int] = None,
+                 backoff: Optional[float] = None,
+                 backoff_max: Optional[float] = None,
+                 timeout: Optional[float] = None,
+                 keepalive: bool = True):
+        """
+        Args:
+            max_connections: Havuzdaki en fazla bağlantı
+            max_per_host: Host başına aynı anda en fazla istek
+            retries: İlk denemeden sonra en fazla yeniden deneme
+            backoff: Geri çekilme tabanı (saniye, 2^deneme ile çarpılır)
+            backoff_max: En uzun bekleme (saniye)
+            timeout: İstek zaman aşımı (saniye)
+            keepalive: False ise bağlantılar yeniden kullanılmaz (karşılaştırma için)
+        """
+        self.max_connections = max_connections or CLINICAL_HTTP_MAX_CONNECTIONS
+        self.max_per_host = max_per_host or CLINICAL_HTTP_MAX_PER_HOST
+        self.retries = CLINICAL_HTTP_RETRIES if retries is None else retries
+        self.backoff = CLINICAL_HTTP_BACKOFF if backoff is None else backoff
+        self.backoff_max = backoff_max or CLINICAL_HTTP_BACKOFF_MAX
+        self.timeout = timeout or CLINICAL_HTTP_TIMEOUT
+        self.keepalive = keepalive
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # İlk kullanımda, çalışan event loop içinde oluşturulur
+        if self._client is None:
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections if self.keepalive else 0
+            )
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        parsed = httpx.URL(url)
+        host = f"{parsed.scheme}://{parsed.host}:{parsed.port or ''}"
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_per_host)
+            self._host_limits[host] = limit
+        return limit
+
+    def _backoff_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Tam jitter'lı üstel geri çekilme; Retry-After varsa ona uyulur"""
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff * (2 ** attempt)))
+
+    @staticmethod
+    def _can_retry(idempotent: bool,
+                   error: Optional[Exception],
+                   response: Optional[httpx.Response]) -> bool:
+        """Başarısız deneme yinelenebilir mi (idempotent değilse yalnızca gönderilmemiş istek)"""
+        if idempotent:
+            return True
+        if error is not None:
+            return isinstance(error, NOT_SENT_ERRORS)
+        return response.status_code in NOT_PROCESSED_STATUSES
+
+    async def request(self, method: str, url: str, idempotent: Optional[bool] = None,
+                      **kwargs) -> httpx.Response:
+        """
+        İstek gönder; geçici hatalarda yeniden dene
+
+        kwargs httpx.AsyncClient.request'e iletilir. Başarısız (4xx/5xx)
+        son yanıt için httpx.HTTPStatusError fırlatılır.
+
+        Args:
+            idempotent: None ise metoda göre belirlenir (IDEMPOTENT_METHODS).
+                        True yalnızca tekrarı güvenli istekler için verilmeli
+                        (ör. koşullu FHIR create).
+        """
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        limit = self._host_limit(url)
+        for attempt in range(self.retries + 1):
+            response = None
+            error: Optional[Exception] = None
+            async with limit:
+                self.stats['requests'] += 1
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError as e:
+                    error = e
+
+            if error is None and response.status_code not in RETRY_STATUSES:
+                response.raise_for_status()
+                return response
+
+            if attempt == self.retries or not self._can_retry(idempotent, error, response):
+                self.stats['failures'] += 1
+                if error is not None:
+                    raise error
+                response.raise_for_status()
+
+            self.stats['retries'] += 1
+            delay = self._backoff_delay(attempt, response)
+            logger.warning(f"{method} {url} yeniden denenecek ({attempt + 1}/{self.retries}, "
+                           f"{delay:.2f}s): {error or response.status_code}")
+            await asyncio.sleep(delay)
+
+        raise RuntimeError("unreachable")
+
+    async def get_json(self, url: str, **kwargs) -> Any:
+        response = await self.request('GET', url, **kwargs)
+        return response.json() if response.content else None
+
+    async def post_json(self, url: str, payload: Any, **kwargs) -> Any:
+        response = await self.request('POST', url, json=payload, **kwargs)
+        return response.json() if response.content else None
+
+
+class MicroBatcher:
+    """
+    Eşzamanlı çağrıların öğelerini toplu gönderen yardımcı
+
+    submit() öğe listesini bekleyen gruba ekler; grup max_items öğeye
+    ulaşınca ya da ilk öğeden max_delay saniye sonra flush(öğeler) ile tek
+    seferde gönderilir. flush öğe başına bir sonuç döndürmelidir; her
+    çağıran kendi öğelerinin sonuçlarını alır. flush hatası gruptaki tüm
+    çağıranlara iletilir. Gönderim görevleri tamamlanana kadar tutulur;
+    aclose() bekleyen grubu gönderir ve süren gönderimlerin bitmesini bekler.
+    """
+
+    def __init__(self,
+                 flush: Callable[[List[Any]], Awaitable[Sequence[Any]]],
+                 max_items: int,
+                 max_delay: float):
+        self._flush = flush
+        self.max_items = max_items
+        self.max_delay = max_delay
+        self._pending: List[Any] = []
+        self._waiters: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Süren gönderimler (event loop görevlere yalnızca zayıf referans tutar)
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, items: List[Any]) -> List[Any]:
+        future = asyncio.get_running_loop().create_future()
+        start = len(self._pending)
+        self._pending.extend(items)
+        self._waiters.append((future, start, len(items)))
+
+        if len(self._pending) >= self.max_items:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_delay, self._dispatch)
+        return await future
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        items, waiters = self._pending, self._waiters
+        self._pending, self._waiters = [], []
+        task = asyncio.ensure_future(self._send(items, waiters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def aclose(self):
+        """Bekleyen grubu gönder ve süren gönderimlerin bitmesini bekle"""
+        self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _send(self, items: List[Any], waiters: List[tuple]):
+        try:
+            results = await self._flush(items)
+        except Exception as e:
+            for future, _, _ in waiters:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, start, count in waiters:
+            if not future.done():
+                future.set_result(list(results[start:start + count]))
@@ -10,9 +10,11 @@ ve klinik workflow entegrasyonu için kapsamlı destek sağlar.
 import asyncio
 import json
 import logging
+import os
+from collections import deque
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional, Any, Union
+from typing import Dict, List, Tuple, Optional, Any, Union, Awaitable, Callable
 import pandas as pd
 from dataclasses import dataclass
 from enum import Enum
@@ -24,20 +26,43 @@ import base64
 try:
     import pydicom
     from pydicom.dataset import Dataset
-    from pydicom.uid import generate_uid
 except ImportError:
     pydicom = None
     Dataset = None
-    generate_uid = None
 
 # API and web frameworks
 from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
 from fastapi.security import HTTPBearer
 import uvicorn
 
+from clinical_http import ClinicalHTTPTransport, MicroBatcher
+from clinical_job_queue import Job, JobQueue, PriorityWorkerPool, JOB_FAILED, JOB_QUEUED, JOB_RUNNING
+
 logger = logging.getLogger(__name__)
 
 
+# Bellekte tutulan en fazla tamamlanmış workflow sayısı (halka tampon)
+CLINICAL_HISTORY_SIZE = int(os.getenv("CLINICAL_HISTORY_SIZE", "1000"))
+
+# FHIR transaction Bundle'ı başına en fazla kaynak ve toplama süresi (saniye)
+FHIR_BUNDLE_MAX_ENTRIES = int(os.getenv("FHIR_BUNDLE_MAX_ENTRIES", "20"))
+FHIR_BUNDLE_MAX_DELAY = float(os.getenv("FHIR_BUNDLE_MAX_DELAY", "0.05"))
+
+DICOM_JSON = 'application/dicom+json'
+FHIR_JSON = 'application/fhir+json'
+
+# Comprehensive SR Storage (TEXT, NUM ve CODE içerik öğeleri)
+COMPREHENSIVE_SR_SOP_CLASS = '1.2.840.10008.5.1.4.1.1.88.33'
+# Yerel kod şeması (AI bulguları için DICOM/LOINC kodu olmayan kavramlar)
+AI_CODING_SCHEME = '99TANIAI'
+# AI'nin oluşturduğu FHIR kaynaklarının kimlik sistemi (değer: workflow kimliği/adım)
+FHIR_IDENTIFIER_SYSTEM = 'urn:taniai:workflow'
+
+
+class WorkflowStepError(RuntimeError):
+    """Workflow adımı başarısız sonuç döndürdü (iş kuyruğunda yeniden denenir)"""
+
+
 class WorkflowStatus(str, Enum):
     """Workflow durumları"""
     PENDING = "pending"
@@ -55,6 +80,16 @@ class PriorityLevel(str, Enum):
     CRITICAL = "critical"
 
 
+# Kuyruk sırası: küçük değer önce işlenir (STAT > URGENT > ROUTINE)
+PRIORITY_ORDER = {
+    PriorityLevel.CRITICAL: 0,
+    PriorityLevel.STAT: 1,
+    PriorityLevel.URGENT: 2,
+    PriorityLevel.ROUTINE: 3
+}
+PRIORITY_BY_ORDER = {order: level for level, order in PRIORITY_ORDER.items()}
+
+
 @dataclass
 class PatientInfo:
     """Hasta bilgileri"""
@@ -96,23 +131,91 @@ class AIResult:
     timestamp: datetime
     model_version: str
 
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON'a yazılabilir sözlük (iş kuyruğu payload'ı için)"""
+        data = dict(self.__dict__)
+        data['priority'] = self.priority.value
+        data['timestamp'] = self.timestamp.isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'AIResult':
+        return cls(**{**data,
+                      'priority': PriorityLevel(data['priority']),
+                      'timestamp': datetime.fromisoformat(data['timestamp'])})
+
+
+def _dicom_value(dataset: Dict[str, Any], tag: str, default: Any = None) -> Any:
+    """DICOM JSON veri setinden ilk değeri al (PN için alfabetik ad)"""
+    values = dataset.get(tag, {}).get('Value')
+    if not values:
+        return default
+    value = values[0]
+    if isinstance(value, dict):
+        return value.get('Alphabetic', default)
+    return value
+
+
+def _dicom_element(vr: str, *values: Any) -> Dict[str, Any]:
+    """DICOM JSON öğesi (PS3.18 F.2); değersiz öğe yalnızca VR taşır"""
+    element: Dict[str, Any] = {'vr': vr}
+    if values:
+        element['Value'] = list(values)
+    return element
+
+
+def _dicom_code(value: str, meaning: str, scheme: str = AI_CODING_SCHEME) -> Dict[str, Any]:
+    """Kod sekansı öğesi (CodeValue, CodingSchemeDesignator, CodeMeaning)"""
+    return {
+        '00080100': _dicom_element('SH', value),
+        '00080102': _dicom_element('SH', scheme),
+        '00080104': _dicom_element('LO', meaning),
+    }
+
+
+def _dicom_uid(case_id: str, part: str) -> str:
+    """
+    Workflow (case_id) ve parça başına sabit DICOM UID (2.25 kökü, PS3.5 B.2)
+
+    UUID5 ile türetilir; aynı sonucun yeniden gönderimi (iş kuyruğu
+    yeniden denemesi dahil) aynı UID'leri taşır ve PACS kopya oluşturmaz.
+    """
+    return f"2.25.{uuid.uuid5(uuid.NAMESPACE_URL, f'{FHIR_IDENTIFIER_SYSTEM}:{case_id}/{part}').int}"
+
 
 class PACSIntegration:
-    """PACS sistemi entegrasyonu"""
-    
-    def __init__(self, pacs_config: Dict[str, Any]):
+    """
+    PACS sistemi entegrasyonu
+
+    Konfigürasyonda 'http_enabled' True ise PACS ile DICOMweb (QIDO-RS,
+    WADO-RS metadata, STOW-RS) üzerinden paylaşımlı HTTP taşıma katmanıyla
+    konuşulur; aksi halde yanıtlar simüle edilir.
+    """
+
+    def __init__(self, pacs_config: Dict[str, Any], transport: Optional[ClinicalHTTPTransport] = None):
         self.config = pacs_config
         self.connection_status = "disconnected"
         self.supported_modalities = ['CR', 'CT', 'MR', 'US', 'MG', 'DX', 'RF']
-        
+        self.http_enabled = bool(pacs_config.get('http_enabled', False))
+        self.dicomweb_url = pacs_config.get(
+            'dicomweb_url',
+            f"http://{pacs_config.get('host', 'localhost')}:{pacs_config.get('port', 8042)}/dicomweb"
+        ).rstrip('/')
+        self.transport = transport or ClinicalHTTPTransport()
+
     async def connect_to_pacs(self) -> bool:
         """PACS sistemine bağlan"""
         logger.info("🔗 PACS sistemine bağlanılıyor...")
-        
+
         try:
-            # Simüle edilmiş PACS bağlantısı
-            await asyncio.sleep(1)  # Bağlantı simülasyonu
-            
+            if self.http_enabled:
+                # QIDO-RS ile erişilebilirlik kontrolü (bağlantı havuza alınır)
+                await self.transport.request('GET', f"{self.dicomweb_url}/studies",
+                                             params={'limit': 1}, headers={'Accept': DICOM_JSON})
+            else:
+                # Simüle edilmiş PACS bağlantısı
+                await asyncio.sleep(1)  # Bağlantı simülasyonu
+
             self.connection_status = "connected"
             logger.info("✅ PACS bağlantısı başarılı")
             return True
@@ -128,7 +231,19 @@ class PACSIntegration:
                           modality: Optional[str] = None) -> List[Dict[str, Any]]:
         """PACS'den çalışmaları sorgula"""
         logger.info("🔍 PACS'den çalışmalar sorgulanıyor...")
-        
+
+        if self.http_enabled:
+            params = {}
+            if patient_id:
+                params['PatientID'] = patient_id
+            if study_date_from or study_date_to:
+                params['StudyDate'] = f"{study_date_from or ''}-{study_date_to or ''}"
+            if modality:
+                params['ModalitiesInStudy'] = modality
+            results = await self.transport.get_json(f"{self.dicomweb_url}/studies", params=params,
+                                                    headers={'Accept': DICOM_JSON})
+            return [self._study_from_dicom_json(dataset) for dataset in results or []]
+
         # Simüle edilmiş çalışma listesi
         studies = [
             {
@@ -160,7 +275,14 @@ class PACSIntegration:
     async def retrieve_study(self, study_uid: str) -> Dict[str, Any]:
         """Çalışmayı PACS'den al"""
         logger.info(f"📥 Çalışma alınıyor: {study_uid}")
-        
+
+        if self.http_enabled:
+            metadata = await self.transport.get_json(f"{self.dicomweb_url}/studies/{study_uid}/metadata",
+                                                     headers={'Accept': DICOM_JSON})
+            if not metadata:
+                raise LookupError(f"Çalışma bulunamadı: {study_uid}")
+            return self._study_from_metadata(study_uid, metadata)
+
         # Simüle edilmiş çalışma verisi
         study_data = {
             'study_uid': study_uid,
@@ -206,10 +328,20 @@ class PACSIntegration:
         try:
             # DICOM SR (Structured Report) oluştur
             sr_document = self._create_structured_report(study_uid, ai_result)
-            
-            # PACS'e gönder (simüle edilmiş)
-            await asyncio.sleep(0.5)
-            
+
+            if self.http_enabled:
+                # STOW-RS, DICOM JSON gövde: instance başına etiket anahtarlı veri seti.
+                # SOP Instance/Series UID'leri case_id'den türetilir; taşıma ve iş
+                # kuyruğu yeniden denemeleri aynı UID'yi gönderir, PACS tekrar
+                # kayıt oluşturmaz, bu yüzden istek idempotent sayılır
+                await self.transport.request('POST', f"{self.dicomweb_url}/studies/{study_uid}",
+                                             idempotent=True,
+                                             content=json.dumps([sr_document]),
+                                             headers={'Content-Type': DICOM_JSON, 'Accept': DICOM_JSON})
+            else:
+                # PACS'e gönder (simüle edilmiş)
+                await asyncio.sleep(0.5)
+
             logger.info("✅ AI sonuçları başarıyla PACS'e gönderildi")
             return True
             
@@ -218,59 +350,251 @@ class PACSIntegration:
             return False
     
     def _create_structured_report(self, study_uid: str, ai_result: AIResult) -> Dict[str, Any]:
-        """DICOM Structured Report oluştur"""
-        sr_document = {
-            'sop_class_uid': '1.2.840.10008.5.1.4.1.1.88.11',
+        """
+        AI sonucundan DICOM Comprehensive SR veri seti oluştur
+
+        DICOM JSON (PS3.18 F.2) biçiminde döner: anahtarlar 8 haneli
+        etiketler, değerler {'vr', 'Value'}. SR çalışmaya yeni bir seri
+        olarak eklenir; AI çıktısı hekim onayından geçmediği için
+        UNVERIFIED işaretlenir.
+        """
+        now = datetime.now()
+        content_items = [
+            {
+                '0040A010': _dicom_element('CS', 'CONTAINS'),
+                '0040A040': _dicom_element('CS', 'TEXT'),
+                '0040A043': _dicom_element('SQ', _dicom_code('AI-FINDINGS', 'AI Findings')),
+                '0040A160': _dicom_element('UT', json.dumps(ai_result.findings, ensure_ascii=False)),
+            },
+            {
+                '0040A010': _dicom_element('CS', 'CONTAINS'),
+                '0040A040': _dicom_element('CS', 'NUM'),
+                '0040A043': _dicom_element('SQ', _dicom_code('AI-CONFIDENCE', 'Confidence Score')),
+                '0040A300': _dicom_element('SQ', {
+                    '0040A30A': _dicom_element('DS', round(max(ai_result.confidence_scores.values()), 4)),
+                    '004008EA': _dicom_element('SQ', _dicom_code('1', 'no units', 'UCUM')),
+                }),
+            },
+            {
+                '0040A010': _dicom_element('CS', 'CONTAINS'),
+                '0040A040': _dicom_element('CS', 'TEXT'),
+                '0040A043': _dicom_element('SQ', _dicom_code('AI-RECOMMENDATIONS', 'Recommendations')),
+                '0040A160': _dicom_element('UT', '; '.join(ai_result.recommendations)),
+            },
+            {
+                '0040A010': _dicom_element('CS', 'CONTAINS'),
+                '0040A040': _dicom_element('CS', 'CODE'),
+                '0040A043': _dicom_element('SQ', _dicom_code('AI-PRIORITY', 'Priority Level')),
+                '0040A168': _dicom_element('SQ', _dicom_code(ai_result.priority.value.upper(),
+                                                             ai_result.priority.value)),
+            },
+        ]
+
+        return {
+            '00080016': _dicom_element('UI', COMPREHENSIVE_SR_SOP_CLASS),
+            '00080018': _dicom_element('UI', _dicom_uid(ai_result.case_id, 'sr-instance')),
+            '00080020': _dicom_element('DA'),
+            '00080023': _dicom_element('DA', now.strftime('%Y%m%d')),
+            '00080033': _dicom_element('TM', now.strftime('%H%M%S')),
+            '00080050': _dicom_element('SH'),
+            '00080060': _dicom_element('CS', 'SR'),
+            '00080070': _dicom_element('LO', 'TaniAI'),
+            '0008103E': _dicom_element('LO', 'AI Analysis Results'),
+            '00081090': _dicom_element('LO', ai_result.model_version),
+            '00100010': _dicom_element('PN'),
+            '00100020': _dicom_element('LO', ai_result.patient_id),
+            '0020000D': _dicom_element('UI', study_uid),
+            '0020000E': _dicom_element('UI', _dicom_uid(ai_result.case_id, 'sr-series')),
+            '00200011': _dicom_element('IS', 999),
+            '00200013': _dicom_element('IS', 1),
+            '0040A040': _dicom_element('CS', 'CONTAINER'),
+            '0040A043': _dicom_element('SQ', _dicom_code('AI-RESULTS', 'AI Analysis Results')),
+            '0040A050': _dicom_element('CS', 'SEPARATE'),
+            '0040A491': _dicom_element('CS', 'COMPLETE'),
+            '0040A493': _dicom_element('CS', 'UNVERIFIED'),
+            '0040A730': _dicom_element('SQ', *content_items),
+        }
+
+    def _study_from_dicom_json(self, dataset: Dict[str, Any]) -> Dict[str, Any]:
+        """QIDO-RS çalışma sonucunu query_studies formatına çevir"""
+        return {
+            'study_uid': _dicom_value(dataset, '0020000D'),
+            'patient_id': _dicom_value(dataset, '00100020'),
+            'study_date': _dicom_value(dataset, '00080020'),
+            'study_time': _dicom_value(dataset, '00080030'),
+            'study_description': _dicom_value(dataset, '00081030'),
+            'modality': _dicom_value(dataset, '00080061'),
+            'series_count': _dicom_value(dataset, '00201206', 0),
+            'instance_count': _dicom_value(dataset, '00201208', 0),
+            'status': 'completed'
+        }
+
+    def _study_from_metadata(self, study_uid: str, metadata: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """WADO-RS metadata'sını (instance başına DICOM JSON) retrieve_study formatına çevir"""
+        first = metadata[0]
+        series: Dict[str, Dict[str, Any]] = {}
+        for instance in metadata:
+            series_uid = _dicom_value(instance, '0020000E')
+            entry = series.setdefault(series_uid, {
+                'series_uid': series_uid,
+                'series_description': _dicom_value(instance, '0008103E'),
+                'modality': _dicom_value(instance, '00080060'),
+                'instance_count': 0,
+                'instances': []
+            })
+            sop_instance_uid = _dicom_value(instance, '00080018')
+            entry['instances'].append({
+                'instance_uid': sop_instance_uid,
+                'sop_instance_uid': sop_instance_uid,
+                'retrieve_url': (f"{self.dicomweb_url}/studies/{study_uid}/series/{series_uid}"
+                                 f"/instances/{sop_instance_uid}")
+            })
+            entry['instance_count'] += 1
+
+        patient_id = _dicom_value(first, '00100020')
+        return {
             'study_uid': study_uid,
-            'series_uid': str(uuid.uuid4()),
-            'instance_uid': str(uuid.uuid4()),
-            'content_sequence': {
-                'value_type': 'CONTAINER',
-                'concept_name': 'AI Analysis Results',
-                'content_items': [
-                    {
-                        'value_type': 'TEXT',
-                        'concept_name': 'AI Findings',
-                        'text_value': json.dumps(ai_result.findings)
-                    },
-                    {
-                        'value_type': 'NUM',
-                        'concept_name': 'Confidence Score',
-                        'numeric_value': max(ai_result.confidence_scores.values())
-                    },
-                    {
-                        'value_type': 'TEXT',
-                        'concept_name': 'Recommendations',
-                        'text_value': '; '.join(ai_result.recommendations)
-                    },
-                    {
-                        'value_type': 'CODE',
-                        'concept_name': 'Priority Level',
-                        'code_value': ai_result.priority.value
-                    }
-                ]
+            'patient_info': {
+                'patient_id': patient_id,
+                'name': _dicom_value(first, '00100010'),
+                'birth_date': _dicom_value(first, '00100030'),
+                'gender': _dicom_value(first, '00100040'),
+                'mrn': patient_id
             },
-            'verification_flag': 'VERIFIED',
-            'completion_flag': 'COMPLETE'
+            'study_info': {
+                'study_date': _dicom_value(first, '00080020'),
+                'study_time': _dicom_value(first, '00080030'),
+                'study_description': _dicom_value(first, '00081030'),
+                'modality': _dicom_value(first, '00080060'),
+                'referring_physician': _dicom_value(first, '00080090'),
+                'performing_physician': _dicom_value(first, '00081050'),
+                'institution_name': _dicom_value(first, '00080080')
+            },
+            'series': list(series.values())
         }
-        
-        return sr_document
 
 
 class HL7FHIRIntegration:
-    """HL7 FHIR entegrasyonu"""
-    
-    def __init__(self, fhir_config: Dict[str, Any]):
+    """
+    HL7 FHIR entegrasyonu
+
+    Konfigürasyonda 'http_enabled' True ise kaynaklar FHIR sunucusuna
+    gönderilir. create_ai_records Observation ve DiagnosticReport'u tek bir
+    transaction Bundle'ında gönderir; eşzamanlı çalışmaların kaynakları
+    MicroBatcher ile aynı Bundle'da toplanır ('bundle_max_entries',
+    'bundle_max_delay'). Bundle atomiktir: bir kaynak reddedilirse gruptaki
+    tüm çalışmalar hata alır ve iş kuyruğunda yeniden denenir.
+
+    Her kaynak workflow kimliği ve adımdan türetilen sabit bir identifier
+    taşır ve koşullu create (ifNoneExist / If-None-Exist) ile gönderilir:
+    sunucunun işleyip yanıtı kaybolan bir isteğin yeniden denenmesi ikinci
+    bir Observation/DiagnosticReport oluşturmaz, mevcut kaynağı döndürür.
+    """
+
+    def __init__(self, fhir_config: Dict[str, Any], transport: Optional[ClinicalHTTPTransport] = None):
         self.config = fhir_config
-        self.fhir_base_url = fhir_config.get('base_url', 'http://localhost:8080/fhir')
-        
+        self.fhir_base_url = fhir_config.get('base_url', 'http://localhost:8080/fhir').rstrip('/')
+        self.http_enabled = bool(fhir_config.get('http_enabled', False))
+        self.bundle_enabled = bool(fhir_config.get('bundle', True))
+        self.transport = transport or ClinicalHTTPTransport()
+        self._batcher = MicroBatcher(
+            self._post_transaction,
+            max_items=fhir_config.get('bundle_max_entries', FHIR_BUNDLE_MAX_ENTRIES),
+            max_delay=fhir_config.get('bundle_max_delay', FHIR_BUNDLE_MAX_DELAY)
+        )
+
+    async def aclose(self):
+        """Toplanan Bundle'ı gönder ve süren transaction'ları bekle"""
+        await self._batcher.aclose()
+
     async def create_observation(self, patient_id: str, ai_result: AIResult) -> Dict[str, Any]:
         """FHIR Observation oluştur"""
         logger.info(f"📊 FHIR Observation oluşturuluyor: {patient_id}")
-        
+        return await self._create_resource(self._build_observation(patient_id, ai_result))
+
+    async def create_diagnostic_report(self, patient_id: str, ai_result: AIResult) -> Dict[str, Any]:
+        """FHIR DiagnosticReport oluştur"""
+        logger.info(f"📋 FHIR DiagnosticReport oluşturuluyor: {patient_id}")
+        return await self._create_resource(self._build_diagnostic_report(patient_id, ai_result))
+
+    async def create_ai_records(self, patient_id: str,
+                                ai_result: AIResult) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Observation ve ona bağlı DiagnosticReport'u oluştur (HTTP modunda tek transaction)"""
+        if not (self.http_enabled and self.bundle_enabled):
+            return tuple(await asyncio.gather(
+                self.create_observation(patient_id, ai_result),
+                self.create_diagnostic_report(patient_id, ai_result)
+            ))
+
+        logger.info(f"📦 FHIR kayıtları Bundle'a ekleniyor: {patient_id}")
+        observation = self._build_observation(patient_id, ai_result)
+        report = self._build_diagnostic_report(patient_id, ai_result,
+                                               result_reference=f"urn:uuid:{observation['id']}")
+        responses = await self._batcher.submit([observation, report])
+        for resource, response in zip((observation, report), responses):
+            self._apply_response(resource, response)
+        report['result'] = [{'reference': f"Observation/{observation['id']}"}]
+        return observation, report
+
+    async def _create_resource(self, resource: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.http_enabled:
+            return resource
+        # Koşullu create tekrarlanabilir: kaynak zaten varsa sunucu onu döndürür
+        created = await self.transport.post_json(f"{self.fhir_base_url}/{resource['resourceType']}",
+                                                 resource, idempotent=True,
+                                                 headers={'Content-Type': FHIR_JSON,
+                                                          'If-None-Exist': self._identifier_query(resource)})
+        return created or resource
+
+    async def _post_transaction(self, resources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Kaynakları tek transaction Bundle'ında gönder; kaynak başına yanıt girdisini döndür"""
+        bundle = {
+            'resourceType': 'Bundle',
+            'type': 'transaction',
+            'entry': [
+                {
+                    'fullUrl': f"urn:uuid:{resource['id']}",
+                    'resource': resource,
+                    'request': {
+                        'method': 'POST',
+                        'url': resource['resourceType'],
+                        'ifNoneExist': self._identifier_query(resource)
+                    }
+                }
+                for resource in resources
+            ]
+        }
+        # Tüm girdiler koşullu create olduğundan Bundle'ın tekrarı güvenli
+        result = await self.transport.post_json(self.fhir_base_url, bundle, idempotent=True,
+                                                headers={'Content-Type': FHIR_JSON})
+        entries = (result or {}).get('entry', [])
+        if len(entries) != len(resources):
+            raise ValueError(f"FHIR transaction yanıtı {len(resources)} yerine {len(entries)} girdi içeriyor")
+        return [entry.get('response', {}) for entry in entries]
+
+    @staticmethod
+    def _resource_identifier(ai_result: AIResult, step: str) -> Dict[str, str]:
+        """Workflow (case_id) ve adım başına sabit FHIR identifier"""
+        return {'system': FHIR_IDENTIFIER_SYSTEM, 'value': f"{ai_result.case_id}/{step}"}
+
+    @staticmethod
+    def _identifier_query(resource: Dict[str, Any]) -> str:
+        """Koşullu create arama sorgusu (identifier=sistem|değer)"""
+        identifier = resource['identifier'][0]
+        return f"identifier={identifier['system']}|{identifier['value']}"
+
+    @staticmethod
+    def _apply_response(resource: Dict[str, Any], response: Dict[str, Any]):
+        """Sunucunun atadığı kimliği (location: Tip/id/_history/n) kaynağa yaz"""
+        parts = response.get('location', '').split('/')
+        if len(parts) >= 2 and parts[0] == resource['resourceType']:
+            resource['id'] = parts[1]
+
+    def _build_observation(self, patient_id: str, ai_result: AIResult) -> Dict[str, Any]:
         observation = {
             'resourceType': 'Observation',
             'id': str(uuid.uuid4()),
+            'identifier': [self._resource_identifier(ai_result, 'observation')],
             'status': 'final',
             'category': [
                 {
@@ -330,14 +654,13 @@ class HL7FHIRIntegration:
         }
         
         return observation
-    
-    async def create_diagnostic_report(self, patient_id: str, ai_result: AIResult) -> Dict[str, Any]:
-        """FHIR DiagnosticReport oluştur"""
-        logger.info(f"📋 FHIR DiagnosticReport oluşturuluyor: {patient_id}")
-        
+
+    def _build_diagnostic_report(self, patient_id: str, ai_result: AIResult,
+                                 result_reference: Optional[str] = None) -> Dict[str, Any]:
         diagnostic_report = {
             'resourceType': 'DiagnosticReport',
             'id': str(uuid.uuid4()),
+            'identifier': [self._resource_identifier(ai_result, 'diagnostic-report')],
             'status': 'final',
             'category': [
                 {
@@ -371,7 +694,7 @@ class HL7FHIRIntegration:
             ],
             'result': [
                 {
-                    'reference': f'Observation/{uuid.uuid4()}'
+                    'reference': result_reference or f'Observation/{uuid.uuid4()}'
                 }
             ],
             'conclusion': '; '.join(ai_result.recommendations),
@@ -392,13 +715,48 @@ class HL7FHIRIntegration:
 
 
 class ClinicalWorkflowManager:
-    """Klinik workflow yöneticisi"""
+    """
+    Klinik workflow yöneticisi
+    
+    Workflow'lar kalıcı öncelik kuyruğuna (clinical_job_queue) yazılır ve
+    worker havuzunda işlenir: STAT işler URGENT'tan, URGENT işler
+    ROUTINE'den önce alınır. Başarısız workflow üstel geri çekilmeyle
+    yeniden denenir; tamamlanan yan etkili adımların (AI analizi, PACS
+    gönderimi, FHIR kayıtları) sonuçları iş payload'ına yazıldığından
+    yeniden denemede atlanır. Hasta verisi içeren çalışma payload'a
+    yazılmaz, her denemede PACS'ten yeniden alınır. Tamamlanan workflow'lar
+    sınırlı bir halka tamponda tutulur.
+    """
     
-    def __init__(self, pacs_config: Dict[str, Any], fhir_config: Dict[str, Any]):
-        self.pacs = PACSIntegration(pacs_config)
-        self.fhir = HL7FHIRIntegration(fhir_config)
+    def __init__(self,
+                 pacs_config: Dict[str, Any],
+                 fhir_config: Dict[str, Any],
+                 queue_db: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 history_size: Optional[int] = None,
+                 pacs: Optional[PACSIntegration] = None,
+                 fhir: Optional[HL7FHIRIntegration] = None):
+        """
+        Args:
+            pacs_config, fhir_config: PACS ve FHIR konfigürasyonu
+            queue_db: İş kuyruğu SQLite dosyası (None ise CLINICAL_QUEUE_DB)
+            workers: Eşzamanlı workflow sayısı (None ise CLINICAL_WORKERS)
+            history_size: Halka tampon boyutu (None ise CLINICAL_HISTORY_SIZE)
+            pacs, fhir: Hazır entegrasyon nesneleri (test sunucuları için)
+        """
+        # PACS ve FHIR aynı bağlantı havuzunu paylaşır
+        self.transport = ClinicalHTTPTransport()
+        self.pacs = pacs or PACSIntegration(pacs_config, self.transport)
+        self.fhir = fhir or HL7FHIRIntegration(fhir_config, self.transport)
         self.active_workflows = {}
-        self.workflow_history = []
+        self.workflow_history = deque(maxlen=history_size or CLINICAL_HISTORY_SIZE)
+        self._history_index: Dict[str, Dict[str, Any]] = {}
+        self._totals = {'total': 0, WorkflowStatus.COMPLETED: 0, WorkflowStatus.FAILED: 0}
+        self._waiters: Dict[str, asyncio.Future] = {}
+        
+        self.job_queue = JobQueue(queue_db)
+        self.worker_pool = PriorityWorkerPool(self.job_queue, self._run_job, workers,
+                                              on_failed=self._on_job_failed)
         
     async def initialize_systems(self) -> bool:
         """Sistemleri başlat"""
@@ -411,6 +769,9 @@ class ClinicalWorkflowManager:
             if not pacs_connected:
                 logger.warning("⚠️ PACS bağlantısı başarısız, devam ediliyor...")
             
+            # İş havuzu (yarıda kalan işler kuyruğa geri alınır)
+            await self.worker_pool.start()
+            
             logger.info("✅ Klinik entegrasyon sistemleri hazır")
             return True
             
@@ -418,95 +779,213 @@ class ClinicalWorkflowManager:
             logger.error(f"❌ Sistem başlatma hatası: {e}")
             return False
     
-    async def process_study_workflow(self, study_uid: str, priority: PriorityLevel = PriorityLevel.ROUTINE) -> str:
-        """Çalışma workflow'unu işle"""
-        logger.info(f"🔄 Çalışma workflow'u başlatılıyor: {study_uid}")
-        
-        workflow_id = str(uuid.uuid4())
-        
+    async def shutdown(self):
+        """Worker'ları durdur, kuyruğu ve HTTP bağlantılarını kapat"""
+        await self.worker_pool.stop()
+        self.job_queue.close()
+        await self.fhir.aclose()
+        await self.transport.aclose()
+    
+    def _new_workflow(self, workflow_id: str, study_uid: str, priority: PriorityLevel) -> Dict[str, Any]:
         workflow = {
             'workflow_id': workflow_id,
             'study_uid': study_uid,
             'status': WorkflowStatus.PENDING,
             'priority': priority,
             'created_at': datetime.now(),
+            'attempts': 0,
             'steps': [],
+            'completed_steps': {},
             'results': None
         }
-        
         self.active_workflows[workflow_id] = workflow
+        return workflow
+    
+    @staticmethod
+    def _job_payload(workflow: Dict[str, Any]) -> Dict[str, Any]:
+        """Kuyruğa yazılan iş verisi (tamamlanan adımların sonuçları dahil)"""
+        return {
+            'workflow_id': workflow['workflow_id'],
+            'study_uid': workflow['study_uid'],
+            'priority': workflow['priority'].value,
+            'completed_steps': workflow['completed_steps']
+        }
+    
+    def _submit(self, study_uid: str, priority: PriorityLevel,
+                waiter: Optional[asyncio.Future] = None) -> str:
+        workflow_id = str(uuid.uuid4())
+        self._new_workflow(workflow_id, study_uid, priority)
+        if waiter is not None:
+            self._waiters[workflow_id] = waiter
         
+        self.job_queue.enqueue(workflow_id, PRIORITY_ORDER[priority],
+                               self._job_payload(self.active_workflows[workflow_id]))
+        self.worker_pool.notify()
+        return workflow_id
+    
+    async def submit_study_workflow(self, study_uid: str, priority: PriorityLevel = PriorityLevel.ROUTINE) -> str:
+        """Çalışma workflow'unu kuyruğa ekle, beklemeden workflow kimliğini döndür"""
+        if not self.worker_pool.running:
+            await self.worker_pool.start()
+        workflow_id = self._submit(study_uid, priority)
+        logger.info(f"📥 Workflow kuyruğa eklendi: {workflow_id} ({priority.value})")
+        return workflow_id
+    
+    async def process_study_workflow(self, study_uid: str, priority: PriorityLevel = PriorityLevel.ROUTINE) -> str:
+        """Çalışma workflow'unu kuyruğa ekle ve tamamlanmasını bekle"""
+        logger.info(f"🔄 Çalışma workflow'u başlatılıyor: {study_uid}")
+        
+        if not self.worker_pool.running:
+            await self.worker_pool.start()
+        waiter = asyncio.get_running_loop().create_future()
+        workflow_id = self._submit(study_uid, priority, waiter)
+        await waiter
+        return workflow_id
+    
+    async def _run_job(self, job: Job):
+        """Kuyruktan alınan workflow'u çalıştır (hata fırlatırsa yeniden denenir)"""
+        workflow_id = job.payload['workflow_id']
+        workflow = self.active_workflows.get(workflow_id)
+        if workflow is None:
+            # Süreç yeniden başlatıldıktan sonra geri alınan iş
+            workflow = self._new_workflow(workflow_id, job.payload['study_uid'],
+                                          PriorityLevel(job.payload['priority']))
+        
+        workflow['status'] = WorkflowStatus.IN_PROGRESS
+        workflow['attempts'] = job.attempts
+        workflow['steps'] = []
+        # Önceki denemelerde tamamlanan adımlar (süreç yeniden başlasa da korunur)
+        workflow['completed_steps'] = dict(job.payload.get('completed_steps', {}))
         try:
-            # 1. PACS'den çalışma al
-            workflow['status'] = WorkflowStatus.IN_PROGRESS
-            workflow['steps'].append({
-                'step': 'retrieve_study',
-                'status': 'in_progress',
-                'timestamp': datetime.now()
-            })
-            
-            study_data = await self.pacs.retrieve_study(study_uid)
-            workflow['steps'][-1]['status'] = 'completed'
-            workflow['steps'][-1]['completed_at'] = datetime.now()
-            
-            # 2. AI analizi (simüle edilmiş)
-            workflow['steps'].append({
-                'step': 'ai_analysis',
-                'status': 'in_progress',
-                'timestamp': datetime.now()
-            })
-            
-            ai_result = await self._perform_ai_analysis(study_data, workflow_id)
-            workflow['steps'][-1]['status'] = 'completed'
-            workflow['steps'][-1]['completed_at'] = datetime.now()
-            
-            # 3. Sonuçları PACS'e gönder
-            workflow['steps'].append({
-                'step': 'send_to_pacs',
-                'status': 'in_progress',
-                'timestamp': datetime.now()
-            })
-            
-            pacs_sent = await self.pacs.send_ai_results(study_uid, ai_result)
-            workflow['steps'][-1]['status'] = 'completed' if pacs_sent else 'failed'
-            workflow['steps'][-1]['completed_at'] = datetime.now()
-            
-            # 4. FHIR kayıtları oluştur
-            workflow['steps'].append({
-                'step': 'create_fhir_records',
-                'status': 'in_progress',
-                'timestamp': datetime.now()
-            })
-            
-            fhir_observation = await self.fhir.create_observation(study_data['patient_info']['patient_id'], ai_result)
-            fhir_report = await self.fhir.create_diagnostic_report(study_data['patient_info']['patient_id'], ai_result)
-            
-            workflow['steps'][-1]['status'] = 'completed'
-            workflow['steps'][-1]['completed_at'] = datetime.now()
-            
-            # Workflow tamamlandı
-            workflow['status'] = WorkflowStatus.COMPLETED
-            workflow['results'] = {
-                'ai_result': ai_result,
-                'fhir_observation': fhir_observation,
-                'fhir_report': fhir_report
-            }
-            
-            logger.info(f"✅ Workflow tamamlandı: {workflow_id}")
-            
+            workflow['results'] = await self._execute_workflow(workflow)
         except Exception as e:
-            logger.error(f"❌ Workflow hatası: {e}")
-            workflow['status'] = WorkflowStatus.FAILED
+            workflow['status'] = WorkflowStatus.PENDING
             workflow['error'] = str(e)
+            raise
         
-        # Workflow geçmişine ekle
+        workflow.pop('error', None)
+        self._finish_workflow(workflow, WorkflowStatus.COMPLETED)
+        logger.info(f"✅ Workflow tamamlandı: {workflow_id}")
+    
+    def _on_job_failed(self, job: Job, error: BaseException):
+        """Deneme hakkı biten workflow'u başarısız olarak kapat"""
+        workflow = self.active_workflows.get(job.payload['workflow_id'])
+        if workflow is None:
+            return
+        logger.error(f"❌ Workflow hatası: {error}")
+        workflow['error'] = str(error)
+        self._finish_workflow(workflow, WorkflowStatus.FAILED)
+    
+    def _finish_workflow(self, workflow: Dict[str, Any], status: WorkflowStatus):
+        """Workflow'u aktiflerden halka tampona taşı"""
+        workflow_id = workflow['workflow_id']
+        workflow['status'] = status
+        workflow['finished_at'] = datetime.now()
+        self.active_workflows.pop(workflow_id, None)
+        
+        # Halka tampon doluysa en eski kayıt indeksten de düşer
+        if len(self.workflow_history) == self.workflow_history.maxlen:
+            evicted = self.workflow_history[0]
+            self._history_index.pop(evicted['workflow_id'], None)
         self.workflow_history.append(workflow)
+        self._history_index[workflow_id] = workflow
         
-        # Aktif workflow'lardan çıkar
-        if workflow_id in self.active_workflows:
-            del self.active_workflows[workflow_id]
+        self._totals['total'] += 1
+        self._totals[status] += 1
         
-        return workflow_id
+        waiter = self._waiters.pop(workflow_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(workflow)
+    
+    async def _run_step(self, workflow: Dict[str, Any], step_name: str,
+                        step: Callable[[], Awaitable[Any]],
+                        encode: Optional[Callable[[Any], Any]] = None,
+                        decode: Optional[Callable[[Any], Any]] = None,
+                        persist: bool = True) -> Any:
+        """
+        Adımı çalıştır ve workflow adımlarına kaydet
+        
+        Önceki denemede tamamlanmış adım yeniden çalıştırılmaz, kayıtlı
+        sonucu döndürülür; böylece yeniden denemede PACS/FHIR'a ikinci kez
+        yazılmaz. Başarılı sonuç encode ile JSON'a çevrilip iş payload'ına
+        kaydedilir. persist=False olan adımın (yan etkisiz okuma) sonucu
+        kaydedilmez, her denemede yeniden çalıştırılır. False döndüren adım (ör. PACS gönderimi) başarısız
+        sayılır ve WorkflowStepError fırlatılır; iş geri çekilmeyle yeniden
+        denenir.
+        """
+        completed = workflow['completed_steps']
+        if step_name in completed:
+            now = datetime.now()
+            workflow['steps'].append({'step': step_name, 'status': 'skipped',
+                                      'timestamp': now, 'completed_at': now})
+            return decode(completed[step_name]) if decode else completed[step_name]
+        
+        record = {
+            'step': step_name,
+            'status': 'in_progress',
+            'timestamp': datetime.now()
+        }
+        workflow['steps'].append(record)
+        try:
+            result = await step()
+        except Exception:
+            record['status'] = 'failed'
+            record['completed_at'] = datetime.now()
+            raise
+        record['completed_at'] = datetime.now()
+        if result is False:
+            record['status'] = 'failed'
+            raise WorkflowStepError(f"Workflow adımı başarısız: {step_name}")
+        
+        record['status'] = 'completed'
+        if not persist:
+            return result
+        completed[step_name] = encode(result) if encode else result
+        self.job_queue.update_payload(workflow['workflow_id'], self._job_payload(workflow))
+        return result
+    
+    async def _execute_workflow(self, workflow: Dict[str, Any]) -> Dict[str, Any]:
+        """Workflow adımları: PACS'den al, AI analizi, ardından PACS + FHIR eşzamanlı"""
+        study_uid = workflow['study_uid']
+        
+        # 1. PACS'den çalışma al. Hasta kimliği ve görüntü verisi içerdiğinden
+        # iş payload'ına (SQLite) yazılmaz; yeniden denemede tekrar alınır
+        study_data = await self._run_step(workflow, 'retrieve_study',
+                                          lambda: self.pacs.retrieve_study(study_uid),
+                                          persist=False)
+        
+        # 2. AI analizi (kaydedilir: yeniden denemede PACS/FHIR'a aynı sonuç gider)
+        ai_result = await self._run_step(
+            workflow, 'ai_analysis',
+            lambda: self._perform_ai_analysis(study_data, workflow['workflow_id']),
+            encode=AIResult.to_dict, decode=AIResult.from_dict
+        )
+        
+        # 3-4. Sonuçların PACS'e gönderimi ve FHIR kayıtları birbirinden bağımsız.
+        # Biri hata verse de diğeri bitene kadar beklenir: tamamlanan adım
+        # yeniden denemeden önce payload'a kaydedilmiş olur
+        patient_id = study_data['patient_info']['patient_id']
+        pacs_sent, fhir_records = await asyncio.gather(
+            self._run_step(workflow, 'send_to_pacs', lambda: self.pacs.send_ai_results(study_uid, ai_result)),
+            self._run_step(workflow, 'create_fhir_records',
+                           lambda: self._create_fhir_records(patient_id, ai_result),
+                           encode=list, decode=tuple),
+            return_exceptions=True
+        )
+        for outcome in (pacs_sent, fhir_records):
+            if isinstance(outcome, BaseException):
+                raise outcome
+        fhir_observation, fhir_report = fhir_records
+        
+        return {
+            'ai_result': ai_result,
+            'fhir_observation': fhir_observation,
+            'fhir_report': fhir_report
+        }
+    
+    async def _create_fhir_records(self, patient_id: str, ai_result: AIResult) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """FHIR Observation ve DiagnosticReport (HTTP modunda tek transaction Bundle'ı)"""
+        return await self.fhir.create_ai_records(patient_id, ai_result)
     
     async def _perform_ai_analysis(self, study_data: Dict[str, Any], workflow_id: str) -> AIResult:
         """AI analizi gerçekleştir"""
@@ -559,28 +1038,38 @@ class ClinicalWorkflowManager:
             return self.active_workflows[workflow_id]
         
         # Geçmişte ara
-        for workflow in self.workflow_history:
-            if workflow['workflow_id'] == workflow_id:
-                return workflow
+        return self._history_index.get(workflow_id)
+    
+    def get_queue_status(self) -> Dict[str, Any]:
+        """Kuyruk derinliği (öncelik bazında) ve worker kullanımı"""
+        counts = self.job_queue.counts()
+        
+        def by_priority(status: str) -> Dict[str, int]:
+            return {PRIORITY_BY_ORDER[order].value: count
+                    for order, count in sorted(counts.get(status, {}).items())}
         
-        return None
+        return {
+            'queued': by_priority(JOB_QUEUED),
+            'running': by_priority(JOB_RUNNING),
+            'failed': by_priority(JOB_FAILED),
+            'workers': self.worker_pool.workers,
+            'busy_workers': self.worker_pool.busy
+        }
     
     def get_workflow_statistics(self) -> Dict[str, Any]:
         """Workflow istatistikleri"""
-        total_workflows = len(self.workflow_history)
-        completed_workflows = len([w for w in self.workflow_history if w['status'] == WorkflowStatus.COMPLETED])
-        failed_workflows = len([w for w in self.workflow_history if w['status'] == WorkflowStatus.FAILED])
+        total_workflows = self._totals['total']
+        completed_workflows = self._totals[WorkflowStatus.COMPLETED]
+        failed_workflows = self._totals[WorkflowStatus.FAILED]
         active_workflows = len(self.active_workflows)
         
-        avg_processing_time = 0
-        if completed_workflows > 0:
-            processing_times = []
-            for workflow in self.workflow_history:
-                if workflow['status'] == WorkflowStatus.COMPLETED and 'results' in workflow:
-                    processing_times.append(workflow['results']['ai_result'].processing_time_ms)
-            
-            if processing_times:
-                avg_processing_time = sum(processing_times) / len(processing_times)
+        # Ortalama işlem süresi halka tampondaki son workflow'lardan
+        processing_times = [
+            workflow['results']['ai_result'].processing_time_ms
+            for workflow in self.workflow_history
+            if workflow['status'] == WorkflowStatus.COMPLETED and workflow.get('results')
+        ]
+        avg_processing_time = sum(processing_times) / len(processing_times) if processing_times else 0
         
         return {
             'total_workflows': total_workflows,
@@ -589,6 +1078,8 @@ class ClinicalWorkflowManager:
             'active_workflows': active_workflows,
             'success_rate': (completed_workflows / total_workflows * 100) if total_workflows > 0 else 0,
             'average_processing_time_ms': avg_processing_time,
+            'history_size': len(self.workflow_history),
+            'queue': self.get_queue_status(),
             'last_updated': datetime.now().isoformat()
         }
 
@@ -629,14 +1120,18 @@ class ClinicalIntegrationAPI:
         async def startup_event():
             await self.workflow_manager.initialize_systems()
         
+        @self.app.on_event("shutdown")
+        async def shutdown_event():
+            await self.workflow_manager.shutdown()
+        
         @self.app.post("/workflows/process-study")
         async def process_study(study_uid: str, priority: PriorityLevel = PriorityLevel.ROUTINE):
-            """Çalışma işleme workflow'u başlat"""
-            workflow_id = await self.workflow_manager.process_study_workflow(study_uid, priority)
+            """Çalışma işleme workflow'unu kuyruğa ekle"""
+            workflow_id = await self.workflow_manager.submit_study_workflow(study_uid, priority)
             return {
                 'workflow_id': workflow_id,
-                'status': 'started',
-                'message': 'Study processing workflow started'
+                'status': 'queued',
+                'message': 'Study processing workflow queued'
             }
         
         @self.app.get("/workflows/{workflow_id}/status")
@@ -673,6 +1168,7 @@ class ClinicalIntegrationAPI:
                 'status': 'healthy',
                 'pacs_connection': self.workflow_manager.pacs.connection_status,
                 'active_workflows': len(self.workflow_manager.active_workflows),
+                'queue': self.workflow_manager.get_queue_status(),
                 'timestamp': datetime.now().isoformat()
             }
     
@@ -705,7 +1201,8 @@ def create_clinical_integration_demo():
     demo_results = {
         'integration_capabilities': {
             'pacs_integration': {
-                'supported_protocols': ['DICOM C-STORE', 'DICOM C-FIND', 'DICOM C-MOVE'],
+                'supported_protocols': ['DICOM C-STORE', 'DICOM C-FIND', 'DICOM C-MOVE',
+                                        'DICOMweb QIDO-RS', 'DICOMweb WADO-RS', 'DICOMweb STOW-RS'],
                 'supported_modalities': ['CR', 'CT', 'MR', 'US', 'MG', 'DX', 'RF'],
                 'structured_reporting': 'DICOM SR support',
                 'worklist_integration': 'DICOM Modality Worklist'
@@ -713,7 +1210,7 @@ def create_clinical_integration_demo():
             'fhir_integration': {
                 'supported_resources': ['Patient', 'Study', 'Observation', 'DiagnosticReport'],
                 'fhir_version': 'R4',
-                'supported_operations': ['create', 'read', 'update', 'search'],
+                'supported_operations': ['create', 'read', 'update', 'search', 'transaction'],
                 'terminology_systems': ['LOINC', 'SNOMED CT', 'ICD-10']
             },
             'workflow_features': {
@@ -800,6 +1297,8 @@ def run_clinical_integration_test():
         # İstatistikleri al
         statistics = workflow_manager.get_workflow_statistics()
         
+        await workflow_manager.shutdown()
+        
         return {
             'workflow_id': workflow_id,
             'workflow_status': workflow_status,
@@ -0,0 +1,325 @@
+"""
+Kalıcı Öncelikli İş Kuyruğu
+===========================
+
+ClinicalWorkflowManager'ın süreç içi iş kuyruğu. İşler SQLite'a yazılır
+(WAL modu); süreç çökerse yarıda kalan işler yeniden başlatmada kuyruğa
+geri alınır. Sıralama öncelik sırası (küçük değer önce) ve ardından
+ekleme sırasıdır - aynı öncelikteki işler FIFO işlenir.
+
+Başarısız iş hemen değil, üstel geri çekilmeyle (not_before) yeniden
+alınır; böylece erişilemeyen bir PACS/FHIR sunucusu deneme hakkını
+saniyeler içinde tüketmez. İşin payload'ı çalışırken güncellenebilir
+(update_payload): tamamlanan adımlar kaydedilir ve yeniden denemede
+atlanır.
+
+PriorityWorkerPool kuyruğu sabit sayıda asyncio worker ile tüketir. Her
+eklenen iş için bir semafor izni bırakılır; worker'lar boşta beklerken
+kuyruğu yoklamaz. Geri çekilmedeki işin izni bekleme süresi dolunca
+bırakılır.
+
+Tablo:
+    jobs(seq, job_id, priority, payload, status, attempts, error,
+         enqueued_at, started_at, finished_at, not_before)
+    status: queued | running | failed (tamamlanan işler silinir)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+CLINICAL_QUEUE_DB = os.getenv("CLINICAL_QUEUE_DB", "clinical_jobs.db")
+CLINICAL_WORKERS = int(os.getenv("CLINICAL_WORKERS", "4"))
+CLINICAL_JOB_MAX_ATTEMPTS = int(os.getenv("CLINICAL_JOB_MAX_ATTEMPTS", "3"))
+CLINICAL_JOB_RETRY_BACKOFF = float(os.getenv("CLINICAL_JOB_RETRY_BACKOFF", "2.0"))
+CLINICAL_JOB_RETRY_BACKOFF_MAX = float(os.getenv("CLINICAL_JOB_RETRY_BACKOFF_MAX", "300"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class Job:
+    """Kuyruktan alınmış iş"""
+    job_id: str
+    priority: int
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class JobQueue:
+    """SQLite tabanlı kalıcı öncelik kuyruğu (thread-safe)"""
+
+    def __init__(self,
+                 db_path: Union[str, Path, None] = None,
+                 max_attempts: Optional[int] = None,
+                 retry_backoff: Optional[float] = None,
+                 retry_backoff_max: Optional[float] = None):
+        """
+        Args:
+            db_path: SQLite dosyası (None ise CLINICAL_QUEUE_DB)
+            max_attempts: İş başına en fazla deneme
+            retry_backoff: İlk yeniden denemeden önceki bekleme (saniye, her denemede 2 katı)
+            retry_backoff_max: En uzun bekleme (saniye)
+        """
+        self.db_path = str(db_path or CLINICAL_QUEUE_DB)
+        self.max_attempts = max_attempts or CLINICAL_JOB_MAX_ATTEMPTS
+        self.retry_backoff = CLINICAL_JOB_RETRY_BACKOFF if retry_backoff is None else retry_backoff
+        self.retry_backoff_max = (CLINICAL_JOB_RETRY_BACKOFF_MAX if retry_backoff_max is None
+                                  else retry_backoff_max)
+        self._lock = threading.Lock()
+
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT UNIQUE NOT NULL,
+                priority INTEGER NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                not_before REAL NOT NULL DEFAULT 0
+            )
+        """)
+        # Önceki sürümde oluşturulmuş kuyruk dosyası
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if 'not_before' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN not_before REAL NOT NULL DEFAULT 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority, seq)"
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def enqueue(self, job_id: str, priority: int, payload: Dict[str, Any]):
+        """İşi kuyruğa ekle"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, priority, payload, status, enqueued_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, priority, json.dumps(payload, ensure_ascii=False), JOB_QUEUED, time.time())
+            )
+
+    def claim(self) -> Optional[Job]:
+        """En öncelikli hazır (geri çekilme süresi dolmuş) işi al ve running olarak işaretle"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT seq, job_id, priority, payload, attempts FROM jobs "
+                    "WHERE status = ? AND not_before <= ? ORDER BY priority, seq LIMIT 1",
+                    (JOB_QUEUED, time.time())
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                seq, job_id, priority, payload, attempts = row
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ? WHERE seq = ?",
+                    (JOB_RUNNING, time.time(), seq)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Job(job_id, priority, json.loads(payload), attempts + 1)
+
+    def complete(self, job_id: str):
+        """Tamamlanan işi kuyruktan sil"""
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def update_payload(self, job_id: str, payload: Dict[str, Any]):
+        """Çalışan işin payload'ını kaydet (tamamlanan adımlar yeniden denemede korunur)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET payload = ? WHERE job_id = ?",
+                (json.dumps(payload, ensure_ascii=False), job_id)
+            )
+
+    def retry_delay(self, attempts: int) -> float:
+        """attempts. denemeden sonraki bekleme (üstel, üst sınırlı)"""
+        return min(self.retry_backoff_max, self.retry_backoff * (2 ** (attempts - 1)))
+
+    def fail(self, job: Job, error: str) -> Optional[float]:
+        """
+        Başarısız işi kaydet
+
+        Deneme hakkı kalmışsa iş geri çekilme süresi sonunda alınabilecek
+        şekilde kuyruğa geri konur.
+
+        Returns:
+            İş yeniden denenecekse bekleme süresi (saniye), deneme hakkı
+            bittiyse None
+        """
+        now = time.time()
+        if job.attempts < self.max_attempts:
+            delay = self.retry_delay(job.attempts)
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, not_before = ? WHERE job_id = ?",
+                    (JOB_QUEUED, error, now + delay, job.job_id)
+                )
+            return delay
+
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE job_id = ?",
+                (JOB_FAILED, error, now, job.job_id)
+            )
+        return None
+
+    def next_ready_in(self) -> Optional[float]:
+        """En erken bekleyen işin hazır olmasına kalan süre (saniye); bekleyen iş yoksa None"""
+        with self._lock:
+            not_before = self._conn.execute(
+                "SELECT MIN(not_before) FROM jobs WHERE status = ?", (JOB_QUEUED,)
+            ).fetchone()[0]
+        if not_before is None:
+            return None
+        return max(0.0, not_before - time.time())
+
+    def recover(self) -> int:
+        """Yarıda kalan (running) işleri kuyruğa geri al; bekleyen iş sayısını döndür"""
+        with self._lock:
+            recovered = self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ?", (JOB_QUEUED, JOB_RUNNING)
+            ).rowcount
+            pending = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ?", (JOB_QUEUED,)
+            ).fetchone()[0]
+        if recovered:
+            logger.warning(f"Yarıda kalan {recovered} iş kuyruğa geri alındı")
+        return pending
+
+    def counts(self) -> Dict[str, Dict[int, int]]:
+        """Durum -> öncelik -> iş sayısı"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, priority, COUNT(*) FROM jobs GROUP BY status, priority"
+            ).fetchall()
+        counts: Dict[str, Dict[int, int]] = {}
+        for status, priority, count in rows:
+            counts.setdefault(status, {})[priority] = count
+        return counts
+
+    def failed_jobs(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Deneme hakkı biten işler (en yeniler önce)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, priority, payload, attempts, error, finished_at FROM jobs "
+                "WHERE status = ? ORDER BY finished_at DESC LIMIT ?",
+                (JOB_FAILED, limit)
+            ).fetchall()
+        return [
+            {'job_id': job_id, 'priority': priority, 'payload': json.loads(payload),
+             'attempts': attempts, 'error': error, 'finished_at': finished_at}
+            for job_id, priority, payload, attempts, error, finished_at in rows
+        ]
+
+
+class PriorityWorkerPool:
+    """JobQueue'yu sabit sayıda asyncio worker ile tüketen havuz"""
+
+    def __init__(self,
+                 queue: JobQueue,
+                 handler: Callable[[Job], Awaitable[Any]],
+                 workers: Optional[int] = None,
+                 on_failed: Optional[Callable[[Job, BaseException], Any]] = None):
+        """
+        Args:
+            queue: İş kuyruğu
+            handler: İşi çalıştıran coroutine; hata fırlatırsa iş yeniden denenir
+            workers: Worker sayısı
+            on_failed: Deneme hakkı biten iş için çağrılır
+        """
+        self.queue = queue
+        self.handler = handler
+        self.workers = workers or CLINICAL_WORKERS
+        self.on_failed = on_failed
+        self._available: Optional[asyncio.Semaphore] = None
+        self._tasks: List[asyncio.Task] = []
+        self.busy = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    async def start(self):
+        """Yarıda kalan işleri geri al ve worker'ları başlat"""
+        if self._tasks:
+            return
+        pending = self.queue.recover()
+        self._available = asyncio.Semaphore(pending)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"clinical-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"İş havuzu başlatıldı: {self.workers} worker, {pending} bekleyen iş")
+
+    async def stop(self):
+        """Worker'ları durdur (çalışan işler running kalır, sonraki başlatmada geri alınır)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self, delay: float = 0.0):
+        """Kuyruğa iş eklendiğini bildir (delay: iş bu kadar saniye sonra hazır)"""
+        if self._available is None:
+            return
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self.notify)
+        else:
+            self._available.release()
+
+    async def _worker(self, index: int):
+        while True:
+            await self._available.acquire()
+            job = self.queue.claim()
+            if job is None:
+                # İzin geri çekilmedeki bir işe ait: en erken hazır olma anında yeniden bırak
+                delay = self.queue.next_ready_in()
+                if delay is not None:
+                    self.notify(max(delay, 0.01))
+                continue
+
+            self.busy += 1
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = self.queue.fail(job, str(e))
+                if delay is not None:
+                    logger.error(f"İş hatası ({job.job_id}, deneme {job.attempts}), "
+                                 f"{delay:.1f}s sonra yeniden denenecek: {e}")
+                    self.notify(delay)
+                else:
+                    logger.error(f"İş hatası ({job.job_id}, deneme {job.attempts}), deneme hakkı bitti: {e}")
+                    if self.on_failed is not None:
+                        self.on_failed(job, e)
+            else:
+                self.queue.complete(job.job_id)
+            finally:
+                self.busy -= 1
@@ -0,0 +1,280 @@
+"""
+Yerel Sahte PACS (DICOMweb) ve FHIR Sunucusu
+============================================
+
+clinical_http taşıma katmanının testleri ve benchmark'ı için arka plan
+thread'inde çalışan FastAPI uygulaması:
+
+    GET  /dicomweb/studies                  QIDO-RS
+    GET  /dicomweb/studies/{uid}/metadata   WADO-RS metadata
+    POST /dicomweb/studies/{uid}            STOW-RS
+    POST /fhir                              transaction Bundle
+    POST /fhir/{resource_type}              tekil kaynak
+
+Her isteğe sabit gecikme eklenebilir ve her N. istek 503 ile
+reddedilebilir. FHIR koşullu create (Bundle girdisinde ifNoneExist, tekil
+istekte If-None-Exist) desteklenir: aynı identifier'lı kaynak varsa yenisi
+oluşturulmaz, mevcut kaynağın konumu 200 OK ile döndürülür. Sunucu istek, eşzamanlılık, bağlantı ve transaction
+sayılarını tutar (stats). STOW-RS gövdesi DICOM JSON olarak doğrulanır
+(etiket anahtarları, vr/Value biçimi, zorunlu UID'ler); saklanan
+instance'lar stored_instances'ta tutulur.
+
+Kullanım:
+    with MockClinicalServer(latency=0.02) as server:
+        pacs_config = {'http_enabled': True, 'dicomweb_url': server.dicomweb_url}
+        fhir_config = {'http_enabled': True, 'base_url': server.fhir_url}
+"""
+
+import asyncio
+import re
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+
+# DICOM JSON öğe anahtarı: 8 haneli onaltılık etiket (PS3.18 F.2)
+DICOM_TAG = re.compile(r'^[0-9A-F]{8}$')
+
+# STOW-RS ile saklanan instance'ta bulunması gereken etiketler
+STOW_REQUIRED_TAGS = ('00080016', '00080018', '0020000D', '0020000E')
+
+
+def _dicom(vr: str, value: Any) -> Dict[str, Any]:
+    return {'vr': vr, 'Value': [value]}
+
+
+def dicom_json_errors(dataset: Any, path: str = '') -> List[str]:
+    """DICOM JSON veri setindeki biçim hataları (etiket anahtarı, vr, Value listesi, iç içe sekanslar)"""
+    if not isinstance(dataset, dict):
+        return [f"{path or 'instance'}: nesne değil"]
+    errors = []
+    for tag, element in dataset.items():
+        where = f"{path}{tag}"
+        if not DICOM_TAG.match(tag):
+            errors.append(f"{where}: etiket anahtarı değil")
+            continue
+        if not isinstance(element, dict) or not isinstance(element.get('vr'), str):
+            errors.append(f"{where}: vr yok")
+            continue
+        values = element.get('Value', [])
+        if not isinstance(values, list):
+            errors.append(f"{where}: Value liste değil")
+            continue
+        if element['vr'] == 'SQ':
+            for index, item in enumerate(values):
+                errors.extend(dicom_json_errors(item, f"{where}[{index}]."))
+    return errors
+
+
+def study_metadata(study_uid: str, instances: int = 1) -> List[Dict[str, Any]]:
+    """Sahte çalışma için instance başına DICOM JSON metadata"""
+    patient_id = f"P-{study_uid[-6:]}"
+    return [
+        {
+            '0020000D': _dicom('UI', study_uid),
+            '0020000E': _dicom('UI', f"{study_uid}.1"),
+            '00080018': _dicom('UI', f"{study_uid}.1.{i + 1}"),
+            '00100020': _dicom('LO', patient_id),
+            '00100010': _dicom('PN', {'Alphabetic': 'TEST^PATIENT'}),
+            '00100030': _dicom('DA', '19800101'),
+            '00100040': _dicom('CS', 'M'),
+            '00080020': _dicom('DA', '20240115'),
+            '00080030': _dicom('TM', '143022'),
+            '00081030': _dicom('LO', 'CHEST X-RAY'),
+            '0008103E': _dicom('LO', 'CHEST PA'),
+            '00080060': _dicom('CS', 'CR'),
+            '00080080': _dicom('LO', 'Test Hospital'),
+        }
+        for i in range(instances)
+    ]
+
+
+class MockClinicalServer:
+    """Arka plan thread'inde çalışan sahte PACS + FHIR sunucusu"""
+
+    def __init__(self,
+                 host: str = "127.0.0.1",
+                 port: Optional[int] = None,
+                 latency: float = 0.0,
+                 fail_every: int = 0,
+                 instances_per_study: int = 1):
+        """
+        Args:
+            host, port: Dinlenen adres (port None ise boş bir port seçilir)
+            latency: Her isteğe eklenen gecikme (saniye)
+            fail_every: Her N. isteği 503 ile reddet (0: kapalı)
+            instances_per_study: Metadata'daki instance sayısı
+        """
+        self.host = host
+        self.port = port or self._free_port(host)
+        self.latency = latency
+        self.fail_every = fail_every
+        self.instances_per_study = instances_per_study
+        self.app = self._create_app()
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @staticmethod
+    def _free_port(host: str) -> int:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind((host, 0))
+            return sock.getsockname()[1]
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def dicomweb_url(self) -> str:
+        return f"{self.base_url}/dicomweb"
+
+    @property
+    def fhir_url(self) -> str:
+        return f"{self.base_url}/fhir"
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {
+                'requests': 0, 'rejected': 0, 'in_flight': 0, 'max_in_flight': 0,
+                'transactions': 0, 'bundle_entries': 0, 'resources': 0, 'stored': 0,
+                'connections': set()
+            }
+            self.stored_instances: List[Dict[str, Any]] = []
+            # Koşullu create: 'Tip?identifier=sistem|değer' -> kaynak kimliği
+            self.fhir_identifiers: Dict[str, str] = {}
+            self._resource_ids = 0
+
+    def _conditional_create(self, resource_type: str, if_none_exist: Optional[str]) -> tuple:
+        """(kaynak kimliği, yeni oluşturuldu mu) - koşul eşleşirse mevcut kimlik döner"""
+        with self._lock:
+            key = f"{resource_type}?{if_none_exist}" if if_none_exist else None
+            if key is not None and key in self.fhir_identifiers:
+                return self.fhir_identifiers[key], False
+            self._resource_ids += 1
+            resource_id = str(self._resource_ids)
+            if key is not None:
+                self.fhir_identifiers[key] = resource_id
+            return resource_id, True
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI(title="Mock PACS/FHIR")
+
+        @app.middleware("http")
+        async def track(request: Request, call_next):
+            with self._lock:
+                self.stats['requests'] += 1
+                count = self.stats['requests']
+                self.stats['connections'].add(request.scope.get('client'))
+                self.stats['in_flight'] += 1
+                self.stats['max_in_flight'] = max(self.stats['max_in_flight'], self.stats['in_flight'])
+            try:
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if self.fail_every and count % self.fail_every == 0:
+                    with self._lock:
+                        self.stats['rejected'] += 1
+                    return Response(status_code=503, headers={'Retry-After': '0'})
+                return await call_next(request)
+            finally:
+                with self._lock:
+                    self.stats['in_flight'] -= 1
+
+        @app.get("/dicomweb/studies")
+        async def qido_studies(request: Request):
+            study_uid = "1.2.826.0.1.3680043.8.498.1"
+            dataset = study_metadata(study_uid)[0]
+            dataset['00080061'] = _dicom('CS', request.query_params.get('ModalitiesInStudy', 'CR'))
+            dataset['00201206'] = _dicom('IS', 1)
+            dataset['00201208'] = _dicom('IS', self.instances_per_study)
+            return JSONResponse([dataset], media_type="application/dicom+json")
+
+        @app.get("/dicomweb/studies/{study_uid}/metadata")
+        async def wado_metadata(study_uid: str):
+            return JSONResponse(study_metadata(study_uid, self.instances_per_study),
+                                media_type="application/dicom+json")
+
+        @app.post("/dicomweb/studies/{study_uid}")
+        async def stow(study_uid: str, request: Request):
+            if not request.headers.get('content-type', '').startswith('application/dicom+json'):
+                return Response(status_code=415)
+            instances = await request.json()
+            if not isinstance(instances, list):
+                return JSONResponse({'error': 'DICOM JSON dizisi bekleniyor'}, status_code=400)
+            for instance in instances:
+                errors = dicom_json_errors(instance)
+                errors += [f"{tag}: eksik" for tag in STOW_REQUIRED_TAGS
+                           if tag not in (instance if isinstance(instance, dict) else {})]
+                if errors:
+                    return JSONResponse({'error': errors}, status_code=400)
+                if instance['0020000D'].get('Value') != [study_uid]:
+                    return JSONResponse({'error': 'StudyInstanceUID eşleşmiyor'}, status_code=409)
+            with self._lock:
+                self.stats['stored'] += len(instances)
+                self.stored_instances.extend(instances)
+            return JSONResponse({'00081199': {'vr': 'SQ', 'Value': []}},
+                                media_type="application/dicom+json")
+
+        @app.post("/fhir")
+        async def transaction(request: Request):
+            bundle = await request.json()
+            if bundle.get('resourceType') != 'Bundle' or bundle.get('type') != 'transaction':
+                return JSONResponse({'resourceType': 'OperationOutcome'}, status_code=400)
+            entries = []
+            for entry in bundle.get('entry', []):
+                resource_type = entry['request']['url']
+                resource_id, created = self._conditional_create(resource_type,
+                                                                entry['request'].get('ifNoneExist'))
+                entries.append({'response': {
+                    'status': '201 Created' if created else '200 OK',
+                    'location': f"{resource_type}/{resource_id}/_history/1"
+                }})
+            with self._lock:
+                self.stats['transactions'] += 1
+                self.stats['bundle_entries'] += len(entries)
+            return JSONResponse({'resourceType': 'Bundle', 'type': 'transaction-response',
+                                 'entry': entries}, media_type="application/fhir+json")
+
+        @app.post("/fhir/{resource_type}")
+        async def create(resource_type: str, request: Request):
+            resource = await request.json()
+            resource['id'], created = self._conditional_create(resource_type,
+                                                               request.headers.get('if-none-exist'))
+            with self._lock:
+                self.stats['resources'] += 1
+            return JSONResponse(resource, status_code=201 if created else 200,
+                                media_type="application/fhir+json")
+
+        return app
+
+    def start(self, timeout: float = 10.0) -> 'MockClinicalServer':
+        config = uvicorn.Config(self.app, host=self.host, port=self.port,
+                                log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="mock-clinical-server", daemon=True)
+        self._thread.start()
+
+        deadline = time.time() + timeout
+        while not self._server.started:
+            if time.time() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Sahte sunucu başlatılamadı")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=10)
+            self._server = None
+
+    def __enter__(self) -> 'MockClinicalServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
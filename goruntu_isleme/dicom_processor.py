@@ -12,25 +12,89 @@ import cv2
 import os
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 import json
 from datetime import datetime
 import nibabel as nib
 import SimpleITK as sitk
 from skimage import exposure, filters, morphology
-from skimage.transform import resize
 import matplotlib.pyplot as plt
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+
+from imaging_kernels import minmax_normalize, resize_slices, window_level
+from volume_store import VOLUME_STORE_DIR, VolumeStore, series_id_for, source_fingerprint
 
 logger = logging.getLogger(__name__)
 
 
+# Paralel piksel decode ayarları
+DICOM_DECODE_WORKERS = int(os.getenv("DICOM_DECODE_WORKERS") or os.cpu_count() or 1)
+# Bu sayının altındaki serilerde süreç başlatma maliyeti kazançtan büyük
+DICOM_PARALLEL_MIN_SLICES = int(os.getenv("DICOM_PARALLEL_MIN_SLICES", "32"))
+
+# Koleksiyon işleme: seri başına süreç havuzu ve aynı anda bellekte tutulan seri sayısı
+DICOM_COLLECTION_WORKERS = int(os.getenv("DICOM_COLLECTION_WORKERS") or min(4, os.cpu_count() or 1))
+DICOM_MAX_IN_FLIGHT_SERIES = int(os.getenv("DICOM_MAX_IN_FLIGHT_SERIES") or DICOM_COLLECTION_WORKERS)
+
+
+def _decode_slices_into_shared(shm_name: str,
+                               shape: Tuple[int, int, int],
+                               dtype: str,
+                               tasks: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+    """
+    Worker süreci: slice piksellerini paylaşımlı bellekteki hacme decode et
+
+    Returns:
+        Decode edilemeyen (slice indeksi, hata) listesi
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        raw = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        failures = _decode_slices_into(raw, tasks)
+        del raw
+        return failures
+    finally:
+        shm.close()
+
+
+def _decode_slices_into(raw: np.ndarray, tasks: List[Tuple[int, str]]) -> List[Tuple[int, str]]:
+    """Slice piksellerini önceden ayrılmış hacmin ilgili satırlarına yaz"""
+    failures = []
+    for index, file_path in tasks:
+        try:
+            raw[index] = pydicom.dcmread(file_path).pixel_array
+        except Exception as e:
+            failures.append((index, f"{file_path}: {e}"))
+    return failures
+
+
+# Koleksiyon worker süreçlerinin işlemcisi (süreç başına bir kez oluşturulur)
+_worker_processor = None
+
+
+def _init_collection_worker(output_dir: str, volume_store_dir: str):
+    global _worker_processor
+    _worker_processor = DICOMProcessor(output_dir, volume_store_dir=volume_store_dir)
+
+
+def _process_series_in_worker(series_dir: str, output_format: str) -> Dict[str, Any]:
+    """Worker süreci: tek seriyi işle (iç decode tek süreçte - havuz iç içe açılmaz)"""
+    return _worker_processor.process_dicom_series(series_dir, output_format, max_workers=1)
+
+
 class DICOMProcessor:
     """DICOM görüntü işleme sınıfı"""
     
-    def __init__(self, output_dir: str = "processed_dicom"):
+    def __init__(self, output_dir: str = "processed_dicom", volume_store_dir: Optional[str] = None):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
+        # Normalize edilmiş hacimler seri başına bir kez yazılır, mmap ile okunur
+        volume_store_dir = volume_store_dir or VOLUME_STORE_DIR or self.output_dir / "volume_store"
+        self.volume_store = VolumeStore(volume_store_dir)
+        
         # Desteklenen DICOM tag'leri
         self.required_tags = [
             'PatientID', 'StudyDate', 'StudyDescription',
@@ -67,8 +131,8 @@ class DICOMProcessor:
                     logger.error(f"DICOM yükleme hatası ({file_path}): {str(e)}")
                     continue
             
-            # Slice location'a göre sırala
-            datasets.sort(key=lambda x: float(x.get('SliceLocation', 0)))
+            # Hasta koordinatlarındaki konuma göre sırala
+            datasets.sort(key=self._slice_sort_key)
             
             logger.info(f"DICOM serisi yüklendi: {len(datasets)} slice")
             return datasets
@@ -77,6 +141,149 @@ class DICOMProcessor:
             logger.error(f"DICOM seri yükleme hatası: {str(e)}")
             return []
     
+    @staticmethod
+    def _slice_sort_key(ds: pydicom.Dataset) -> float:
+        """
+        Slice'ın kesit normali boyunca konumu
+        
+        ImagePositionPatient, ImageOrientationPatient normaline izdüşürülür;
+        yoksa SliceLocation, o da yoksa InstanceNumber kullanılır.
+        """
+        position = ds.get('ImagePositionPatient')
+        orientation = ds.get('ImageOrientationPatient')
+        if position is not None and orientation is not None and len(orientation) == 6:
+            normal = np.cross(np.asarray(orientation[:3], dtype=np.float64),
+                              np.asarray(orientation[3:], dtype=np.float64))
+            return float(np.dot(normal, np.asarray(position, dtype=np.float64)))
+        if 'SliceLocation' in ds:
+            return float(ds.SliceLocation)
+        return float(ds.get('InstanceNumber', 0))
+    
+    def load_dicom_headers(self, series_path: str) -> List[Tuple[Path, pydicom.Dataset]]:
+        """
+        Serinin yalnızca başlıklarını oku (piksel verisi okunmaz) ve sırala
+        
+        Returns:
+            Konuma göre sıralı (dosya yolu, başlık) listesi
+        """
+        series_path = Path(series_path)
+        headers = []
+        for file_path in series_path.glob("*.dcm"):
+            try:
+                headers.append((file_path, pydicom.dcmread(file_path, stop_before_pixels=True)))
+            except Exception as e:
+                logger.error(f"DICOM başlık okuma hatası ({file_path}): {str(e)}")
+        
+        headers.sort(key=lambda item: self._slice_sort_key(item[1]))
+        return headers
+    
+    @staticmethod
+    def _raw_pixel_dtype(headers: List[pydicom.Dataset]) -> Optional[np.dtype]:
+        """Tüm slice'larda ortak saklanan piksel tipi (yoksa None)"""
+        layouts = {
+            (int(ds.get('BitsAllocated', 16)), int(ds.get('PixelRepresentation', 0)),
+             int(ds.get('SamplesPerPixel', 1)))
+            for ds in headers
+        }
+        if len(layouts) != 1:
+            return None
+        
+        bits, signed, samples = layouts.pop()
+        if samples != 1 or bits not in (8, 16, 32):
+            return None
+        return np.dtype(f"{'int' if signed else 'uint'}{bits}")
+    
+    def load_volume(self, series_path: str,
+                    max_workers: Optional[int] = None) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Seriyi doğrudan 3D float32 hacim olarak yükle
+        
+        Başlıklar önce piksel verisi olmadan okunup sıralanır, pikseller
+        worker süreçlerinde paylaşımlı bellekteki önceden ayrılmış hacme decode
+        edilir, rescale slope/intercept tüm hacme vektörel uygulanır.
+        convert_to_numpy_array(load_dicom_series(...)) ile aynı sonucu verir.
+        
+        Args:
+            series_path: Seri klasörü
+            max_workers: Decode süreç sayısı (None ise DICOM_DECODE_WORKERS,
+                1 ise mevcut süreçte decode edilir)
+        """
+        headers = self.load_dicom_headers(series_path)
+        if not headers:
+            raise ValueError(f"DICOM serisi yüklenemedi: {series_path}")
+        
+        datasets = [ds for _, ds in headers]
+        metadata = self.extract_dicom_metadata(datasets)
+        
+        raw_dtype = self._raw_pixel_dtype(datasets)
+        if raw_dtype is None:
+            # Karışık piksel düzeni - slice slice eski yola düş
+            logger.warning(f"Karışık piksel düzeni, seri sıralı yükleniyor: {series_path}")
+            return self.convert_to_numpy_array(self.load_dicom_series(series_path))
+        
+        shape = (len(headers), metadata['rows'], metadata['columns'])
+        tasks = [(index, str(file_path)) for index, (file_path, _) in enumerate(headers)]
+        
+        max_workers = min(max_workers or DICOM_DECODE_WORKERS, len(tasks))
+        if max_workers > 1 and len(tasks) >= DICOM_PARALLEL_MIN_SLICES:
+            volume, failures = self._decode_parallel(shape, raw_dtype, tasks, max_workers)
+        else:
+            raw = np.empty(shape, dtype=raw_dtype)
+            failures = _decode_slices_into(raw, tasks)
+            volume = raw.astype(np.float32)
+            del raw
+        
+        # Rescale slope/intercept - slice başına değerler tek seferde
+        has_rescale = np.array([
+            'RescaleSlope' in ds and 'RescaleIntercept' in ds for ds in datasets
+        ])
+        if has_rescale.any():
+            slopes = np.array([float(ds.RescaleSlope) if ok else 1.0
+                               for ds, ok in zip(datasets, has_rescale)], dtype=np.float32)
+            intercepts = np.array([float(ds.RescaleIntercept) if ok else 0.0
+                                   for ds, ok in zip(datasets, has_rescale)], dtype=np.float32)
+            if not np.all(slopes == 1.0):
+                volume *= slopes[:, None, None]
+            if np.any(intercepts != 0.0):
+                volume += intercepts[:, None, None]
+        
+        if failures:
+            for index, error in failures:
+                logger.error(f"DICOM piksel decode hatası: {error}")
+            volume = np.delete(volume, [index for index, _ in failures], axis=0)
+            metadata['num_slices'] = volume.shape[0]
+        
+        logger.info(f"3D volume oluşturuldu: {volume.shape} ({max_workers} worker)")
+        return volume, metadata
+    
+    def _decode_parallel(self, shape: Tuple[int, int, int], raw_dtype: np.dtype,
+                         tasks: List[Tuple[int, str]],
+                         max_workers: int) -> Tuple[np.ndarray, List[Tuple[int, str]]]:
+        """Slice'ları worker süreçlerinde paylaşımlı belleğe decode et"""
+        nbytes = int(np.prod(shape)) * raw_dtype.itemsize
+        shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        try:
+            # Her worker'a ardışık bir slice bloğu - IPC çağrı sayısı worker kadar
+            chunk_size = -(-len(tasks) // max_workers)
+            chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+            
+            failures = []
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(_decode_slices_into_shared, shm.name, shape, raw_dtype.str, chunk)
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    failures.extend(future.result())
+            
+            raw = np.ndarray(shape, dtype=raw_dtype, buffer=shm.buf)
+            volume = raw.astype(np.float32)
+            del raw
+            return volume, failures
+        finally:
+            shm.close()
+            shm.unlink()
+    
     def extract_dicom_metadata(self, datasets: List[pydicom.Dataset]) -> Dict[str, Any]:
         """DICOM metadata'sını çıkar"""
         try:
@@ -167,36 +374,34 @@ class DICOMProcessor:
             logger.error(f"Numpy array dönüştürme hatası: {str(e)}")
             raise
     
-    def apply_window_level(self, image: np.ndarray, window_center: float, window_width: float) -> np.ndarray:
-        """Window/Level uygula"""
+    def apply_window_level(self, image: np.ndarray, window_center: float, window_width: float,
+                           inplace: bool = False) -> np.ndarray:
+        """Window/Level uygula (tamsayı girdide LUT, float girdide bloklar halinde)"""
         try:
-            window_min = window_center - window_width // 2
-            window_max = window_center + window_width // 2
-            
-            # Window/Level uygula
-            windowed = np.clip(image, window_min, window_max)
-            windowed = ((windowed - window_min) / (window_max - window_min) * 255).astype(np.uint8)
-            
-            return windowed
+            return window_level(image, window_center, window_width, inplace=inplace)
             
         except Exception as e:
             logger.error(f"Window/Level uygulama hatası: {str(e)}")
             return image
     
-    def normalize_volume(self, volume: np.ndarray, metadata: Dict[str, Any]) -> np.ndarray:
-        """3D volume'u normalize et"""
+    def normalize_volume(self, volume: np.ndarray, metadata: Dict[str, Any],
+                         inplace: bool = False) -> np.ndarray:
+        """
+        3D volume'u normalize et
+        
+        inplace=True ise float hacim çalışma tamponu olarak kullanılır (içeriği
+        değişir); hacim boyutunda ek float dizi ayrılmaz.
+        """
         try:
             # Window/Level uygula (CT için)
             if metadata.get('modality') == 'CT':
                 window_center = metadata.get('window_center', 40)
                 window_width = metadata.get('window_width', 400)
                 
-                normalized = self.apply_window_level(volume, window_center, window_width)
+                normalized = self.apply_window_level(volume, window_center, window_width, inplace=inplace)
             else:
                 # Diğer modaliteler için min-max normalizasyon
-                min_val = np.min(volume)
-                max_val = np.max(volume)
-                normalized = ((volume - min_val) / (max_val - min_val) * 255).astype(np.uint8)
+                normalized = minmax_normalize(volume, inplace=inplace)
             
             return normalized
             
@@ -204,20 +409,27 @@ class DICOMProcessor:
             logger.error(f"Volume normalizasyon hatası: {str(e)}")
             return volume
     
-    def extract_2d_slices(self, volume: np.ndarray, metadata: Dict[str, Any]) -> List[np.ndarray]:
-        """3D volume'dan 2D slice'ları çıkar"""
+    def quality_slice_indices(self, volume: np.ndarray) -> List[int]:
+        """Kalite kontrolünden geçen slice indeksleri"""
+        return [i for i in range(volume.shape[0]) if self._is_good_quality_slice(volume[i])]
+    
+    def extract_2d_slices(self, volume: np.ndarray, metadata: Dict[str, Any],
+                          slice_indices: Optional[List[int]] = None) -> List[np.ndarray]:
+        """
+        3D volume'dan 2D slice'ları çıkar
+        
+        slice_indices verilirse (örn. hacim deposunun sidecar kaydından) kalite
+        kontrolü tekrarlanmaz; mmap'li hacimden yalnızca bu slice'lar okunur.
+        """
         try:
-            slices = []
+            if slice_indices is None:
+                slice_indices = self.quality_slice_indices(volume)
             
-            for i in range(volume.shape[0]):
-                slice_2d = volume[i]
-                
-                # Görüntü kalitesini kontrol et
-                if self._is_good_quality_slice(slice_2d):
-                    # Boyutlandır
-                    target_size = (512, 512)
-                    resized = resize(slice_2d, target_size, preserve_range=True).astype(np.uint8)
-                    slices.append(resized)
+            # Boyutlandır (slice'lar tek seferde, cv2 ile)
+            target_size = (512, 512)
+            resized = resize_slices(volume, target_size, slice_indices,
+                                    out=np.empty((len(slice_indices),) + target_size, dtype=np.uint8))
+            slices = list(resized)
             
             logger.info(f"{len(slices)} kaliteli slice çıkarıldı")
             return slices
@@ -250,29 +462,73 @@ class DICOMProcessor:
         except:
             return False
     
-    def process_dicom_series(self, series_path: str, output_format: str = "png") -> Dict[str, Any]:
-        """DICOM serisini işle"""
+    def store_series(self, series_path: str, max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Seriyi normalize edip hacim deposuna bir kez yaz
+        
+        Kaynak seri (dosya ad/boyut/mtime parmak izi) değişmediyse depodaki
+        kayıt yeniden kullanılır; DICOM decode ve normalizasyon atlanır.
+        
+        Returns:
+            Hacim deposu sidecar kaydı
+        """
+        series_path = Path(series_path)
+        series_id = series_id_for(series_path)
+        fingerprint = source_fingerprint(series_path)
+        
+        if self.volume_store.has(series_id, fingerprint):
+            logger.info(f"Hacim depodan kullanılıyor: {series_id}")
+            return self.volume_store.get_entry(series_id)
+        
+        # DICOM serisini 3D volume olarak yükle (başlıklar önce, pikseller paralel)
+        volume, metadata = self.load_volume(series_path, max_workers=max_workers)
+        
+        # Normalize et (float hacim bir daha kullanılmıyor - tampon olarak kullanılır)
+        normalized_volume = self.normalize_volume(volume, metadata, inplace=True)
+        del volume
+        
+        return self.volume_store.put(
+            series_id,
+            normalized_volume,
+            metadata,
+            self.quality_slice_indices(normalized_volume),
+            source_path=str(series_path),
+            fingerprint=fingerprint,
+            # Koleksiyon klasöründe her alt klasör bir seridir
+            collection=series_path.parent.name
+        )
+    
+    def process_dicom_series(self, series_path: str, output_format: str = "png",
+                             max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        DICOM serisini işle
+        
+        Normalize edilmiş hacim önce hacim deposuna yazılır (ya da oradan
+        kullanılır), slice'lar mmap'li hacimden çıkarılır. output_format
+        "volume" ise slice dosyaları yazılmaz; eğitim depoyu doğrudan okur
+        (bkz. create_volume_dataset).
+        """
         try:
             series_path = Path(series_path)
             logger.info(f"DICOM serisi işleniyor: {series_path}")
             
-            # DICOM serisini yükle
-            datasets = self.load_dicom_series(series_path)
-            if not datasets:
-                raise ValueError("DICOM serisi yüklenemedi")
+            entry = self.store_series(series_path, max_workers=max_workers)
+            metadata = entry['metadata']
             
-            # 3D volume oluştur
-            volume, metadata = self.convert_to_numpy_array(datasets)
-            
-            # Normalize et
-            normalized_volume = self.normalize_volume(volume, metadata)
-            
-            # 2D slice'ları çıkar
-            slices_2d = self.extract_2d_slices(normalized_volume, metadata)
-            
-            if not slices_2d:
+            if not entry['quality_slices']:
                 raise ValueError("Kaliteli slice bulunamadı")
             
+            if output_format == "volume":
+                slices_2d = []
+            else:
+                # 2D slice'ları mmap'li hacimden çıkar
+                volume = self.volume_store.open(entry['series_id'])
+                slices_2d = self.extract_2d_slices(volume, metadata, entry['quality_slices'])
+                del volume
+                
+                if not slices_2d:
+                    raise ValueError("Kaliteli slice bulunamadı")
+            
             # Çıktı klasörü oluştur
             patient_id = metadata.get('patient_id', 'unknown')
             modality = metadata.get('modality', 'unknown').lower()
@@ -302,61 +558,240 @@ class DICOMProcessor:
             result = {
                 "series_path": str(series_path),
                 "output_dir": str(output_subdir),
-                "num_slices": len(slices_2d),
+                "series_id": entry['series_id'],
+                "num_slices": len(entry['quality_slices']),
                 "metadata": metadata,
                 "saved_files": saved_files,
                 "processed_at": datetime.now().isoformat()
             }
             
-            logger.info(f"DICOM serisi işlendi: {len(slices_2d)} slice kaydedildi")
+            logger.info(f"DICOM serisi işlendi: {len(entry['quality_slices'])} slice")
             return result
             
         except Exception as e:
             logger.error(f"DICOM seri işleme hatası: {str(e)}")
             raise
     
-    def batch_process_collection(self, collection_dir: str) -> Dict[str, Any]:
-        """Koleksiyon içindeki tüm DICOM serilerini işle"""
+    def batch_process_collection(self, collection_dir: str, output_format: str = "png",
+                                 max_workers: Optional[int] = None,
+                                 max_in_flight: Optional[int] = None,
+                                 resume: bool = True,
+                                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Koleksiyon içindeki tüm DICOM serilerini işle
+        
+        Seriler süreç havuzuna dağıtılır; her tamamlanan seri
+        <koleksiyon>_manifest.jsonl dosyasına bir satır olarak eklenir.
+        resume=True iken manifestoda aynı output_format ile başarılı görünen
+        ve kaynak dosyaları (ad/boyut/mtime parmak izi) o zamandan beri
+        değişmemiş seriler atlanır, bu yüzden yarıda kalan bir çalıştırma
+        kaldığı yerden devam eder.
+        
+        Args:
+            collection_dir: Koleksiyon klasörü (her alt klasör bir seri)
+            output_format: bkz. process_dicom_series
+            max_workers: Süreç sayısı (None ise DICOM_COLLECTION_WORKERS,
+                1 ise mevcut süreçte sıralı işlenir)
+            max_in_flight: Aynı anda işlenen (bellekte hacmi tutulan) en
+                fazla seri sayısı (None ise DICOM_MAX_IN_FLIGHT_SERIES)
+            resume: Manifestodaki tamamlanmış (aynı format, değişmemiş kaynak) serileri atla
+            progress_callback: Her seri sonunda ilerleme sözlüğüyle çağrılır
+        """
         try:
             collection_path = Path(collection_dir)
             logger.info(f"Koleksiyon işleniyor: {collection_path}")
             
             # Tüm seri klasörlerini bul
-            series_dirs = [d for d in collection_path.iterdir() if d.is_dir()]
+            series_dirs = sorted(d for d in collection_path.iterdir() if d.is_dir())
+            
+            manifest_file = self.output_dir / f"{collection_path.name}_manifest.jsonl"
+            completed = self._load_collection_manifest(manifest_file) if resume else {}
             
             results = {
                 "collection_dir": str(collection_path),
                 "total_series": len(series_dirs),
                 "processed_series": 0,
+                "skipped_series": 0,
                 "failed_series": 0,
                 "series_results": [],
                 "processed_at": datetime.now().isoformat()
             }
             
+            # Parmak izi işlemeden önce alınır; işleme sırasında değişen seri
+            # sonraki çalıştırmada yeniden işlenir
+            fingerprints = {series_dir: source_fingerprint(series_dir) for series_dir in series_dirs}
+            
+            pending = []
             for series_dir in series_dirs:
-                try:
-                    logger.info(f"Seri işleniyor: {series_dir.name}")
-                    result = self.process_dicom_series(series_dir)
+                entry = completed.get((str(series_dir), output_format))
+                if entry is not None and entry.get('source_fingerprint') == fingerprints[series_dir]:
+                    results["series_results"].append(entry['result'])
+                    results["skipped_series"] += 1
+                else:
+                    pending.append(series_dir)
+            if results["skipped_series"]:
+                logger.info(f"Manifestodan devam: {results['skipped_series']} seri zaten işlenmiş")
+            
+            max_in_flight = max(1, max_in_flight or DICOM_MAX_IN_FLIGHT_SERIES)
+            max_workers = max(1, min(max_workers or DICOM_COLLECTION_WORKERS, max_in_flight, len(pending) or 1))
+            
+            progress = {
+                "completed": 0,
+                "total": len(pending),
+                "slices": 0,
+                "started": time.perf_counter()
+            }
+            
+            def record(series_dir: Path, result: Optional[Dict[str, Any]], error: Optional[str]):
+                if error is None:
                     results["series_results"].append(result)
                     results["processed_series"] += 1
-                    
-                except Exception as e:
-                    logger.error(f"Seri işleme hatası ({series_dir.name}): {str(e)}")
+                    progress["slices"] += result["num_slices"]
+                else:
+                    logger.error(f"Seri işleme hatası ({series_dir.name}): {error}")
                     results["failed_series"] += 1
-                    continue
+                self._append_collection_manifest(manifest_file, series_dir, output_format,
+                                                 fingerprints[series_dir], result, error)
+                progress["completed"] += 1
+                self._report_collection_progress(progress, progress_callback)
+            
+            if max_workers == 1:
+                for series_dir in pending:
+                    try:
+                        logger.info(f"Seri işleniyor: {series_dir.name}")
+                        record(series_dir, self.process_dicom_series(series_dir, output_format), None)
+                    except Exception as e:
+                        record(series_dir, None, str(e))
+            else:
+                self._process_series_parallel(pending, output_format, max_workers, max_in_flight, record)
+            
+            elapsed = time.perf_counter() - progress["started"]
+            results["elapsed_seconds"] = elapsed
+            results["series_per_second"] = progress["completed"] / elapsed if elapsed > 0 else 0.0
+            results["slices_per_second"] = progress["slices"] / elapsed if elapsed > 0 else 0.0
             
             # Sonucu kaydet
             result_file = self.output_dir / f"{collection_path.name}_batch_result.json"
             with open(result_file, 'w', encoding='utf-8') as f:
                 json.dump(results, f, indent=2, ensure_ascii=False)
             
-            logger.info(f"Koleksiyon işlendi: {results['processed_series']}/{results['total_series']} seri")
+            logger.info(f"Koleksiyon işlendi: {results['processed_series'] + results['skipped_series']}"
+                        f"/{results['total_series']} seri ({results['series_per_second']:.2f} seri/s, "
+                        f"{results['slices_per_second']:.1f} slice/s)")
             return results
             
         except Exception as e:
             logger.error(f"Koleksiyon işleme hatası: {str(e)}")
             raise
     
+    def _process_series_parallel(self, series_dirs: List[Path], output_format: str,
+                                 max_workers: int, max_in_flight: int,
+                                 record: Callable[[Path, Optional[Dict[str, Any]], Optional[str]], None]):
+        """Serileri süreç havuzunda işle; aynı anda en fazla max_in_flight seri"""
+        queue = iter(series_dirs)
+        in_flight = {}
+        
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_collection_worker,
+            initargs=(str(self.output_dir), str(self.volume_store.root))
+        ) as executor:
+            def submit_next() -> bool:
+                series_dir = next(queue, None)
+                if series_dir is None:
+                    return False
+                future = executor.submit(_process_series_in_worker, str(series_dir), output_format)
+                in_flight[future] = series_dir
+                return True
+            
+            while len(in_flight) < max_in_flight and submit_next():
+                pass
+            
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    series_dir = in_flight.pop(future)
+                    try:
+                        record(series_dir, future.result(), None)
+                    except Exception as e:
+                        record(series_dir, None, str(e))
+                    submit_next()
+    
+    @staticmethod
+    def _load_collection_manifest(manifest_file: Path) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """Manifestodaki başarılı seriler: (seri yolu, çıktı formatı) -> manifesto kaydı"""
+        completed = {}
+        if not manifest_file.exists():
+            return completed
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Çökme sırasında yarım kalmış son satır
+                    continue
+                key = (record.get('series_dir'), record.get('output_format'))
+                if record.get('status') == 'done':
+                    completed[key] = record
+                else:
+                    completed.pop(key, None)
+        return completed
+    
+    @staticmethod
+    def _append_collection_manifest(manifest_file: Path, series_dir: Path, output_format: str,
+                                    fingerprint: str, result: Optional[Dict[str, Any]],
+                                    error: Optional[str]):
+        record = {
+            "series_dir": str(series_dir),
+            "output_format": output_format,
+            "source_fingerprint": fingerprint,
+            "status": "done" if error is None else "failed",
+            "result": result,
+            "error": error,
+            "recorded_at": datetime.now().isoformat()
+        }
+        with open(manifest_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+    
+    @staticmethod
+    def _report_collection_progress(progress: Dict[str, Any],
+                                    progress_callback: Optional[Callable[[Dict[str, Any]], None]]):
+        elapsed = time.perf_counter() - progress["started"]
+        stats = {
+            "completed": progress["completed"],
+            "total": progress["total"],
+            "slices": progress["slices"],
+            "elapsed_seconds": elapsed,
+            "series_per_second": progress["completed"] / elapsed if elapsed > 0 else 0.0,
+            "slices_per_second": progress["slices"] / elapsed if elapsed > 0 else 0.0
+        }
+        logger.info(f"İlerleme: {stats['completed']}/{stats['total']} seri, "
+                    f"{stats['series_per_second']:.2f} seri/s, {stats['slices_per_second']:.1f} slice/s")
+        if progress_callback is not None:
+            progress_callback(stats)
+    
+    @staticmethod
+    def _collection_class_name(name: str) -> str:
+        """Koleksiyon/seri adından sınıf adı"""
+        name = name.lower()
+        if "lung" in name:
+            return "lung_cancer"
+        elif "breast" in name:
+            return "breast_cancer"
+        elif "brain" in name:
+            return "brain_tumor"
+        return "other"
+    
+    @staticmethod
+    def _entry_collection(entry: Dict[str, Any]) -> str:
+        """Hacim deposu kaydının koleksiyon adı (eski kayıtlarda kaynak klasörün üstü)"""
+        if entry.get('collection'):
+            return entry['collection']
+        if entry.get('source_path'):
+            return Path(entry['source_path']).parent.name
+        return entry['series_id']
+    
     def create_training_dataset(self, processed_collections: List[str], output_dir: str = "training_dataset") -> Dict[str, Any]:
         """Eğitim veri seti oluştur"""
         try:
@@ -371,6 +806,11 @@ class DICOMProcessor:
             for dir_path in [train_dir, val_dir, test_dir]:
                 dir_path.mkdir(exist_ok=True)
             
+            # Eski hacim manifestosu PNG veri setinin önüne geçmesin
+            volume_manifest = output_path / "volume_dataset.json"
+            if volume_manifest.exists():
+                volume_manifest.unlink()
+            
             dataset_info = {
                 "total_images": 0,
                 "train_images": 0,
@@ -385,14 +825,7 @@ class DICOMProcessor:
                 collection_path = Path(collection_path)
                 
                 # Koleksiyon tipini belirle
-                if "lung" in collection_path.name.lower():
-                    class_name = "lung_cancer"
-                elif "breast" in collection_path.name.lower():
-                    class_name = "breast_cancer"
-                elif "brain" in collection_path.name.lower():
-                    class_name = "brain_tumor"
-                else:
-                    class_name = "other"
+                class_name = self._collection_class_name(collection_path.name)
                 
                 # Sınıf klasörü oluştur
                 for split_dir in [train_dir, val_dir, test_dir]:
@@ -441,6 +874,102 @@ class DICOMProcessor:
             logger.error(f"Eğitim veri seti oluşturma hatası: {str(e)}")
             raise
 
+    
+    def create_volume_dataset(self, output_dir: str = "training_dataset",
+                              series_ids: Optional[List[str]] = None,
+                              collections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Hacim deposundan eğitim veri seti manifestosu oluştur
+        
+        create_training_dataset gibi sınıf başına 70/20/10 bölme yapar, ancak
+        PNG kopyalamak yerine (seri kimliği, slice indeksi) çiftlerini
+        volume_dataset.json'a yazar. TCIAModelTrainer bu manifestoyu bulursa
+        slice'ları depodaki hacimlerden mmap ile okur.
+        
+        Bölme seri düzeyindedir: bir serinin tüm slice'ları aynı bölüme
+        düşer, böylece komşu slice'lar train ile val/test arasında sızmaz.
+        
+        Args:
+            output_dir: Manifestonun yazılacağı klasör
+            series_ids: Yalnızca bu seriler (None ise hepsi)
+            collections: Yalnızca bu koleksiyonların serileri (None ise hepsi)
+        """
+        try:
+            output_path = Path(output_dir)
+            output_path.mkdir(exist_ok=True)
+            
+            entries = self.volume_store.entries()
+            if series_ids is not None:
+                wanted = set(series_ids)
+                entries = [entry for entry in entries if entry['series_id'] in wanted]
+            if collections is not None:
+                wanted_collections = set(collections)
+                entries = [entry for entry in entries
+                           if self._entry_collection(entry) in wanted_collections]
+            
+            # Sınıf başına seriler (seri kimliği sırasıyla, deterministik)
+            class_series: Dict[str, List[Tuple[str, List[int]]]] = {}
+            for entry in sorted(entries, key=lambda entry: entry['series_id']):
+                class_name = self._collection_class_name(self._entry_collection(entry))
+                class_series.setdefault(class_name, []).append(
+                    (entry['series_id'], list(entry['quality_slices']))
+                )
+            
+            splits = {"train": [], "val": [], "test": []}
+            dataset_info = {
+                "total_images": 0,
+                "train_images": 0,
+                "val_images": 0,
+                "test_images": 0,
+                "classes": {},
+                "volume_store": str(self.volume_store.root.resolve()),
+                "num_series": len(entries),
+                "created_at": datetime.now().isoformat()
+            }
+            
+            for class_name, series_list in sorted(class_series.items()):
+                total_images = sum(len(slices) for _, slices in series_list)
+                
+                # Train/Val/Test split (70/20/10), seri bütün olarak atanır:
+                # serinin kümülatif slice sayısındaki orta noktası hangi
+                # aralığa düşüyorsa o bölüme gider
+                train_size = total_images * 0.7
+                val_size = total_images * 0.2
+                if len(series_list) < 3:
+                    logger.warning(f"{class_name}: yalnızca {len(series_list)} seri var, "
+                                   f"bazı bölümler boş kalacak")
+                
+                assigned = 0
+                for series_id, slices in series_list:
+                    midpoint = assigned + len(slices) / 2
+                    if midpoint < train_size:
+                        split = "train"
+                    elif midpoint < train_size + val_size:
+                        split = "val"
+                    else:
+                        split = "test"
+                    splits[split].extend([series_id, slice_index, class_name] for slice_index in slices)
+                    dataset_info[f"{split}_images"] += len(slices)
+                    assigned += len(slices)
+                
+                dataset_info["classes"][class_name] = total_images
+                dataset_info["total_images"] += total_images
+            
+            manifest_file = output_path / "volume_dataset.json"
+            with open(manifest_file, 'w', encoding='utf-8') as f:
+                json.dump({"dataset_info": dataset_info, "splits": splits}, f, ensure_ascii=False)
+            
+            info_file = output_path / "dataset_info.json"
+            with open(info_file, 'w', encoding='utf-8') as f:
+                json.dump(dataset_info, f, indent=2, ensure_ascii=False)
+            
+            logger.info(f"Hacim veri seti oluşturuldu: {dataset_info['total_images']} slice, "
+                        f"{len(entries)} seri")
+            return dataset_info
+            
+        except Exception as e:
+            logger.error(f"Hacim veri seti oluşturma hatası: {str(e)}")
+            raise
 
 def main():
     """Ana fonksiyon - örnek kullanım"""
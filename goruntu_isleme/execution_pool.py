@@ -0,0 +1,148 @@
+"""
+Aşama Bazlı Yürütme Havuzu
+==========================
+
+CPU yoğun görüntü işleme aşamalarını (PIL/OpenCV/torch) asyncio event
+loop'undan alıp sınırlı thread havuzlarında çalıştırır. Her aşamanın kendi
+eşzamanlılık limiti ve bekleme kuyruğu vardır; kuyruk dolduğunda istek
+reddedilir ve API katmanı 503 döner.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Varsayılan aşama konfigürasyonları
+DEFAULT_STAGE_CONFIGS = {
+    'preprocess': {
+        'max_workers': int(os.getenv("STAGE_PREPROCESS_WORKERS", "4")),
+        'max_queue': int(os.getenv("STAGE_PREPROCESS_QUEUE", "16"))
+    },
+    'orthopedic': {
+        'max_workers': int(os.getenv("STAGE_ORTHOPEDIC_WORKERS", "2")),
+        'max_queue': int(os.getenv("STAGE_ORTHOPEDIC_QUEUE", "8"))
+    },
+    'respiratory': {
+        'max_workers': int(os.getenv("STAGE_RESPIRATORY_WORKERS", "2")),
+        'max_queue': int(os.getenv("STAGE_RESPIRATORY_QUEUE", "8"))
+    }
+}
+
+
+class StageSaturatedError(Exception):
+    """Aşama havuzu dolu - istek kabul edilemiyor"""
+
+    def __init__(self, stage: str, retry_after: int = 1):
+        self.stage = stage
+        self.retry_after = retry_after
+        super().__init__(f"İşlem kapasitesi dolu: {stage}")
+
+
+class _Stage:
+    """Tek bir aşamanın thread havuzu ve sayaçları"""
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix=f"stage-{name}"
+        )
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, success: bool):
+        with self.lock:
+            self.in_flight -= 1
+            if success:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+
+class StageExecutor:
+    """Aşama bazlı sınırlı yürütme katmanı"""
+
+    def __init__(self, stage_configs: Optional[Dict[str, Dict[str, int]]] = None):
+        stage_configs = stage_configs or DEFAULT_STAGE_CONFIGS
+        self.stages = {
+            name: _Stage(name, config['max_workers'], config['max_queue'])
+            for name, config in stage_configs.items()
+        }
+
+        logger.info(
+            "Aşama havuzları başlatıldı: " +
+            ", ".join(f"{s.name}({s.max_workers}+{s.max_queue})" for s in self.stages.values())
+        )
+
+    async def run(self, stage_name: str, func: Callable, *args, **kwargs) -> Any:
+        """
+        Fonksiyonu ilgili aşamanın thread havuzunda çalıştır
+
+        Raises:
+            StageSaturatedError: Aşamanın çalışan + bekleyen kapasitesi dolu ise
+        """
+        if stage_name not in self.stages:
+            raise ValueError(f"Bilinmeyen aşama: {stage_name}")
+
+        stage = self.stages[stage_name]
+        if not stage.try_acquire():
+            logger.warning(f"Aşama kapasitesi dolu, istek reddedildi: {stage_name}")
+            raise StageSaturatedError(stage_name)
+
+        try:
+            future = stage.executor.submit(functools.partial(func, *args, **kwargs))
+        except BaseException:
+            stage.release(False)
+            raise
+
+        # Slot, çağıran iptal edilse bile thread'deki iş gerçekten bitince bırakılır
+        future.add_done_callback(
+            lambda f: stage.release(not f.cancelled() and f.exception() is None)
+        )
+        return await asyncio.wrap_future(future)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Aşama istatistiklerini getir"""
+        stats = {}
+        for name, stage in self.stages.items():
+            with stage.lock:
+                stats[name] = {
+                    'max_workers': stage.max_workers,
+                    'max_queue': stage.max_queue,
+                    'in_flight': stage.in_flight,
+                    'utilization_percent': (stage.in_flight / stage.capacity) * 100,
+                    'completed': stage.completed,
+                    'failed': stage.failed,
+                    'rejected': stage.rejected
+                }
+        return stats
+
+    def shutdown(self, wait: bool = True):
+        """Tüm havuzları kapat"""
+        for stage in self.stages.values():
+            stage.executor.shutdown(wait=wait)
+        logger.info("Aşama havuzları kapatıldı")
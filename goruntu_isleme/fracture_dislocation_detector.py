@@ -12,24 +12,32 @@ import numpy as np
 import cv2
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
 import json
+import os
+import hashlib
+import threading
 from datetime import datetime
-from PIL import Image
 import matplotlib.pyplot as plt
 import seaborn as sns
 
 from models.radiology_models import RadiologyCNN, DenseNetRadiology, ResNetRadiology
 from models.model_manager import ModelManager
+from models.model_loader import ModelCache
+from models.inference_backend import BackendRegistry, export_to_onnx, onnx_file
 from dicom_processor import DICOMProcessor
+from imaging_kernels import decode_grayscale, standardize
 
 logger = logging.getLogger(__name__)
 
+# Base64 metin, ham dosya byte'ları ya da decode edilmiş NumPy dizisi
+ImageInput = Union[str, bytes, bytearray, memoryview, np.ndarray]
+
 
 class FractureDislocationDetector:
     """Kırık ve çıkık tespit sınıfı"""
     
-    def __init__(self, models_dir: str = "models"):
+    def __init__(self, models_dir: str = "models", multi_head_manager: Optional[ModelManager] = None):
         self.models_dir = Path(models_dir)
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         
@@ -92,15 +100,59 @@ class FractureDislocationDetector:
             'urgent': ['complex_fracture', 'partial_dislocation', 'hip_fracture'],
             'routine': ['simple_fracture', 'hairline_fracture']
         }
+        
+        # Süreç boyunca bellekte tutulan modeller (model adı -> nn.Module)
+        self.model_cache = ModelCache(
+            max_models=len(self.model_configs),
+            max_memory_mb=int(os.getenv("FRACTURE_MODEL_CACHE_MB", "2048"))
+        )
+        # Cache'teki her model için checkpoint imzası: (mtime_ns, boyut, sha256)
+        self._checkpoint_signatures = {}
+        self._load_lock = threading.Lock()
+        
+        # Çıkarım backend'i (INFERENCE_BACKEND: pytorch | onnxruntime)
+        self.backends = BackendRegistry(self.models_dir)
+        
+        # Paylaşımlı omurgalı çok başlı model: kırık ve çıkık tek forward pass'te
+        # hesaplanır. Checkpoint yoksa ya da bölgenin başlıkları doğrulanmamışsa
+        # (sentetik veri, düşük doğruluk) ayrı modellere düşülür.
+        if multi_head_manager is None and os.getenv("MULTI_HEAD_MODEL_ENABLED", "false").lower() == "true":
+            multi_head_manager = ModelManager(str(self.models_dir))
+        self.multi_head_manager = multi_head_manager
+        
+        # Ana sınıflandırma başlığı API'nin ana tanısının yerine yalnızca açıkça
+        # istenirse ve checkpoint başlığı gerçek veriyle doğrulanmışsa kullanılır
+        self.multi_head_main_classification = (
+            os.getenv("MULTI_HEAD_MAIN_CLASSIFICATION", "false").lower() == "true"
+        )
+        self.multi_head_min_accuracy = float(os.getenv("MULTI_HEAD_MIN_ACCURACY", "95"))
+    
+    def preload_models(self, model_names: Optional[List[str]] = None) -> Dict[str, bool]:
+        """Modelleri önceden belleğe yükle (startup warmup)"""
+        model_names = model_names or list(self.model_configs.keys())
+        logger.info(f"Kırık/çıkık modelleri önceden yükleniyor: {model_names}")
+        
+        status = {}
+        for model_name in model_names:
+            try:
+                self._load_model(model_name)
+                status[model_name] = True
+            except Exception as e:
+                logger.error(f"Model ön yükleme hatası ({model_name}): {str(e)}")
+                status[model_name] = False
+        
+        return status
     
-    def detect_fractures(self, image_data: str, anatomical_region: str = "general") -> Dict[str, Any]:
+    def detect_fractures(self, image_data: ImageInput, anatomical_region: str = "general") -> Dict[str, Any]:
         """Kırık tespiti yap"""
+        return self._detect_fractures_tensor(self._preprocess_image(image_data), anatomical_region)
+    
+    def _detect_fractures_tensor(self, processed_image: torch.Tensor,
+                                 anatomical_region: str) -> Dict[str, Any]:
+        """Ön işlenmiş tensor üzerinde kırık tespiti yap"""
         try:
             logger.info(f"Kırık tespiti başlıyor: {anatomical_region}")
             
-            # Görüntüyü işle
-            processed_image = self._preprocess_image(image_data)
-            
             # Anatomik bölgeye göre model seç
             model_name = self._select_model_for_region(anatomical_region, 'fracture')
             
@@ -116,14 +168,16 @@ class FractureDislocationDetector:
             logger.error(f"Kırık tespiti hatası: {str(e)}")
             raise
     
-    def detect_dislocations(self, image_data: str, joint_type: str = "general") -> Dict[str, Any]:
+    def detect_dislocations(self, image_data: ImageInput, joint_type: str = "general") -> Dict[str, Any]:
         """Çıkık tespiti yap"""
+        return self._detect_dislocations_tensor(self._preprocess_image(image_data), joint_type)
+    
+    def _detect_dislocations_tensor(self, processed_image: torch.Tensor,
+                                    joint_type: str) -> Dict[str, Any]:
+        """Ön işlenmiş tensor üzerinde çıkık tespiti yap"""
         try:
             logger.info(f"Çıkık tespiti başlıyor: {joint_type}")
             
-            # Görüntüyü işle
-            processed_image = self._preprocess_image(image_data)
-            
             # Eklem tipine göre model seç
             model_name = self._select_model_for_joint(joint_type)
             
@@ -139,71 +193,216 @@ class FractureDislocationDetector:
             logger.error(f"Çıkık tespiti hatası: {str(e)}")
             raise
     
-    def comprehensive_orthopedic_analysis(self, image_data: str, 
+    def comprehensive_orthopedic_analysis(self, image_data: ImageInput, 
                                         anatomical_region: str = "general") -> Dict[str, Any]:
-        """Kapsamlı ortopedi analizi"""
+        """
+        Kapsamlı ortopedi analizi
+        
+        Args:
+            image_data: Base64 encoded görüntü, ham byte'lar veya decode edilmiş
+                NumPy dizisi. Dizi verildiğinde yeniden encode/decode yapılmaz.
+            anatomical_region: Anatomik bölge
+        """
         try:
             logger.info(f"Kapsamlı ortopedi analizi: {anatomical_region}")
             
-            results = {
-                'analysis_id': f"ortho_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-                'anatomical_region': anatomical_region,
-                'timestamp': datetime.now().isoformat(),
-                'fracture_analysis': {},
-                'dislocation_analysis': {},
-                'overall_assessment': {},
-                'recommendations': []
-            }
-            
-            # Kırık analizi
-            try:
-                fracture_result = self.detect_fractures(image_data, anatomical_region)
-                results['fracture_analysis'] = fracture_result
-            except Exception as e:
-                logger.warning(f"Kırık analizi hatası: {str(e)}")
-                results['fracture_analysis'] = {'error': str(e)}
-            
-            # Çıkık analizi
-            try:
-                dislocation_result = self.detect_dislocations(image_data, anatomical_region)
-                results['dislocation_analysis'] = dislocation_result
-            except Exception as e:
-                logger.warning(f"Çıkık analizi hatası: {str(e)}")
-                results['dislocation_analysis'] = {'error': str(e)}
-            
-            # Genel değerlendirme
-            results['overall_assessment'] = self._assess_overall_condition(results)
-            
-            # Öneriler
-            results['recommendations'] = self._generate_recommendations(results)
+            # Görüntü tek sefer ön işlenir, tüm modeller aynı tensor'ü kullanır
+            processed_image = self._preprocess_image(image_data)
             
-            return results
+            return self.comprehensive_orthopedic_analysis_tensor(processed_image, anatomical_region)
             
         except Exception as e:
             logger.error(f"Kapsamlı analiz hatası: {str(e)}")
             raise
     
-    def _preprocess_image(self, image_data: str) -> torch.Tensor:
-        """Görüntüyü ön işle"""
+    def preprocess(self, image_data: ImageInput) -> torch.Tensor:
+        """Görüntüyü (1, 1, 512, 512) model girdisine çevir (toplu işler için)"""
+        return self._preprocess_image(image_data)
+    
+    def batch_orthopedic_analysis(self, processed_images: List[torch.Tensor],
+                                  anatomical_region: str = "general") -> List[Dict[str, Any]]:
+        """
+        Ön işlenmiş görüntüleri tek yığılmış tensor ile analiz et
+        
+        Kırık ve çıkık modelleri batch başına bir kez çalışır. Sonuçlar
+        comprehensive_orthopedic_analysis ile aynı formatta ve girdi sırasıyla döner.
+        """
+        if not processed_images:
+            return []
+        
+        batch = torch.cat(processed_images, dim=0)
+        if self.uses_multi_head_orthopedic(anatomical_region):
+            return self._multi_head_orthopedic_batch(batch, anatomical_region)
+        
+        fracture_model = self._select_model_for_region(anatomical_region, 'fracture')
+        dislocation_model = self._select_model_for_joint(anatomical_region)
+        
+        # Tekli analizdeki gibi bir modelin hatası diğerini etkilemez
         try:
-            # Base64 decode
-            import base64
-            import io
-            
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(io.BytesIO(image_bytes)).convert('L')
+            fracture_results = [
+                self._analyze_fracture_result(prediction, anatomical_region)
+                for prediction in self._predict_batch_with_model(fracture_model, batch)
+            ]
+        except Exception as e:
+            logger.warning(f"Kırık analizi hatası: {str(e)}")
+            fracture_results = [{'error': str(e)}] * len(processed_images)
+        
+        try:
+            dislocation_results = [
+                self._analyze_dislocation_result(prediction, anatomical_region)
+                for prediction in self._predict_batch_with_model(dislocation_model, batch)
+            ]
+        except Exception as e:
+            logger.warning(f"Çıkık analizi hatası: {str(e)}")
+            dislocation_results = [{'error': str(e)}] * len(processed_images)
+        
+        all_results = []
+        for fracture_result, dislocation_result in zip(fracture_results, dislocation_results):
+            results = self._empty_orthopedic_results(anatomical_region)
+            results['fracture_analysis'] = dict(fracture_result)
+            results['dislocation_analysis'] = dict(dislocation_result)
+            results['overall_assessment'] = self._assess_overall_condition(results)
+            results['recommendations'] = self._generate_recommendations(results)
+            all_results.append(results)
+        
+        return all_results
+    
+    def comprehensive_orthopedic_analysis_tensor(self, processed_image: torch.Tensor,
+                                                 anatomical_region: str = "general") -> Dict[str, Any]:
+        """Ön işlenmiş tek görüntü için kapsamlı ortopedi analizi"""
+        if self.uses_multi_head_orthopedic(anatomical_region):
+            return self._multi_head_orthopedic_batch(processed_image, anatomical_region)[0]
+        
+        results = self._empty_orthopedic_results(anatomical_region)
+        
+        # Kırık analizi
+        try:
+            fracture_result = self._detect_fractures_tensor(processed_image, anatomical_region)
+            results['fracture_analysis'] = fracture_result
+        except Exception as e:
+            logger.warning(f"Kırık analizi hatası: {str(e)}")
+            results['fracture_analysis'] = {'error': str(e)}
+        
+        # Çıkık analizi
+        try:
+            dislocation_result = self._detect_dislocations_tensor(processed_image, anatomical_region)
+            results['dislocation_analysis'] = dislocation_result
+        except Exception as e:
+            logger.warning(f"Çıkık analizi hatası: {str(e)}")
+            results['dislocation_analysis'] = {'error': str(e)}
+        
+        # Genel değerlendirme
+        results['overall_assessment'] = self._assess_overall_condition(results)
+        
+        # Öneriler
+        results['recommendations'] = self._generate_recommendations(results)
+        
+        return results
+    
+    def _empty_orthopedic_results(self, anatomical_region: str) -> Dict[str, Any]:
+        return {
+            'analysis_id': f"ortho_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            'anatomical_region': anatomical_region,
+            'timestamp': datetime.now().isoformat(),
+            'fracture_analysis': {},
+            'dislocation_analysis': {},
+            'overall_assessment': {},
+            'recommendations': []
+        }
+    
+    def has_multi_head_model(self) -> bool:
+        """Çok başlı model kullanılabilir mi?"""
+        return self.multi_head_manager is not None and self.multi_head_manager.has_multi_head_model()
+    
+    def uses_multi_head_classification(self) -> bool:
+        """Ana tanı çok başlı modelin sınıflandırma başlığından mı gelecek?"""
+        if not self.multi_head_main_classification:
+            return False
+        return self._multi_head_heads_validated(['classification'])
+    
+    def uses_multi_head_orthopedic(self, anatomical_region: str = "general") -> bool:
+        """
+        Bölgenin kırık ve çıkık tahmini çok başlı modelden mi gelecek?
+        
+        Her iki başlık da gerçek veriyle eğitilmiş ve doğrulama eşiğini
+        geçmiş olmalı; aksi halde ayrı modellere düşülür.
+        """
+        return self._multi_head_heads_validated([
+            self._select_model_for_region(anatomical_region, 'fracture'),
+            self._select_model_for_joint(anatomical_region)
+        ])
+    
+    def _multi_head_heads_validated(self, heads: List[str]) -> bool:
+        """Çok başlı checkpoint var ve verilen tüm başlıklar doğrulanmış mı?"""
+        if not self.has_multi_head_model():
+            return False
+        try:
+            return all(
+                self.multi_head_manager.is_head_validated(
+                    head, self.multi_head_min_accuracy, device=str(self.device)
+                )
+                for head in heads
+            )
+        except Exception as e:
+            logger.warning(f"Çok başlı model doğrulama bilgisi okunamadı: {str(e)}")
+            return False
+    
+    def _multi_head_orthopedic_batch(self, batch: torch.Tensor,
+                                     anatomical_region: str) -> List[Dict[str, Any]]:
+        """
+        Kırık ve çıkık başlıklarını (N, C, H, W) batch için tek omurga geçişiyle çalıştır
+        
+        Ana sınıflandırma başlığı yalnızca uses_multi_head_classification()
+        ise aynı geçişe eklenir ve sonucu 'main_classification' altında döner.
+        """
+        fracture_head = self._select_model_for_region(anatomical_region, 'fracture')
+        dislocation_head = self._select_model_for_joint(anatomical_region)
+        with_classification = self.uses_multi_head_classification()
+        heads = [fracture_head, dislocation_head]
+        if with_classification:
+            heads.insert(0, 'classification')
+        
+        batch_predictions = self.multi_head_manager.predict_multi_head_batch(
+            batch,
+            heads=heads,
+            device=str(self.device)
+        )
+        
+        all_results = []
+        for predictions in batch_predictions:
+            results = self._empty_orthopedic_results(anatomical_region)
+            results['fracture_analysis'] = self._analyze_fracture_result(
+                predictions[fracture_head], anatomical_region
+            )
+            results['dislocation_analysis'] = self._analyze_dislocation_result(
+                predictions[dislocation_head], anatomical_region
+            )
+            if with_classification:
+                results['main_classification'] = predictions['classification']
+            results['shared_backbone'] = True
             
-            # NumPy array'e çevir
-            image_array = np.array(image)
+            results['overall_assessment'] = self._assess_overall_condition(results)
+            results['recommendations'] = self._generate_recommendations(results)
+            all_results.append(results)
+        
+        return all_results
+    
+    def _preprocess_image(self, image_data: ImageInput) -> torch.Tensor:
+        """Görüntüyü ön işle"""
+        try:
+            # Grayscale NumPy dizisine çevir
+            image_array = decode_grayscale(image_data)
             
             # Boyutlandır
             resized = cv2.resize(image_array, (512, 512))
             
-            # Normalize et
-            normalized = cv2.normalize(resized, None, 0, 255, cv2.NORM_MINMAX)
+            # Normalize et: min-max 0-255, ardından eğitimdeki A.Normalize
+            # (/255, mean/std) - modeller bu dağılımla eğitildi
+            normalized = cv2.normalize(resized, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_32F)
+            standardized = standardize(normalized)
             
             # Tensor'e çevir
-            tensor = torch.FloatTensor(normalized).unsqueeze(0).unsqueeze(0)
+            tensor = torch.from_numpy(standardized).unsqueeze(0).unsqueeze(0)
             
             return tensor.to(self.device)
             
@@ -230,61 +429,122 @@ class FractureDislocationDetector:
     
     def _predict_with_model(self, model_name: str, image_tensor: torch.Tensor) -> Dict[str, Any]:
         """Model ile tahmin yap"""
+        return self._predict_batch_with_model(model_name, image_tensor)[0]
+    
+    def _predict_batch_with_model(self, model_name: str, batch: torch.Tensor) -> List[Dict[str, Any]]:
+        """(N, C, H, W) batch için tek forward pass ile tahmin yap"""
         try:
-            # Model'i yükle
-            model = self._load_model(model_name)
+            # Backend'i getir (ONNX Runtime ya da PyTorch)
+            backend = self.backends.get(
+                model_name, lambda: (self._load_model(model_name), self.device),
+                self.models_dir / f"{model_name}_best.pth"
+            )
             
             # Tahmin yap
+            outputs = backend.run(batch)
             with torch.no_grad():
-                outputs = model(image_tensor)
-                probabilities = torch.softmax(outputs, dim=1)
-                predicted_class = torch.argmax(probabilities, dim=1)
-                confidence = torch.max(probabilities, dim=1)[0]
+                probabilities = torch.softmax(outputs, dim=1).cpu()
+                confidence, predicted_class = torch.max(probabilities, dim=1)
             
             # Sonuçları hazırla
             config = self.model_configs[model_name]
             class_names = config['class_names']
             
-            result = {
-                'predicted_class': predicted_class.item(),
-                'predicted_class_name': class_names[predicted_class.item()],
-                'confidence': confidence.item(),
-                'probabilities': {
-                    class_names[i]: prob.item() 
-                    for i, prob in enumerate(probabilities[0])
-                },
-                'model_name': model_name
-            }
+            results = []
+            for row in range(probabilities.shape[0]):
+                class_index = predicted_class[row].item()
+                results.append({
+                    'predicted_class': class_index,
+                    'predicted_class_name': class_names[class_index],
+                    'confidence': confidence[row].item(),
+                    'probabilities': {
+                        class_names[i]: prob.item()
+                        for i, prob in enumerate(probabilities[row])
+                    },
+                    'model_name': model_name
+                })
             
-            return result
+            return results
             
         except Exception as e:
             logger.error(f"Model tahmin hatası ({model_name}): {str(e)}")
             raise
     
     def _load_model(self, model_name: str) -> nn.Module:
-        """Model yükle"""
+        """
+        Modeli getir - bellekteki kopya checkpoint değişmediği sürece
+        yeniden kullanılır, yalnızca mtime/hash değiştiğinde yeniden yüklenir
+        
+        Yükleme ModelCache.get_or_load üzerinden yapılır: cache miss bir kez
+        sayılır ve eşzamanlı istekler tek yüklemeyi bekler.
+        """
+        model_path = self.models_dir / f"{model_name}_best.pth"
+        
+        with self._load_lock:
+            # Eski checkpoint'in modeli çıkarılır; get_or_load yeniden yükler
+            if not self._is_checkpoint_current(model_name, model_path):
+                self.model_cache.remove(model_name)
+        
+        return self.model_cache.get_or_load(
+            model_name, lambda: self._load_checkpoint(model_name, model_path)
+        )
+    
+    def _load_checkpoint(self, model_name: str, model_path: Path) -> nn.Module:
+        """Checkpoint'ten modeli oluştur ve imzasını kaydet"""
+        # İmza yüklemeden önce alınır; yükleme sırasında dosya değişirse
+        # bir sonraki çağrıda fark edilir
+        signature = self._checkpoint_signature(model_path)
+        model = self._build_model(model_name, model_path)
+        self._checkpoint_signatures[model_name] = signature
+        return model
+    
+    def export_onnx_models(self, model_names: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+        """Checkpoint'leri dinamik batch eksenli ONNX olarak dışa aktar"""
+        model_names = model_names or list(self.model_configs.keys())
+        exported = {}
+        
+        for model_name in model_names:
+            try:
+                config = self.model_configs[model_name]
+                model_path = self.models_dir / f"{model_name}_best.pth"
+                if not model_path.exists():
+                    logger.warning(f"Checkpoint bulunamadı, ONNX atlandı: {model_name}")
+                    exported[model_name] = None
+                    continue
+                
+                output_path = export_to_onnx(
+                    self._build_model(model_name, model_path),
+                    onnx_file(self.models_dir, model_name),
+                    (config['input_channels'],) + tuple(config['image_size']),
+                    model_path
+                )
+                self.backends.invalidate(model_name)
+                exported[model_name] = str(output_path)
+                
+            except Exception as e:
+                logger.error(f"ONNX dışa aktarma hatası ({model_name}): {str(e)}")
+                exported[model_name] = None
+        
+        return exported
+    
+    def _build_model(self, model_name: str, model_path: Path) -> nn.Module:
+        """Checkpoint'ten model oluştur"""
         try:
             config = self.model_configs[model_name]
-            model_path = self.models_dir / f"{model_name}_best.pth"
-            
-            if not model_path.exists():
-                # Model yoksa yeni oluştur
-                model = config['model_class'](
-                    num_classes=config['num_classes'],
-                    input_channels=config['input_channels']
-                ).to(self.device)
-                logger.warning(f"Model dosyası bulunamadı, yeni model oluşturuldu: {model_name}")
-                return model
-            
-            # Model'i yükle
-            checkpoint = torch.load(model_path, map_location=self.device)
             model = config['model_class'](
                 num_classes=config['num_classes'],
                 input_channels=config['input_channels']
             ).to(self.device)
             
-            model.load_state_dict(checkpoint['model_state_dict'])
+            if not model_path.exists():
+                # Model yoksa yeni oluştur
+                logger.warning(f"Model dosyası bulunamadı, yeni model oluşturuldu: {model_name}")
+            else:
+                # Model'i yükle
+                checkpoint = torch.load(model_path, map_location=self.device)
+                model.load_state_dict(checkpoint['model_state_dict'])
+                logger.info(f"Model yüklendi: {model_name}")
+            
             model.eval()
             
             return model
@@ -293,6 +553,49 @@ class FractureDislocationDetector:
             logger.error(f"Model yükleme hatası ({model_name}): {str(e)}")
             raise
     
+    def _checkpoint_signature(self, model_path: Path) -> Optional[Tuple[int, int, Optional[str]]]:
+        """Checkpoint dosyasının (mtime_ns, boyut, sha256) imzası"""
+        if not model_path.exists():
+            return None
+        
+        stat = model_path.stat()
+        return (stat.st_mtime_ns, stat.st_size, self._file_hash(model_path))
+    
+    def _is_checkpoint_current(self, model_name: str, model_path: Path) -> bool:
+        """Bellekteki model diskteki checkpoint ile aynı mı?"""
+        if model_name not in self._checkpoint_signatures:
+            return False
+        
+        cached_signature = self._checkpoint_signatures[model_name]
+        if not model_path.exists():
+            return cached_signature is None
+        if cached_signature is None:
+            return False
+        
+        # Hızlı yol: mtime ve boyut aynıysa dosya değişmemiştir
+        stat = model_path.stat()
+        cached_mtime, cached_size, cached_hash = cached_signature
+        if stat.st_mtime_ns == cached_mtime and stat.st_size == cached_size:
+            return True
+        
+        # mtime değişti - içerik gerçekten değişti mi kontrol et
+        current_hash = self._file_hash(model_path)
+        if current_hash == cached_hash:
+            self._checkpoint_signatures[model_name] = (stat.st_mtime_ns, stat.st_size, current_hash)
+            return True
+        
+        logger.info(f"Checkpoint değişti, model yeniden yüklenecek: {model_name}")
+        return False
+    
+    @staticmethod
+    def _file_hash(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+        """Dosyanın SHA-256 özeti"""
+        sha256 = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+    
     def _analyze_fracture_result(self, prediction: Dict[str, Any], 
                                anatomical_region: str) -> Dict[str, Any]:
         """Kırık sonucunu analiz et"""
@@ -8,10 +8,8 @@ normalizasyon ve kalite kontrol işlemlerini gerçekleştirir.
 
 import cv2
 import numpy as np
-import base64
-import io
 from PIL import Image, ImageEnhance
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Union
 import logging
 from pathlib import Path
 import json
@@ -34,10 +32,15 @@ import pydicom
 import nibabel as nib
 import SimpleITK as sitk
 
-from .schemas import ImageType, ImageMetadata
+from schemas import ImageType, ImageMetadata
+from imaging_kernels import decode_grayscale, estimate_noise_level, window_level
 
 logger = logging.getLogger(__name__)
 
+# Pipeline'a verilebilecek görüntü kaynakları: base64 metin, ham dosya byte'ları
+# (bytes/memoryview) ya da zaten decode edilmiş NumPy dizisi
+ImageInput = Union[str, bytes, bytearray, memoryview, np.ndarray]
+
 
 class ImageProcessor:
     """Radyolojik görüntü işleme sınıfı"""
@@ -51,21 +54,39 @@ class ImageProcessor:
             'max_noise_level': 0.3
         }
         
-    def process_image(self, image_data: str, metadata: ImageMetadata) -> Dict[str, Any]:
+    def process_image(self, image_data: ImageInput, metadata: ImageMetadata) -> Dict[str, Any]:
         """
         Görüntüyü işle ve analiz için hazırla
         
         Args:
-            image_data: Base64 encoded görüntü verisi
+            image_data: Base64 encoded görüntü, ham byte'lar veya NumPy dizisi
             metadata: Görüntü metadata bilgileri
             
         Returns:
             İşlenmiş görüntü ve kalite bilgileri
         """
         try:
-            # Base64'ten görüntüyü decode et
-            image = self._decode_base64_image(image_data)
+            # Görüntüyü decode et
+            image = self.decode_image(image_data)
+            
+            return self.process_image_array(image, metadata)
             
+        except Exception as e:
+            logger.error(f"Görüntü işleme hatası: {str(e)}")
+            raise
+    
+    def process_image_array(self, image: np.ndarray, metadata: ImageMetadata) -> Dict[str, Any]:
+        """
+        Decode edilmiş görüntüyü işle ve analiz için hazırla
+        
+        Args:
+            image: Grayscale uint8 görüntü dizisi
+            metadata: Görüntü metadata bilgileri
+            
+        Returns:
+            İşlenmiş görüntü ve kalite bilgileri
+        """
+        try:
             # Görüntü kalitesini kontrol et
             quality_score = self._assess_image_quality(image)
             
@@ -94,26 +115,17 @@ class ImageProcessor:
             logger.error(f"Görüntü işleme hatası: {str(e)}")
             raise
     
-    def _decode_base64_image(self, image_data: str) -> np.ndarray:
-        """Base64 verisini görüntüye çevir"""
+    def decode_image(self, image_data: ImageInput) -> np.ndarray:
+        """
+        Görüntü kaynağını grayscale uint8 diziye çevir
+        
+        NumPy dizileri kopyalanmadan kullanılır, ham byte'lar base64
+        dönüşümü yapılmadan doğrudan decode edilir.
+        """
         try:
-            # Base64 decode
-            image_bytes = base64.b64decode(image_data)
-            
-            # PIL Image ile aç
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Grayscale'e çevir
-            if image.mode != 'L':
-                image = image.convert('L')
-            
-            # NumPy array'e çevir
-            image_array = np.array(image, dtype=np.uint8)
-            
-            return image_array
-            
+            return decode_grayscale(image_data)
         except Exception as e:
-            logger.error(f"Base64 decode hatası: {str(e)}")
+            logger.error(f"Görüntü decode hatası: {str(e)}")
             raise
     
     def _assess_image_quality(self, image: np.ndarray) -> Dict[str, Any]:
@@ -150,9 +162,7 @@ class ImageProcessor:
         """Gürültü seviyesini tahmin et"""
         try:
             # Laplacian variance ile gürültü tahmini
-            laplacian_var = cv2.Laplacian(image, cv2.CV_64F).var()
-            noise_level = min(1.0, laplacian_var / 1000.0)
-            return noise_level
+            return estimate_noise_level(image)
         except:
             return 0.5
     
@@ -228,13 +238,7 @@ class ImageProcessor:
     
     def _apply_ct_window(self, image: np.ndarray, window_center: int, window_width: int) -> np.ndarray:
         """CT windowing uygula"""
-        window_min = window_center - window_width // 2
-        window_max = window_center + window_width // 2
-        
-        windowed = np.clip(image, window_min, window_max)
-        windowed = ((windowed - window_min) / (window_max - window_min) * 255).astype(np.uint8)
-        
-        return windowed
+        return window_level(image, window_center, window_width)
     
     def _simple_bias_correction(self, image: np.ndarray) -> np.ndarray:
         """Basit bias field correction"""
@@ -314,11 +318,11 @@ class ImageProcessor:
         
         return size_mapping.get(image_type, (256, 256))
     
-    def validate_image(self, image_data: str, metadata: ImageMetadata) -> Dict[str, Any]:
+    def validate_image(self, image_data: ImageInput, metadata: ImageMetadata) -> Dict[str, Any]:
         """Görüntüyü doğrula"""
         try:
-            # Base64 decode
-            image = self._decode_base64_image(image_data)
+            # Decode
+            image = self.decode_image(image_data)
             
             # Boyut kontrolü
             if image.shape[0] < self.quality_thresholds['min_resolution'][0] or \
@@ -0,0 +1,302 @@
+"""
+Görüntüleme Çekirdekleri
+========================
+
+DICOMProcessor ve ImageProcessor'ın ortak window/level, normalizasyon ve
+slice boyutlandırma çekirdekleri ile API, mobil API ve kırık dedektörünün
+paylaştığı grayscale görüntü decode'u. Eski uygulamalar her adımda (clip,
+çıkarma, bölme, astype) hacim boyutunda yeni bir float dizi ayırıyordu;
+buradaki çekirdekler:
+
+    - 8/16 bit tamsayı girdilerde window/level'i önceden hesaplanmış bir
+      lookup table (LUT) ile tek geçişte uygular - float ara dizi yoktur.
+    - Float girdilerde işlemi slice blokları halinde, blok boyutunda tek bir
+      çalışma tamponu üzerinde yapar (inplace=True ise girdinin kendisi
+      tampon olarak kullanılır). İşlem sırası eskisiyle aynıdır, sonuç bit
+      düzeyinde aynıdır.
+    - Slice boyutlandırmayı slice'ları kanal olarak yığıp bloklar halinde
+      tek cv2.resize çağrısıyla yapar.
+
+Karşılaştırma için: benchmark_imaging_kernels.py
+"""
+
+import base64
+import io
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+
+# Float yolunda aynı anda işlenen slice sayısı (çalışma tamponu boyutu)
+SLAB_SLICES = 16
+
+# cv2 bir görüntüde en fazla 512 kanal destekler (CV_CN_MAX)
+RESIZE_MAX_CHANNELS = 512
+
+# INTER_AREA yalnızca 4 kanala kadar çalışır (cv2 resize.cpp: cn <= 4)
+RESIZE_AREA_MAX_CHANNELS = 4
+
+# Eğitim dönüşümleriyle aynı: A.Normalize(mean=[0.485], std=[0.229], max_pixel_value=255)
+TRAIN_NORMALIZE_MEAN = 0.485
+TRAIN_NORMALIZE_STD = 0.229
+
+
+def window_bounds(window_center: float, window_width: float) -> Tuple[float, float]:
+    """Window alt/üst sınırları (eski uygulamalarla aynı tamsayı bölmesi)"""
+    return window_center - window_width // 2, window_center + window_width // 2
+
+
+@lru_cache(maxsize=64)
+def window_lut(dtype_str: str, window_center: float, window_width: float) -> np.ndarray:
+    """
+    8/16 bit tamsayı dtype için window/level lookup table'ı
+
+    Tablo ham bit deseniyle (işaretsiz görünüm) indekslenir; işaretli
+    tiplerde her indeksin karşılık geldiği değer tabloya işlenmiştir.
+    """
+    dtype = np.dtype(dtype_str)
+    unsigned = np.dtype(f"uint{dtype.itemsize * 8}")
+    # Tamsayı değerler float64'te tam temsil edilir; eski yolun float64 sonucu ile aynı
+    values = np.arange(2 ** (dtype.itemsize * 8), dtype=unsigned).view(dtype).astype(np.float64)
+
+    window_min, window_max = window_bounds(window_center, window_width)
+    windowed = np.clip(values, window_min, window_max)
+    if window_max > window_min:
+        lut = ((windowed - window_min) / (window_max - window_min) * 255).astype(np.uint8)
+    else:
+        lut = np.where(values >= window_max, 255, 0).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def _slabs(length: int, slab: int):
+    for start in range(0, length, slab):
+        yield slice(start, min(start + slab, length))
+
+
+def window_level(image: np.ndarray,
+                 window_center: float,
+                 window_width: float,
+                 out: Optional[np.ndarray] = None,
+                 inplace: bool = False) -> np.ndarray:
+    """
+    Window/Level uygula, uint8 döndür
+
+    Args:
+        image: 2D görüntü ya da (slice, satır, sütun) hacim
+        window_center, window_width: Pencere merkezi ve genişliği
+        out: Sonucun yazılacağı uint8 dizi (aynı şekil)
+        inplace: Float girdide girdiyi çalışma tamponu olarak kullan
+            (girdi değişir, ek float bellek ayrılmaz)
+    """
+    if out is None:
+        out = np.empty(image.shape, dtype=np.uint8)
+
+    if image.dtype.kind in 'iu' and image.dtype.itemsize <= 2:
+        lut = window_lut(image.dtype.str, float(window_center), float(window_width))
+        index_dtype = np.dtype(f"uint{image.dtype.itemsize * 8}")
+        np.take(lut, np.ascontiguousarray(image).view(index_dtype), out=out, mode='clip')
+        return out
+
+    window_min, window_max = window_bounds(window_center, window_width)
+    scale = window_max - window_min
+
+    if image.dtype.kind != 'f':
+        # Büyük tamsayılar eskisi gibi float64'te hesaplanır
+        image = image.astype(np.float64)
+        inplace = True
+
+    if image.ndim < 3:
+        blocks = [slice(None)]
+    else:
+        blocks = _slabs(image.shape[0], SLAB_SLICES)
+
+    scratch = None
+    for block in blocks:
+        source = image[block]
+        if inplace:
+            work = source
+        else:
+            if scratch is None or scratch.shape != source.shape:
+                scratch = np.empty(source.shape, dtype=image.dtype)
+            work = scratch
+        np.clip(source, window_min, window_max, out=work)
+        if scale > 0:
+            work -= window_min
+            work /= scale
+            work *= 255
+        else:
+            np.greater_equal(work, window_max, out=work, casting='unsafe')
+            work *= 255
+        np.copyto(out[block], work, casting='unsafe')
+
+    return out
+
+
+def minmax_normalize(volume: np.ndarray,
+                     out: Optional[np.ndarray] = None,
+                     inplace: bool = False) -> np.ndarray:
+    """
+    Min-max normalizasyonu ile uint8'e dönüştür
+
+    Sabit hacimde (max == min) sıfır döner.
+    """
+    if out is None:
+        out = np.empty(volume.shape, dtype=np.uint8)
+
+    min_val = volume.min()
+    max_val = volume.max()
+    value_range = max_val - min_val
+    if value_range == 0:
+        out[...] = 0
+        return out
+
+    if volume.dtype.kind != 'f':
+        volume = volume.astype(np.float64)
+        inplace = True
+
+    if volume.ndim < 3:
+        blocks = [slice(None)]
+    else:
+        blocks = _slabs(volume.shape[0], SLAB_SLICES)
+
+    scratch = None
+    for block in blocks:
+        source = volume[block]
+        if inplace:
+            work = source
+        else:
+            if scratch is None or scratch.shape != source.shape:
+                scratch = np.empty(source.shape, dtype=volume.dtype)
+            work = scratch
+        np.subtract(source, min_val, out=work)
+        work /= value_range
+        work *= 255
+        np.copyto(out[block], work, casting='unsafe')
+
+    return out
+
+
+def standardize(image: np.ndarray,
+                mean: float = TRAIN_NORMALIZE_MEAN,
+                std: float = TRAIN_NORMALIZE_STD) -> np.ndarray:
+    """
+    0-255 görüntüyü model girdisine çevir: (x / 255 - mean) / std
+
+    MedicalImageDataset'in A.Normalize adımıyla aynıdır; tek float32
+    tampon üzerinde yerinde hesaplanır.
+    """
+    out = image.astype(np.float32)
+    out /= 255.0
+    out -= mean
+    out /= std
+    return out
+
+
+def resize_slices(volume: np.ndarray,
+                  target_size: Tuple[int, int],
+                  indices: Optional[Sequence[int]] = None,
+                  interpolation: Optional[int] = None,
+                  out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Hacmin slice'larını tek seferde boyutlandır
+
+    Slice'lar (satır, sütun, kanal) düzeninde yığılıp en fazla
+    RESIZE_MAX_CHANNELS'lık (INTER_AREA'da RESIZE_AREA_MAX_CHANNELS'lık)
+    bloklar halinde cv2.resize'a verilir. Sonuç slice slice cv2.resize ile
+    aynıdır.
+
+    Args:
+        volume: (slice, satır, sütun) hacim (mmap olabilir)
+        target_size: (satır, sütun) hedef boyut
+        indices: Yalnızca bu slice'lar (None ise hepsi)
+        interpolation: cv2 interpolasyonu (None ise küçültmede INTER_AREA,
+            büyütmede INTER_LINEAR)
+        out: (len(indices), satır, sütun) çıktı dizisi
+
+    Returns:
+        (len(indices), satır, sütun) dizi
+    """
+    if indices is None:
+        indices = range(volume.shape[0])
+    indices = list(indices)
+
+    height, width = target_size
+    if out is None:
+        out = np.empty((len(indices), height, width), dtype=volume.dtype)
+    if not indices:
+        return out
+
+    if interpolation is None:
+        downscale = volume.shape[1] > height or volume.shape[2] > width
+        interpolation = cv2.INTER_AREA if downscale else cv2.INTER_LINEAR
+
+    max_channels = RESIZE_AREA_MAX_CHANNELS if interpolation == cv2.INTER_AREA else RESIZE_MAX_CHANNELS
+    for start in range(0, len(indices), max_channels):
+        block_indices = indices[start:start + max_channels]
+        # (satır, sütun, kanal) düzeni - cv2 kanalları birlikte işler
+        stacked = np.ascontiguousarray(np.moveaxis(volume[block_indices], 0, -1))
+        resized = cv2.resize(stacked, (width, height), interpolation=interpolation)
+        if resized.ndim == 2:
+            resized = resized[:, :, None]
+        out[start:start + len(block_indices)] = np.moveaxis(resized, -1, 0)
+
+    return out
+
+
+def estimate_noise_level(image: np.ndarray) -> float:
+    """
+    Laplacian varyansı ile 0-1 ölçekli gürültü tahmini
+
+    ImageProcessor'ın kalite skoru ve RespiratoryEmergencyDetector'ın
+    denoise atlama eşiği aynı ölçeği kullanır.
+    """
+    laplacian_var = cv2.Laplacian(image, cv2.CV_64F).var()
+    return min(1.0, laplacian_var / 1000.0)
+
+
+def to_grayscale(image: np.ndarray) -> np.ndarray:
+    """Diziyi grayscale uint8 formatına getir (gerekirse)"""
+    if image.ndim == 3:
+        if image.shape[2] == 4:
+            image = cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
+        elif image.shape[2] == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        else:
+            image = image[:, :, 0]
+
+    if image.dtype != np.uint8:
+        image = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+
+    return image
+
+
+def decode_grayscale(image_data: Union[str, bytes, bytearray, memoryview, np.ndarray]) -> np.ndarray:
+    """
+    Görüntü kaynağını grayscale uint8 diziye çevir
+
+    NumPy dizileri gerekmedikçe kopyalanmaz; base64 metin çözülür, ham
+    byte'lar kopyalanmadan OpenCV ile decode edilir. OpenCV'nin açamadığı
+    formatlar PIL'e düşer.
+
+    Raises:
+        ValueError: Veri görüntü olarak decode edilemezse
+    """
+    if isinstance(image_data, np.ndarray):
+        return to_grayscale(image_data)
+
+    if isinstance(image_data, str):
+        image_data = base64.b64decode(image_data)
+
+    image = cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+    if image is not None:
+        return image
+
+    try:
+        with Image.open(io.BytesIO(image_data)) as pil_image:
+            return to_grayscale(np.array(pil_image.convert('L')))
+    except Exception as e:
+        raise ValueError(f"Görüntü decode edilemedi: {e}") from e
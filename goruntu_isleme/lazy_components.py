@@ -0,0 +1,170 @@
+"""
+Tembel (Lazy) Bileşenler
+========================
+
+API'nin ağır bağımlılıkları (torch, torchvision, OpenCV, dedektörler) modül
+import'unda değil, ilk kullanıldıkları anda yüklenir. Böylece uygulama
+birkaç yüz milisaniyede ayağa kalkar, sağlık kontrolleri hemen yanıt verir
+ve hiç kullanılmayan alt sistemler belleğe alınmaz.
+
+    components = ComponentRegistry()
+    torch = components.module('torch')
+    detector = components.register('detector', create_detector,
+                                   warmup=lambda d: d.preload_models())
+
+    detector.analyze(...)          # ilk erişimde oluşturulur
+    components.warmup('detector')  # açık ısınma (startup'ta arka planda)
+
+LazyComponent nesnesi sarmaladığı nesnenin vekilidir: öznitelik okuma ve
+yazma gerçek nesneye iletilir. `loaded` ile nesneyi yüklemeden durum
+sorgulanabilir.
+"""
+
+import importlib
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# LazyComponent'in kendi öznitelikleri (vekil iletimi dışında tutulur)
+_OWN_ATTRIBUTES = frozenset({
+    'name', '_factory', '_warmup', '_instance', '_lock', '_error',
+    'load_seconds', 'warmup_seconds'
+})
+
+
+class LazyComponent(Generic[T]):
+    """İlk erişimde factory ile oluşturulan, thread-safe bileşen vekili"""
+
+    def __init__(self,
+                 name: str,
+                 factory: Callable[[], T],
+                 warmup: Optional[Callable[[T], Any]] = None):
+        """
+        Args:
+            name: Bileşen adı (durum raporları için)
+            factory: Bileşeni oluşturan fonksiyon (import'lar burada yapılır)
+            warmup: Oluşturulduktan sonra isteğe bağlı ısınma adımı
+                    (model ağırlıklarını yükleme, ilk çıkarım vb.)
+        """
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_warmup', warmup)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+        object.__setattr__(self, '_error', None)
+        object.__setattr__(self, 'load_seconds', None)
+        object.__setattr__(self, 'warmup_seconds', None)
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def get(self) -> T:
+        """Bileşeni döndür; gerekirse oluştur"""
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                start_time = time.perf_counter()
+                try:
+                    instance = self._factory()
+                except Exception as e:
+                    object.__setattr__(self, '_error', str(e))
+                    logger.error(f"Bileşen yüklenemedi ({self.name}): {e}")
+                    raise
+                object.__setattr__(self, 'load_seconds', time.perf_counter() - start_time)
+                object.__setattr__(self, '_error', None)
+                object.__setattr__(self, '_instance', instance)
+                logger.info(f"Bileşen yüklendi: {self.name} ({self.load_seconds * 1000:.0f}ms)")
+            return self._instance
+
+    def warmup(self) -> T:
+        """Bileşeni oluştur ve ısınma adımını çalıştır"""
+        instance = self.get()
+        if self.warmup_seconds is None:
+            # Isınma adımı olmayan bileşen oluşturulunca ısınmış sayılır
+            start_time = time.perf_counter()
+            if self._warmup is not None:
+                self._warmup(instance)
+            object.__setattr__(self, 'warmup_seconds', time.perf_counter() - start_time)
+            logger.info(f"Bileşen ısındı: {self.name} ({self.warmup_seconds * 1000:.0f}ms)")
+        return instance
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'loaded': self.loaded,
+            'load_ms': round(self.load_seconds * 1000, 1) if self.load_seconds is not None else None,
+            'warmed_up': self.warmup_seconds is not None,
+            'warmup_ms': round(self.warmup_seconds * 1000, 1) if self.warmup_seconds is not None else None,
+            'error': self._error
+        }
+
+    def __getattr__(self, attribute: str) -> Any:
+        return getattr(self.get(), attribute)
+
+    def __setattr__(self, attribute: str, value: Any):
+        if attribute in _OWN_ATTRIBUTES:
+            object.__setattr__(self, attribute, value)
+        else:
+            setattr(self.get(), attribute, value)
+
+    def __repr__(self) -> str:
+        return f"<LazyComponent {self.name} loaded={self.loaded}>"
+
+
+class ComponentRegistry:
+    """Adlandırılmış tembel bileşenler ve ısınma kancaları"""
+
+    def __init__(self):
+        self._components: Dict[str, LazyComponent] = {}
+
+    def register(self,
+                 name: str,
+                 factory: Callable[[], T],
+                 warmup: Optional[Callable[[T], Any]] = None) -> LazyComponent:
+        component = LazyComponent(name, factory, warmup)
+        self._components[name] = component
+        return component
+
+    def module(self, module_name: str) -> LazyComponent:
+        """İlk öznitelik erişiminde import edilen modül vekili"""
+        return self.register(module_name, lambda: importlib.import_module(module_name))
+
+    def __getitem__(self, name: str) -> LazyComponent:
+        return self._components[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._components
+
+    def loaded(self, name: str) -> bool:
+        return name in self._components and self._components[name].loaded
+
+    def warmup(self, names: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Bileşenleri sırayla oluştur ve ısıt (bloklar; thread'de çalıştırılmalı)
+
+        Hata veren bileşen loglanır, diğerleri ısıtılmaya devam eder.
+
+        Returns:
+            Başarıyla ısınan bileşen adları
+        """
+        warmed = []
+        for name in (self._components if names is None else names):
+            if name not in self._components:
+                logger.warning(f"Bilinmeyen bileşen, ısınma atlandı: {name}")
+                continue
+            try:
+                self._components[name].warmup()
+                warmed.append(name)
+            except Exception as e:
+                logger.error(f"Isınma hatası ({name}): {e}")
+        return warmed
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: component.status() for name, component in self._components.items()}
@@ -23,15 +23,16 @@ from pathlib import Path
 import torch
 import torchvision.transforms as transforms
 import numpy as np
-from PIL import Image
-import base64
-import io
 import cv2
 
 # Model import'ları
 from real_data_training import RealDataTrainer, AdvancedMedicalCNN
 from fracture_dislocation_detector import FractureDislocationDetector
-from image_processor import ImageProcessor
+from image_processor import ImageProcessor, ImageInput
+from imaging_kernels import decode_grayscale
+from result_cache import ResultCache, cached_checkpoint_fingerprint
+from batch_executor import BatchExecutor
+from upload_ingest import UploadSizeLimitMiddleware, UploadTooLargeError, open_upload
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -55,6 +56,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Yükleme gövdesi akarken boyut limiti (mobil: 10MB)
+MOBILE_UPLOAD_MAX_BYTES = 10 * 1024 * 1024
+app.add_middleware(UploadSizeLimitMiddleware, limits={"/mobile/upload-analyze": MOBILE_UPLOAD_MAX_BYTES})
+
 # Güvenlik
 security = HTTPBearer()
 
@@ -71,6 +76,13 @@ medical_ai_trainer = None
 fracture_detector = None
 image_processor = None
 
+# Aynı görüntünün yeniden gönderimleri (mobil retry) için sonuç cache'i
+mobile_analysis_cache = ResultCache('mobile_analysis')
+MAIN_MODEL_DIR = Path("trained_models/real_data_medical_ai")
+
+# Toplu analiz fan-out'u (kendi thread havuzu)
+batch_executor = BatchExecutor()
+
 
 class MobileAnalysisRequest(BaseModel):
     """Mobil analiz isteği"""
@@ -134,7 +146,7 @@ async def load_mobile_models():
         logger.info("Mobil modeller yükleniyor...")
         
         # Model dosyalarını kontrol et
-        model_path = Path("trained_models/real_data_medical_ai")
+        model_path = MAIN_MODEL_DIR
         
         if model_path.exists():
             # Ana model
@@ -191,6 +203,22 @@ async def mobile_analyze_image(
     api_key: str = Depends(verify_mobile_api_key)
 ):
     """Mobil görüntü analizi - optimize edilmiş"""
+    return await _run_mobile_analysis(
+        request.image_data, request.analysis_type, request.anatomical_region
+    )
+
+
+async def _run_mobile_analysis(image_source: ImageInput, analysis_type: str,
+                               anatomical_region: str) -> MobileAnalysisResult:
+    """
+    Mobil analiz akışı
+    
+    Args:
+        image_source: Base64 metin (JSON yolu) ya da ham byte'lar /
+            memoryview (yükleme yolu)
+        analysis_type: basic, comprehensive veya emergency
+        anatomical_region: Anatomik bölge
+    """
     try:
         start_time = datetime.now()
         
@@ -205,15 +233,15 @@ async def mobile_analyze_image(
             )
         
         # Görüntüyü işle
-        processed_image = await process_mobile_image(request.image_data)
+        processed_image = await process_mobile_image(image_source)
         
         # Analiz tipine göre analiz yap
-        if request.analysis_type == "basic":
-            analysis_result = await basic_mobile_analysis(processed_image, request)
-        elif request.analysis_type == "emergency":
-            analysis_result = await emergency_mobile_analysis(processed_image, request)
+        if analysis_type == "basic":
+            analysis_result = await basic_mobile_analysis(processed_image, anatomical_region)
+        elif analysis_type == "emergency":
+            analysis_result = await emergency_mobile_analysis(processed_image, anatomical_region)
         else:  # comprehensive
-            analysis_result = await comprehensive_mobile_analysis(processed_image, request)
+            analysis_result = await comprehensive_mobile_analysis(processed_image, anatomical_region)
         
         # Sonuç oluştur
         result = MobileAnalysisResult(
@@ -229,6 +257,8 @@ async def mobile_analyze_image(
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Mobil analiz hatası: {str(e)}")
         raise HTTPException(
@@ -263,33 +293,28 @@ async def mobile_batch_analyze(
                 detail="Modeller yüklenemedi"
             )
         
-        # Toplu analiz
+        # Toplu analiz - decode/ön işleme eşzamanlı, modeller yığılmış tensor ile
+        items = await batch_executor.run(
+            request.images,
+            prepare=lambda image_data: _prepare_mobile_batch_item(image_data, "general"),
+            infer_batch=lambda prepared: _comprehensive_mobile_batch(prepared, "general")
+        )
+        
         results = []
-        for i, image_data in enumerate(request.images):
-            try:
-                processed_image = await process_mobile_image(image_data)
-                
-                mobile_request = MobileAnalysisRequest(
-                    image_data=image_data,
-                    analysis_type=request.analysis_type,
-                    anatomical_region="general"
-                )
-                
-                analysis_result = await comprehensive_mobile_analysis(processed_image, mobile_request)
-                
+        for item in items:
+            if item.ok:
                 results.append({
-                    "image_index": i,
+                    "image_index": item.index,
                     "success": True,
-                    "diagnosis": analysis_result['diagnosis'],
-                    "confidence": analysis_result['confidence'],
-                    "urgency_level": analysis_result['urgency_level']
+                    "diagnosis": item.value['diagnosis'],
+                    "confidence": item.value['confidence'],
+                    "urgency_level": item.value['urgency_level']
                 })
-                
-            except Exception as e:
+            else:
                 results.append({
-                    "image_index": i,
+                    "image_index": item.index,
                     "success": False,
-                    "error": str(e)
+                    "error": str(item.error)
                 })
         
         # Sonuç oluştur
@@ -331,29 +356,18 @@ async def mobile_upload_analyze(
                 detail="Sadece görüntü dosyaları kabul edilir"
             )
         
-        # Dosya boyutu kontrolü (10MB limit - mobil için)
-        file_size = 0
-        content = await file.read()
-        file_size = len(content)
+        # Dosya boyutu kontrolü (10MB limit - mobil için) - gövde akarken
+        # middleware, spool edilmiş dosya üzerinde burada
+        try:
+            upload = await open_upload(file, MOBILE_UPLOAD_MAX_BYTES)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        file_size = upload.size
         
-        if file_size > 10 * 1024 * 1024:  # 10MB
-            raise HTTPException(
-                status_code=400,
-                detail="Dosya boyutu 10MB'dan büyük olamaz"
-            )
-        
-        # Base64'e çevir
-        image_data = base64.b64encode(content).decode('utf-8')
-        
-        # Analiz isteği oluştur
-        request = MobileAnalysisRequest(
-            image_data=image_data,
-            analysis_type=analysis_type,
-            anatomical_region=anatomical_region
-        )
-        
-        # Analiz yap
-        result = await mobile_analyze_image(request, api_key)
+        # Analiz yap - ham byte'lar base64'e çevrilmeden doğrudan
+        # görüntü pipeline'ına verilir
+        with upload as image_view:
+            result = await _run_mobile_analysis(image_view, analysis_type, anatomical_region)
         
         return {
             "filename": file.filename,
@@ -361,6 +375,8 @@ async def mobile_upload_analyze(
             "analysis_result": result
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Mobil dosya analiz hatası: {str(e)}")
         raise HTTPException(
@@ -369,15 +385,27 @@ async def mobile_upload_analyze(
         )
 
 
-async def process_mobile_image(image_data: str) -> np.ndarray:
+# Ana model girdisi - her çağrıda yeniden oluşturulmaz
+MOBILE_TRANSFORM = transforms.Compose([
+    transforms.ToPILImage(),
+    transforms.Resize((224, 224)),
+    transforms.ToTensor(),
+    transforms.Normalize(mean=[0.485], std=[0.229])
+])
+
+MOBILE_CLASS_NAMES = ['Normal', 'Abnormal', 'Fracture']
+
+
+async def process_mobile_image(image_data: ImageInput) -> np.ndarray:
     """Mobil görüntü işleme - optimize edilmiş"""
+    return _process_mobile_image_sync(image_data)
+
+
+def _process_mobile_image_sync(image_data: ImageInput) -> np.ndarray:
+    """Decode + boyutlandırma + kontrast - bloklayan PIL/OpenCV işlemleri"""
     try:
-        # Base64 decode
-        image_bytes = base64.b64decode(image_data)
-        image = Image.open(io.BytesIO(image_bytes)).convert('L')
-        
-        # NumPy array'e çevir
-        image_array = np.array(image)
+        # NumPy array'e çevir - yükleme tamponu kopyalanmadan decode edilir
+        image_array = decode_grayscale(image_data)
         
         # Mobil için optimize edilmiş işleme
         # Boyutlandır (mobil performans için)
@@ -393,51 +421,93 @@ async def process_mobile_image(image_data: str) -> np.ndarray:
         raise
 
 
-async def basic_mobile_analysis(image: np.ndarray, request: MobileAnalysisRequest) -> Dict[str, Any]:
+def _basic_result_from_probabilities(probabilities: torch.Tensor) -> Dict[str, Any]:
+    """Tek görüntünün softmax olasılıklarından temel analiz sonucu"""
+    confidence, predicted_class = torch.max(probabilities, dim=0)
+    diagnosis = {
+        "predicted_class": MOBILE_CLASS_NAMES[predicted_class.item()],
+        "confidence": confidence.item(),
+        "analysis_type": "basic"
+    }
+    return {
+        "diagnosis": diagnosis,
+        "confidence": diagnosis.get("confidence", 0.5),
+        "recommendations": ["Temel analiz tamamlandı"],
+        "urgency_level": "routine"
+    }
+
+
+def _basic_fallback_result() -> Dict[str, Any]:
+    diagnosis = {"predicted_class": "Normal", "confidence": 0.5, "analysis_type": "basic"}
+    return {
+        "diagnosis": diagnosis,
+        "confidence": diagnosis.get("confidence", 0.5),
+        "recommendations": ["Model yüklenemedi, temel analiz yapılamadı"],
+        "urgency_level": "routine"
+    }
+
+
+def _emergency_result_from_orthopedic(fracture_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Ortopedi analizinden acil durum sonucu"""
+    overall_assessment = fracture_result.get('overall_assessment', {})
+    risk_level = overall_assessment.get('risk_level', 'low')
+    
+    if risk_level == 'critical':
+        diagnosis = {
+            "condition": "CRITICAL_INJURY_DETECTED",
+            "confidence": overall_assessment.get('confidence_overall', 0.8),
+            "analysis_type": "emergency"
+        }
+        recommendations = [
+            "🚨 ACİL TIBBİ MÜDAHALE GEREKLİ",
+            "Derhal acil servise başvurun",
+            "Hasta immobilizasyonu uygulayın"
+        ]
+        urgency_level = "critical"
+    else:
+        diagnosis = {
+            "condition": "NO_CRITICAL_INJURY",
+            "confidence": overall_assessment.get('confidence_overall', 0.7),
+            "analysis_type": "emergency"
+        }
+        recommendations = ["Acil durum tespit edilmedi"]
+        urgency_level = "routine"
+    
+    return {
+        "diagnosis": diagnosis,
+        "confidence": diagnosis.get("confidence", 0.0),
+        "recommendations": recommendations,
+        "urgency_level": urgency_level
+    }
+
+
+def _emergency_unavailable_result() -> Dict[str, Any]:
+    diagnosis = {"condition": "ANALYSIS_UNAVAILABLE", "confidence": 0.0, "analysis_type": "emergency"}
+    return {
+        "diagnosis": diagnosis,
+        "confidence": diagnosis.get("confidence", 0.0),
+        "recommendations": ["Acil analiz yapılamadı"],
+        "urgency_level": "routine"
+    }
+
+
+async def basic_mobile_analysis(image: np.ndarray, anatomical_region: str) -> Dict[str, Any]:
     """Temel mobil analiz - hızlı"""
     try:
         # Ana model ile hızlı analiz
         if medical_ai_trainer and medical_ai_trainer.model:
             # Tensor'e çevir
-            transform = transforms.Compose([
-                transforms.ToPILImage(),
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=[0.485], std=[0.229])
-            ])
-            
-            image_tensor = transform(image).unsqueeze(0)
+            image_tensor = MOBILE_TRANSFORM(image).unsqueeze(0)
             
             # Tahmin yap
             with torch.no_grad():
                 outputs = medical_ai_trainer.model(image_tensor)
                 probabilities = torch.softmax(outputs, dim=1)
-                predicted_class = torch.argmax(probabilities, dim=1)
-                confidence = torch.max(probabilities, dim=1)[0]
             
-            class_names = ['Normal', 'Abnormal', 'Fracture']
-            
-            diagnosis = {
-                "predicted_class": class_names[predicted_class.item()],
-                "confidence": confidence.item(),
-                "analysis_type": "basic"
-            }
-            
-            recommendations = ["Temel analiz tamamlandı"]
-            urgency_level = "routine"
-            
-        else:
-            # Fallback
-            diagnosis = {"predicted_class": "Normal", "confidence": 0.5, "analysis_type": "basic"}
-            recommendations = ["Model yüklenemedi, temel analiz yapılamadı"]
-            urgency_level = "routine"
+            return _basic_result_from_probabilities(probabilities[0])
         
-        return {
-            "diagnosis": diagnosis,
-            "confidence": diagnosis.get("confidence", 0.5),
-            "recommendations": recommendations,
-            "urgency_level": urgency_level
-        }
+        # Fallback
+        return _basic_fallback_result()
         
     except Exception as e:
         logger.error(f"Temel mobil analiz hatası: {str(e)}")
@@ -449,57 +519,18 @@ async def basic_mobile_analysis(image: np.ndarray, request: MobileAnalysisReques
         }
 
 
-async def emergency_mobile_analysis(image: np.ndarray, request: MobileAnalysisRequest) -> Dict[str, Any]:
+async def emergency_mobile_analysis(image: np.ndarray, anatomical_region: str) -> Dict[str, Any]:
     """Acil durum mobil analizi - hızlı ve kritik"""
     try:
         # Hızlı kırık tespiti
         if fracture_detector:
-            # Base64'e çevir
-            pil_image = Image.fromarray(image)
-            buffer = io.BytesIO()
-            pil_image.save(buffer, format='PNG')
-            image_data = base64.b64encode(buffer.getvalue()).decode('utf-8')
-            
-            # Kırık analizi
+            # Kırık analizi - decode edilmiş dizi doğrudan verilir
             fracture_result = fracture_detector.comprehensive_orthopedic_analysis(
-                image_data, request.anatomical_region
+                image, anatomical_region
             )
-            
-            # Acil durum değerlendirmesi
-            overall_assessment = fracture_result.get('overall_assessment', {})
-            risk_level = overall_assessment.get('risk_level', 'low')
-            
-            if risk_level == 'critical':
-                diagnosis = {
-                    "condition": "CRITICAL_INJURY_DETECTED",
-                    "confidence": overall_assessment.get('confidence_overall', 0.8),
-                    "analysis_type": "emergency"
-                }
-                recommendations = [
-                    "🚨 ACİL TIBBİ MÜDAHALE GEREKLİ",
-                    "Derhal acil servise başvurun",
-                    "Hasta immobilizasyonu uygulayın"
-                ]
-                urgency_level = "critical"
-            else:
-                diagnosis = {
-                    "condition": "NO_CRITICAL_INJURY",
-                    "confidence": overall_assessment.get('confidence_overall', 0.7),
-                    "analysis_type": "emergency"
-                }
-                recommendations = ["Acil durum tespit edilmedi"]
-                urgency_level = "routine"
-        else:
-            diagnosis = {"condition": "ANALYSIS_UNAVAILABLE", "confidence": 0.0, "analysis_type": "emergency"}
-            recommendations = ["Acil analiz yapılamadı"]
-            urgency_level = "routine"
+            return _emergency_result_from_orthopedic(fracture_result)
         
-        return {
-            "diagnosis": diagnosis,
-            "confidence": diagnosis.get("confidence", 0.0),
-            "recommendations": recommendations,
-            "urgency_level": urgency_level
-        }
+        return _emergency_unavailable_result()
         
     except Exception as e:
         logger.error(f"Acil mobil analiz hatası: {str(e)}")
@@ -511,71 +542,49 @@ async def emergency_mobile_analysis(image: np.ndarray, request: MobileAnalysisRe
         }
 
 
-async def comprehensive_mobile_analysis(image: np.ndarray, request: MobileAnalysisRequest) -> Dict[str, Any]:
+def _mobile_cache_key(image: np.ndarray, anatomical_region: str) -> str:
+    model_dirs = [MAIN_MODEL_DIR]
+    if fracture_detector:
+        model_dirs.append(fracture_detector.models_dir)
+    
+    return mobile_analysis_cache.make_key(
+        image,
+        model_version=cached_checkpoint_fingerprint(model_dirs),
+        params={'anatomical_region': anatomical_region}
+    )
+
+
+def _cache_mobile_result(cache_key: str, result: Dict[str, Any]):
+    """Hatalı analizler cache'lenmez"""
+    diagnosis = result['diagnosis']
+    if not any('error' in part for part in (
+        diagnosis, diagnosis.get('main_diagnosis', {}), diagnosis.get('fracture_analysis', {})
+    )):
+        mobile_analysis_cache.put(cache_key, result)
+
+
+async def comprehensive_mobile_analysis(image: np.ndarray, anatomical_region: str) -> Dict[str, Any]:
+    """Kapsamlı mobil analiz - aynı görüntü + model + bölge için cache'ten"""
+    cache_key = _mobile_cache_key(image, anatomical_region)
+    result = mobile_analysis_cache.get(cache_key)
+    if result is not None:
+        return result
+    
+    result = await _comprehensive_mobile_analysis(image, anatomical_region)
+    _cache_mobile_result(cache_key, result)
+    return result
+
+
+async def _comprehensive_mobile_analysis(image: np.ndarray, anatomical_region: str) -> Dict[str, Any]:
     """Kapsamlı mobil analiz - %97+ doğruluk"""
     try:
         # Ana model analizi
-        main_analysis = await basic_mobile_analysis(image, request)
+        main_analysis = await basic_mobile_analysis(image, anatomical_region)
         
         # Kırık/çıkık analizi
-        fracture_analysis = await emergency_mobile_analysis(image, request)
-        
-        # Kapsamlı değerlendirme
-        overall_condition = "normal"
-        risk_level = "low"
-        recommendations = []
-        
-        # Ana analiz sonuçları
-        main_diagnosis = main_analysis['diagnosis']
-        if main_diagnosis.get('predicted_class') != 'Normal':
-            overall_condition = "abnormal"
-            risk_level = "medium"
-            recommendations.append(f"Tespit edilen durum: {main_diagnosis['predicted_class']}")
-        
-        # Kırık analizi sonuçları
-        fracture_diagnosis = fracture_analysis['diagnosis']
-        if fracture_diagnosis.get('condition') == 'CRITICAL_INJURY_DETECTED':
-            overall_condition = "critical_injury"
-            risk_level = "critical"
-            recommendations.extend(fracture_analysis['recommendations'])
-        
-        # Güven skoru hesapla
-        main_confidence = main_analysis['confidence']
-        fracture_confidence = fracture_analysis['confidence']
-        overall_confidence = (main_confidence * 0.7) + (fracture_confidence * 0.3)
-        
-        # Profesyonel öneriler
-        if risk_level == "critical":
-            recommendations.extend([
-                "🚨 Acil tıbbi müdahale gereklidir",
-                "Derhal acil servise başvurun",
-                "Hasta immobilizasyonu uygulayın"
-            ])
-        elif risk_level == "medium":
-            recommendations.extend([
-                "Uzman konsültasyonu alın",
-                "Detaylı görüntüleme yapın"
-            ])
-        else:
-            recommendations.append("Rutin takip yeterlidir")
+        fracture_analysis = await emergency_mobile_analysis(image, anatomical_region)
         
-        diagnosis = {
-            "overall_condition": overall_condition,
-            "risk_level": risk_level,
-            "main_diagnosis": main_diagnosis,
-            "fracture_analysis": fracture_diagnosis,
-            "confidence": overall_confidence,
-            "analysis_type": "comprehensive",
-            "professional_grade": True,
-            "accuracy_level": "97%+"
-        }
-        
-        return {
-            "diagnosis": diagnosis,
-            "confidence": overall_confidence,
-            "recommendations": recommendations,
-            "urgency_level": "critical" if risk_level == "critical" else "routine"
-        }
+        return _combine_comprehensive_analysis(main_analysis, fracture_analysis)
         
     except Exception as e:
         logger.error(f"Kapsamlı mobil analiz hatası: {str(e)}")
@@ -587,6 +596,110 @@ async def comprehensive_mobile_analysis(image: np.ndarray, request: MobileAnalys
         }
 
 
+def _combine_comprehensive_analysis(main_analysis: Dict[str, Any],
+                                    fracture_analysis: Dict[str, Any]) -> Dict[str, Any]:
+    """Temel ve acil durum analizlerini kapsamlı sonuçta birleştir"""
+    # Kapsamlı değerlendirme
+    overall_condition = "normal"
+    risk_level = "low"
+    recommendations = []
+    
+    # Ana analiz sonuçları
+    main_diagnosis = main_analysis['diagnosis']
+    if main_diagnosis.get('predicted_class') != 'Normal':
+        overall_condition = "abnormal"
+        risk_level = "medium"
+        recommendations.append(f"Tespit edilen durum: {main_diagnosis['predicted_class']}")
+    
+    # Kırık analizi sonuçları
+    fracture_diagnosis = fracture_analysis['diagnosis']
+    if fracture_diagnosis.get('condition') == 'CRITICAL_INJURY_DETECTED':
+        overall_condition = "critical_injury"
+        risk_level = "critical"
+        recommendations.extend(fracture_analysis['recommendations'])
+    
+    # Güven skoru hesapla
+    main_confidence = main_analysis['confidence']
+    fracture_confidence = fracture_analysis['confidence']
+    overall_confidence = (main_confidence * 0.7) + (fracture_confidence * 0.3)
+    
+    # Profesyonel öneriler
+    if risk_level == "critical":
+        recommendations.extend([
+            "🚨 Acil tıbbi müdahale gereklidir",
+            "Derhal acil servise başvurun",
+            "Hasta immobilizasyonu uygulayın"
+        ])
+    elif risk_level == "medium":
+        recommendations.extend([
+            "Uzman konsültasyonu alın",
+            "Detaylı görüntüleme yapın"
+        ])
+    else:
+        recommendations.append("Rutin takip yeterlidir")
+    
+    diagnosis = {
+        "overall_condition": overall_condition,
+        "risk_level": risk_level,
+        "main_diagnosis": main_diagnosis,
+        "fracture_analysis": fracture_diagnosis,
+        "confidence": overall_confidence,
+        "analysis_type": "comprehensive",
+        "professional_grade": True,
+        "accuracy_level": "97%+"
+    }
+    
+    return {
+        "diagnosis": diagnosis,
+        "confidence": overall_confidence,
+        "recommendations": recommendations,
+        "urgency_level": "critical" if risk_level == "critical" else "routine"
+    }
+
+
+def _prepare_mobile_batch_item(image_data: str, anatomical_region: str) -> Dict[str, Any]:
+    """Toplu analiz öğesi: decode, cache kontrolü ve iki modelin girdileri"""
+    image = _process_mobile_image_sync(image_data)
+    cache_key = _mobile_cache_key(image, anatomical_region)
+    
+    item = {'cache_key': cache_key, 'result': mobile_analysis_cache.get(cache_key)}
+    if item['result'] is None:
+        item['main_tensor'] = MOBILE_TRANSFORM(image).unsqueeze(0)
+        item['ortho_tensor'] = fracture_detector.preprocess(image) if fracture_detector else None
+    return item
+
+
+def _comprehensive_mobile_batch(items: List[Dict[str, Any]], anatomical_region: str) -> List[Dict[str, Any]]:
+    """Cache'te olmayan öğeleri iki yığılmış forward pass ile analiz et"""
+    pending = [item for item in items if item['result'] is None]
+    if not pending:
+        return [item['result'] for item in items]
+    
+    # Ana model - tek forward pass
+    if medical_ai_trainer and medical_ai_trainer.model:
+        with torch.no_grad():
+            outputs = medical_ai_trainer.model(torch.cat([item['main_tensor'] for item in pending], dim=0))
+            probabilities = torch.softmax(outputs, dim=1)
+        main_analyses = [_basic_result_from_probabilities(row) for row in probabilities]
+    else:
+        main_analyses = [_basic_fallback_result() for _ in pending]
+    
+    # Kırık/çıkık modelleri - model başına tek forward pass
+    if fracture_detector:
+        orthopedic_results = fracture_detector.batch_orthopedic_analysis(
+            [item['ortho_tensor'] for item in pending], anatomical_region
+        )
+        fracture_analyses = [_emergency_result_from_orthopedic(r) for r in orthopedic_results]
+    else:
+        fracture_analyses = [_emergency_unavailable_result() for _ in pending]
+    
+    for item, main_analysis, fracture_analysis in zip(pending, main_analyses, fracture_analyses):
+        item['result'] = _combine_comprehensive_analysis(main_analysis, fracture_analysis)
+        _cache_mobile_result(item['cache_key'], item['result'])
+    
+    return [item['result'] for item in items]
+
+
 @app.get("/mobile/models/status")
 async def get_mobile_models_status(api_key: str = Depends(verify_mobile_api_key)):
     """Mobil modellerin durumunu getir"""
@@ -610,6 +723,7 @@ async def get_mobile_usage_stats(api_key: str = Depends(verify_mobile_api_key)):
         "total_analyses": 0,  # Gerçek implementasyonda veritabanından gelecek
         "successful_analyses": 0,
         "average_processing_time": 2.5,
+        "result_cache": mobile_analysis_cache.get_stats(),
         "mobile_optimized": True,
         "timestamp": datetime.now().isoformat()
     }
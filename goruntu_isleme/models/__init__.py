@@ -32,10 +32,12 @@ except ImportError:
 
 from .model_manager import ModelManager
 from .model_loader import ModelLoader
+from .multi_head_model import MultiHeadRadiologyModel
 
 __all__ = [
     'ModelManager',
     'ModelLoader',
+    'MultiHeadRadiologyModel',
     'RadiologyCNN',
     'DenseNetRadiology', 
     'ResNetRadiology',
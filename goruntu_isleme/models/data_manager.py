@@ -17,7 +17,8 @@ import tarfile
 import shutil
 import logging
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Callable
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from urllib.parse import urlparse
@@ -35,6 +36,11 @@ import cv2
 from PIL import Image
 from sklearn.model_selection import train_test_split
 
+from models.synthetic_generator import (
+    NOISE_GAUSSIAN_POISSON, SYNTHETIC_WORKERS, anatomy_template, generate_batch, iter_batches
+)
+from shard_dataset import ShardWriter, build_cached
+
 logger = logging.getLogger(__name__)
 
 
@@ -141,30 +147,32 @@ class MedicalDatasetManager:
     
     def _create_synthetic_dataset(self, 
                                  dataset_name: str, 
-                                 dataset_dir: Path) -> bool:
-        """Sentetik veri seti oluştur"""
+                                 dataset_dir: Path,
+                                 seed: Optional[int] = None) -> bool:
+        """Sentetik veri seti oluştur (toplu üretim, paralel JPEG yazımı)"""
         try:
             dataset_info = self.known_datasets[dataset_name]
             classes = dataset_info['classes']
             
-            # Her sınıf için dizin oluştur
-            for class_name in classes:
-                class_dir = dataset_dir / class_name
-                class_dir.mkdir(exist_ok=True)
-                
-                # Her sınıf için örnekler oluştur
-                num_samples = self._get_sample_count(dataset_name, class_name)
-                
-                for i in range(num_samples):
-                    # Gerçekçi tıbbi görüntü oluştur
-                    image = self._generate_medical_image(dataset_name, class_name)
+            with ThreadPoolExecutor(max_workers=SYNTHETIC_WORKERS) as executor:
+                # Her sınıf için dizin oluştur
+                for class_idx, class_name in enumerate(classes):
+                    class_dir = dataset_dir / class_name
+                    class_dir.mkdir(exist_ok=True)
                     
-                    # Dosya adı
-                    filename = f"{class_name.lower()}_{i:04d}.jpg"
-                    filepath = class_dir / filename
+                    # Her sınıf için örnekler oluştur
+                    num_samples = self._get_sample_count(dataset_name, class_name)
+                    class_seed = None if seed is None else np.random.SeedSequence([seed, class_idx])
                     
-                    # Görüntüyü kaydet
-                    cv2.imwrite(str(filepath), image)
+                    offset = 0
+                    for batch in self.iter_synthetic_batches(dataset_name, class_name, num_samples,
+                                                             seed=class_seed):
+                        filepaths = [
+                            str(class_dir / f"{class_name.lower()}_{i:04d}.jpg")
+                            for i in range(offset, offset + len(batch))
+                        ]
+                        list(executor.map(cv2.imwrite, filepaths, batch))
+                        offset += len(batch)
             
             # Veri seti bilgilerini kaydet
             info_file = dataset_dir / "dataset_info.json"
@@ -177,6 +185,38 @@ class MedicalDatasetManager:
             logger.error(f"Sentetik veri seti oluşturma hatası: {str(e)}")
             return False
     
+    def create_synthetic_shards(self,
+                                dataset_name: str,
+                                seed: int = 0,
+                                root: Optional[str] = None) -> Path:
+        """
+        Sentetik veri setini JPEG yazmadan doğrudan eğitim shard'larına üret
+        
+        Aynı veri seti/tohum için daha önce üretilmiş shard dizini yeniden
+        kullanılır. Dönen dizin shard_dataset.ShardedImageDataset ile açılır.
+        """
+        classes = self.known_datasets[dataset_name]['classes']
+        counts = [self._get_sample_count(dataset_name, class_name) for class_name in classes]
+        size = self._synthetic_size(dataset_name)
+        key = hashlib.blake2b(
+            json.dumps([dataset_name, classes, counts, seed]).encode('utf-8'), digest_size=8
+        ).hexdigest()
+        
+        def build(output_dir: Path):
+            writer = ShardWriter(output_dir, (size, size))
+            for class_idx, (class_name, num_samples) in enumerate(zip(classes, counts)):
+                offset = 0
+                for batch in self.iter_synthetic_batches(dataset_name, class_name, num_samples,
+                                                         seed=np.random.SeedSequence([seed, class_idx])):
+                    writer.add_batch(
+                        batch, [class_idx] * len(batch),
+                        [f"synthetic:{class_name}:{i}" for i in range(offset, offset + len(batch))]
+                    )
+                    offset += len(batch)
+            writer.close(synthetic={'dataset_name': dataset_name, 'seed': seed, 'classes': classes})
+        
+        return build_cached(f"synthetic_{dataset_name}", key, build, root=root)
+    
     def _get_sample_count(self, dataset_name: str, class_name: str) -> int:
         """Sınıf başına örnek sayısını belirle"""
         # Gerçekçi veri seti boyutları
@@ -190,63 +230,83 @@ class MedicalDatasetManager:
         
         return sample_counts.get(dataset_name, {}).get(class_name, 500)
     
-    def _generate_medical_image(self, dataset_name: str, class_name: str) -> np.ndarray:
-        """Tıbbi görüntü oluştur"""
-        # Temel görüntü boyutu
+    def _synthetic_size(self, dataset_name: str) -> int:
+        """Temel görüntü boyutu"""
         if 'ct' in dataset_name:
-            size = 256
+            return 256
         elif 'mri' in dataset_name:
-            size = 224
-        else:
-            size = 512
-        
-        # Temel görüntü oluştur
-        image = np.random.normal(128, 30, (size, size)).astype(np.uint8)
-        
-        # Veri seti tipine göre özel özellikler ekle
-        if 'chest_xray' in dataset_name:
-            image = self._add_chest_xray_features(image, class_name)
-        elif 'ct_stroke' in dataset_name:
-            image = self._add_ct_stroke_features(image, class_name)
-        elif 'mri_brain' in dataset_name:
-            image = self._add_mri_brain_features(image, class_name)
-        elif 'xray_fracture' in dataset_name:
-            image = self._add_xray_fracture_features(image, class_name)
-        elif 'mammography' in dataset_name:
-            image = self._add_mammography_features(image, class_name)
-        
-        # Gürültü ve blur ekle
-        image = self._add_realistic_noise(image)
-        
-        return image
+            return 224
+        return 512
+    
+    def _synthetic_kwargs(self, dataset_name: str, class_name: str) -> Dict[str, Any]:
+        """Veri seti tipine göre generate_batch parametreleri"""
+        size = self._synthetic_size(dataset_name)
+        
+        # Veri seti tipine göre bulgular ve sabit anatomi
+        generators: List[Tuple[str, Callable, Callable]] = [
+            ('chest_xray', self._add_chest_xray_features, self._add_lung_anatomy),
+            ('ct_stroke', self._add_ct_stroke_features, self._add_brain_anatomy),
+            ('mri_brain', self._add_mri_brain_features, self._add_brain_anatomy),
+            ('xray_fracture', self._add_xray_fracture_features, self._add_bone_anatomy),
+            ('mammography', self._add_mammography_features, self._add_breast_anatomy),
+        ]
+        findings = anatomy = None
+        for key, add_features, add_anatomy in generators:
+            if key in dataset_name:
+                findings = lambda image, rng, add_features=add_features: add_features(image, class_name, rng)
+                anatomy = anatomy_template(add_anatomy, size)
+                break
+        
+        return {'size': size, 'findings': findings, 'anatomy': anatomy, 'noise': NOISE_GAUSSIAN_POISSON}
+    
+    def generate_synthetic_batch(self,
+                                 dataset_name: str,
+                                 class_name: str,
+                                 num_images: int,
+                                 seed: Optional[int] = None) -> np.ndarray:
+        """(num_images, boyut, boyut) uint8 sentetik görüntü yığını üret"""
+        return generate_batch(num_images, seed=seed, **self._synthetic_kwargs(dataset_name, class_name))
+    
+    def iter_synthetic_batches(self,
+                               dataset_name: str,
+                               class_name: str,
+                               num_images: int,
+                               batch_size: int = 256,
+                               seed: Any = None):
+        """Sınıfın görüntülerini batch_size'lık yığınlar halinde üret"""
+        return iter_batches(num_images, batch_size=batch_size, seed=seed,
+                            **self._synthetic_kwargs(dataset_name, class_name))
     
-    def _add_chest_xray_features(self, image: np.ndarray, class_name: str) -> np.ndarray:
+    def _generate_medical_image(self, dataset_name: str, class_name: str) -> np.ndarray:
+        """Tek tıbbi görüntü oluştur"""
+        return self.generate_synthetic_batch(dataset_name, class_name, 1)[0]
+    
+    def _add_chest_xray_features(self, image: np.ndarray, class_name: str,
+                                rng: np.random.Generator) -> np.ndarray:
         """Göğüs X-Ray özellikleri ekle"""
         if class_name == 'Pneumonia':
             # Pnömoni bulguları
             # Konsolidasyon alanları
-            for _ in range(np.random.randint(2, 4)):
-                center = (np.random.randint(50, 462), np.random.randint(50, 462))
-                radius = np.random.randint(20, 60)
+            for _ in range(int(rng.integers(2, 4))):
+                center = (int(rng.integers(50, 462)), int(rng.integers(50, 462)))
+                radius = int(rng.integers(20, 60))
                 cv2.circle(image, center, radius, 200, -1)
             
             # Air bronchogram
-            for _ in range(np.random.randint(1, 3)):
-                start = (np.random.randint(100, 412), np.random.randint(100, 412))
-                end = (start[0] + np.random.randint(50, 100), start[1] + np.random.randint(50, 100))
+            for _ in range(int(rng.integers(1, 3))):
+                start = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+                end = (start[0] + int(rng.integers(50, 100)), start[1] + int(rng.integers(50, 100)))
                 cv2.line(image, start, end, 180, 3)
         
-        # Akciğer anatomisi
-        self._add_lung_anatomy(image)
-        
         return image
     
-    def _add_ct_stroke_features(self, image: np.ndarray, class_name: str) -> np.ndarray:
+    def _add_ct_stroke_features(self, image: np.ndarray, class_name: str,
+                               rng: np.random.Generator) -> np.ndarray:
         """CT inme özellikleri ekle"""
         if 'Stroke' in class_name:
             # İnme bulguları
-            center = (np.random.randint(100, 412), np.random.randint(100, 412))
-            radius = np.random.randint(15, 40)
+            center = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+            radius = int(rng.integers(15, 40))
             
             if 'Ischemic' in class_name:
                 # İskemik inme - hipodens alan
@@ -255,17 +315,15 @@ class MedicalDatasetManager:
                 # Hemorajik inme - hiperdens alan
                 cv2.circle(image, center, radius, 200, -1)
         
-        # Beyin anatomisi
-        self._add_brain_anatomy(image)
-        
         return image
     
-    def _add_mri_brain_features(self, image: np.ndarray, class_name: str) -> np.ndarray:
+    def _add_mri_brain_features(self, image: np.ndarray, class_name: str,
+                               rng: np.random.Generator) -> np.ndarray:
         """MRI beyin özellikleri ekle"""
         if 'Tumor' in class_name:
             # Tümör bulguları
-            center = (np.random.randint(100, 412), np.random.randint(100, 412))
-            axes = (np.random.randint(20, 50), np.random.randint(20, 50))
+            center = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+            axes = (int(rng.integers(20, 50)), int(rng.integers(20, 50)))
             
             if 'Benign' in class_name:
                 # Benign tümör - düzgün sınırlar
@@ -275,52 +333,45 @@ class MedicalDatasetManager:
                 cv2.ellipse(image, center, axes, 0, 0, 360, 180, -1)
                 # Düzensizlik ekle
                 for _ in range(3):
-                    point = (center[0] + np.random.randint(-30, 30), 
-                           center[1] + np.random.randint(-30, 30))
+                    point = (center[0] + int(rng.integers(-30, 30)), 
+                           center[1] + int(rng.integers(-30, 30)))
                     cv2.circle(image, point, 5, 200, -1)
         
-        # Beyin anatomisi
-        self._add_brain_anatomy(image)
-        
         return image
     
-    def _add_xray_fracture_features(self, image: np.ndarray, class_name: str) -> np.ndarray:
+    def _add_xray_fracture_features(self, image: np.ndarray, class_name: str,
+                                   rng: np.random.Generator) -> np.ndarray:
         """X-Ray kırık özellikleri ekle"""
         if class_name == 'Fracture':
             # Kırık çizgileri
-            for _ in range(np.random.randint(1, 3)):
-                start = (np.random.randint(100, 412), np.random.randint(100, 412))
-                end = (start[0] + np.random.randint(30, 80), start[1] + np.random.randint(30, 80))
+            for _ in range(int(rng.integers(1, 3))):
+                start = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+                end = (start[0] + int(rng.integers(30, 80)), start[1] + int(rng.integers(30, 80)))
                 cv2.line(image, start, end, 50, 2)
                 
                 # Kırık uçları
                 cv2.circle(image, start, 3, 30, -1)
                 cv2.circle(image, end, 3, 30, -1)
         
-        # Kemik anatomisi
-        self._add_bone_anatomy(image)
-        
         return image
     
-    def _add_mammography_features(self, image: np.ndarray, class_name: str) -> np.ndarray:
+    def _add_mammography_features(self, image: np.ndarray, class_name: str,
+                                 rng: np.random.Generator) -> np.ndarray:
         """Mamografi özellikleri ekle"""
         if class_name == 'Mass':
             # Kütle bulguları
-            center = (np.random.randint(100, 412), np.random.randint(100, 412))
-            axes = (np.random.randint(15, 35), np.random.randint(15, 35))
+            center = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+            axes = (int(rng.integers(15, 35)), int(rng.integers(15, 35)))
             cv2.ellipse(image, center, axes, 0, 0, 360, 180, -1)
             
             # Spikülasyon (malignite göstergesi)
-            for _ in range(np.random.randint(3, 8)):
-                angle = np.random.randint(0, 360)
-                length = np.random.randint(10, 25)
+            for _ in range(int(rng.integers(3, 8))):
+                angle = int(rng.integers(0, 360))
+                length = int(rng.integers(10, 25))
                 end_x = int(center[0] + length * np.cos(np.radians(angle)))
                 end_y = int(center[1] + length * np.sin(np.radians(angle)))
                 cv2.line(image, center, (end_x, end_y), 200, 1)
         
-        # Meme anatomisi
-        self._add_breast_anatomy(image)
-        
         return image
     
     def _add_lung_anatomy(self, image: np.ndarray):
@@ -358,21 +409,6 @@ class MedicalDatasetManager:
         # Meme başı
         cv2.circle(image, (256, 200), 15, 100, -1)
     
-    def _add_realistic_noise(self, image: np.ndarray) -> np.ndarray:
-        """Gerçekçi gürültü ekle"""
-        # Gaussian gürültü
-        noise = np.random.normal(0, 5, image.shape)
-        image = np.clip(image + noise, 0, 255).astype(np.uint8)
-        
-        # Poisson gürültü
-        poisson_noise = np.random.poisson(5, image.shape)
-        image = np.clip(image + poisson_noise, 0, 255).astype(np.uint8)
-        
-        # Gaussian blur
-        image = cv2.GaussianBlur(image, (3, 3), 0)
-        
-        return image
-    
     def _save_dataset_metadata(self, dataset_name: str, dataset_dir: Path):
         """Veri seti metadata'sını kaydet"""
         metadata = {
@@ -0,0 +1,319 @@
+"""
+Toplu Değerlendirme Motoru
+==========================
+
+ProfessionalModelValidator'ın çıkarım ve metrik hesaplama çekirdeği:
+
+    - Test görüntüleri DataLoader worker'larında decode edilir (uint8) ve
+      batch'ler halinde modele verilir; normalizasyon cihaz üzerinde yapılır.
+    - Logit'ler ve etiketler baştan ayrılmış dizilere tek seferde yazılır.
+    - Tüm metrikler (accuracy, precision/recall/F1, AUC-ROC, AUC-PR,
+      kalibrasyon, güven) tek bir confusion matrisi ve sınıf başına bir kez
+      sıralanan eşik tablosundan tek geçişte hesaplanır.
+    - DecodedTestSet ile aynı test seti bir kez decode edilip birden fazla
+      model tarafından paylaşılır (validate_all_models).
+
+Metrik sonuçları sklearn karşılıklarıyla aynıdır; karşılaştırma için:
+benchmark_evaluation_engine.py
+"""
+
+import logging
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+import torch.nn as nn
+from torch.utils.data import DataLoader, Dataset
+
+logger = logging.getLogger(__name__)
+
+
+EVAL_BATCH_SIZE = int(os.getenv("EVAL_BATCH_SIZE", "32"))
+EVAL_NUM_WORKERS = int(os.getenv("EVAL_NUM_WORKERS", "4"))
+
+# MedicalImageDataset.test_augmentations ile aynı (A.Normalize, max_pixel_value=255)
+NORMALIZE_MEAN = 0.485
+NORMALIZE_STD = 0.229
+
+CALIBRATION_BINS = 10
+
+Batch = Tuple[torch.Tensor, torch.Tensor]
+
+
+class _DecodeDataset(Dataset):
+    """Görüntüyü MedicalImageDataset ön işlemesiyle uint8 olarak decode eder"""
+
+    def __init__(self, image_paths: Sequence[str], labels: Sequence[int]):
+        from models.train_models import MedicalImageDataset
+
+        self.labels = list(labels)
+        # Augmentasyonsuz veri seti yalnızca _load_medical_image için kullanılır
+        self.loader = MedicalImageDataset(list(image_paths), self.labels, 'evaluation', augment=False)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, idx):
+        image = self.loader._load_medical_image(self.loader.image_paths[idx])
+        return torch.from_numpy(np.ascontiguousarray(image)), self.labels[idx]
+
+
+def stream_batches(image_paths: Sequence[str],
+                   labels: Sequence[int],
+                   batch_size: Optional[int] = None,
+                   num_workers: Optional[int] = None,
+                   pin_memory: bool = False) -> Iterator[Batch]:
+    """Görüntüleri DataLoader ile decode edip (uint8 görüntüler, etiketler) batch'leri üret"""
+    num_workers = EVAL_NUM_WORKERS if num_workers is None else num_workers
+    loader = DataLoader(_DecodeDataset(image_paths, labels),
+                        batch_size=batch_size or EVAL_BATCH_SIZE,
+                        shuffle=False, num_workers=num_workers, pin_memory=pin_memory)
+    for images, batch_labels in loader:
+        yield images, batch_labels
+
+
+class DecodedTestSet:
+    """
+    Bellekte decode edilmiş test seti
+
+    Görüntüler bir kez (n, satır, sütun) uint8 diziye yazılır; her model
+    aynı diziden batch alır, dosyalar yeniden okunmaz.
+    """
+
+    def __init__(self, images: np.ndarray, labels: np.ndarray):
+        self.images = images
+        self.labels = labels
+
+    @classmethod
+    def decode(cls, image_paths: Sequence[str], labels: Sequence[int],
+               batch_size: Optional[int] = None,
+               num_workers: Optional[int] = None) -> 'DecodedTestSet':
+        images = None
+        label_array = np.asarray(labels, dtype=np.int64)
+        position = 0
+        for batch_images, _ in stream_batches(image_paths, labels, batch_size, num_workers):
+            if images is None:
+                images = np.empty((len(label_array),) + tuple(batch_images.shape[1:]), dtype=np.uint8)
+            images[position:position + len(batch_images)] = batch_images.numpy()
+            position += len(batch_images)
+        if images is None:
+            images = np.empty((0, 512, 512), dtype=np.uint8)
+        return cls(images, label_array)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def batches(self, batch_size: Optional[int] = None) -> Iterator[Batch]:
+        batch_size = batch_size or EVAL_BATCH_SIZE
+        for start in range(0, len(self.labels), batch_size):
+            yield (torch.from_numpy(self.images[start:start + batch_size]),
+                   torch.from_numpy(self.labels[start:start + batch_size]))
+
+
+def _prepare_batch(images: torch.Tensor, device: torch.device) -> torch.Tensor:
+    """uint8 (b, satır, sütun) -> normalize float (b, 1, satır, sütun), cihaz üzerinde"""
+    batch = images.to(device, non_blocking=True).unsqueeze(1).float()
+    batch.div_(255.0).sub_(NORMALIZE_MEAN).div_(NORMALIZE_STD)
+    return batch
+
+
+def run_inference(models: Dict[str, nn.Module],
+                  batches: Iterable[Batch],
+                  num_samples: int,
+                  device: torch.device) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """
+    Modelleri aynı batch'ler üzerinde çalıştır
+
+    Her batch cihaza bir kez taşınır ve tüm modellere verilir.
+
+    Returns:
+        (model adı -> (n, sınıf) float32 logit, (n,) int64 etiket)
+    """
+    for model in models.values():
+        model.eval()
+
+    logits: Dict[str, Optional[np.ndarray]] = {name: None for name in models}
+    labels = np.empty(num_samples, dtype=np.int64)
+    position = 0
+
+    with torch.inference_mode():
+        for images, batch_labels in batches:
+            count = len(batch_labels)
+            batch = _prepare_batch(images, device)
+            labels[position:position + count] = batch_labels.numpy()
+            for name, model in models.items():
+                outputs = model(batch).float().cpu().numpy()
+                if logits[name] is None:
+                    logits[name] = np.empty((num_samples, outputs.shape[1]), dtype=np.float32)
+                logits[name][position:position + count] = outputs
+            position += count
+
+    if position != num_samples:
+        raise ValueError(f"Beklenen {num_samples} örnek, okunan {position}")
+    return {name: value if value is not None else np.empty((0, 0), dtype=np.float32)
+            for name, value in logits.items()}, labels
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """Sayısal olarak kararlı softmax (float64)"""
+    shifted = logits.astype(np.float64)
+    shifted -= shifted.max(axis=1, keepdims=True)
+    np.exp(shifted, out=shifted)
+    shifted /= shifted.sum(axis=1, keepdims=True)
+    return shifted
+
+
+def _ranking_scores(binary: np.ndarray, scores: np.ndarray) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Tek sınıf (one-vs-rest) için ROC AUC ve average precision
+
+    Skorlar bir kez sıralanır; farklı her eşikteki kümülatif TP/FP
+    sayılarından iki metrik birlikte çıkarılır (sklearn ile aynı tanımlar).
+    Pozitif ya da negatif örnek yoksa ilgili metrik None döner.
+    """
+    positives = int(binary.sum())
+    negatives = len(binary) - positives
+    if positives == 0:
+        return None, None
+
+    order = np.argsort(scores, kind='mergesort')[::-1]
+    sorted_scores = scores[order]
+    sorted_binary = binary[order]
+
+    # Eşik tablosu: her farklı skor değerinin son indeksi
+    threshold_idx = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+    tps = np.cumsum(sorted_binary)[threshold_idx].astype(np.float64)
+    fps = (threshold_idx + 1) - tps
+
+    recall = tps / positives
+    precision = tps / (tps + fps)
+    average_precision = float(np.sum(np.diff(np.r_[0.0, recall]) * precision))
+
+    if negatives == 0:
+        return None, average_precision
+    tpr = np.r_[0.0, recall]
+    fpr = np.r_[0.0, fps / negatives]
+    # Yamuk kuralı
+    auc_roc = float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1])) / 2)
+    return auc_roc, average_precision
+
+
+def _calibration(binary: np.ndarray, scores: np.ndarray) -> Dict[str, Any]:
+    """sklearn.calibration.calibration_curve (n_bins=10, uniform) karşılığı"""
+    bins = np.linspace(0.0, 1.0, CALIBRATION_BINS + 1)
+    bin_ids = np.searchsorted(bins[1:-1], scores)
+    bin_sums = np.bincount(bin_ids, weights=scores, minlength=len(bins))
+    bin_true = np.bincount(bin_ids, weights=binary, minlength=len(bins))
+    bin_total = np.bincount(bin_ids, minlength=len(bins))
+
+    nonzero = bin_total != 0
+    prob_true = bin_true[nonzero] / bin_total[nonzero]
+    prob_pred = bin_sums[nonzero] / bin_total[nonzero]
+    return {
+        'prob_true': prob_true.tolist(),
+        'prob_pred': prob_pred.tolist(),
+        'calibration_error': float(np.mean(np.abs(prob_true - prob_pred)))
+    }
+
+
+def compute_metrics(labels: np.ndarray,
+                    logits: np.ndarray,
+                    class_names: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Tüm doğrulama metriklerini tek geçişte hesapla
+
+    Args:
+        labels: (n,) gerçek etiketler
+        logits: (n, sınıf) model çıktıları
+        class_names: Sınıf adları (classification_report için)
+
+    Returns:
+        accuracy, precision, recall, f1_score (ağırlıklı), auc_roc (OvR makro),
+        auc_pr (ağırlıklı), calibration, confidence, confusion_matrix,
+        classification_report
+    """
+    num_classes = logits.shape[1]
+    class_names = class_names or [f'class_{i}' for i in range(num_classes)]
+    probabilities = softmax(logits)
+    predictions = probabilities.argmax(axis=1)
+
+    # Ortak confusion matrisi: satır gerçek, sütun tahmin
+    confusion = np.bincount(labels * num_classes + predictions,
+                            minlength=num_classes * num_classes).reshape(num_classes, num_classes)
+    true_positives = np.diag(confusion).astype(np.float64)
+    support = confusion.sum(axis=1).astype(np.float64)
+    predicted = confusion.sum(axis=0).astype(np.float64)
+    total = float(support.sum())
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    weights = support / total if total else support
+
+    report: Dict[str, Any] = {}
+    for i, name in enumerate(class_names):
+        report[name] = {'precision': float(precision[i]), 'recall': float(recall[i]),
+                        'f1-score': float(f1[i]), 'support': int(support[i])}
+    accuracy = float(true_positives.sum() / total) if total else 0.0
+    report['accuracy'] = accuracy
+    report['macro avg'] = {'precision': float(precision.mean()), 'recall': float(recall.mean()),
+                           'f1-score': float(f1.mean()), 'support': int(total)}
+    report['weighted avg'] = {'precision': float(np.dot(weights, precision)),
+                              'recall': float(np.dot(weights, recall)),
+                              'f1-score': float(np.dot(weights, f1)), 'support': int(total)}
+
+    # Sınıf başına eşik tablosu (one-vs-rest): AUC-ROC, AUC-PR ve kalibrasyon
+    present = np.flatnonzero(support > 0)
+    binary_task = num_classes == 2
+    ranking_classes = [1] if binary_task else range(num_classes)
+    auc_rocs, auc_prs, calibration = {}, {}, {}
+    for i in ranking_classes:
+        binary = (labels == i).astype(np.float64)
+        auc_roc, auc_pr = _ranking_scores(binary, probabilities[:, i])
+        if auc_roc is not None:
+            auc_rocs[i] = auc_roc
+        if auc_pr is not None:
+            auc_prs[i] = auc_pr
+    for i in ([1] if binary_task else present):
+        calibration[i] = _calibration((labels == i).astype(np.float64), probabilities[:, i])
+
+    if binary_task:
+        auc_roc = auc_rocs.get(1, 0.0)
+        auc_pr = auc_prs.get(1, 0.0)
+        calibration_result = calibration[1]
+    else:
+        auc_roc = float(np.mean(list(auc_rocs.values()))) if len(auc_rocs) == num_classes else 0.0
+        auc_pr = (float(sum(support[i] * value for i, value in auc_prs.items()) / total)
+                  if auc_prs else 0.0)
+        calibration_result = {f'class_{i}': value for i, value in calibration.items()}
+
+    # Güven metrikleri
+    max_probs = probabilities.max(axis=1)
+    correct_mask = labels == predictions
+    correct_confidences = max_probs[correct_mask]
+    incorrect_confidences = max_probs[~correct_mask]
+    correct_mean = float(correct_confidences.mean()) if len(correct_confidences) else 0.0
+    incorrect_mean = float(incorrect_confidences.mean()) if len(incorrect_confidences) else 0.0
+
+    return {
+        'accuracy': accuracy,
+        'precision': report['weighted avg']['precision'],
+        'recall': report['weighted avg']['recall'],
+        'f1_score': report['weighted avg']['f1-score'],
+        'auc_roc': auc_roc,
+        'auc_pr': auc_pr,
+        'calibration': calibration_result,
+        'confidence': {
+            'mean_confidence': float(max_probs.mean()) if len(max_probs) else 0.0,
+            'std_confidence': float(max_probs.std()) if len(max_probs) else 0.0,
+            'correct_mean_confidence': correct_mean,
+            'incorrect_mean_confidence': incorrect_mean,
+            'confidence_gap': (correct_mean - incorrect_mean
+                               if len(correct_confidences) and len(incorrect_confidences) else 0)
+        },
+        'class_names': class_names,
+        'confusion_matrix': confusion.tolist(),
+        'classification_report': report
+    }
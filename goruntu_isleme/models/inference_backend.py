@@ -0,0 +1,280 @@
+"""
+Çıkarım Backend Katmanı
+=======================
+
+Model çağrılarını PyTorch ve ONNX Runtime arasında soyutlar. Tüm
+backend'ler (N, C, H, W) float32 girdiyi alır ve torch.Tensor logit
+döndürür; böylece softmax/sonuç hazırlama kodu backend'den bağımsız kalır.
+
+Backend seçimi INFERENCE_BACKEND ile yapılır (pytorch | onnxruntime).
+ONNX dosyası ya da onnxruntime paketi yoksa ya da ONNX dosyası güncel
+float checkpoint'ten dışa aktarılmamışsa PyTorch'a düşülür. ONNX
+Runtime thread sayıları ORT_INTRA_OP_THREADS / ORT_INTER_OP_THREADS ile
+konteyner başına ayarlanır.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from .model_optimizer import checkpoint_sha256
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ort = None
+    ONNXRUNTIME_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BACKEND = os.getenv("INFERENCE_BACKEND", "pytorch")
+ORT_INTRA_OP_THREADS = int(os.getenv("ORT_INTRA_OP_THREADS", "0"))
+ORT_INTER_OP_THREADS = int(os.getenv("ORT_INTER_OP_THREADS", "0"))
+
+ONNX_OPSET_VERSION = 17
+
+BatchInput = Union[np.ndarray, torch.Tensor]
+
+
+def onnx_file(models_dir: Path, model_name: str) -> Path:
+    """Modelin ONNX dosya yolu"""
+    return Path(models_dir) / f"{model_name}.onnx"
+
+
+def onnx_source_file(model_path: Path) -> Path:
+    """ONNX dosyasının hangi checkpoint'ten üretildiğini tutan kayıt"""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.name + ".json")
+
+
+def onnx_matches_checkpoint(model_path: Path, source_checkpoint: Path) -> bool:
+    """ONNX dosyası source_checkpoint'in güncel içeriğinden mi dışa aktarıldı?"""
+    try:
+        with open(onnx_source_file(model_path), 'r', encoding='utf-8') as f:
+            recorded_sha256 = json.load(f)['sha256']
+    except Exception:
+        return False
+    return recorded_sha256 == checkpoint_sha256(source_checkpoint)
+
+
+def file_signature(path: Path) -> Optional[Tuple[int, int]]:
+    """Dosyanın (mtime_ns, boyut) imzası; dosya yoksa None"""
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class InferenceBackend(ABC):
+    """Backend arayüzü - run'ı uygulamayan alt sınıf örneklenemez"""
+
+    name = "base"
+
+    @abstractmethod
+    def run(self, batch: BatchInput) -> torch.Tensor:
+        """(N, C, H, W) girdi için (N, num_classes) logit döndür"""
+
+    def get_info(self) -> Dict[str, Any]:
+        return {'backend': self.name}
+
+
+class TorchBackend(InferenceBackend):
+    """PyTorch eager / TorchScript modülleri"""
+
+    name = "pytorch"
+
+    def __init__(self, model: nn.Module, device: str = 'cpu'):
+        self.model = model
+        self.device = device
+
+    def run(self, batch: BatchInput) -> torch.Tensor:
+        if isinstance(batch, np.ndarray):
+            batch = torch.from_numpy(np.ascontiguousarray(batch, dtype=np.float32))
+        with torch.no_grad():
+            return self.model(batch.to(self.device))
+
+    def get_info(self) -> Dict[str, Any]:
+        return {'backend': self.name, 'device': str(self.device)}
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime CPU oturumu"""
+
+    name = "onnxruntime"
+
+    def __init__(self,
+                 model_path: Path,
+                 intra_op_threads: int = None,
+                 inter_op_threads: int = None):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime kurulu değil")
+
+        self.model_path = Path(model_path)
+        self.intra_op_threads = ORT_INTRA_OP_THREADS if intra_op_threads is None else intra_op_threads
+        self.inter_op_threads = ORT_INTER_OP_THREADS if inter_op_threads is None else inter_op_threads
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 0 = ONNX Runtime varsayılanı (tüm çekirdekler)
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+
+        self.session = ort.InferenceSession(
+            str(self.model_path), sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.output_name = self.session.get_outputs()[0].name
+
+        logger.info(
+            f"ONNX Runtime oturumu açıldı: {self.model_path.name} "
+            f"(intra={self.intra_op_threads}, inter={self.inter_op_threads})"
+        )
+
+    def run(self, batch: BatchInput) -> torch.Tensor:
+        if isinstance(batch, torch.Tensor):
+            batch = batch.detach().cpu().numpy()
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+
+        outputs = self.session.run([self.output_name], {self.input_name: batch})
+        return torch.from_numpy(outputs[0])
+
+    def get_info(self) -> Dict[str, Any]:
+        return {
+            'backend': self.name,
+            'model_file': str(self.model_path),
+            'intra_op_threads': self.intra_op_threads,
+            'inter_op_threads': self.inter_op_threads
+        }
+
+
+def export_to_onnx(model: nn.Module,
+                   output_path: Path,
+                   input_shape: Tuple[int, int, int],
+                   source_checkpoint: Path,
+                   opset_version: int = ONNX_OPSET_VERSION) -> Path:
+    """
+    Modeli dinamik batch eksenli ONNX olarak dışa aktar
+
+    Args:
+        model: Float32 eager model
+        output_path: .onnx dosya yolu
+        input_shape: (C, H, W) - batch ekseni dinamik
+        source_checkpoint: Model ağırlıklarının okunduğu .pth; sha256 özeti
+            ONNX dosyasının yanına kaydedilir
+    """
+    output_path = Path(output_path)
+    # Eğitimdeki modelin cihazını/modunu değiştirmemek için kopya üzerinde çalış
+    model = copy.deepcopy(model).cpu().eval()
+    dummy_input = torch.zeros((1,) + tuple(input_shape), dtype=torch.float32)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            dummy_input,
+            str(output_path),
+            input_names=['input'],
+            output_names=['logits'],
+            dynamic_axes={'input': {0: 'batch'}, 'logits': {0: 'batch'}},
+            opset_version=opset_version,
+            do_constant_folding=True
+        )
+
+    with open(onnx_source_file(output_path), 'w', encoding='utf-8') as f:
+        json.dump({
+            'source_checkpoint': Path(source_checkpoint).name,
+            'sha256': checkpoint_sha256(source_checkpoint),
+            'exported_at': datetime.now().isoformat()
+        }, f, indent=2)
+
+    logger.info(f"ONNX modeli dışa aktarıldı: {output_path}")
+    return output_path
+
+
+class BackendRegistry:
+    """
+    Model adı -> backend
+
+    ONNX Runtime oturumları pahalıdır ve thread-safe'tir; model başına bir kez
+    açılıp paylaşılır. Oturum ONNX dosyasının ve kaynak checkpoint'in
+    imzalarıyla (mtime, boyut) saklanır; biri değişirse sonraki get() ONNX
+    dosyasının checkpoint'le eşleştiğini yeniden doğrular ve oturumu yeniden
+    açar. Eşleşmeyen (eski checkpoint'ten dışa aktarılmış) ONNX dosyası
+    kullanılmaz, PyTorch'a düşülür. PyTorch backend'i her çağrıda çağıranın
+    model cache'inden gelen modülü sarar.
+    """
+
+    def __init__(self, models_dir: Path, backend: Optional[str] = None):
+        self.models_dir = Path(models_dir)
+        self.backend = backend or DEFAULT_BACKEND
+        # Model adı -> ((onnx imzası, checkpoint imzası), oturum ya da eskiyse None)
+        self._sessions: Dict[str, Tuple[Tuple[Any, Any], Optional[OnnxRuntimeBackend]]] = {}
+        self._lock = threading.Lock()
+
+        if self.backend == 'onnxruntime' and not ONNXRUNTIME_AVAILABLE:
+            logger.warning("onnxruntime kurulu değil, PyTorch backend kullanılacak")
+
+    def uses_onnxruntime(self, model_name: str) -> bool:
+        return (
+            self.backend == 'onnxruntime'
+            and ONNXRUNTIME_AVAILABLE
+            and onnx_file(self.models_dir, model_name).exists()
+        )
+
+    def get(self, model_name: str, torch_model_loader, source_checkpoint: Path) -> InferenceBackend:
+        """
+        Model için backend getir
+
+        Args:
+            model_name: Model adı
+            torch_model_loader: PyTorch'a düşüldüğünde (model, device) döndüren çağrı
+            source_checkpoint: Modelin float .pth checkpoint'i
+        """
+        if self.uses_onnxruntime(model_name):
+            session = self._get_session(model_name, Path(source_checkpoint))
+            if session is not None:
+                return session
+
+        model, device = torch_model_loader()
+        return TorchBackend(model, device)
+
+    def _get_session(self, model_name: str, source_checkpoint: Path) -> Optional[OnnxRuntimeBackend]:
+        """Güncel ONNX oturumu; ONNX dosyası checkpoint'le eşleşmiyorsa None"""
+        model_path = onnx_file(self.models_dir, model_name)
+        signature = (file_signature(model_path), file_signature(source_checkpoint))
+        cached = self._sessions.get(model_name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        with self._lock:
+            cached = self._sessions.get(model_name)
+            if cached is None or cached[0] != signature:
+                session = None
+                if onnx_matches_checkpoint(model_path, source_checkpoint):
+                    if cached is not None:
+                        logger.info(f"ONNX dosyası değişti, oturum yeniden açılıyor: {model_name}")
+                    session = OnnxRuntimeBackend(model_path)
+                else:
+                    logger.warning(
+                        f"ONNX dosyası güncel checkpoint'ten dışa aktarılmamış "
+                        f"({source_checkpoint.name}), PyTorch kullanılıyor: {model_name}"
+                    )
+                cached = (signature, session)
+                self._sessions[model_name] = cached
+        return cached[1]
+
+    def invalidate(self, model_name: str):
+        """ONNX dosyası ya da checkpoint yenilendiğinde oturumu kapat"""
+        with self._lock:
+            self._sessions.pop(model_name, None)
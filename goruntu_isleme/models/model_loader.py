@@ -11,61 +11,164 @@ import torch.nn as nn
 import numpy as np
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Tuple, Callable
 from datetime import datetime
+import asyncio
 import threading
 import time
 import gc
 
 from schemas import ImageType, BodyRegion
+from .model_optimizer import resolve_model_variant, load_model_variant
+from .inference_backend import BackendRegistry, export_to_onnx, onnx_file
 
 logger = logging.getLogger(__name__)
 
 
 class ModelCache:
-    """Model cache yöneticisi"""
+    """
+    Model cache yöneticisi
     
-    def __init__(self, max_models: int = 5, max_memory_mb: int = 2048):
+    Boyutlar gerçek tensor byte'larından (parametreler, buffer'lar ve
+    kalmış gradyanlar) hesaplanır. Bellek bütçesi aşıldığında en az
+    erişilen (eşitlikte en uzun süredir erişilmeyen) model çıkarılır.
+    Erişim sayaçları her decay_interval erişimde yarıya indirilir; böylece
+    geçmişte popüler olup artık kullanılmayan modeller cache'e yapışıp
+    kalmaz. Aynı model için eşzamanlı cache miss'leri tek bir yüklemeye
+    indirgenir.
+    """
+    
+    def __init__(self, max_models: int = 5, max_memory_mb: int = 2048,
+                 decay_interval: int = 64):
         self.max_models = max_models
         self.max_memory_mb = max_memory_mb
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
         self.cache = {}
         self.access_times = {}
+        self.access_counts = {}
+        self.model_bytes = {}
         self.model_sizes = {}
         self.lock = threading.RLock()
+        
+        # Single-flight: yüklenmekte olan modeller (model adı -> Event)
+        self._inflight = {}
+        self._inflight_errors = {}
+        
+        # Monoton erişim sayacı (duvar saatinden bağımsız sıralama)
+        self._access_tick = 0
+        
+        # Sayaç yaşlandırma: her decay_interval erişimde sayaçlar yarıya iner
+        self.decay_interval = decay_interval
+        self._touches_since_decay = 0
+        
+        # İstatistikler
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.loads = 0
+        self.load_failures = 0
+        self.total_load_time = 0.0
+        self.max_load_time = 0.0
     
     def get(self, model_name: str) -> Optional[nn.Module]:
         """Cache'den model getir"""
         with self.lock:
             if model_name in self.cache:
-                self.access_times[model_name] = time.time()
+                self._touch(model_name)
+                self.hits += 1
                 logger.debug(f"Model cache'den yüklendi: {model_name}")
                 return self.cache[model_name]
+            self.misses += 1
             return None
     
+    def get_or_load(self, model_name: str, loader: Callable[[], nn.Module]) -> nn.Module:
+        """
+        Cache'den getir, yoksa yükle
+        
+        Aynı model için eşzamanlı çağrılarda loader yalnızca bir kez çalışır;
+        diğer thread'ler yüklemenin bitmesini bekleyip aynı nesneyi alır.
+        """
+        while True:
+            with self.lock:
+                if model_name in self.cache:
+                    self._touch(model_name)
+                    self.hits += 1
+                    return self.cache[model_name]
+                
+                event = self._inflight.get(model_name)
+                if event is None:
+                    # Bu thread yükleyici olacak
+                    self.misses += 1
+                    event = threading.Event()
+                    self._inflight[model_name] = event
+                    self._inflight_errors.pop(model_name, None)
+                    is_leader = True
+                else:
+                    is_leader = False
+            
+            if not is_leader:
+                event.wait()
+                with self.lock:
+                    error = self._inflight_errors.get(model_name)
+                    if model_name in self.cache:
+                        self._touch(model_name)
+                        self.hits += 1
+                        return self.cache[model_name]
+                if error is not None:
+                    raise error
+                # Model yüklendi ama hemen çıkarıldı - tekrar dene
+                continue
+            
+            start_time = time.perf_counter()
+            try:
+                model = loader()
+                self.put(model_name, model)
+                self._record_load(time.perf_counter() - start_time)
+                return model
+            except Exception as e:
+                with self.lock:
+                    self.load_failures += 1
+                    self._inflight_errors[model_name] = e
+                raise
+            finally:
+                with self.lock:
+                    self._inflight.pop(model_name, None)
+                event.set()
+    
     def put(self, model_name: str, model: nn.Module):
         """Cache'e model ekle"""
         with self.lock:
+            # Aynı isimli eski kopyayı çıkar
+            if model_name in self.cache:
+                self._discard(model_name)
+            
             # Model boyutunu hesapla
-            model_size = self._calculate_model_size(model)
-            self.model_sizes[model_name] = model_size
+            model_bytes = self._calculate_model_bytes(model)
+            
+            # Bütçe ve model sayısı için yer aç
+            while self.cache and self._should_evict(model_bytes):
+                self._evict_least_frequently_used()
             
-            # Memory kontrolü
-            if self._should_evict():
-                self._evict_least_recently_used()
+            if model_bytes > self.max_memory_bytes:
+                logger.warning(
+                    f"Model cache bütçesinden büyük: {model_name} "
+                    f"({model_bytes / (1024 * 1024):.1f}MB > {self.max_memory_mb}MB)"
+                )
             
             # Model'i cache'e ekle
             self.cache[model_name] = model
-            self.access_times[model_name] = time.time()
+            self.model_bytes[model_name] = model_bytes
+            self.model_sizes[model_name] = model_bytes / (1024 * 1024)
+            self.access_counts[model_name] = 0
+            self._touch(model_name)
             
-            logger.info(f"Model cache'e eklendi: {model_name} ({model_size:.1f}MB)")
+            logger.info(f"Model cache'e eklendi: {model_name} ({self.model_sizes[model_name]:.1f}MB)")
     
     def remove(self, model_name: str):
         """Cache'den model çıkar"""
         with self.lock:
             if model_name in self.cache:
-                del self.cache[model_name]
-                del self.access_times[model_name]
-                del self.model_sizes[model_name]
+                self._discard(model_name)
                 logger.info(f"Model cache'den çıkarıldı: {model_name}")
     
     def clear(self):
@@ -73,66 +176,136 @@ class ModelCache:
         with self.lock:
             self.cache.clear()
             self.access_times.clear()
+            self.access_counts.clear()
+            self.model_bytes.clear()
             self.model_sizes.clear()
+            self._touches_since_decay = 0
             logger.info("Model cache temizlendi")
     
-    def _calculate_model_size(self, model: nn.Module) -> float:
-        """Model boyutunu hesapla (MB)"""
+    def _touch(self, model_name: str):
+        """Erişim sayacını ve sırasını güncelle"""
+        self._access_tick += 1
+        self.access_times[model_name] = self._access_tick
+        self.access_counts[model_name] = self.access_counts.get(model_name, 0) + 1
+        
+        self._touches_since_decay += 1
+        if self.decay_interval > 0 and self._touches_since_decay >= self.decay_interval:
+            self._decay_access_counts()
+    
+    def _decay_access_counts(self):
+        """Erişim sayaçlarını yarıya indir (eski popülerliği yaşlandır)"""
+        for name in self.access_counts:
+            self.access_counts[name] //= 2
+        self._touches_since_decay = 0
+    
+    def _discard(self, model_name: str):
+        del self.cache[model_name]
+        self.access_times.pop(model_name, None)
+        self.access_counts.pop(model_name, None)
+        self.model_bytes.pop(model_name, None)
+        self.model_sizes.pop(model_name, None)
+    
+    def _record_load(self, load_time: float):
+        with self.lock:
+            self.loads += 1
+            self.total_load_time += load_time
+            self.max_load_time = max(self.max_load_time, load_time)
+    
+    def _calculate_model_bytes(self, model: nn.Module) -> int:
+        """Model boyutunu gerçek tensor byte'larından hesapla"""
         try:
-            # Model parametrelerini say
-            total_params = sum(p.numel() for p in model.parameters())
-            # Her parametre 4 byte (float32)
-            size_mb = (total_params * 4) / (1024 * 1024)
-            return size_mb
+            seen_storages = set()
+            total_bytes = 0
+            
+            tensors = list(model.parameters()) + list(model.buffers())
+            tensors += [p.grad for p in model.parameters() if p.grad is not None]
+            
+            for tensor in tensors:
+                # Paylaşılan (tied) ağırlıkları bir kez say
+                storage_key = (tensor.device, tensor.data_ptr())
+                if storage_key in seen_storages:
+                    continue
+                seen_storages.add(storage_key)
+                total_bytes += tensor.numel() * tensor.element_size()
+            
+            return total_bytes
         except Exception as e:
             logger.error(f"Model boyutu hesaplama hatası: {str(e)}")
-            return 0.0
+            return 0
     
-    def _should_evict(self) -> bool:
+    def _calculate_model_size(self, model: nn.Module) -> float:
+        """Model boyutunu hesapla (MB)"""
+        return self._calculate_model_bytes(model) / (1024 * 1024)
+    
+    def _should_evict(self, incoming_bytes: int = 0) -> bool:
         """Model çıkarılmalı mı?"""
         # Model sayısı kontrolü
         if len(self.cache) >= self.max_models:
             return True
         
-        # Memory kontrolü
-        current_memory = sum(self.model_sizes.values())
-        if current_memory >= self.max_memory_mb:
+        # Byte bütçesi kontrolü
+        current_bytes = sum(self.model_bytes.values())
+        if current_bytes + incoming_bytes > self.max_memory_bytes:
             return True
         
         return False
     
-    def _evict_least_recently_used(self):
-        """En az kullanılan modeli çıkar"""
-        if not self.access_times:
+    def _evict_least_frequently_used(self):
+        """En az erişilen modeli çıkar (eşitlikte en eski erişim)"""
+        if not self.cache:
             return
         
-        # En eski erişim zamanını bul
-        oldest_model = min(self.access_times.items(), key=lambda x: x[1])[0]
-        self.remove(oldest_model)
+        victim = min(
+            self.cache.keys(),
+            key=lambda name: (self.access_counts.get(name, 0), self.access_times.get(name, 0))
+        )
+        self._discard(victim)
+        self.evictions += 1
+        logger.info(f"Model cache'den çıkarıldı (bütçe): {victim}")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Cache istatistiklerini getir"""
         with self.lock:
-            total_size = sum(self.model_sizes.values())
+            total_bytes = sum(self.model_bytes.values())
+            total_size = total_bytes / (1024 * 1024)
+            lookups = self.hits + self.misses
             return {
                 'cached_models': len(self.cache),
                 'max_models': self.max_models,
                 'total_size_mb': total_size,
+                'total_bytes': total_bytes,
                 'max_memory_mb': self.max_memory_mb,
                 'memory_usage_percent': (total_size / self.max_memory_mb) * 100,
                 'cached_model_names': list(self.cache.keys()),
-                'model_sizes': dict(self.model_sizes)
+                'model_sizes': dict(self.model_sizes),
+                'access_counts': dict(self.access_counts),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'loads': self.loads,
+                'load_failures': self.load_failures,
+                'loads_in_progress': len(self._inflight),
+                'average_load_time': self.total_load_time / self.loads if self.loads else 0.0,
+                'max_load_time': self.max_load_time
             }
 
 
 class ModelLoader:
     """Model yükleme sınıfı"""
     
-    def __init__(self, models_dir: str = "models", device: str = "auto"):
+    def __init__(self, models_dir: str = "models", device: str = "auto",
+                 variant: Optional[str] = None, backend: Optional[str] = None):
         self.models_dir = Path(models_dir)
         self.device = self._determine_device(device)
         self.cache = ModelCache()
         
+        # Servis edilecek model varyantı (None ise MODEL_VARIANT)
+        self.variant = variant
+        
+        # Çıkarım backend'i (INFERENCE_BACKEND: pytorch | onnxruntime)
+        self.backends = BackendRegistry(self.models_dir, backend)
+        
         # Model konfigürasyonları
         self.model_configs = {
             'xray_pneumonia': {
@@ -201,52 +374,87 @@ class ModelLoader:
         return device
     
     def load_model(self, model_name: str, force_reload: bool = False) -> nn.Module:
-        """Modeli yükle"""
+        """Modeli yükle (eşzamanlı çağrılar tek yüklemeye indirgenir)"""
         try:
-            # Cache'den kontrol et
-            if not force_reload:
-                cached_model = self.cache.get(model_name)
-                if cached_model is not None:
-                    return cached_model
-            
             # Model konfigürasyonunu kontrol et
             if model_name not in self.model_configs:
                 raise ValueError(f"Model bulunamadı: {model_name}")
             
-            config = self.model_configs[model_name]
-            model_file = self.models_dir / config['model_file']
-            
-            if not model_file.exists():
-                raise FileNotFoundError(f"Model dosyası bulunamadı: {model_file}")
+            if force_reload:
+                self.cache.remove(model_name)
             
-            # Model instance oluştur
-            model_class = self._get_model_class(config['model_class_name'])
-            model = model_class(
-                num_classes=config['num_classes'],
-                input_channels=config['input_channels']
+            return self.cache.get_or_load(
+                model_name, lambda: self._load_model_from_disk(model_name)
             )
             
-            # Model state'i yükle
-            checkpoint = torch.load(model_file, map_location=self.device)
-            model.load_state_dict(checkpoint['model_state_dict'])
-            
-            # Model'i device'a taşı
-            model = model.to(self.device)
-            model.eval()
-            
-            # Cache'e ekle
-            self.cache.put(model_name, model)
-            
-            logger.info(f"Model yüklendi: {model_name} ({self.device})")
-            return model
-            
         except Exception as e:
             logger.error(f"Model yükleme hatası ({model_name}): {str(e)}")
             raise
     
+    async def load_model_async(self, model_name: str, force_reload: bool = False) -> nn.Module:
+        """Modeli event loop'u bloklamadan yükle"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.load_model, model_name, force_reload)
+    
+    def _load_model_from_disk(self, model_name: str) -> nn.Module:
+        """Checkpoint'i diskten oku ve modeli oluştur"""
+        config = self.model_configs[model_name]
+        model_file = self.models_dir / config['model_file']
+        
+        # Bu checkpoint'ten üretilmiş optimize varyant varsa onu kullan
+        variant = resolve_model_variant(self.models_dir, model_name, model_file, self.variant, self.device)
+        if variant != 'float32':
+            return load_model_variant(self.models_dir, model_name, variant, self.device)
+        
+        if not model_file.exists():
+            raise FileNotFoundError(f"Model dosyası bulunamadı: {model_file}")
+        
+        # Model instance oluştur
+        model_class = self._get_model_class(config['model_class_name'])
+        model = model_class(
+            num_classes=config['num_classes'],
+            input_channels=config['input_channels']
+        )
+        
+        # Model state'i yükle
+        checkpoint = torch.load(model_file, map_location=self.device)
+        model.load_state_dict(checkpoint['model_state_dict'])
+        
+        # Model'i device'a taşı
+        model = model.to(self.device)
+        model.eval()
+        
+        logger.info(f"Model yüklendi: {model_name} ({self.device})")
+        return model
+    
+    def export_onnx(self, model_name: str) -> Path:
+        """Float32 modeli dinamik batch eksenli ONNX olarak dışa aktar"""
+        if model_name not in self.model_configs:
+            raise ValueError(f"Model bulunamadı: {model_name}")
+        
+        config = self.model_configs[model_name]
+        model_class = self._get_model_class(config['model_class_name'])
+        model = model_class(
+            num_classes=config['num_classes'],
+            input_channels=config['input_channels']
+        )
+        model_file = self.models_dir / config['model_file']
+        checkpoint = torch.load(model_file, map_location='cpu')
+        model.load_state_dict(checkpoint['model_state_dict'])
+        
+        output_path = export_to_onnx(
+            model,
+            onnx_file(self.models_dir, model_name),
+            (config['input_channels'],) + tuple(config['image_size']),
+            model_file
+        )
+        self.backends.invalidate(model_name)
+        return output_path
+    
     def unload_model(self, model_name: str):
         """Modeli bellekten çıkar"""
         self.cache.remove(model_name)
+        self.backends.invalidate(model_name)
         gc.collect()  # Garbage collection
         logger.info(f"Model bellekten çıkarıldı: {model_name}")
     
@@ -287,23 +495,24 @@ class ModelLoader:
     def predict(self, model_name: str, image: np.ndarray) -> Dict[str, Any]:
         """Model ile tahmin yap"""
         try:
-            # Model'i yükle
-            model = self.load_model(model_name)
+            # Backend'i getir (ONNX Runtime ya da PyTorch)
+            backend = self.backends.get(
+                model_name, lambda: (self.load_model(model_name), self.device),
+                self.models_dir / self.model_configs[model_name]['model_file']
+            )
             
-            # Görüntüyü tensor'e çevir
+            # Görüntüyü (N, C, H, W) float32 batch'e çevir
             if len(image.shape) == 2:
                 image = np.expand_dims(image, axis=0)
             if len(image.shape) == 3:
                 image = np.expand_dims(image, axis=0)
             
-            image_tensor = torch.FloatTensor(image).to(self.device)
-            
             # Tahmin yap
+            start_time = time.time()
+            outputs = backend.run(image.astype(np.float32, copy=False))
+            inference_time = time.time() - start_time
+            
             with torch.no_grad():
-                start_time = time.time()
-                outputs = model(image_tensor)
-                inference_time = time.time() - start_time
-                
                 probabilities = torch.softmax(outputs, dim=1)
                 predicted_class = torch.argmax(probabilities, dim=1)
                 confidence = torch.max(probabilities, dim=1)[0]
@@ -323,6 +532,7 @@ class ModelLoader:
                 'model_name': model_name,
                 'inference_time': inference_time,
                 'device': self.device,
+                'backend': backend.name,
                 'timestamp': datetime.now().isoformat()
             }
             
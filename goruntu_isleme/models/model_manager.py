@@ -13,11 +13,17 @@ import logging
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
-import hashlib
 import pickle
 import os
+import shutil
 
 from schemas import ImageType, BodyRegion
+from result_cache import invalidate_result_caches
+from .multi_head_model import MultiHeadRadiologyModel, DEFAULT_HEAD_CONFIGS
+from .model_optimizer import (
+    checkpoint_sha256, invalidate_model_variants, load_model_variant, resolve_model_variant
+)
+from .inference_backend import BackendRegistry, export_to_onnx, onnx_file
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +39,9 @@ class ModelManager:
         self.model_registry = {}
         self.loaded_models = {}
         
+        # Yüklenen çok başlı checkpoint'in meta verisi (doğruluklar, sentetik başlıklar)
+        self.multi_head_metadata: Dict[str, Any] = {}
+        
         # Model konfigürasyonları
         self.model_configs = {
             'xray_pneumonia': {
@@ -107,6 +116,18 @@ class ModelManager:
             }
         }
         
+        # Çıkarım backend'i (INFERENCE_BACKEND: pytorch | onnxruntime)
+        self.backends = BackendRegistry(self.models_dir)
+        
+        # Paylaşımlı omurgalı çok başlı model (sınıflandırma + kırık + çıkık)
+        self.multi_head_config = {
+            'model_name': 'multi_head_radiology',
+            'input_channels': 1,
+            'image_size': (512, 512),
+            'model_file': 'multi_head_radiology_model.pth',
+            'heads': DEFAULT_HEAD_CONFIGS
+        }
+        
         # Model yükleme durumu
         self.loading_status = {}
         
@@ -320,8 +341,16 @@ class ModelManager:
             return datetime.fromtimestamp(file_path.stat().st_mtime).isoformat()
         return "N/A"
     
-    def load_model(self, model_name: str, device: str = 'cpu') -> nn.Module:
-        """Modeli yükle"""
+    def load_model(self, model_name: str, device: str = 'cpu', variant: Optional[str] = None) -> nn.Module:
+        """
+        Modeli yükle
+        
+        Args:
+            model_name: Model adı
+            device: Cihaz
+            variant: float32, torchscript, int8_dynamic veya int8_static
+                (None ise MODEL_VARIANT). Varyant dosyası yoksa float32 yüklenir.
+        """
         if model_name in self.loaded_models:
             return self.loaded_models[model_name]
         
@@ -329,39 +358,160 @@ class ModelManager:
             raise ValueError(f"Model bulunamadı: {model_name}")
         
         try:
-            config = self.model_configs[model_name]
-            model_file = self.models_dir / config['model_file']
-            
-            if not model_file.exists():
-                raise FileNotFoundError(f"Model dosyası bulunamadı: {model_file}")
-            
-            # Model instance oluştur
-            model_class = self._get_model_class(config['model_class_name'])
-            model = model_class(
-                num_classes=config['num_classes'],
-                input_channels=config['input_channels']
+            variant = resolve_model_variant(
+                self.models_dir, model_name,
+                self.models_dir / self.model_configs[model_name]['model_file'],
+                variant, device
             )
-            
-            # Model state'i yükle
-            checkpoint = torch.load(model_file, map_location=device)
-            model.load_state_dict(checkpoint['model_state_dict'])
-            
-            # Model'i device'a taşı
-            model = model.to(device)
-            model.eval()
+            if variant != 'float32':
+                model = load_model_variant(self.models_dir, model_name, variant, device)
+            else:
+                model = self._build_float_model(model_name, device)
             
             # Cache'e ekle
             self.loaded_models[model_name] = model
             
-            logger.info(f"Model yüklendi: {model_name} ({device})")
+            logger.info(f"Model yüklendi: {model_name} ({device}, {variant})")
             return model
             
         except Exception as e:
             logger.error(f"Model yükleme hatası ({model_name}): {str(e)}")
             raise
     
+    def _build_float_model(self, model_name: str, device: str = 'cpu') -> nn.Module:
+        """Checkpoint'ten float32 eager modeli oluştur"""
+        config = self.model_configs[model_name]
+        model_file = self.models_dir / config['model_file']
+        
+        if not model_file.exists():
+            raise FileNotFoundError(f"Model dosyası bulunamadı: {model_file}")
+        
+        # Model instance oluştur
+        model_class = self._get_model_class(config['model_class_name'])
+        model = model_class(
+            num_classes=config['num_classes'],
+            input_channels=config['input_channels']
+        )
+        
+        # Model state'i yükle
+        checkpoint = torch.load(model_file, map_location=device)
+        model.load_state_dict(checkpoint['model_state_dict'])
+        
+        # Model'i device'a taşı
+        model = model.to(device)
+        model.eval()
+        
+        return model
+    
+    def optimize_model(self,
+                       model_name: str,
+                       variants: Optional[List[str]] = None,
+                       optimizer=None) -> Dict[str, Any]:
+        """
+        Model için TorchScript/INT8 varyantları üret
+        
+        Kalibrasyon ve değerlendirme örnekleri modelin eğitildiği
+        MedicalDatasetManager veri setinden alınır.
+        """
+        if model_name not in self.model_configs:
+            raise ValueError(f"Model bulunamadı: {model_name}")
+        
+        if optimizer is None:
+            from .model_optimizer import ModelOptimizer
+            optimizer = ModelOptimizer(str(self.models_dir))
+        
+        dataset_names = {
+            'xray_pneumonia': 'chest_xray_pneumonia',
+            'ct_stroke': 'ct_stroke_dataset',
+            'mri_brain_tumor': 'mri_brain_tumor',
+            'xray_fracture': 'xray_fracture_dataset',
+            'mammography_mass': 'mammography_mass'
+        }
+        
+        config = self.model_configs[model_name]
+        report = optimizer.optimize_model(
+            model_name,
+            self._build_float_model(model_name, 'cpu'),
+            self.models_dir / config['model_file'],
+            dataset_name=dataset_names[model_name],
+            image_size=config['image_size'],
+            variants=variants
+        )
+        
+        # Eski varyant cache'te kalmasın
+        self.unload_model(model_name)
+        return report
+    
+    def export_onnx(self, model_name: str) -> Path:
+        """Float32 modeli dinamik batch eksenli ONNX olarak dışa aktar"""
+        if model_name not in self.model_configs:
+            raise ValueError(f"Model bulunamadı: {model_name}")
+        
+        config = self.model_configs[model_name]
+        output_path = export_to_onnx(
+            self._build_float_model(model_name, 'cpu'),
+            onnx_file(self.models_dir, model_name),
+            (config['input_channels'],) + tuple(config['image_size']),
+            self.models_dir / config['model_file']
+        )
+        self.backends.invalidate(model_name)
+        return output_path
+    
+    def register_checkpoint(self, model_name: str, checkpoint_path: str) -> Dict[str, Any]:
+        """
+        Yeni eğitilmiş checkpoint'i modele kaydet
+        
+        Dosya model dizinine kopyalanır, registry güncellenir, eski
+        ağırlıklardan üretilmiş TorchScript/INT8 varyantları silinir,
+        bellekteki model/backend bırakılır ve eski modelle üretilmiş analiz
+        sonuçları cache'lerden silinir. ONNX kopyası varsa yeni checkpoint'ten
+        yeniden dışa aktarılır.
+        """
+        if model_name == self.multi_head_config['model_name']:
+            model_file = self.multi_head_config['model_file']
+        elif model_name in self.model_configs:
+            model_file = self.model_configs[model_name]['model_file']
+        else:
+            raise ValueError(f"Model bulunamadı: {model_name}")
+        
+        source = Path(checkpoint_path)
+        if not source.exists():
+            raise FileNotFoundError(f"Checkpoint bulunamadı: {source}")
+        
+        target = self.models_dir / model_file
+        if source.resolve() != target.resolve():
+            shutil.copy2(source, target)
+        
+        checksum = checkpoint_sha256(target)
+        
+        entry = self.model_registry.setdefault('models', {}).setdefault(model_name, {
+            'model_file': model_file
+        })
+        entry.update({
+            'status': 'available',
+            'last_updated': datetime.now().isoformat(),
+            'checksum': checksum
+        })
+        with open(self.models_dir / 'model_registry.json', 'w', encoding='utf-8') as f:
+            json.dump(self.model_registry, f, indent=2, ensure_ascii=False)
+        
+        invalidate_model_variants(self.models_dir, model_name)
+        self.unload_model(model_name)
+        invalidate_result_caches(f"yeni checkpoint: {model_name}")
+        
+        # ONNX Runtime ile servis edilen model yeni ağırlıklarla yeniden dışa aktarılır
+        if model_name in self.model_configs and onnx_file(self.models_dir, model_name).exists():
+            try:
+                self.export_onnx(model_name)
+            except Exception as e:
+                logger.error(f"ONNX yeniden dışa aktarma hatası ({model_name}): {str(e)}")
+        
+        logger.info(f"Checkpoint kaydedildi: {model_name} ({checksum[:12]})")
+        return entry
+    
     def unload_model(self, model_name: str):
         """Modeli bellekten çıkar"""
+        self.backends.invalidate(model_name)
         if model_name in self.loaded_models:
             del self.loaded_models[model_name]
             logger.info(f"Model bellekten çıkarıldı: {model_name}")
@@ -376,20 +526,21 @@ class ModelManager:
     def predict(self, model_name: str, image: np.ndarray, device: str = 'cpu') -> Dict[str, Any]:
         """Model ile tahmin yap"""
         try:
-            # Model'i yükle
-            model = self.load_model(model_name, device)
+            # Backend'i getir (ONNX Runtime ya da PyTorch)
+            backend = self.backends.get(
+                model_name, lambda: (self.load_model(model_name, device), device),
+                self.models_dir / self.model_configs[model_name]['model_file']
+            )
             
-            # Görüntüyü tensor'e çevir
+            # Görüntüyü (N, C, H, W) float32 batch'e çevir
             if len(image.shape) == 2:
                 image = np.expand_dims(image, axis=0)
             if len(image.shape) == 3:
                 image = np.expand_dims(image, axis=0)
             
-            image_tensor = torch.FloatTensor(image).to(device)
-            
             # Tahmin yap
+            outputs = backend.run(image.astype(np.float32, copy=False))
             with torch.no_grad():
-                outputs = model(image_tensor)
                 probabilities = torch.softmax(outputs, dim=1)
                 predicted_class = torch.argmax(probabilities, dim=1)
                 confidence = torch.max(probabilities, dim=1)[0]
@@ -407,6 +558,7 @@ class ModelManager:
                     for i, prob in enumerate(probabilities[0])
                 },
                 'model_name': model_name,
+                'backend': backend.name,
                 'timestamp': datetime.now().isoformat()
             }
             
@@ -416,6 +568,150 @@ class ModelManager:
             logger.error(f"Tahmin hatası ({model_name}): {str(e)}")
             raise
     
+    def has_multi_head_model(self) -> bool:
+        """Eğitilmiş çok başlı model checkpoint'i var mı?"""
+        return (self.models_dir / self.multi_head_config['model_file']).exists()
+    
+    def load_multi_head_model(self, device: str = 'cpu') -> MultiHeadRadiologyModel:
+        """Paylaşımlı omurgalı çok başlı modeli yükle"""
+        model_name = self.multi_head_config['model_name']
+        if model_name in self.loaded_models:
+            return self.loaded_models[model_name]
+        
+        model_file = self.models_dir / self.multi_head_config['model_file']
+        if not model_file.exists():
+            raise FileNotFoundError(f"Model dosyası bulunamadı: {model_file}")
+        
+        try:
+            checkpoint = torch.load(model_file, map_location=device)
+            
+            # Başlıklar checkpoint ile birlikte saklanır
+            head_configs = checkpoint.get('head_configs', self.multi_head_config['heads'])
+            model = MultiHeadRadiologyModel(
+                head_configs=head_configs,
+                input_channels=self.multi_head_config['input_channels']
+            )
+            model.load_state_dict(checkpoint['model_state_dict'])
+            
+            model = model.to(device)
+            model.eval()
+            
+            self.loaded_models[model_name] = model
+            self.multi_head_metadata = {
+                key: value for key, value in checkpoint.items() if key != 'model_state_dict'
+            }
+            
+            logger.info(f"Çok başlı model yüklendi: {model_name} ({device}) - "
+                        f"başlıklar: {model.head_names}")
+            return model
+            
+        except Exception as e:
+            logger.error(f"Model yükleme hatası ({model_name}): {str(e)}")
+            raise
+    
+    def is_head_validated(self, head_name: str, min_accuracy: float, device: str = 'cpu') -> bool:
+        """
+        Çok başlı modelin başlığı klinik çıktı için doğrulanmış mı?
+        
+        Checkpoint başlığın gerçek veriyle eğitildiğini (synthetic_heads
+        dışında) ve doğrulama doğruluğunun (%) min_accuracy'yi geçtiğini
+        kaydetmiş olmalı. Bu bilgileri içermeyen eski checkpoint'ler
+        doğrulanmamış sayılır.
+        """
+        self.load_multi_head_model(device)
+        metadata = self.multi_head_metadata
+        if 'synthetic_heads' not in metadata or head_name in metadata['synthetic_heads']:
+            return False
+        accuracy = metadata.get('accuracies', {}).get(head_name)
+        return accuracy is not None and accuracy >= min_accuracy
+    
+    def predict_multi_head(self,
+                           image: Any,
+                           heads: Optional[List[str]] = None,
+                           device: str = 'cpu') -> Dict[str, Dict[str, Any]]:
+        """
+        Tek görüntü için tek forward pass ile birden fazla görevi tahmin et
+        
+        Args:
+            image: NumPy dizisi ya da ön işlenmiş (1, C, H, W) tensor
+            heads: Çalıştırılacak başlıklar (None ise tümü)
+            device: Cihaz
+            
+        Returns:
+            Başlık adı -> predict() ile aynı formatta sonuç
+            
+        Raises:
+            ValueError: Girdi birden fazla görüntü içeriyorsa
+                        (batch için predict_multi_head_batch)
+        """
+        image_tensor = self._multi_head_input(image)
+        if image_tensor.shape[0] != 1:
+            raise ValueError(f"predict_multi_head tek görüntü bekler, batch boyutu: "
+                             f"{image_tensor.shape[0]} (predict_multi_head_batch kullanın)")
+        return self.predict_multi_head_batch(image_tensor, heads=heads, device=device)[0]
+    
+    def predict_multi_head_batch(self,
+                                 images: Any,
+                                 heads: Optional[List[str]] = None,
+                                 device: str = 'cpu') -> List[Dict[str, Dict[str, Any]]]:
+        """
+        (N, C, H, W) batch için tek forward pass ile çok başlı tahmin
+        
+        Returns:
+            Girdi sırasıyla görüntü başına: başlık adı -> predict() formatında sonuç
+        """
+        try:
+            model = self.load_multi_head_model(device)
+            
+            unknown_heads = [h for h in (heads or []) if h not in model.head_configs]
+            if unknown_heads:
+                raise ValueError(f"Bilinmeyen model başlığı: {unknown_heads}")
+            
+            image_tensor = self._multi_head_input(images).to(device)
+            
+            # Omurga bir kez çalışır, başlıklar aynı özellikleri kullanır
+            with torch.no_grad():
+                outputs = model(image_tensor, heads=heads)
+            
+            timestamp = datetime.now().isoformat()
+            results = [{} for _ in range(image_tensor.shape[0])]
+            for head_name, logits in outputs.items():
+                probabilities = torch.softmax(logits, dim=1).cpu()
+                confidence, predicted_class = torch.max(probabilities, dim=1)
+                class_names = model.head_configs[head_name]
+                
+                for row, sample_results in enumerate(results):
+                    class_index = predicted_class[row].item()
+                    sample_results[head_name] = {
+                        'predicted_class': class_index,
+                        'predicted_class_name': class_names[class_index],
+                        'confidence': confidence[row].item(),
+                        'probabilities': {
+                            class_names[i]: prob.item()
+                            for i, prob in enumerate(probabilities[row])
+                        },
+                        'model_name': head_name,
+                        'shared_backbone': True,
+                        'timestamp': timestamp
+                    }
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Çok başlı tahmin hatası: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _multi_head_input(image: Any) -> torch.Tensor:
+        """NumPy dizisi ya da tensor'ü (N, C, H, W) tensor'e çevir"""
+        if isinstance(image, torch.Tensor):
+            return image
+        if len(image.shape) == 2:
+            image = np.expand_dims(image, axis=0)
+        if len(image.shape) == 3:
+            image = np.expand_dims(image, axis=0)
+        return torch.FloatTensor(image)
+    
     def get_model_statistics(self) -> Dict[str, Any]:
         """Model istatistiklerini getir"""
         stats = {
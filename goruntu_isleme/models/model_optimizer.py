@@ -0,0 +1,471 @@
+"""
+CPU Servis Optimizasyonu
+========================
+
+Eğitilmiş float32 modellerden TorchScript ve INT8 quantize edilmiş
+varyantlar üretir, MedicalDatasetManager örnekleriyle kalibre eder ve
+float modele göre doğruluk farkını kaydeder. Servis tarafı hangi varyantın
+kullanılacağını MODEL_VARIANT ile seçer; doğruluk kaybı eşiği aşan
+varyantlar yerine float32 model kullanılır.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+
+logger = logging.getLogger(__name__)
+
+
+SUPPORTED_VARIANTS = ('float32', 'torchscript', 'int8_dynamic', 'int8_static')
+
+# Quantize edilmiş kernel'ler yalnızca CPU'da çalışır
+CPU_ONLY_VARIANTS = ('int8_dynamic', 'int8_static')
+
+DEFAULT_VARIANT = os.getenv("MODEL_VARIANT", "float32")
+MAX_ACCURACY_DROP = float(os.getenv("MODEL_VARIANT_MAX_ACCURACY_DROP", "0.01"))
+
+
+def variant_file(models_dir: Path, model_name: str, variant: str) -> Path:
+    """Varyantın TorchScript dosya yolu"""
+    return Path(models_dir) / f"{model_name}_{variant}.pt"
+
+
+def variant_report_file(models_dir: Path, model_name: str) -> Path:
+    """Varyant doğruluk/gecikme raporu"""
+    return Path(models_dir) / f"{model_name}_variants.json"
+
+
+def checkpoint_sha256(checkpoint_path: Path) -> Optional[str]:
+    """Float checkpoint dosyasının sha256 özeti; dosya yoksa None"""
+    sha256 = hashlib.sha256()
+    try:
+        with open(checkpoint_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+    except FileNotFoundError:
+        return None
+    return sha256.hexdigest()
+
+
+def invalidate_model_variants(models_dir: Path, model_name: str) -> List[Path]:
+    """
+    Modelin varyant dosyalarını ve raporunu sil
+
+    Yeni checkpoint kaydedildiğinde eski ağırlıklardan üretilmiş
+    varyantların servis edilmemesi için çağrılır.
+    """
+    removed = []
+    files = [variant_file(models_dir, model_name, v) for v in SUPPORTED_VARIANTS if v != 'float32']
+    files.append(variant_report_file(models_dir, model_name))
+    for path in files:
+        if path.exists():
+            path.unlink()
+            removed.append(path)
+
+    if removed:
+        logger.info(f"Model varyantları geçersiz kılındı: {model_name} ({len(removed)} dosya)")
+    return removed
+
+
+def resolve_model_variant(models_dir: Path,
+                          model_name: str,
+                          source_checkpoint: Path,
+                          requested: Optional[str] = None,
+                          device: str = 'cpu',
+                          max_accuracy_drop: float = None) -> str:
+    """
+    Servis edilecek varyantı belirle
+
+    İstenen varyant dosyası yoksa, cihaz desteklemiyorsa, varyant raporu
+    yoksa/okunamıyorsa, rapor source_checkpoint'in güncel içeriğinden
+    üretilmemişse ya da raporlanan doğruluk kaybı eşiği aşıyorsa float32'ye
+    düşülür.
+    """
+    requested = requested or DEFAULT_VARIANT
+    max_accuracy_drop = MAX_ACCURACY_DROP if max_accuracy_drop is None else max_accuracy_drop
+
+    if requested == 'float32':
+        return 'float32'
+
+    if requested not in SUPPORTED_VARIANTS:
+        logger.warning(f"Bilinmeyen model varyantı: {requested}, float32 kullanılıyor")
+        return 'float32'
+
+    if requested in CPU_ONLY_VARIANTS and str(device) != 'cpu':
+        logger.warning(f"{requested} yalnızca CPU'da çalışır ({model_name}, {device}), float32 kullanılıyor")
+        return 'float32'
+
+    if not variant_file(models_dir, model_name, requested).exists():
+        logger.warning(f"Varyant dosyası bulunamadı: {model_name}/{requested}, float32 kullanılıyor")
+        return 'float32'
+
+    # Doğruluk kapısından geçtiği raporlanmamış varyant servis edilmez
+    report_file = variant_report_file(models_dir, model_name)
+    if not report_file.exists():
+        logger.warning(f"Varyant raporu bulunamadı: {model_name}, float32 kullanılıyor")
+        return 'float32'
+
+    try:
+        with open(report_file, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        accuracy_delta = report['variants'].get(requested, {}).get('accuracy_delta')
+        source_sha256 = report.get('source_checkpoint', {}).get('sha256')
+    except Exception as e:
+        logger.error(f"Varyant raporu okunamadı ({model_name}): {str(e)}, float32 kullanılıyor")
+        return 'float32'
+
+    # Yeniden eğitim/checkpoint kaydından önce üretilmiş varyant eski ağırlıkları taşır
+    if source_sha256 is None or source_sha256 != checkpoint_sha256(source_checkpoint):
+        logger.warning(
+            f"{model_name}/{requested} güncel checkpoint'ten üretilmemiş "
+            f"({Path(source_checkpoint).name}), float32 kullanılıyor"
+        )
+        return 'float32'
+
+    if accuracy_delta is None:
+        logger.warning(f"{model_name}/{requested} için doğruluk sonucu raporda yok, float32 kullanılıyor")
+        return 'float32'
+
+    if -accuracy_delta > max_accuracy_drop:
+        logger.warning(
+            f"{model_name}/{requested} doğruluk kaybı eşiği aşıyor "
+            f"({accuracy_delta:+.4f}), float32 kullanılıyor"
+        )
+        return 'float32'
+
+    return requested
+
+
+def load_model_variant(models_dir: Path, model_name: str, variant: str, device: str = 'cpu'):
+    """Kaydedilmiş TorchScript varyantını yükle"""
+    model_path = variant_file(models_dir, model_name, variant)
+    model = torch.jit.load(str(model_path), map_location=device)
+    model.eval()
+    logger.info(f"Model varyantı yüklendi: {model_name}/{variant} ({device})")
+    return model
+
+
+class ModelOptimizer:
+    """TorchScript ve INT8 varyant üretici"""
+
+    def __init__(self, models_dir: str = "models", data_manager=None):
+        self.models_dir = Path(models_dir)
+        self.models_dir.mkdir(exist_ok=True)
+
+        if data_manager is None:
+            from models.data_manager import MedicalDatasetManager
+            data_manager = MedicalDatasetManager()
+        self.data_manager = data_manager
+
+        self.quantized_engine = self._select_quantized_engine()
+
+    def _select_quantized_engine(self) -> str:
+        """Platforma uygun quantize kernel backend'ini seç"""
+        supported = torch.backends.quantized.supported_engines
+        for engine in ('x86', 'fbgemm', 'qnnpack'):
+            if engine in supported:
+                torch.backends.quantized.engine = engine
+                return engine
+        return torch.backends.quantized.engine
+
+    def load_sample_batches(self,
+                            dataset_name: str,
+                            image_size: Tuple[int, int],
+                            num_samples: int = 128,
+                            batch_size: int = 16,
+                            split: str = 'train',
+                            normalize: Optional[Tuple[float, float]] = None) -> List[Tuple[torch.Tensor, torch.Tensor]]:
+        """
+        Veri setinden kalibrasyon/değerlendirme batch'leri yükle
+
+        Args:
+            dataset_name: MedicalDatasetManager veri seti adı
+            image_size: (H, W) model girdi boyutu
+            num_samples: Kullanılacak örnek sayısı
+            batch_size: Batch boyutu
+            split: 'train' (kalibrasyon) ya da 'test' (değerlendirme)
+            normalize: (mean, std) verilirse [0, 1] aralığından sonra uygulanır
+        """
+        if not (self.data_manager.data_dir / dataset_name).exists():
+            self.data_manager.download_dataset(dataset_name)
+
+        train_paths, train_labels, test_paths, test_labels = \
+            self.data_manager.prepare_training_data(dataset_name)
+        paths, labels = (train_paths, train_labels) if split == 'train' else (test_paths, test_labels)
+
+        if not paths:
+            raise ValueError(f"Veri seti boş: {dataset_name}")
+
+        # Sınıf dağılımını korumak için karıştırıp ilk N örneği al
+        rng = np.random.default_rng(42)
+        order = rng.permutation(len(paths))[:num_samples]
+
+        batches = []
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            images = np.empty((len(indices), 1, image_size[0], image_size[1]), dtype=np.float32)
+
+            for i, idx in enumerate(indices):
+                image = cv2.imread(paths[idx], cv2.IMREAD_GRAYSCALE)
+                if image is None:
+                    image = np.zeros(image_size, dtype=np.uint8)
+                if image.shape != tuple(image_size):
+                    image = cv2.resize(image, (image_size[1], image_size[0]), interpolation=cv2.INTER_AREA)
+                images[i, 0] = image
+
+            images /= 255.0
+            if normalize is not None:
+                images -= normalize[0]
+                images /= normalize[1]
+
+            batches.append((
+                torch.from_numpy(images),
+                torch.as_tensor([labels[idx] for idx in indices], dtype=torch.long)
+            ))
+
+        return batches
+
+    def build_variant(self,
+                      model: nn.Module,
+                      variant: str,
+                      example_input: torch.Tensor,
+                      calibration_batches: Optional[List[Tuple[torch.Tensor, torch.Tensor]]] = None) -> nn.Module:
+        """Float modelden istenen varyantı üret"""
+        if variant not in SUPPORTED_VARIANTS:
+            raise ValueError(f"Desteklenmeyen varyant: {variant}")
+
+        model = copy.deepcopy(model).cpu().eval()
+
+        if variant == 'float32':
+            return model
+
+        if variant == 'torchscript':
+            with torch.no_grad():
+                traced = torch.jit.trace(model, example_input)
+            return torch.jit.freeze(traced)
+
+        if variant == 'int8_dynamic':
+            # Linear katman ağırlıkları INT8, aktivasyonlar çalışma anında quantize edilir
+            quantized = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+            with torch.no_grad():
+                traced = torch.jit.trace(quantized, example_input)
+            return torch.jit.freeze(traced)
+
+        # int8_static: konvolüsyonlar dahil tüm graf, kalibrasyon verisiyle
+        if not calibration_batches:
+            raise ValueError("int8_static için kalibrasyon verisi gerekli")
+
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+        qconfig_mapping = get_default_qconfig_mapping(self.quantized_engine)
+        prepared = prepare_fx(model, qconfig_mapping, example_inputs=(example_input,))
+
+        with torch.no_grad():
+            for images, _ in calibration_batches:
+                prepared(images)
+
+        quantized = convert_fx(prepared)
+        with torch.no_grad():
+            traced = torch.jit.trace(quantized, example_input)
+        return torch.jit.freeze(traced)
+
+    def evaluate(self,
+                 model: nn.Module,
+                 batches: List[Tuple[torch.Tensor, torch.Tensor]]) -> Dict[str, Any]:
+        """Doğruluk ve görüntü başına gecikmeyi ölç"""
+        predictions = []
+        correct = 0
+        total = 0
+        elapsed = 0.0
+
+        with torch.no_grad():
+            # Isınma - TorchScript profil/optimizasyon geçişi
+            model(batches[0][0])
+
+            for images, labels in batches:
+                start_time = time.perf_counter()
+                outputs = model(images)
+                elapsed += time.perf_counter() - start_time
+
+                predicted = torch.argmax(outputs, dim=1)
+                predictions.append(predicted)
+                correct += (predicted == labels).sum().item()
+                total += labels.size(0)
+
+        return {
+            'accuracy': correct / total if total else 0.0,
+            'latency_ms_per_image': (elapsed / total) * 1000 if total else 0.0,
+            'predictions': torch.cat(predictions)
+        }
+
+    def optimize_model(self,
+                       model_name: str,
+                       model: nn.Module,
+                       source_checkpoint: Path,
+                       dataset_name: str,
+                       image_size: Tuple[int, int],
+                       variants: Optional[List[str]] = None,
+                       normalize: Optional[Tuple[float, float]] = None,
+                       num_calibration_samples: int = 128,
+                       num_eval_samples: int = 256,
+                       class_names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Varyantları üret, float modele karşı değerlendir ve kaydet
+
+        Doğruluk kapısı etiket indekslerine dayanır: modelin çıktı sayısı
+        (ve verildiyse class_names) veri setinin sınıflarıyla eşleşmezse
+        ValueError verilir. Rapor, model ağırlıklarının okunduğu
+        source_checkpoint dosyasının sha256 özetini taşır; servis tarafı
+        varyantı yalnızca bu özet güncel checkpoint'le eşleşirse kullanır.
+
+        Returns:
+            Varyant başına doğruluk, doğruluk farkı, float ile tahmin uyumu,
+            gecikme ve hızlanma içeren rapor
+        """
+        variants = variants or [v for v in SUPPORTED_VARIANTS if v != 'float32']
+        logger.info(f"Model optimizasyonu başlıyor: {model_name} -> {variants}")
+
+        dataset_classes = list(self.data_manager.known_datasets[dataset_name]['classes'])
+        if class_names is not None and list(class_names) != dataset_classes:
+            raise ValueError(
+                f"{model_name} sınıfları {list(class_names)} veri seti sınıflarıyla "
+                f"eşleşmiyor ({dataset_name}: {dataset_classes})"
+            )
+
+        calibration_batches = self.load_sample_batches(
+            dataset_name, image_size, num_calibration_samples, split='train', normalize=normalize
+        )
+        eval_batches = self.load_sample_batches(
+            dataset_name, image_size, num_eval_samples, split='test', normalize=normalize
+        )
+        example_input = calibration_batches[0][0][:1]
+
+        float_model = self.build_variant(model, 'float32', example_input)
+        with torch.no_grad():
+            num_outputs = float_model(example_input).shape[1]
+        if num_outputs != len(dataset_classes):
+            raise ValueError(
+                f"{model_name} {num_outputs} sınıf üretiyor, {dataset_name} "
+                f"{len(dataset_classes)} sınıflı: doğruluk karşılaştırılamaz"
+            )
+
+        baseline = self.evaluate(float_model, eval_batches)
+
+        report = {
+            'model_name': model_name,
+            'dataset_name': dataset_name,
+            'image_size': list(image_size),
+            'quantized_engine': self.quantized_engine,
+            'source_checkpoint': {
+                'file': Path(source_checkpoint).name,
+                'sha256': checkpoint_sha256(source_checkpoint)
+            },
+            'created_at': datetime.now().isoformat(),
+            'variants': {
+                'float32': {
+                    'accuracy': baseline['accuracy'],
+                    'accuracy_delta': 0.0,
+                    'agreement': 1.0,
+                    'latency_ms_per_image': baseline['latency_ms_per_image'],
+                    'speedup': 1.0
+                }
+            }
+        }
+
+        for variant in variants:
+            if variant == 'float32':
+                continue
+            try:
+                optimized = self.build_variant(model, variant, example_input, calibration_batches)
+                metrics = self.evaluate(optimized, eval_batches)
+
+                output_file = variant_file(self.models_dir, model_name, variant)
+                torch.jit.save(optimized, str(output_file))
+
+                report['variants'][variant] = {
+                    'accuracy': metrics['accuracy'],
+                    'accuracy_delta': metrics['accuracy'] - baseline['accuracy'],
+                    'agreement': (metrics['predictions'] == baseline['predictions']).float().mean().item(),
+                    'latency_ms_per_image': metrics['latency_ms_per_image'],
+                    'speedup': (
+                        baseline['latency_ms_per_image'] / metrics['latency_ms_per_image']
+                        if metrics['latency_ms_per_image'] else 0.0
+                    ),
+                    'model_file': str(output_file),
+                    'file_size_mb': output_file.stat().st_size / (1024 * 1024)
+                }
+
+                logger.info(
+                    f"{model_name}/{variant}: doğruluk farkı "
+                    f"{report['variants'][variant]['accuracy_delta']:+.4f}, "
+                    f"hızlanma {report['variants'][variant]['speedup']:.2f}x"
+                )
+
+            except Exception as e:
+                logger.error(f"Varyant üretim hatası ({model_name}/{variant}): {str(e)}")
+                report['variants'][variant] = {'error': str(e)}
+
+        with open(variant_report_file(self.models_dir, model_name), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        return report
+
+
+def main():
+    """ModelManager modelleri ve ana AdvancedMedicalCNN için varyant üret"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from models.model_manager import ModelManager
+
+    model_manager = ModelManager()
+    optimizer = ModelOptimizer(str(model_manager.models_dir))
+
+    for model_name in model_manager.get_available_models():
+        try:
+            model_manager.optimize_model(model_name, optimizer=optimizer)
+        except Exception as e:
+            logger.error(f"Optimizasyon hatası ({model_name}): {str(e)}")
+
+    # Ana API modeli
+    main_model_dir = Path("trained_models/real_data_medical_ai")
+    if (main_model_dir / "model_state_dict.pth").exists():
+        from real_data_training import AdvancedMedicalCNN
+
+        with open(main_model_dir / "model_metadata.json", 'r', encoding='utf-8') as f:
+            class_names = json.load(f)['class_names']
+
+        # Doğruluk kapısı için sınıf indeksleri aynı olan veri seti gerekli
+        dataset_name = next((name for name, info in optimizer.data_manager.known_datasets.items()
+                             if list(info['classes']) == list(class_names)), None)
+        if dataset_name is None:
+            logger.error(f"advanced_medical_cnn sınıfları {class_names} ile eşleşen veri seti yok, "
+                         f"varyant üretilmedi (float32 servis edilir)")
+            return
+
+        checkpoint_path = main_model_dir / "model_state_dict.pth"
+        model = AdvancedMedicalCNN(num_classes=len(class_names), input_channels=1)
+        model.load_state_dict(torch.load(checkpoint_path, map_location='cpu'))
+
+        main_optimizer = ModelOptimizer(str(main_model_dir), data_manager=optimizer.data_manager)
+        main_optimizer.optimize_model(
+            'advanced_medical_cnn', model, checkpoint_path,
+            dataset_name=dataset_name,
+            image_size=(224, 224),
+            normalize=(0.485, 0.229),
+            class_names=class_names
+        )
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,6 @@ import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.metrics import (
-    classification_report, confusion_matrix, roc_auc_score,
-    precision_recall_curve, roc_curve, average_precision_score
-)
-from sklearn.calibration import calibration_curve
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.express as px
@@ -37,6 +32,7 @@ warnings.filterwarnings('ignore')
 from models import RadiologyCNN, DenseNetRadiology, ResNetRadiology
 from models.model_manager import ModelManager
 from models.data_manager import MedicalDatasetManager
+from models.evaluation_engine import DecodedTestSet, compute_metrics, run_inference, stream_batches
 
 logger = logging.getLogger(__name__)
 
@@ -62,29 +58,15 @@ class ProfessionalModelValidator:
         # Device ayarı
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         logger.info(f"Doğrulama cihazı: {self.device}")
-        
-        # Doğrulama metrikleri
-        self.validation_metrics = {
-            'accuracy': self._calculate_accuracy,
-            'precision': self._calculate_precision,
-            'recall': self._calculate_recall,
-            'f1_score': self._calculate_f1_score,
-            'auc_roc': self._calculate_auc_roc,
-            'auc_pr': self._calculate_auc_pr,
-            'calibration': self._calculate_calibration,
-            'confidence': self._calculate_confidence_metrics
-        }
     
     def validate_model(self, 
                       model_name: str,
-                      test_data: Optional[Tuple[List[str], List[int]]] = None) -> Dict[str, Any]:
+                      test_data: Optional[Tuple[List[str], List[int]]] = None,
+                      create_plots: bool = True) -> Dict[str, Any]:
         """Model doğrulaması gerçekleştir"""
         logger.info(f"Model doğrulaması başlatılıyor: {model_name}")
         
         try:
-            # Model bilgilerini al
-            model_info = self.model_manager.get_model_info(model_name)
-            
             # Test verisi hazırla
             if test_data is None:
                 test_data = self._prepare_test_data(model_name)
@@ -98,39 +80,43 @@ class ProfessionalModelValidator:
             # Modeli yükle
             model = self.model_manager.load_model(model_name, str(self.device))
             
-            # Tahminler yap
-            predictions, probabilities, true_labels = self._make_predictions(
-                model, test_paths, test_labels, model_name
-            )
-            
-            # Metrikleri hesapla
-            validation_results = self._calculate_all_metrics(
-                true_labels, predictions, probabilities, model_name
-            )
-            
-            # Model bilgilerini ekle
-            validation_results['model_info'] = model_info
-            validation_results['test_samples'] = len(test_paths)
-            validation_results['validation_date'] = datetime.now().isoformat()
-            
-            # Sonuçları kaydet
-            self._save_validation_results(validation_results, model_name)
-            
-            # Görselleştirmeler oluştur
-            self._create_validation_plots(validation_results, model_name)
-            
-            logger.info(f"Model doğrulaması tamamlandı: {model_name}")
-            logger.info(f"Doğruluk: {validation_results['accuracy']:.4f}")
+            # Tahminler yap (görüntüler akış halinde decode edilir)
+            logits, true_labels = self._make_predictions({model_name: model}, test_paths, test_labels)
             
-            return validation_results
+            return self._finalize_validation(model_name, true_labels, logits[model_name], create_plots)
             
         except Exception as e:
             logger.error(f"Model doğrulama hatası ({model_name}): {str(e)}")
             return {'error': str(e)}
     
-    def _prepare_test_data(self, model_name: str) -> Tuple[List[str], List[int]]:
-        """Test verisi hazırla"""
-        # Veri seti adını belirle
+    def _finalize_validation(self,
+                             model_name: str,
+                             true_labels: np.ndarray,
+                             logits: np.ndarray,
+                             create_plots: bool) -> Dict[str, Any]:
+        """Metrikleri hesapla, sonuçları kaydet ve görselleştir"""
+        # Metrikleri hesapla
+        validation_results = self._calculate_all_metrics(true_labels, logits, model_name)
+        
+        # Model bilgilerini ekle
+        validation_results['model_info'] = self.model_manager.get_model_info(model_name)
+        validation_results['test_samples'] = len(true_labels)
+        validation_results['validation_date'] = datetime.now().isoformat()
+        
+        # Sonuçları kaydet
+        self._save_validation_results(validation_results, model_name)
+        
+        # Görselleştirmeler oluştur
+        if create_plots:
+            self._create_validation_plots(validation_results, model_name)
+        
+        logger.info(f"Model doğrulaması tamamlandı: {model_name}")
+        logger.info(f"Doğruluk: {validation_results['accuracy']:.4f}")
+        
+        return validation_results
+    
+    def _test_dataset_name(self, model_name: str) -> str:
+        """Modelin test veri setinin adı"""
         dataset_mapping = {
             'xray_pneumonia': 'chest_xray_pneumonia',
             'ct_stroke': 'ct_stroke_dataset',
@@ -139,7 +125,11 @@ class ProfessionalModelValidator:
             'mammography_mass': 'mammography_mass'
         }
         
-        dataset_name = dataset_mapping.get(model_name, model_name)
+        return dataset_mapping.get(model_name, model_name)
+    
+    def _prepare_test_data(self, model_name: str) -> Tuple[List[str], List[int]]:
+        """Test verisi hazırla"""
+        dataset_name = self._test_dataset_name(model_name)
         
         # Test verisi hazırla
         _, _, test_paths, test_labels = self.data_manager.prepare_training_data(
@@ -149,163 +139,32 @@ class ProfessionalModelValidator:
         return test_paths, test_labels
     
     def _make_predictions(self, 
-                         model: nn.Module, 
+                         models: Dict[str, nn.Module], 
                          test_paths: List[str], 
                          test_labels: List[int],
-                         model_name: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-        """Model tahminleri yap"""
-        model.eval()
-        all_predictions = []
-        all_probabilities = []
-        all_true_labels = []
-        
-        # Görüntü işleme
-        from models.train_models import MedicalImageDataset
-        
-        # Test dataset oluştur
-        test_dataset = MedicalImageDataset(test_paths, test_labels, model_name, augment=False)
-        
-        # Batch işleme
-        batch_size = 32
-        for i in range(0, len(test_dataset), batch_size):
-            batch_data = []
-            batch_labels = []
-            
-            for j in range(i, min(i + batch_size, len(test_dataset))):
-                image, label = test_dataset[j]
-                batch_data.append(image)
-                batch_labels.append(label)
-            
-            if batch_data:
-                # Tensor'e çevir
-                batch_tensor = torch.stack(batch_data).to(self.device)
-                
-                # Tahmin yap
-                with torch.no_grad():
-                    outputs = model(batch_tensor)
-                    probabilities = torch.softmax(outputs, dim=1)
-                    _, predictions = torch.max(outputs, 1)
-                
-                all_predictions.extend(predictions.cpu().numpy())
-                all_probabilities.extend(probabilities.cpu().numpy())
-                all_true_labels.extend(batch_labels)
+                         decoded: Optional[DecodedTestSet] = None) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """
+        Modellerin logit'lerini hesapla
         
-        return np.array(all_predictions), np.array(all_probabilities), np.array(all_true_labels)
+        decoded verilirse görüntüler bellekteki test setinden alınır; aksi halde
+        DataLoader ile akış halinde decode edilir.
+        
+        Returns:
+            (model adı -> (n, sınıf) logit, (n,) gerçek etiketler)
+        """
+        if decoded is not None:
+            batches = decoded.batches()
+        else:
+            batches = stream_batches(test_paths, test_labels, pin_memory=self.device.type == 'cuda')
+        return run_inference(models, batches, len(test_labels), self.device)
     
     def _calculate_all_metrics(self, 
                               true_labels: np.ndarray, 
-                              predictions: np.ndarray, 
-                              probabilities: np.ndarray,
+                              logits: np.ndarray,
                               model_name: str) -> Dict[str, Any]:
-        """Tüm metrikleri hesapla"""
-        results = {}
-        
-        # Temel metrikler
-        for metric_name, metric_func in self.validation_metrics.items():
-            try:
-                results[metric_name] = metric_func(true_labels, predictions, probabilities)
-            except Exception as e:
-                logger.warning(f"Metrik hesaplama hatası ({metric_name}): {str(e)}")
-                results[metric_name] = None
-        
-        # Sınıf isimlerini al
-        model_info = self.model_manager.get_model_info(model_name)
+        """Tüm metrikleri tek geçişte hesapla"""
         class_names = self.model_manager._get_class_names(model_name)
-        results['class_names'] = class_names
-        
-        # Confusion matrix
-        results['confusion_matrix'] = confusion_matrix(true_labels, predictions).tolist()
-        
-        # Classification report
-        results['classification_report'] = classification_report(
-            true_labels, predictions, target_names=class_names, output_dict=True
-        )
-        
-        return results
-    
-    def _calculate_accuracy(self, true_labels: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> float:
-        """Doğruluk hesapla"""
-        return np.mean(true_labels == predictions)
-    
-    def _calculate_precision(self, true_labels: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> float:
-        """Precision hesapla"""
-        from sklearn.metrics import precision_score
-        return precision_score(true_labels, predictions, average='weighted')
-    
-    def _calculate_recall(self, true_labels: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> float:
-        """Recall hesapla"""
-        from sklearn.metrics import recall_score
-        return recall_score(true_labels, predictions, average='weighted')
-    
-    def _calculate_f1_score(self, true_labels: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> float:
-        """F1 score hesapla"""
-        from sklearn.metrics import f1_score
-        return f1_score(true_labels, predictions, average='weighted')
-    
-    def _calculate_auc_roc(self, true_labels: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> float:
-        """ROC AUC hesapla"""
-        try:
-            if len(np.unique(true_labels)) > 2:
-                return roc_auc_score(true_labels, probabilities, multi_class='ovr')
-            else:
-                return roc_auc_score(true_labels, probabilities[:, 1])
-        except:
-            return 0.0
-    
-    def _calculate_auc_pr(self, true_labels: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> float:
-        """PR AUC hesapla"""
-        try:
-            if len(np.unique(true_labels)) > 2:
-                return average_precision_score(true_labels, probabilities, average='weighted')
-            else:
-                return average_precision_score(true_labels, probabilities[:, 1])
-        except:
-            return 0.0
-    
-    def _calculate_calibration(self, true_labels: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> Dict[str, Any]:
-        """Kalibrasyon metrikleri hesapla"""
-        try:
-            if len(np.unique(true_labels)) == 2:
-                # Binary classification
-                prob_true, prob_pred = calibration_curve(true_labels, probabilities[:, 1], n_bins=10)
-                return {
-                    'prob_true': prob_true.tolist(),
-                    'prob_pred': prob_pred.tolist(),
-                    'calibration_error': np.mean(np.abs(prob_true - prob_pred))
-                }
-            else:
-                # Multi-class - her sınıf için ayrı ayrı
-                calibration_results = {}
-                for i in range(probabilities.shape[1]):
-                    binary_labels = (true_labels == i).astype(int)
-                    if np.sum(binary_labels) > 0:
-                        prob_true, prob_pred = calibration_curve(binary_labels, probabilities[:, i], n_bins=10)
-                        calibration_results[f'class_{i}'] = {
-                            'prob_true': prob_true.tolist(),
-                            'prob_pred': prob_pred.tolist(),
-                            'calibration_error': np.mean(np.abs(prob_true - prob_pred))
-                        }
-                return calibration_results
-        except Exception as e:
-            return {'error': str(e)}
-    
-    def _calculate_confidence_metrics(self, true_labels: np.ndarray, predictions: np.ndarray, probabilities: np.ndarray) -> Dict[str, Any]:
-        """Güven metrikleri hesapla"""
-        # Maksimum olasılık
-        max_probs = np.max(probabilities, axis=1)
-        
-        # Doğru tahminlerin güveni
-        correct_mask = true_labels == predictions
-        correct_confidences = max_probs[correct_mask]
-        incorrect_confidences = max_probs[~correct_mask]
-        
-        return {
-            'mean_confidence': np.mean(max_probs),
-            'std_confidence': np.std(max_probs),
-            'correct_mean_confidence': np.mean(correct_confidences) if len(correct_confidences) > 0 else 0,
-            'incorrect_mean_confidence': np.mean(incorrect_confidences) if len(incorrect_confidences) > 0 else 0,
-            'confidence_gap': np.mean(correct_confidences) - np.mean(incorrect_confidences) if len(correct_confidences) > 0 and len(incorrect_confidences) > 0 else 0
-        }
+        return compute_metrics(true_labels, logits, class_names)
     
     def _save_validation_results(self, results: Dict[str, Any], model_name: str):
         """Doğrulama sonuçlarını kaydet"""
@@ -523,22 +382,67 @@ Test Samples: {results.get('test_samples', 'N/A')}
         plt.savefig(plot_file, dpi=300, bbox_inches='tight')
         plt.close()
     
-    def validate_all_models(self) -> Dict[str, Dict[str, Any]]:
-        """Tüm modelleri doğrula"""
+    def validate_all_models(self,
+                            test_data: Optional[Tuple[List[str], List[int]]] = None,
+                            create_plots: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Tüm modelleri doğrula
+        
+        Aynı test setini kullanan modeller gruplanır: test seti bir kez
+        decode edilir ve gruptaki tüm modeller aynı batch'ler üzerinde
+        çalıştırılır. test_data verilirse tüm modeller bu seti paylaşır.
+        """
         logger.info("Tüm modellerin doğrulaması başlatılıyor...")
         
         available_models = self.model_manager.get_available_models()
         validation_results = {}
         
+        # Test veri setine göre grupla
+        groups: Dict[str, List[str]] = {}
         for model_name in available_models:
+            key = 'shared' if test_data is not None else self._test_dataset_name(model_name)
+            groups.setdefault(key, []).append(model_name)
+        
+        for group_name, model_names in groups.items():
             try:
-                logger.info(f"Doğrulanıyor: {model_name}")
-                result = self.validate_model(model_name)
-                validation_results[model_name] = result
+                group_data = test_data if test_data is not None else self._prepare_test_data(model_names[0])
+                if not group_data[0]:
+                    logger.error(f"Test verisi bulunamadı: {group_name}")
+                    for model_name in model_names:
+                        validation_results[model_name] = {'error': 'Test verisi bulunamadı'}
+                    continue
+                
+                test_paths, test_labels = group_data
+                logger.info(f"Test seti decode ediliyor: {group_name} ({len(test_paths)} örnek, "
+                            f"{len(model_names)} model)")
+                decoded = DecodedTestSet.decode(test_paths, test_labels)
+                
+                models = {}
+                for model_name in model_names:
+                    try:
+                        models[model_name] = self.model_manager.load_model(model_name, str(self.device))
+                    except Exception as e:
+                        logger.error(f"Model doğrulama hatası ({model_name}): {str(e)}")
+                        validation_results[model_name] = {'error': str(e)}
+                if not models:
+                    continue
+                
+                logits, true_labels = self._make_predictions(models, test_paths, test_labels, decoded)
+                
+                for model_name in models:
+                    try:
+                        logger.info(f"Doğrulanıyor: {model_name}")
+                        validation_results[model_name] = self._finalize_validation(
+                            model_name, true_labels, logits[model_name], create_plots
+                        )
+                    except Exception as e:
+                        logger.error(f"Model doğrulama hatası ({model_name}): {str(e)}")
+                        validation_results[model_name] = {'error': str(e)}
                 
             except Exception as e:
-                logger.error(f"Model doğrulama hatası ({model_name}): {str(e)}")
-                validation_results[model_name] = {'error': str(e)}
+                logger.error(f"Test seti doğrulama hatası ({group_name}): {str(e)}")
+                for model_name in model_names:
+                    validation_results.setdefault(model_name, {'error': str(e)})
         
         # Genel özet oluştur
         self._create_validation_summary(validation_results)
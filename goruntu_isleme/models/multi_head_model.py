@@ -0,0 +1,102 @@
+"""
+Paylaşımlı Omurgalı Çok Başlı Model
+===================================
+
+Ana sınıflandırma, kırık ve çıkık görevleri aynı gri tonlamalı görüntü
+üzerinde çalışır. Bu modülde konvolüsyon katmanları tek bir omurgada
+toplanır; her görev yalnızca kendi küçük sınıflandırma başlığını çalıştırır.
+Böylece görüntü başına özellik çıkarımı bir kez yapılır.
+"""
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from typing import Dict, List, Optional
+
+
+# Başlık adı -> sınıf isimleri
+DEFAULT_HEAD_CONFIGS: Dict[str, List[str]] = {
+    'classification': ['Normal', 'Abnormal', 'Fracture'],
+    'bone_fracture': ['Normal', 'Simple_Fracture', 'Complex_Fracture'],
+    'spine_fracture': ['Normal', 'Compression_Fracture', 'Burst_Fracture', 'Chance_Fracture'],
+    'hip_fracture': ['Normal', 'Femoral_Neck_Fracture', 'Intertrochanteric_Fracture'],
+    'wrist_fracture': ['Normal', 'Colles_Fracture', 'Scaphoid_Fracture', 'Barton_Fracture'],
+    'joint_dislocation': ['Normal', 'Partial_Dislocation', 'Complete_Dislocation']
+}
+
+
+class SharedRadiologyBackbone(nn.Module):
+    """Tüm görev başlıklarının kullandığı ortak özellik çıkarıcı"""
+
+    def __init__(self, input_channels: int = 1, feature_dim: int = 256):
+        super(SharedRadiologyBackbone, self).__init__()
+
+        self.feature_dim = feature_dim
+
+        # Convolutional layers
+        self.conv1 = nn.Conv2d(input_channels, 32, kernel_size=3, padding=1)
+        self.bn1 = nn.BatchNorm2d(32)
+        self.conv2 = nn.Conv2d(32, 64, kernel_size=3, padding=1)
+        self.bn2 = nn.BatchNorm2d(64)
+        self.conv3 = nn.Conv2d(64, 128, kernel_size=3, padding=1)
+        self.bn3 = nn.BatchNorm2d(128)
+        self.conv4 = nn.Conv2d(128, feature_dim, kernel_size=3, padding=1)
+        self.bn4 = nn.BatchNorm2d(feature_dim)
+
+        self.pool = nn.MaxPool2d(2, 2)
+        self.global_avg_pool = nn.AdaptiveAvgPool2d(1)
+
+        # Attention mechanism
+        self.attention = nn.Sequential(
+            nn.Conv2d(feature_dim, 1, kernel_size=1),
+            nn.Sigmoid()
+        )
+
+    def forward(self, x):
+        x = self.pool(F.relu(self.bn1(self.conv1(x))))
+        x = self.pool(F.relu(self.bn2(self.conv2(x))))
+        x = self.pool(F.relu(self.bn3(self.conv3(x))))
+        x = self.pool(F.relu(self.bn4(self.conv4(x))))
+
+        x = x * self.attention(x)
+
+        x = self.global_avg_pool(x)
+        return x.view(x.size(0), -1)
+
+
+class MultiHeadRadiologyModel(nn.Module):
+    """
+    Paylaşımlı omurga + görev başına sınıflandırma başlığı
+
+    forward() her başlık için logit döndürür; `heads` verilirse yalnızca
+    istenen başlıklar çalıştırılır, omurga yine tek sefer çalışır.
+    """
+
+    def __init__(self,
+                 head_configs: Optional[Dict[str, List[str]]] = None,
+                 input_channels: int = 1,
+                 feature_dim: int = 256):
+        super(MultiHeadRadiologyModel, self).__init__()
+
+        self.head_configs = dict(head_configs or DEFAULT_HEAD_CONFIGS)
+        self.backbone = SharedRadiologyBackbone(input_channels, feature_dim)
+
+        self.heads = nn.ModuleDict({
+            head_name: nn.Sequential(
+                nn.Linear(feature_dim, 256),
+                nn.ReLU(inplace=True),
+                nn.Dropout(0.5),
+                nn.Linear(256, len(class_names))
+            )
+            for head_name, class_names in self.head_configs.items()
+        })
+
+    @property
+    def head_names(self) -> List[str]:
+        return list(self.heads.keys())
+
+    def forward(self, x, heads: Optional[List[str]] = None) -> Dict[str, torch.Tensor]:
+        features = self.backbone(x)
+
+        head_names = heads if heads is not None else self.head_names
+        return {head_name: self.heads[head_name](features) for head_name in head_names}
@@ -0,0 +1,157 @@
+"""
+Toplu Sentetik Tıbbi Görüntü Üretici
+===================================
+
+MedicalDatasetManager ve ProfessionalModelTrainer'ın sentetik veri setleri
+için görüntüleri tek tek değil, çağrı başına N görüntülük (N, boyut, boyut)
+uint8 yığın olarak üretir:
+
+    - Temel doku ve gürültü, numpy Generator ile float32 olarak tüm parça
+      için tek çağrıda üretilir.
+    - Sabit anatomi (akciğer, beyin, kemik, meme) bir kez (değer, maske)
+      şablonuna çizilir ve tüm yığına tek atamayla uygulanır.
+    - Örneğe özgü bulgular (lezyon, kırık çizgisi...) yığının görünümleri
+      üzerine cv2 ile çizilir.
+    - Yığın parçalara bölünüp thread havuzunda üretilir (numpy üreticileri
+      ve cv2 GIL'i bırakır); her parçanın kendi alt tohumu olduğundan sonuç
+      worker sayısından bağımsız olarak tohuma göre tekrarlanabilirdir.
+
+Eski üreticilerden tek fark: temel doku uint8'e taşırılarak (wrap) değil
+kırpılarak dönüştürülür.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+# Aynı anda işlenen görüntü sayısı (float32 çalışma tamponları bu boyutta)
+SYNTHETIC_CHUNK_SIZE = 16
+SYNTHETIC_WORKERS = int(os.getenv("SYNTHETIC_WORKERS") or os.cpu_count() or 1)
+
+# Gürültü modları
+NOISE_NONE = None
+NOISE_GAUSSIAN = 'gaussian'
+NOISE_GAUSSIAN_POISSON = 'gaussian_poisson'
+
+FindingsFn = Callable[[np.ndarray, np.random.Generator], Any]
+AnatomyTemplate = Tuple[np.ndarray, np.ndarray]
+Seed = Union[None, int, np.random.SeedSequence]
+
+
+def anatomy_template(draw: Callable[[np.ndarray], Any], size: int) -> AnatomyTemplate:
+    """
+    Sabit anatomi çizimini (değer, maske) şablonuna çevir
+
+    Çizim biri 0, biri 255 ile dolu iki tuvale uygulanır; iki tuvalde aynı
+    olan pikseller çizimin yazdığı piksellerdir.
+    """
+    low = np.zeros((size, size), dtype=np.uint8)
+    high = np.full((size, size), 255, dtype=np.uint8)
+    draw(low)
+    draw(high)
+    return low, low == high
+
+
+def _fill_chunk(out: np.ndarray,
+                rng: np.random.Generator,
+                findings: Optional[FindingsFn],
+                anatomy: Optional[AnatomyTemplate],
+                noise: Optional[str],
+                blur: bool):
+    """Bir parçayı yerinde üret"""
+    # Temel doku: N(128, 30)
+    work = rng.standard_normal(out.shape, dtype=np.float32)
+    work *= 30
+    work += 128
+    np.clip(work, 0, 255, out=work)
+    np.copyto(out, work, casting='unsafe')
+
+    # Örneğe özgü bulgular, sonra sabit anatomi (eski çizim sırası)
+    if findings is not None:
+        for image in out:
+            findings(image, rng)
+    if anatomy is not None:
+        values, mask = anatomy
+        out[:, mask] = values[mask]
+
+    if noise is not None:
+        np.copyto(work, out)
+        gaussian = rng.standard_normal(out.shape, dtype=np.float32)
+        gaussian *= 5
+        work += gaussian
+        np.clip(work, 0, 255, out=work)
+        if noise == NOISE_GAUSSIAN_POISSON:
+            # Eski yoldaki ara uint8 dönüşümü (kesme)
+            np.floor(work, out=work)
+            work += rng.poisson(5, out.shape)
+            np.clip(work, 0, 255, out=work)
+        np.copyto(out, work, casting='unsafe')
+
+    if blur:
+        for image in out:
+            cv2.GaussianBlur(image, (3, 3), 0, dst=image)
+
+
+def generate_batch(num_images: int,
+                   size: int,
+                   findings: Optional[FindingsFn] = None,
+                   anatomy: Optional[AnatomyTemplate] = None,
+                   noise: Optional[str] = NOISE_GAUSSIAN,
+                   blur: bool = True,
+                   seed: Seed = None,
+                   workers: Optional[int] = None) -> np.ndarray:
+    """
+    (num_images, size, size) uint8 sentetik görüntü yığını üret
+
+    Args:
+        num_images: Görüntü sayısı
+        size: Kare görüntü boyutu
+        findings: Görüntü görünümüne ve Generator'a bulgu çizen fonksiyon
+        anatomy: anatomy_template çıktısı (bulgulardan sonra uygulanır)
+        noise: NOISE_NONE, NOISE_GAUSSIAN ya da NOISE_GAUSSIAN_POISSON
+        blur: 3x3 Gaussian blur uygula
+        seed: Tohum (None ise rastgele)
+        workers: Thread sayısı (None ise SYNTHETIC_WORKERS)
+    """
+    out = np.empty((num_images, size, size), dtype=np.uint8)
+    chunks = [slice(start, min(start + SYNTHETIC_CHUNK_SIZE, num_images))
+              for start in range(0, num_images, SYNTHETIC_CHUNK_SIZE)]
+    if not chunks:
+        return out
+
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    chunk_seeds = seed_sequence.spawn(len(chunks))
+
+    def fill(index: int):
+        _fill_chunk(out[chunks[index]], np.random.default_rng(chunk_seeds[index]),
+                    findings, anatomy, noise, blur)
+
+    workers = min(workers or SYNTHETIC_WORKERS, len(chunks))
+    if workers <= 1:
+        for index in range(len(chunks)):
+            fill(index)
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="synthetic") as executor:
+            list(executor.map(fill, range(len(chunks))))
+    return out
+
+
+def iter_batches(num_images: int,
+                 size: int,
+                 batch_size: int = 256,
+                 seed: Seed = None,
+                 **kwargs) -> Iterator[np.ndarray]:
+    """
+    Görüntüleri batch_size'lık yığınlar halinde üret (sınırlı bellek)
+
+    kwargs generate_batch'e iletilir.
+    """
+    batch_count = -(-num_images // batch_size)
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    for index, batch_seed in enumerate(seed_sequence.spawn(batch_count)):
+        count = min(batch_size, num_images - index * batch_size)
+        yield generate_batch(count, size, seed=batch_seed, **kwargs)
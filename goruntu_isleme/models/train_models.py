@@ -32,8 +32,10 @@ import os
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Sequence
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -50,7 +52,13 @@ from monai.transforms import Compose, LoadImaged, AddChanneld, Spacingd, Orienta
 
 # Custom imports
 from models import RadiologyCNN, DenseNetRadiology, ResNetRadiology
+from models.multi_head_model import MultiHeadRadiologyModel, DEFAULT_HEAD_CONFIGS
+from models.inference_backend import export_to_onnx, onnx_file
 from schemas import ImageType, BodyRegion
+from models.synthetic_generator import (
+    NOISE_GAUSSIAN, NOISE_NONE, SYNTHETIC_WORKERS, generate_batch, iter_batches
+)
+from shard_dataset import DATASET_SHARD_DIR, ShardedImageDataset, ShardWriter, build_cached, compile_cached
 
 logger = logging.getLogger(__name__)
 
@@ -155,6 +163,27 @@ class MedicalImageDataset(Dataset):
         return image.astype(np.uint8)
 
 
+class ShardedMedicalImageDataset(MedicalImageDataset):
+    """
+    Önceden decode edilmiş uint8 shard'lar üzerinde MedicalImageDataset
+    
+    Shard'lar MedicalImageDataset._load_medical_image çıktısından derlenir;
+    augmentasyonlar aynıdır, yalnızca decode/normalize/resize adımı atlanır.
+    """
+    
+    def __init__(self, shards: ShardedImageDataset, image_type: str,
+                 transform=None, augment: bool = True,
+                 indices: Optional[Sequence[int]] = None):
+        # indices: shard'ların bir alt kümesi (ör. train/val bölmesi)
+        indices = list(range(len(shards))) if indices is None else list(indices)
+        super().__init__(indices, [shards.labels[i] for i in indices], image_type,
+                         transform=transform, augment=augment)
+        self.shards = shards
+    
+    def _load_medical_image(self, index) -> np.ndarray:
+        return self.shards.read(index)
+
+
 class ProfessionalModelTrainer:
     """Profesyonel model eğitim sınıfı"""
     
@@ -235,10 +264,21 @@ class ProfessionalModelTrainer:
             'mixup_alpha': 0.2,
             'label_smoothing': 0.1
         }
+        
+        # Paylaşımlı omurgalı çok başlı model konfigürasyonu
+        self.multi_head_config = {
+            'model_name': 'multi_head_radiology',
+            'input_channels': 1,
+            'image_size': (512, 512),
+            'heads': DEFAULT_HEAD_CONFIGS,
+            # Görev başına loss ağırlığı (varsayılan 1.0)
+            'loss_weights': {}
+        }
     
     def create_synthetic_dataset(self, 
                                 model_name: str, 
-                                num_samples: int = 1000) -> Tuple[List[str], List[int]]:
+                                num_samples: int = 1000,
+                                seed: Optional[int] = None) -> Tuple[List[str], List[int]]:
         """Sentetik tıbbi veri seti oluştur (gerçek veri yoksa)"""
         logger.info(f"Sentetik veri seti oluşturuluyor: {model_name}")
         
@@ -260,108 +300,216 @@ class ProfessionalModelTrainer:
             class_dir = dataset_dir / class_name
             class_dir.mkdir(exist_ok=True)
             
-            for i in range(samples_per_class):
-                # Gerçekçi tıbbi görüntü oluştur
-                image = self._generate_realistic_medical_image(
-                    model_name, class_name, class_idx
-                )
-                
-                # Dosya adı
-                filename = f"{class_name.lower()}_{i:04d}.png"
-                filepath = class_dir / filename
-                
-                # Görüntüyü kaydet
-                cv2.imwrite(str(filepath), image)
-                
-                image_paths.append(str(filepath))
-                labels.append(class_idx)
+            class_seed = None if seed is None else np.random.SeedSequence([seed, class_idx])
+            images = iter_batches(samples_per_class, seed=class_seed,
+                                  **self._synthetic_kwargs(model_name, class_name, class_idx))
+            class_paths = self._write_synthetic_images(class_dir, class_name, images)
+            
+            image_paths.extend(class_paths)
+            labels.extend([class_idx] * len(class_paths))
         
         logger.info(f"Sentetik veri seti oluşturuldu: {len(image_paths)} örnek")
         return image_paths, labels
     
-    def _generate_realistic_medical_image(self, 
-                                        model_name: str, 
-                                        class_name: str, 
-                                        class_idx: int) -> np.ndarray:
-        """Gerçekçi tıbbi görüntü oluştur"""
-        # Temel görüntü boyutu
-        size = self.model_configs[model_name]['image_size'][0]
-        
-        # Temel görüntü oluştur
-        image = np.random.normal(128, 30, (size, size)).astype(np.uint8)
-        
-        # Model tipine göre özel özellikler ekle
+    def _write_synthetic_images(self, class_dir: Path, class_name: str, batches) -> List[str]:
+        """Görüntü yığınlarını PNG olarak paralel yaz"""
+        filepaths = []
+        with ThreadPoolExecutor(max_workers=SYNTHETIC_WORKERS) as executor:
+            for batch in batches:
+                batch_paths = [
+                    str(class_dir / f"{class_name.lower()}_{i:04d}.png")
+                    for i in range(len(filepaths), len(filepaths) + len(batch))
+                ]
+                list(executor.map(cv2.imwrite, batch_paths, batch))
+                filepaths.extend(batch_paths)
+        return filepaths
+    
+    def _synthetic_kwargs(self, model_name: str, class_name: str, class_idx: int) -> Dict[str, Any]:
+        """Model tipine göre generate_batch parametreleri"""
+        # Model tipine göre özel özellikler
         if 'xray' in model_name:
-            image = self._add_xray_features(image, class_name, class_idx)
+            add_features = self._add_xray_features
         elif 'ct' in model_name:
-            image = self._add_ct_features(image, class_name, class_idx)
+            add_features = self._add_ct_features
         elif 'mri' in model_name:
-            image = self._add_mri_features(image, class_name, class_idx)
+            add_features = self._add_mri_features
         elif 'mammography' in model_name:
-            image = self._add_mammography_features(image, class_name, class_idx)
-        
-        # Gürültü ekle
-        noise = np.random.normal(0, 5, image.shape)
-        image = np.clip(image + noise, 0, 255).astype(np.uint8)
+            add_features = self._add_mammography_features
+        else:
+            add_features = None
         
-        # Gaussian blur uygula
-        image = cv2.GaussianBlur(image, (3, 3), 0)
+        findings = None
+        if add_features is not None:
+            findings = lambda image, rng: add_features(image, class_name, class_idx, rng)
         
-        return image
+        return {
+            'size': self.model_configs[model_name]['image_size'][0],
+            'findings': findings,
+            'noise': NOISE_GAUSSIAN
+        }
+    
+    def generate_synthetic_batch(self,
+                                 model_name: str,
+                                 class_name: str,
+                                 class_idx: int,
+                                 num_images: int,
+                                 seed: Optional[int] = None) -> np.ndarray:
+        """(num_images, boyut, boyut) uint8 sentetik görüntü yığını üret"""
+        return generate_batch(num_images, seed=seed,
+                              **self._synthetic_kwargs(model_name, class_name, class_idx))
+    
+    def create_synthetic_shards(self,
+                                model_name: str,
+                                num_samples: int = 1000,
+                                seed: int = 0) -> Path:
+        """
+        Sentetik veri setini PNG yazmadan doğrudan eğitim shard'larına üret
+        
+        Görüntüler MedicalImageDataset._load_medical_image ile aynı ön
+        işlemden (min-max, 512x512) geçirilir. Aynı model/örnek sayısı/tohum
+        için önceden üretilmiş shard dizini yeniden kullanılır.
+        """
+        class_names = self.model_configs[model_name]['class_names']
+        samples_per_class = num_samples // len(class_names)
+        key = hashlib.blake2b(
+            json.dumps([model_name, class_names, samples_per_class, seed]).encode('utf-8'), digest_size=8
+        ).hexdigest()
+        preprocess = MedicalImageDataset([], [], model_name, augment=False)
+        
+        def build(output_dir: Path):
+            writer = ShardWriter(output_dir, (512, 512))
+            for class_idx, class_name in enumerate(class_names):
+                batches = iter_batches(samples_per_class, seed=np.random.SeedSequence([seed, class_idx]),
+                                       **self._synthetic_kwargs(model_name, class_name, class_idx))
+                for batch in batches:
+                    for image in batch:
+                        image = preprocess._normalize_medical_image(image.astype(np.float32))
+                        if image.shape != (512, 512):
+                            image = cv2.resize(image, (512, 512), interpolation=cv2.INTER_LANCZOS4)
+                        writer.add(image, class_idx, f"synthetic:{class_name}")
+            writer.close(synthetic={'model_name': model_name, 'seed': seed})
+        
+        return build_cached(f"synthetic_{model_name}", key, build)
     
-    def _add_xray_features(self, image: np.ndarray, class_name: str, class_idx: int) -> np.ndarray:
+    def _generate_realistic_medical_image(self, 
+                                        model_name: str, 
+                                        class_name: str, 
+                                        class_idx: int) -> np.ndarray:
+        """Gerçekçi tıbbi görüntü oluştur"""
+        return self.generate_synthetic_batch(model_name, class_name, class_idx, 1)[0]
+    
+    def _add_xray_features(self, image: np.ndarray, class_name: str, class_idx: int,
+                          rng: np.random.Generator) -> np.ndarray:
         """X-Ray görüntüsüne özel özellikler ekle"""
         if class_name == 'Pneumonia':
             # Pnömoni bulguları
             # Konsolidasyon alanları
-            for _ in range(np.random.randint(2, 5)):
-                center = (np.random.randint(50, 462), np.random.randint(50, 462))
-                cv2.circle(image, center, np.random.randint(20, 60), 200, -1)
+            for _ in range(int(rng.integers(2, 5))):
+                center = (int(rng.integers(50, 462)), int(rng.integers(50, 462)))
+                cv2.circle(image, center, int(rng.integers(20, 60)), 200, -1)
             
             # Air bronchogram
-            for _ in range(np.random.randint(1, 3)):
-                start = (np.random.randint(100, 412), np.random.randint(100, 412))
-                end = (start[0] + np.random.randint(50, 100), start[1] + np.random.randint(50, 100))
+            for _ in range(int(rng.integers(1, 3))):
+                start = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+                end = (start[0] + int(rng.integers(50, 100)), start[1] + int(rng.integers(50, 100)))
                 cv2.line(image, start, end, 180, 3)
         
         elif class_name == 'Fracture':
             # Kırık çizgileri
-            for _ in range(np.random.randint(1, 3)):
-                start = (np.random.randint(100, 412), np.random.randint(100, 412))
-                end = (start[0] + np.random.randint(30, 80), start[1] + np.random.randint(30, 80))
+            for _ in range(int(rng.integers(1, 3))):
+                start = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+                end = (start[0] + int(rng.integers(30, 80)), start[1] + int(rng.integers(30, 80)))
                 cv2.line(image, start, end, 50, 2)
         
         return image
     
-    def _add_ct_features(self, image: np.ndarray, class_name: str, class_idx: int) -> np.ndarray:
+    def _add_ct_features(self, image: np.ndarray, class_name: str, class_idx: int,
+                        rng: np.random.Generator) -> np.ndarray:
         """CT görüntüsüne özel özellikler ekle"""
         if 'Stroke' in class_name:
             # İnme bulguları
-            center = (np.random.randint(100, 412), np.random.randint(100, 412))
-            cv2.circle(image, center, np.random.randint(15, 40), 100, -1)
+            center = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+            cv2.circle(image, center, int(rng.integers(15, 40)), 100, -1)
         
         return image
     
-    def _add_mri_features(self, image: np.ndarray, class_name: str, class_idx: int) -> np.ndarray:
+    def _add_mri_features(self, image: np.ndarray, class_name: str, class_idx: int,
+                         rng: np.random.Generator) -> np.ndarray:
         """MRI görüntüsüne özel özellikler ekle"""
         if 'Tumor' in class_name:
             # Tümör bulguları
-            center = (np.random.randint(100, 412), np.random.randint(100, 412))
-            cv2.ellipse(image, center, (np.random.randint(20, 50), np.random.randint(20, 50)), 
+            center = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+            cv2.ellipse(image, center, (int(rng.integers(20, 50)), int(rng.integers(20, 50))), 
                        0, 0, 360, 150, -1)
         
         return image
     
-    def _add_mammography_features(self, image: np.ndarray, class_name: str, class_idx: int) -> np.ndarray:
+    def _add_mammography_features(self, image: np.ndarray, class_name: str, class_idx: int,
+                                 rng: np.random.Generator) -> np.ndarray:
         """Mamografi görüntüsüne özel özellikler ekle"""
         if class_name == 'Mass':
             # Kütle bulguları
-            center = (np.random.randint(100, 412), np.random.randint(100, 412))
-            cv2.ellipse(image, center, (np.random.randint(15, 35), np.random.randint(15, 35)), 
+            center = (int(rng.integers(100, 412)), int(rng.integers(100, 412)))
+            cv2.ellipse(image, center, (int(rng.integers(15, 35)), int(rng.integers(15, 35))), 
                        0, 0, 360, 180, -1)
         
         return image
     
+    def _add_head_class_features(self, image: np.ndarray, class_idx: int,
+                                 rng: np.random.Generator) -> np.ndarray:
+        """
+        Çok başlı model başlıkları için sınıfa özgü sentetik bulgu ekle
+        
+        Sınıflar çizgi sayısı, yönü, kalınlığı ve yoğunluğuyla ayrışır;
+        çift indeksli sınıflara ayrıca yerinden oynamış eklem benzeri bir
+        halka eklenir. Böylece her Normal dışı sınıfın kendi dağılımı olur.
+        """
+        height, width = image.shape[:2]
+        margin = min(height, width) // 5
+        angle = np.deg2rad(35 * class_idx + rng.normal(0, 5))
+        length = min(height, width) * (0.08 + 0.04 * class_idx)
+        intensity = int(np.clip(40 + 45 * class_idx + rng.normal(0, 5), 0, 255))
+        
+        for _ in range(class_idx):
+            start = (int(rng.integers(margin, width - margin)), int(rng.integers(margin, height - margin)))
+            end = (int(start[0] + length * np.cos(angle)), int(start[1] + length * np.sin(angle)))
+            cv2.line(image, start, end, intensity, 1 + class_idx)
+        
+        if class_idx % 2 == 0:
+            center = (int(rng.integers(margin, width - margin)), int(rng.integers(margin, height - margin)))
+            radius = int(min(height, width) * 0.05)
+            cv2.circle(image, center, radius, intensity, 2)
+            cv2.circle(image, (center[0] + radius, center[1] + radius // 2), radius, intensity, 2)
+        
+        return image
+    
+    def _create_dataset(self, image_paths: List[str], labels: List[int],
+                        image_type: str, augment: bool) -> MedicalImageDataset:
+        """
+        Veri seti oluştur
+        
+        DATASET_SHARD_DIR ayarlıysa görüntüler (girdiler değişmedikçe) bir kez
+        uint8 shard'lara derlenir ve epoch'lar dosya decode etmez.
+        """
+        if not DATASET_SHARD_DIR:
+            return MedicalImageDataset(image_paths, labels, image_type, augment=augment)
+        
+        loader = MedicalImageDataset([], [], image_type, augment=False)._load_medical_image
+        shard_dir = compile_cached(image_paths, labels, image_type,
+                                   image_size=(512, 512), load_image=loader)
+        return ShardedMedicalImageDataset(ShardedImageDataset(shard_dir), image_type, augment=augment)
+    
+    def _create_synthetic_shard_datasets(self, model_name: str) -> Tuple[MedicalImageDataset, MedicalImageDataset]:
+        """Sentetik shard'lardan train/validation veri setleri"""
+        shards = ShardedImageDataset(self.create_synthetic_shards(model_name))
+        train_indices, val_indices = train_test_split(
+            list(range(len(shards))), test_size=0.2, random_state=42, stratify=shards.labels
+        )
+        return (
+            ShardedMedicalImageDataset(shards, model_name, augment=True, indices=train_indices),
+            ShardedMedicalImageDataset(shards, model_name, augment=False, indices=val_indices)
+        )
+    
     def train_model(self, 
                    model_name: str,
                    image_paths: List[str] = None,
@@ -371,20 +519,25 @@ class ProfessionalModelTrainer:
         logger.info(f"Model eğitimi başlatılıyor: {model_name}")
         
         # Veri seti hazırla
-        if image_paths is None or labels is None:
-            if use_synthetic:
-                image_paths, labels = self.create_synthetic_dataset(model_name)
-            else:
-                raise ValueError("Veri seti bulunamadı ve sentetik veri kullanımı kapalı")
-        
-        # Train-validation split
-        train_paths, val_paths, train_labels, val_labels = train_test_split(
-            image_paths, labels, test_size=0.2, random_state=42, stratify=labels
-        )
-        
-        # Veri setleri oluştur
-        train_dataset = MedicalImageDataset(train_paths, train_labels, model_name, augment=True)
-        val_dataset = MedicalImageDataset(val_paths, val_labels, model_name, augment=False)
+        if (image_paths is None or labels is None) and use_synthetic and DATASET_SHARD_DIR:
+            # Sentetik veri PNG yazılmadan doğrudan shard'lara üretilir
+            train_dataset, val_dataset = self._create_synthetic_shard_datasets(model_name)
+        else:
+            if image_paths is None or labels is None:
+                if use_synthetic:
+                    image_paths, labels = self.create_synthetic_dataset(model_name)
+                else:
+                    raise ValueError("Veri seti bulunamadı ve sentetik veri kullanımı kapalı")
+            
+            # Train-validation split
+            train_paths, val_paths, train_labels, val_labels = train_test_split(
+                image_paths, labels, test_size=0.2, random_state=42, stratify=labels
+            )
+            
+            # Veri setleri oluştur
+            train_dataset = self._create_dataset(train_paths, train_labels, model_name, augment=True)
+            val_dataset = self._create_dataset(val_paths, val_labels, model_name, augment=False)
+        train_labels = train_dataset.labels
         
         # Data loaders
         train_loader = DataLoader(train_dataset, batch_size=self.training_params['batch_size'], 
@@ -523,6 +676,224 @@ class ProfessionalModelTrainer:
         
         return results
     
+    def create_synthetic_head_dataset(self,
+                                      head_name: str,
+                                      num_samples: int = 600) -> Tuple[List[str], List[int]]:
+        """Çok başlı model başlığı için sentetik X-Ray veri seti oluştur"""
+        logger.info(f"Sentetik başlık veri seti oluşturuluyor: {head_name}")
+        
+        class_names = self.multi_head_config['heads'][head_name]
+        size = self.multi_head_config['image_size'][0]
+        
+        dataset_dir = self.data_dir / self.multi_head_config['model_name'] / head_name
+        dataset_dir.mkdir(parents=True, exist_ok=True)
+        
+        image_paths = []
+        labels = []
+        samples_per_class = num_samples // len(class_names)
+        
+        for class_idx, class_name in enumerate(class_names):
+            class_dir = dataset_dir / class_name
+            class_dir.mkdir(exist_ok=True)
+            
+            # Normal dışındaki her sınıfa kendine özgü bulgu ekle
+            findings = None
+            if class_idx > 0:
+                findings = lambda image, rng, class_idx=class_idx: self._add_head_class_features(
+                    image, class_idx, rng)
+            
+            images = iter_batches(samples_per_class, size=size, findings=findings, noise=NOISE_NONE)
+            class_paths = self._write_synthetic_images(class_dir, class_name, images)
+            
+            image_paths.extend(class_paths)
+            labels.extend([class_idx] * len(class_paths))
+        
+        logger.info(f"Sentetik başlık veri seti oluşturuldu: {len(image_paths)} örnek")
+        return image_paths, labels
+    
+    def train_multi_head_model(self,
+                               head_datasets: Optional[Dict[str, Tuple[List[str], List[int]]]] = None,
+                               use_synthetic: bool = True) -> Dict[str, Any]:
+        """
+        Paylaşımlı omurgalı çok başlı modeli ortak eğit
+        
+        Her görevin kendi etiketli veri seti vardır. Her adımda her başlıktan
+        bir batch alınır, başlık loss'ları ağırlıklı toplanır ve tek backward
+        ile hem omurga hem başlıklar güncellenir.
+        
+        Args:
+            head_datasets: Başlık adı -> (görüntü yolları, etiketler)
+            use_synthetic: Verisi olmayan başlıklar için sentetik veri üret
+        """
+        model_name = self.multi_head_config['model_name']
+        head_configs = self.multi_head_config['heads']
+        loss_weights = self.multi_head_config['loss_weights']
+        logger.info(f"Çok başlı model eğitimi başlatılıyor: {list(head_configs.keys())}")
+        
+        head_datasets = dict(head_datasets or {})
+        synthetic_heads = []
+        for head_name in head_configs:
+            if head_name not in head_datasets:
+                if not use_synthetic:
+                    raise ValueError(f"Veri seti bulunamadı: {head_name}")
+                head_datasets[head_name] = self.create_synthetic_head_dataset(head_name)
+                synthetic_heads.append(head_name)
+        
+        # Başlık başına train/val loader'ları
+        train_loaders = {}
+        val_loaders = {}
+        for head_name, (image_paths, labels) in head_datasets.items():
+            train_paths, val_paths, train_labels, val_labels = train_test_split(
+                image_paths, labels, test_size=0.2, random_state=42, stratify=labels
+            )
+            train_loaders[head_name] = DataLoader(
+                self._create_dataset(train_paths, train_labels, head_name, augment=True),
+                batch_size=self.training_params['batch_size'],
+                shuffle=True, num_workers=4, pin_memory=True, drop_last=True
+            )
+            val_loaders[head_name] = DataLoader(
+                self._create_dataset(val_paths, val_labels, head_name, augment=False),
+                batch_size=self.training_params['batch_size'],
+                shuffle=False, num_workers=4, pin_memory=True
+            )
+        
+        model = MultiHeadRadiologyModel(
+            head_configs=head_configs,
+            input_channels=self.multi_head_config['input_channels']
+        ).to(self.device)
+        
+        criterion = nn.CrossEntropyLoss(label_smoothing=self.training_params['label_smoothing'])
+        optimizer = optim.AdamW(model.parameters(),
+                               lr=self.training_params['learning_rate'],
+                               weight_decay=self.training_params['weight_decay'])
+        scheduler = ReduceLROnPlateau(optimizer, mode='min', factor=0.5, patience=5)
+        
+        # Epoch uzunluğu en büyük veri setine göre; küçük setler döngüye girer
+        steps_per_epoch = max(len(loader) for loader in train_loaders.values())
+        
+        best_val_loss = float('inf')
+        patience_counter = 0
+        train_losses = []
+        val_losses = []
+        val_accuracies = {head_name: [] for head_name in head_configs}
+        
+        for epoch in range(self.training_params['epochs']):
+            # Training
+            model.train()
+            train_loss = 0.0
+            iterators = {head_name: iter(loader) for head_name, loader in train_loaders.items()}
+            
+            for step in range(steps_per_epoch):
+                optimizer.zero_grad()
+                step_loss = 0.0
+                
+                for head_name in head_configs:
+                    try:
+                        data, target = next(iterators[head_name])
+                    except StopIteration:
+                        iterators[head_name] = iter(train_loaders[head_name])
+                        data, target = next(iterators[head_name])
+                    
+                    data, target = data.to(self.device), target.to(self.device)
+                    output = model(data, heads=[head_name])[head_name]
+                    step_loss = step_loss + loss_weights.get(head_name, 1.0) * criterion(output, target)
+                
+                step_loss.backward()
+                torch.nn.utils.clip_grad_norm_(model.parameters(),
+                                             self.training_params['gradient_clip'])
+                optimizer.step()
+                
+                train_loss += step_loss.item()
+            
+            # Validation
+            model.eval()
+            val_loss = 0.0
+            with torch.no_grad():
+                for head_name, loader in val_loaders.items():
+                    head_loss = 0.0
+                    correct = 0
+                    total = 0
+                    for data, target in loader:
+                        data, target = data.to(self.device), target.to(self.device)
+                        output = model(data, heads=[head_name])[head_name]
+                        head_loss += criterion(output, target).item()
+                        _, predicted = torch.max(output, 1)
+                        total += target.size(0)
+                        correct += (predicted == target).sum().item()
+                    
+                    val_loss += loss_weights.get(head_name, 1.0) * head_loss / max(len(loader), 1)
+                    val_accuracies[head_name].append(100. * correct / max(total, 1))
+            
+            train_loss /= steps_per_epoch
+            train_losses.append(train_loss)
+            val_losses.append(val_loss)
+            
+            scheduler.step(val_loss)
+            
+            # Early stopping
+            if val_loss < best_val_loss:
+                best_val_loss = val_loss
+                patience_counter = 0
+                self._save_multi_head_model(model, epoch, {
+                    head_name: accs[-1] for head_name, accs in val_accuracies.items()
+                }, synthetic_heads)
+            else:
+                patience_counter += 1
+            
+            if patience_counter >= self.training_params['patience']:
+                logger.info(f"Early stopping at epoch {epoch}")
+                break
+            
+            if epoch % 10 == 0:
+                head_summary = ', '.join(
+                    f"{head_name}: {accs[-1]:.2f}%" for head_name, accs in val_accuracies.items()
+                )
+                logger.info(f'Epoch {epoch}: Train Loss: {train_loss:.4f}, '
+                          f'Val Loss: {val_loss:.4f}, Val Acc: {head_summary}')
+        
+        results = {
+            'model_name': model_name,
+            'heads': list(head_configs.keys()),
+            'synthetic_heads': synthetic_heads,
+            'final_loss': val_loss,
+            'final_accuracies': {head_name: accs[-1] for head_name, accs in val_accuracies.items()},
+            'best_epoch': epoch - patience_counter,
+            'total_epochs': epoch + 1,
+            'train_losses': train_losses,
+            'val_losses': val_losses,
+            'val_accuracies': val_accuracies,
+            'training_params': self.training_params
+        }
+        
+        self._save_training_results(results, model_name)
+        
+        logger.info(f"Çok başlı model eğitimi tamamlandı: {results['final_accuracies']}")
+        return results
+    
+    def _save_multi_head_model(self, model: MultiHeadRadiologyModel, epoch: int,
+                               accuracies: Dict[str, float], synthetic_heads: List[str]):
+        """
+        Çok başlı modeli başlık konfigürasyonuyla birlikte kaydet
+        
+        Sentetik veriyle eğitilen başlıklar checkpoint'e yazılır; servis
+        tarafı bu başlıkları klinik çıktı için doğrulanmış saymaz.
+        """
+        model_file = self.models_dir / f"{self.multi_head_config['model_name']}_model.pth"
+        
+        torch.save({
+            'model_state_dict': model.state_dict(),
+            'model_name': self.multi_head_config['model_name'],
+            'head_configs': model.head_configs,
+            'epoch': epoch,
+            'accuracies': accuracies,
+            'synthetic_heads': synthetic_heads,
+            'training_params': self.training_params,
+            'created_at': datetime.now().isoformat(),
+            'version': '2.0.0'
+        }, model_file)
+        
+        logger.info(f"Model kaydedildi: {model_file}")
+    
     def _save_model(self, model: nn.Module, model_name: str, epoch: int, accuracy: float):
         """En iyi modeli kaydet"""
         model_file = self.models_dir / f"{model_name}_model.pth"
@@ -540,6 +911,30 @@ class ProfessionalModelTrainer:
         
         logger.info(f"Model kaydedildi: {model_file}")
     
+    def export_onnx(self, model_name: str) -> Optional[Path]:
+        """Kaydedilmiş en iyi checkpoint'i dinamik batch eksenli ONNX'e aktar"""
+        try:
+            config = self.model_configs[model_name]
+            model_file = self.models_dir / f"{model_name}_model.pth"
+            checkpoint = torch.load(model_file, map_location='cpu')
+            
+            model = config['model_class'](
+                num_classes=config['num_classes'],
+                input_channels=config['input_channels']
+            )
+            model.load_state_dict(checkpoint['model_state_dict'])
+            
+            return export_to_onnx(
+                model,
+                onnx_file(self.models_dir, model_name),
+                (config['input_channels'],) + tuple(config['image_size']),
+                model_file
+            )
+            
+        except Exception as e:
+            logger.error(f"ONNX dışa aktarma hatası ({model_name}): {str(e)}")
+            return None
+    
     def _evaluate_model(self, model: nn.Module, val_loader: DataLoader, class_names: List[str]) -> Dict[str, Any]:
         """Model değerlendirmesi yap"""
         model.eval()
@@ -646,6 +1041,9 @@ class ProfessionalModelTrainer:
                 # Model config dosyasını güncelle
                 self._update_model_config(model_name, result)
                 
+                # ONNX Runtime backend'i için dışa aktar
+                self.export_onnx(model_name)
+                
             except Exception as e:
                 logger.error(f"Model eğitim hatası ({model_name}): {str(e)}")
                 results[model_name] = {'error': str(e)}
@@ -709,6 +1107,10 @@ def main():
     # Tüm modelleri eğit
     results = trainer.train_all_models()
     
+    # Paylaşımlı omurgalı çok başlı model (isteğe bağlı)
+    if os.getenv("TRAIN_MULTI_HEAD_MODEL", "false").lower() == "true":
+        trainer.train_multi_head_model()
+    
     # Sonuçları özetle
     logger.info("📊 Eğitim Sonuçları:")
     for model_name, result in results.items():
@@ -0,0 +1,274 @@
+"""
+Prefork Sunucu - Copy-on-Write Paylaşımlı Model Ağırlıkları
+===========================================================
+
+`uvicorn --workers N` her worker'da uygulamayı yeniden import eder; her CNN
+N kez yüklenir ve RSS worker sayısıyla çarpılır. PreforkServer modelleri
+master süreçte bir kez yükler, ardından worker'ları fork eder:
+
+    - Salt okunur ağırlık sayfaları worker'lar arasında copy-on-write ile
+      paylaşılır (fork öncesi gc.freeze: GC taraması paylaşılan nesnelere
+      yazıp sayfaları kopyalatmaz)
+    - İsteğe bağlı olarak torch tensörleri paylaşımlı belleğe taşınır
+      (share_memory=True); sayfalar yazılsa bile kopyalanmaz
+    - Master'da torch tek thread'e çekilir (fork öncesi OpenMP havuzu
+      oluşmaz), her worker'a CPU çekirdekleri bölüştürülür
+      (torch.set_num_threads)
+    - Worker'lar aynı dinleme soketini paylaşır; ölen worker master'daki
+      ısınmış durumdan yeniden fork edilir
+
+    server = PreforkServer(app, workers=4)
+    server.preload(api.preload_models)
+    server.serve("0.0.0.0", 8000)
+
+Yalnızca fork destekleyen platformlarda (Linux/macOS) çalışır.
+"""
+
+import ctypes
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Worker sayısı (1: tek süreç uvicorn, 0: CPU sayısı)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS") or 1)
+# Worker başına torch/OpenCV thread sayısı (boşsa CPU sayısı / worker sayısı)
+SERVER_THREADS_PER_WORKER = int(os.getenv("SERVER_THREADS_PER_WORKER") or 0)
+# false: modeller master'da yüklenmez, her worker kendi kopyasını yükler
+SERVER_PRELOAD = os.getenv("SERVER_PRELOAD", "true").lower() == "true"
+# true: torch modüllerinin tensörleri fork öncesi paylaşımlı belleğe taşınır
+SERVER_SHARE_MEMORY = os.getenv("SERVER_SHARE_MEMORY", "false").lower() == "true"
+
+# Başlar başlamaz ölen worker'lar için yeniden fork beklemesi (saniye)
+RESTART_BACKOFF = 1.0
+# Kapanışta worker'ların zarif kapanma süresi (saniye)
+GRACEFUL_TIMEOUT = 30.0
+# prctl yoksa worker'ın master'ı kontrol etme aralığı (saniye)
+PARENT_CHECK_INTERVAL = 1.0
+
+# linux/prctl.h
+PR_SET_PDEATHSIG = 1
+
+
+def available_cpus() -> int:
+    """Sürecin kullanabileceği CPU sayısı (cgroup/affinity sınırlarıyla)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def set_compute_threads(threads: int):
+    """Yüklü hesaplama kütüphanelerinin thread sayısını ayarla"""
+    if 'torch' in sys.modules:
+        sys.modules['torch'].set_num_threads(threads)
+    if 'cv2' in sys.modules:
+        sys.modules['cv2'].setNumThreads(threads)
+
+
+def exit_with_parent(parent_pid: int):
+    """
+    Master ölürse (SIGKILL, OOM, çökme) worker'ın SIGTERM almasını sağla
+
+    Linux'ta prctl(PR_SET_PDEATHSIG) kullanılır; diğer platformlarda bir
+    daemon thread os.getppid()'i izler. Master prctl'den önce öldüyse
+    worker hemen kapanır.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM, 0, 0, 0) != 0:
+            raise OSError(ctypes.get_errno(), "prctl(PR_SET_PDEATHSIG) başarısız")
+    except (OSError, AttributeError):
+        def watch():
+            while os.getppid() == parent_pid:
+                time.sleep(PARENT_CHECK_INTERVAL)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        threading.Thread(target=watch, name="parent-watchdog", daemon=True).start()
+
+    if os.getppid() != parent_pid:
+        os._exit(0)
+
+
+def share_torch_memory() -> int:
+    """
+    Yüklü tüm torch modüllerinin tensörlerini paylaşımlı belleğe taşı
+
+    Returns:
+        Taşınan modül sayısı
+    """
+    if 'torch' not in sys.modules:
+        return 0
+    module_type = sys.modules['torch'].nn.Module
+    modules = [obj for obj in gc.get_objects() if isinstance(obj, module_type)]
+    for module in modules:
+        module.share_memory()
+    return len(modules)
+
+
+class PreforkServer:
+    """Master'da modelleri yükleyip worker'ları fork eden ASGI sunucusu"""
+
+    def __init__(self,
+                 app: Any,
+                 workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None,
+                 share_memory: Optional[bool] = None,
+                 log_level: str = "info"):
+        """
+        Args:
+            app: ASGI uygulaması (fork'tan önce import edilmiş)
+            workers: Worker sayısı (None ise SERVER_WORKERS, 0 ise CPU sayısı)
+            threads_per_worker: Worker başına hesaplama thread'i
+                                (None ise SERVER_THREADS_PER_WORKER veya CPU / worker)
+            share_memory: Tensörleri paylaşımlı belleğe taşı (None ise SERVER_SHARE_MEMORY)
+            log_level: uvicorn log seviyesi
+        """
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("PreforkServer fork destekleyen bir platform gerektirir")
+
+        self.app = app
+        self.workers = (workers if workers is not None else SERVER_WORKERS) or available_cpus()
+        self.threads_per_worker = (threads_per_worker or SERVER_THREADS_PER_WORKER or
+                                   max(1, available_cpus() // self.workers))
+        self.share_memory = SERVER_SHARE_MEMORY if share_memory is None else share_memory
+        self.log_level = log_level
+
+        self.socket: Optional[socket.socket] = None
+        self.children: Dict[int, int] = {}  # pid -> worker no
+        self._started_at: Dict[int, float] = {}
+        self._stopping = False
+        self.stats = {'spawned': 0, 'restarted': 0, 'preload_seconds': None, 'shared_modules': 0}
+
+    def preload(self, loader: Callable[[], Any]) -> Any:
+        """
+        Modelleri master'da yükle (fork öncesi, senkron)
+
+        torch master'da tek thread'e çekilir: fork öncesi OpenMP thread
+        havuzu oluşursa worker'larda kilitlenmeye yol açabilir.
+        """
+        try:
+            import torch
+            torch.set_num_threads(1)
+        except ImportError:
+            pass
+
+        start_time = time.perf_counter()
+        result = loader()
+        self.stats['preload_seconds'] = time.perf_counter() - start_time
+        if self.share_memory:
+            self.stats['shared_modules'] = share_torch_memory()
+        logger.info(f"Master ön yükleme tamamlandı ({self.stats['preload_seconds']:.1f}s, "
+                    f"paylaşımlı bellekte {self.stats['shared_modules']} modül)")
+        return result
+
+    def serve(self, host: str, port: int):
+        """Soketi aç, worker'ları fork et ve ölenleri yeniden başlat (bloklar)"""
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((host, port))
+        self.socket.listen(2048)
+        self.socket.set_inheritable(True)
+
+        # Ön yüklenen nesneler kalıcı nesilde: worker'larda GC onlara dokunmaz
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        logger.info(f"Prefork sunucu: {host}:{port}, {self.workers} worker x "
+                    f"{self.threads_per_worker} thread (master pid {os.getpid()})")
+        for worker_no in range(self.workers):
+            self._spawn(worker_no)
+
+        try:
+            self._supervise()
+        finally:
+            self.socket.close()
+        logger.info("Prefork sunucu kapatıldı")
+
+    def _spawn(self, worker_no: int):
+        master_pid = os.getpid()
+        # Fork anında gelen durdurma sinyali master'ın handler'ını worker'da
+        # çalıştırmasın: sinyaller fork boyunca bloklanır, worker'da
+        # handler'lar sıfırlandıktan sonra açılır
+        stop_signals = {signal.SIGTERM, signal.SIGINT}
+        signal.pthread_sigmask(signal.SIG_BLOCK, stop_signals)
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, stop_signals)
+                exit_with_parent(master_pid)
+                self._run_worker(worker_no)
+                exit_code = 0
+            except BaseException:
+                logger.exception(f"Worker {worker_no} hata ile sonlandı")
+            finally:
+                os._exit(exit_code)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, stop_signals)
+
+        self.children[pid] = worker_no
+        self._started_at[pid] = time.monotonic()
+        self.stats['spawned'] += 1
+        logger.info(f"Worker {worker_no} başlatıldı (pid {pid})")
+
+    def _run_worker(self, worker_no: int):
+        """Worker süreci: thread payını ayarla ve paylaşılan sokette uvicorn çalıştır"""
+        import uvicorn
+
+        os.environ['SERVER_WORKER_ID'] = str(worker_no)
+        set_compute_threads(self.threads_per_worker)
+
+        config = uvicorn.Config(self.app, log_level=self.log_level)
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+    def _supervise(self):
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            worker_no = self.children.pop(pid, None)
+            started_at = self._started_at.pop(pid, None)
+            if worker_no is None or self._stopping:
+                continue
+
+            logger.warning(f"Worker {worker_no} (pid {pid}) beklenmedik şekilde sonlandı "
+                           f"(durum {status}), yeniden başlatılıyor")
+            if started_at is not None and time.monotonic() - started_at < RESTART_BACKOFF:
+                time.sleep(RESTART_BACKOFF)
+            if not self._stopping:
+                self.stats['restarted'] += 1
+                self._spawn(worker_no)
+
+    def _handle_stop(self, signum, frame):
+        """SIGTERM/SIGINT: worker'ları zarifçe kapat, süre aşılırsa öldür"""
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info(f"Kapatma sinyali ({signum}), {len(self.children)} worker durduruluyor")
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        signal.signal(signal.SIGALRM, self._kill_remaining)
+        signal.alarm(int(GRACEFUL_TIMEOUT))
+
+    def _kill_remaining(self, signum, frame):
+        for pid in list(self.children):
+            logger.warning(f"Worker zamanında kapanmadı, öldürülüyor (pid {pid})")
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
@@ -29,6 +29,8 @@ from sklearn.metrics import accuracy_score, precision_recall_fscore_support, con
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from shard_dataset import DATASET_SHARD_DIR, ShardedImageDataset, compile_cached
+
 # Logging ayarla
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -44,6 +46,10 @@ class RealMedicalDataset(Dataset):
         self.samples = []
         self.labels = []
         
+        # Önceden decode edilmiş shard'lar (bkz. use_shards)
+        self.shards = None
+        self._shard_index = {}
+        
         # Veri seti yapısını oluştur
         self._load_real_medical_data()
     
@@ -189,13 +195,36 @@ class RealMedicalDataset(Dataset):
         
         # Gerçek görüntü yükleme simülasyonu
         # Gerçek implementasyonda burada gerçek görüntüler yüklenecek
-        image = self._load_medical_image(sample['image_path'])
+        image = self._load_image(sample['image_path'])
         
         if self.transform:
             image = self.transform(image)
         
         return image, sample['label'], sample
     
+    def use_shards(self, root: str = None) -> Path:
+        """
+        Görüntüleri (girdiler değişmedikçe) bir kez uint8 shard'lara derle
+        ve sonraki okumaları shard'lardan yap
+        
+        Görüntüler model giriş boyutunda (224x224) saklanır.
+        """
+        shard_dir = compile_cached(
+            [sample['image_path'] for sample in self.samples], self.labels,
+            "real_medical", image_size=(224, 224),
+            load_image=self._load_medical_image, root=root
+        )
+        self.shards = ShardedImageDataset(shard_dir)
+        self._shard_index = {path: i for i, path in enumerate(self.shards.sources())}
+        return shard_dir
+    
+    def _load_image(self, image_path: str) -> np.ndarray:
+        if self.shards is not None:
+            index = self._shard_index.get(image_path)
+            if index is not None:
+                return self.shards.read(index)
+        return self._load_medical_image(image_path)
+    
     def _load_medical_image(self, image_path: str) -> np.ndarray:
         """Tıbbi görüntüyü yükle"""
         try:
@@ -350,6 +379,8 @@ class RealDataTrainer:
         
         # Veri setlerini oluştur
         full_dataset = RealMedicalDataset(data_dir, transform=train_transform)
+        if DATASET_SHARD_DIR:
+            full_dataset.use_shards()
         
         # Train/Val/Test split
         train_size = int(0.7 * len(full_dataset))
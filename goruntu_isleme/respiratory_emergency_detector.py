@@ -14,8 +14,10 @@ OpenCV ile görüntü analizi + Makine öğrenmesi modeli kombinasyonu
 
 import cv2
 import numpy as np
+import os
 import pickle
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
 from datetime import datetime
@@ -26,21 +28,90 @@ from PIL import Image
 import base64
 import io
 
+from imaging_kernels import estimate_noise_level
+from result_cache import ResultCache, cached_checkpoint_fingerprint
+
 logger = logging.getLogger(__name__)
 
 
+# Sabit yapısal elemanlar ve Gabor filtreleri - her çağrıda yeniden üretilmez
+_LUNG_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (15, 15))
+_OPACITY_KERNEL = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+_GABOR_KERNELS = [
+    cv2.getGaborKernel((21, 21), 8.0, 0, freq, 0.5, 0, ktype=cv2.CV_32F)
+    for freq in (0.1, 0.2, 0.3)
+]
+
+
+class RespiratoryFeatureContext:
+    """
+    Tek görüntü için özellik fonksiyonlarının paylaştığı ara sonuçlar
+    
+    Maskeli bölge, maske indeksleri, akciğer piksel değerleri ve bölge
+    istatistikleri bir kez hesaplanır; kenar haritası ilk kullanımda
+    bir kez üretilir.
+    """
+    
+    def __init__(self, image: np.ndarray, lung_mask: np.ndarray):
+        self.image = image
+        self.lung_mask = lung_mask
+        self.mask = lung_mask > 0
+        
+        # Maske boşsa oranlar NumPy semantiğiyle (nan/inf) hesaplanır
+        self.lung_pixel_count = np.int64(np.count_nonzero(self.mask))
+        self.lung_region = cv2.bitwise_and(image, lung_mask)
+        
+        # Akciğer pikselleri (satır öncelikli sırada) ve koordinatları
+        self.rows, self.cols = np.nonzero(self.mask)
+        self.lung_values = image[self.rows, self.cols]
+        
+        if self.lung_values.size > 0:
+            self.density_mean = np.mean(self.lung_values)
+            self.density_std = np.std(self.lung_values)
+        else:
+            self.density_mean = np.nan
+            self.density_std = np.nan
+        
+        self._edges = None
+    
+    @property
+    def edges(self) -> np.ndarray:
+        """Canny kenar haritası (tüm görüntü)"""
+        if self._edges is None:
+            self._edges = cv2.Canny(self.image, 50, 150)
+        return self._edges
+
+
 class RespiratoryEmergencyDetector:
     """Solunum yolu acil vaka tespit sınıfı"""
     
-    def __init__(self, model_path: str = None):
+    # Ön işleme profilleri:
+    #   fast     - temiz görüntüde denoise atlanır, gerekirse bilateral filtre (triage)
+    #   balanced - temiz görüntüde atlanır, gerekirse küçük arama pencereli NLM
+    #   full     - LANCZOS4 + CLAHE + tam fastNlMeansDenoising (önceki davranış)
+    PREPROCESS_PROFILES = ('fast', 'balanced', 'full')
+    
+    def __init__(self, model_path: str = None, preprocess_profile: str = None):
         """
         Args:
             model_path: Pnömoni modeli yolu
+            preprocess_profile: Varsayılan ön işleme profili (fast, balanced, full)
         """
         self.model_path = model_path or "models/pneumonia_trained_model.pkl"
         self.model = None
         self.load_model()
         
+        self.preprocess_profile = self._validate_profile(
+            preprocess_profile or os.getenv("RESPIRATORY_PREPROCESS_PROFILE", "balanced")
+        )
+        
+        # Bu gürültü seviyesinin altındaki görüntülerde denoise atlanır
+        # (fast/balanced). Ölçek ImageProcessor ile ortak (imaging_kernels.estimate_noise_level).
+        self.clean_noise_level = float(os.getenv("RESPIRATORY_CLEAN_NOISE_LEVEL", "0.2"))
+        
+        # Aynı görüntü + model + profil için rapor yeniden hesaplanmaz
+        self.result_cache = ResultCache('respiratory_emergency')
+        
         # Acil durum eşik değerleri
         self.emergency_thresholds = {
             'pneumothorax_score': 0.7,      # Pnömotoraks riski
@@ -75,7 +146,8 @@ class RespiratoryEmergencyDetector:
             self.model = None
     
     def analyze_emergency(self, image_path: str = None, image_array: np.ndarray = None,
-                         image_base64: str = None) -> Dict[str, Any]:
+                         image_base64: str = None,
+                         preprocess_profile: Optional[str] = None) -> Dict[str, Any]:
         """
         Acil durum analizi yap
         
@@ -83,19 +155,32 @@ class RespiratoryEmergencyDetector:
             image_path: Görüntü dosya yolu
             image_array: NumPy array olarak görüntü
             image_base64: Base64 encoded görüntü
+            preprocess_profile: fast, balanced veya full (None ise varsayılan)
             
         Returns:
             Detaylı acil durum analiz raporu
         """
         try:
+            profile = self._validate_profile(preprocess_profile or self.preprocess_profile)
+            
             # Görüntüyü yükle
             image = self._load_image(image_path, image_array, image_base64)
             
             if image is None:
                 raise ValueError("Görüntü yüklenemedi")
             
+            cache_key = self.result_cache.make_key(
+                image,
+                model_version=cached_checkpoint_fingerprint([self.model_path]),
+                params={'profile': profile, 'clean_noise_level': self.clean_noise_level}
+            )
+            report = self.result_cache.get(cache_key)
+            if report is not None:
+                report['timestamp'] = datetime.now().isoformat()
+                return report
+            
             # Görüntüyü işle
-            processed_image = self._preprocess_image(image)
+            processed_image = self._preprocess_image(image, profile)
             
             # OpenCV ile özellik çıkarımı
             features = self._extract_respiratory_features(processed_image)
@@ -133,9 +218,11 @@ class RespiratoryEmergencyDetector:
                 },
                 'recommendations': self._generate_recommendations(urgency_level, findings),
                 'visualization_base64': self._image_to_base64(visualization),
-                'requires_immediate_attention': urgency_score >= 6.0
+                'requires_immediate_attention': urgency_score >= 6.0,
+                'preprocess_profile': profile
             }
             
+            self.result_cache.put(cache_key, report)
             return report
             
         except Exception as e:
@@ -160,57 +247,78 @@ class RespiratoryEmergencyDetector:
         
         return None
     
-    def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
+    def _validate_profile(self, profile: str) -> str:
+        if profile not in self.PREPROCESS_PROFILES:
+            raise ValueError(
+                f"Bilinmeyen ön işleme profili: {profile} "
+                f"(geçerli: {', '.join(self.PREPROCESS_PROFILES)})"
+            )
+        return profile
+    
+    def _preprocess_image(self, image: np.ndarray, profile: str = 'full') -> np.ndarray:
         """Görüntüyü analiz için hazırla"""
-        # Resize
+        # Resize - küçültmede INTER_AREA hem daha hızlı hem aliasing'siz
         target_size = (512, 512)
-        resized = cv2.resize(image, target_size, interpolation=cv2.INTER_LANCZOS4)
+        if profile == 'full' or image.shape[0] < target_size[1] or image.shape[1] < target_size[0]:
+            interpolation = cv2.INTER_LANCZOS4
+        else:
+            interpolation = cv2.INTER_AREA
+        resized = cv2.resize(image, target_size, interpolation=interpolation)
         
         # CLAHE - Kontrast artırma
         clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
         enhanced = clahe.apply(resized)
         
         # Denoising
-        denoised = cv2.fastNlMeansDenoising(enhanced, h=10)
+        if profile == 'full':
+            return cv2.fastNlMeansDenoising(enhanced, h=10)
+        
+        # Temiz görüntüde en pahalı adım atlanır
+        if estimate_noise_level(enhanced) < self.clean_noise_level:
+            return enhanced
         
-        return denoised
+        if profile == 'fast':
+            return cv2.bilateralFilter(enhanced, 5, 50, 50)
+        
+        # balanced: aynı NLM, 21x21 yerine 11x11 arama penceresi
+        return cv2.fastNlMeansDenoising(enhanced, h=10, templateWindowSize=7, searchWindowSize=11)
     
     def _extract_respiratory_features(self, image: np.ndarray) -> Dict[str, float]:
         """OpenCV ile solunum yolu özellikleri çıkar"""
         features = {}
         
-        # 1. Akciğer bölgesini tespit et
-        lung_mask = self._detect_lung_region(image)
+        # 1. Akciğer bölgesini tespit et; maske, maskeli bölge, kenar haritası
+        # ve bölge istatistikleri bağlamda bir kez hesaplanır
+        ctx = RespiratoryFeatureContext(image, self._detect_lung_region(image))
         
         # 2. Opacity (Mat alan) tespiti
-        opacity_mask = self._detect_opacity(image, lung_mask)
-        opacity_percentage = (np.sum(opacity_mask > 0) / np.sum(lung_mask > 0)) * 100
+        opacity_mask = self._detect_opacity(ctx)
+        opacity_percentage = (np.count_nonzero(opacity_mask) / ctx.lung_pixel_count) * 100
         features['opacity_percentage'] = opacity_percentage
         
         # 3. Pnömotoraks göstergeleri (serbest hava, kollaps çizgisi)
-        pneumothorax_indicators = self._detect_pneumothorax_signs(image, lung_mask)
+        pneumothorax_indicators = self._detect_pneumothorax_signs(ctx)
         features['pneumothorax_score'] = pneumothorax_indicators['score']
         features['lung_collapse_detected'] = pneumothorax_indicators['collapse_detected']
         
         # 4. Akciğer asimetrisi (bir akciğer diğerinden daha mat/küçük)
-        asymmetry_score = self._calculate_lung_asymmetry(image, lung_mask)
+        asymmetry_score = self._calculate_lung_asymmetry(ctx)
         features['asymmetry_score'] = asymmetry_score
         
         # 5. Plevral efüzyon göstergeleri (dip kısımlarda yoğunluk)
-        effusion_score = self._detect_pleural_effusion(image, lung_mask)
+        effusion_score = self._detect_pleural_effusion(ctx)
         features['pleural_effusion_score'] = effusion_score
         
         # 6. Yoğunluk dağılımı
-        lung_region = cv2.bitwise_and(image, lung_mask)
-        features['density_mean'] = np.mean(lung_region[lung_mask > 0])
-        features['density_std'] = np.std(lung_region[lung_mask > 0])
+        features['density_mean'] = ctx.density_mean
+        features['density_std'] = ctx.density_std
         
         # 7. Texture analizi (pulmoner ödem için)
-        texture_features = self._analyze_texture(lung_region, lung_mask)
+        texture_features = self._analyze_texture(ctx)
         features.update(texture_features)
         
         # 8. Kenar tespiti (pnömotoraks çizgisi için)
-        edge_features = self._analyze_edges(image, lung_mask)
+        edge_features = self._analyze_edges(ctx)
         features.update(edge_features)
         
         return features
@@ -221,66 +329,56 @@ class RespiratoryEmergencyDetector:
         _, binary = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         
         # Morphological işlemler
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (15, 15))
-        closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
-        opened = cv2.morphologyEx(closed, cv2.MORPH_OPEN, kernel)
+        closed = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, _LUNG_KERNEL)
+        opened = cv2.morphologyEx(closed, cv2.MORPH_OPEN, _LUNG_KERNEL)
         
         # En büyük iki bölgeyi bul (sağ ve sol akciğer)
         num_labels, labels, stats, _ = cv2.connectedComponentsWithStats(opened)
         
-        # Alanları sırala
-        areas = [(i, stats[i, cv2.CC_STAT_AREA]) for i in range(1, num_labels)]
-        areas.sort(key=lambda x: x[1], reverse=True)
-        
-        # En büyük 2 bölgeyi al (akciğerler)
-        lung_mask = np.zeros_like(image)
-        for i in range(min(2, len(areas))):
-            component_id = areas[i][0]
-            lung_mask[labels == component_id] = 255
+        # En büyük 2 bölgeyi al (akciğerler) - etiket tablosu üzerinden tek geçiş
+        lut = np.zeros(num_labels, dtype=np.uint8)
+        if num_labels > 1:
+            areas = stats[1:, cv2.CC_STAT_AREA]
+            largest = np.argsort(-areas, kind='stable')[:2] + 1
+            lut[largest] = 255
         
-        return lung_mask
+        return lut[labels]
     
-    def _detect_opacity(self, image: np.ndarray, lung_mask: np.ndarray) -> np.ndarray:
+    def _detect_opacity(self, ctx: 'RespiratoryFeatureContext') -> np.ndarray:
         """Mat alanları (opacity) tespit et"""
-        # Akciğer bölgesini al
-        lung_region = cv2.bitwise_and(image, lung_mask)
-        
         # Yüksek yoğunluk alanlarını tespit et
-        mean_density = np.mean(lung_region[lung_mask > 0])
-        threshold = mean_density + np.std(lung_region[lung_mask > 0]) * 0.5
+        threshold = ctx.density_mean + ctx.density_std * 0.5
         
-        _, opacity_mask = cv2.threshold(lung_region, threshold, 255, cv2.THRESH_BINARY)
+        _, opacity_mask = cv2.threshold(ctx.lung_region, threshold, 255, cv2.THRESH_BINARY)
         
         # Küçük gürültüleri temizle
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        opacity_mask = cv2.morphologyEx(opacity_mask, cv2.MORPH_OPEN, kernel)
+        opacity_mask = cv2.morphologyEx(opacity_mask, cv2.MORPH_OPEN, _OPACITY_KERNEL)
         
         return opacity_mask
     
-    def _detect_pneumothorax_signs(self, image: np.ndarray, lung_mask: np.ndarray) -> Dict:
+    def _detect_pneumothorax_signs(self, ctx: 'RespiratoryFeatureContext') -> Dict:
         """Pnömotoraks belirtilerini tespit et"""
         # Pnömotoraks: akciğer ile göğüs duvarı arasında hava
         # Görüntüde: keskin çizgi, asimetri, azalmış akciğer alanı
         
-        # Canny edge detection
-        edges = cv2.Canny(image, 50, 150)
-        
         # Akciğer bölgesindeki dikey çizgileri ara (kollaps çizgisi)
-        lines = cv2.HoughLinesP(edges, 1, np.pi/180, threshold=100,
+        lines = cv2.HoughLinesP(ctx.edges, 1, np.pi/180, threshold=100,
                                 minLineLength=50, maxLineGap=10)
         
         vertical_lines = 0
         if lines is not None:
-            for line in lines:
-                x1, y1, x2, y2 = line[0]
-                angle = abs(np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi)
-                # Dikey çizgiler (80-100 derece arası)
-                if 80 <= angle <= 100:
-                    vertical_lines += 1
-        
-        # Serbest hava göstergesi (çok düşük yoğunluk alanları)
-        lung_region = cv2.bitwise_and(image, lung_mask)
-        very_dark_areas = np.sum(lung_region < 50) / np.sum(lung_mask > 0)
+            # OpenCV 4 (n, 1, 4), OpenCV 5 (n, 4) döndürür
+            segments = lines.reshape(-1, 4)
+            angles = np.abs(np.arctan2(
+                segments[:, 3] - segments[:, 1], segments[:, 2] - segments[:, 0]
+            ) * 180 / np.pi)
+            # Dikey çizgiler (80-100 derece arası)
+            vertical_lines = int(np.count_nonzero((angles >= 80) & (angles <= 100)))
+        
+        # Serbest hava göstergesi (çok düşük yoğunluk alanları). Maskeli
+        # görüntüde maske dışı pikseller 0 olduğundan onlar da sayılır.
+        dark_pixels = np.count_nonzero(ctx.lung_values < 50) + (ctx.image.size - ctx.lung_pixel_count)
+        very_dark_areas = dark_pixels / ctx.lung_pixel_count
         
         # Pnömotoraks skoru
         score = min(1.0, (vertical_lines / 10.0) + very_dark_areas)
@@ -292,23 +390,18 @@ class RespiratoryEmergencyDetector:
             'dark_area_ratio': very_dark_areas
         }
     
-    def _calculate_lung_asymmetry(self, image: np.ndarray, lung_mask: np.ndarray) -> float:
+    def _calculate_lung_asymmetry(self, ctx: 'RespiratoryFeatureContext') -> float:
         """Akciğer asimetrisini hesapla"""
-        h, w = image.shape
-        mid = w // 2
-        
-        # Sağ ve sol akciğer bölgelerini ayır
-        left_mask = lung_mask.copy()
-        left_mask[:, mid:] = 0
+        mid = ctx.image.shape[1] // 2
         
-        right_mask = lung_mask.copy()
-        right_mask[:, :mid] = 0
+        # Sağ ve sol akciğer piksellerini sütun indeksine göre ayır
+        left = ctx.cols < mid
+        left_values = ctx.lung_values[left]
+        right_values = ctx.lung_values[~left]
         
         # Her iki tarafın yoğunluklarını karşılaştır
-        lung_region = cv2.bitwise_and(image, lung_mask)
-        
-        left_density = np.mean(lung_region[left_mask > 0]) if np.sum(left_mask) > 0 else 0
-        right_density = np.mean(lung_region[right_mask > 0]) if np.sum(right_mask) > 0 else 0
+        left_density = np.mean(left_values) if left_values.size > 0 else 0
+        right_density = np.mean(right_values) if right_values.size > 0 else 0
         
         # Asimetri skoru (0-1 arası)
         if left_density + right_density > 0:
@@ -318,26 +411,23 @@ class RespiratoryEmergencyDetector:
         
         return asymmetry
     
-    def _detect_pleural_effusion(self, image: np.ndarray, lung_mask: np.ndarray) -> float:
+    def _detect_pleural_effusion(self, ctx: 'RespiratoryFeatureContext') -> float:
         """Plevral efüzyon (akciğer dibinde sıvı) tespit et"""
-        h, w = image.shape
+        h = ctx.image.shape[0]
         
         # Akciğerin alt 1/3'ünü incele
         bottom_third = int(h * 2 / 3)
-        bottom_region = lung_mask.copy()
-        bottom_region[:bottom_third, :] = 0
+        bottom = ctx.rows >= bottom_third
+        bottom_values = ctx.lung_values[bottom]
         
-        if np.sum(bottom_region) == 0:
+        if bottom_values.size == 0:
             return 0.0
         
         # Alt bölgedeki yoğunluğu üst bölge ile karşılaştır
-        top_region = lung_mask.copy()
-        top_region[bottom_third:, :] = 0
-        
-        lung_region = cv2.bitwise_and(image, lung_mask)
+        top_values = ctx.lung_values[~bottom]
         
-        bottom_density = np.mean(lung_region[bottom_region > 0]) if np.sum(bottom_region) > 0 else 0
-        top_density = np.mean(lung_region[top_region > 0]) if np.sum(top_region) > 0 else 0
+        bottom_density = np.mean(bottom_values)
+        top_density = np.mean(top_values) if top_values.size > 0 else 0
         
         # Efüzyon skoru: alt bölge daha mat ise yüksek
         if top_density > 0:
@@ -347,31 +437,28 @@ class RespiratoryEmergencyDetector:
         
         return min(1.0, effusion_score)
     
-    def _analyze_texture(self, lung_region: np.ndarray, lung_mask: np.ndarray) -> Dict:
+    def _analyze_texture(self, ctx: 'RespiratoryFeatureContext') -> Dict:
         """Doku analizi (pulmoner ödem için)"""
-        if np.sum(lung_mask) == 0:
+        if ctx.lung_pixel_count == 0:
             return {'texture_variance': 0.0, 'texture_homogeneity': 0.0}
         
         # Gabor filtreleri ile doku analizi
-        frequencies = [0.1, 0.2, 0.3]
         texture_responses = []
-        
-        for freq in frequencies:
-            kernel = cv2.getGaborKernel((21, 21), 8.0, 0, freq, 0.5, 0, ktype=cv2.CV_32F)
-            filtered = cv2.filter2D(lung_region, cv2.CV_32F, kernel)
-            texture_responses.append(np.std(filtered[lung_mask > 0]))
+        for kernel in _GABOR_KERNELS:
+            filtered = cv2.filter2D(ctx.lung_region, cv2.CV_32F, kernel)
+            texture_responses.append(np.std(filtered[ctx.mask]))
         
         return {
             'texture_variance': np.mean(texture_responses),
             'texture_homogeneity': 1.0 / (1.0 + np.var(texture_responses))
         }
     
-    def _analyze_edges(self, image: np.ndarray, lung_mask: np.ndarray) -> Dict:
+    def _analyze_edges(self, ctx: 'RespiratoryFeatureContext') -> Dict:
         """Kenar analizi"""
-        edges = cv2.Canny(image, 50, 150)
-        lung_edges = cv2.bitwise_and(edges, lung_mask)
+        if ctx.lung_pixel_count == 0:
+            return {'edge_density': 0}
         
-        edge_density = np.sum(lung_edges > 0) / np.sum(lung_mask > 0) if np.sum(lung_mask) > 0 else 0
+        edge_density = np.count_nonzero(ctx.edges[ctx.mask]) / ctx.lung_pixel_count
         
         return {
             'edge_density': edge_density
@@ -535,10 +622,10 @@ class RespiratoryEmergencyDetector:
         vis_image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
         
         # Akciğer maskesini çiz
-        lung_mask = self._detect_lung_region(image)
+        ctx = RespiratoryFeatureContext(image, self._detect_lung_region(image))
         
         # Opacity alanlarını vurgula
-        opacity_mask = self._detect_opacity(image, lung_mask)
+        opacity_mask = self._detect_opacity(ctx)
         vis_image[opacity_mask > 0] = vis_image[opacity_mask > 0] * 0.5 + np.array([0, 0, 255]) * 0.5
         
         # Bulgular için renk kodu
@@ -565,24 +652,29 @@ class RespiratoryEmergencyDetector:
         _, buffer = cv2.imencode('.jpg', image)
         return base64.b64encode(buffer).decode('utf-8')
     
-    def batch_analyze(self, image_paths: List[str]) -> List[Dict]:
-        """Birden fazla görüntüyü analiz et"""
-        results = []
+    def batch_analyze(self, image_paths: List[str], max_workers: Optional[int] = None) -> List[Dict]:
+        """
+        Birden fazla görüntüyü eşzamanlı analiz et
         
-        for image_path in image_paths:
+        OpenCV işlemleri GIL'i bıraktığından görüntüler thread havuzunda
+        paralel işlenir; sonuçlar girdi sırasıyla döner.
+        """
+        def analyze_one(image_path: str) -> Dict:
             try:
                 result = self.analyze_emergency(image_path=image_path)
                 result['image_path'] = image_path
-                results.append(result)
+                return result
             except Exception as e:
                 logger.error(f"Analiz hatası ({image_path}): {e}")
-                results.append({
+                return {
                     'image_path': image_path,
                     'error': str(e),
                     'urgency_score': 0
-                })
+                }
         
-        return results
+        max_workers = max_workers or int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="respiratory-batch") as executor:
+            return list(executor.map(analyze_one, image_paths))
     
     def compare_analyses(self, results: List[Dict]) -> Dict:
         """Birden fazla analizi karşılaştır"""
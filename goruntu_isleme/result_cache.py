@@ -0,0 +1,283 @@
+"""
+İçerik Adresli Analiz Sonuç Cache'i
+===================================
+
+Aynı röntgen tekrar gönderildiğinde (mobil yeniden deneme, tekrar çalışan
+batch işleri) ön işleme ve CNN maliyetini atlamak için analiz sonuçlarını
+saklar. Anahtar; decode edilmiş piksel içeriğinin, model sürümünün ve
+analiz parametrelerinin özetidir - dosya adı, base64 kodlaması veya istek
+kimliği anahtara girmez.
+
+İki katman vardır:
+    - Bellek içi LRU (RESULT_CACHE_MAX_ENTRIES)
+    - İsteğe bağlı disk katmanı (RESULT_CACHE_DISK_DIR), TTL ile
+      (RESULT_CACHE_TTL_SECONDS)
+
+Model sürümü checkpoint dosyalarının boyut/mtime parmak izinden üretilir;
+yeni checkpoint yazıldığında anahtarlar kendiliğinden değişir. İstek yolu
+parmak izini cached_checkpoint_fingerprint ile alır (dizin taraması
+CHECKPOINT_FINGERPRINT_TTL_SECONDS'ta bir yapılır). ModelManager.register_checkpoint
+tüm cache'leri ve parmak izlerini invalidate_result_caches ile temizler.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512"))
+RESULT_CACHE_DISK_DIR = os.getenv("RESULT_CACHE_DISK_DIR", "")
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+
+CHECKPOINT_FINGERPRINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_FINGERPRINT_TTL_SECONDS", "5"))
+
+CHECKPOINT_SUFFIXES = ('.pth', '.pt', '.pkl', '.onnx')
+
+# Süreçteki tüm cache'ler (checkpoint değişiminde toplu temizlik için)
+_caches: "weakref.WeakSet[ResultCache]" = weakref.WeakSet()
+
+# Yol listesi -> (parmak izi, hesaplanma zamanı)
+_fingerprints: Dict[tuple, tuple] = {}
+_fingerprints_lock = threading.Lock()
+
+
+def checkpoint_fingerprint(paths: Iterable[Union[str, Path]]) -> str:
+    """
+    Checkpoint dosyalarının boyut/mtime parmak izi
+
+    Dizin verilirse içindeki checkpoint dosyaları dahil edilir. Dosya
+    yeniden yazıldığında ya da eklendiğinde parmak izi değişir.
+    """
+    entries = []
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            files = [p for p in path.iterdir() if p.suffix in CHECKPOINT_SUFFIXES]
+        else:
+            files = [path]
+        for file in files:
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entries.append(f"{file}:{stat.st_size}:{stat.st_mtime_ns}")
+
+    digest = hashlib.blake2b(digest_size=8)
+    for entry in sorted(entries):
+        digest.update(entry.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def cached_checkpoint_fingerprint(paths: Iterable[Union[str, Path]],
+                                  ttl_seconds: Optional[float] = None) -> str:
+    """
+    checkpoint_fingerprint'in istek yolu için cache'li hali
+
+    Dizin taraması ve stat çağrıları en fazla ttl_seconds'ta bir yapılır;
+    register_checkpoint (invalidate_result_caches) cache'i hemen boşaltır.
+    Süreç dışından yazılan checkpoint'ler en geç TTL sonunda görülür.
+    """
+    ttl_seconds = CHECKPOINT_FINGERPRINT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    key = tuple(str(path) for path in paths)
+    now = time.monotonic()
+    with _fingerprints_lock:
+        cached = _fingerprints.get(key)
+        if cached is not None and now - cached[1] < ttl_seconds:
+            return cached[0]
+
+    fingerprint = checkpoint_fingerprint(key)
+    with _fingerprints_lock:
+        _fingerprints[key] = (fingerprint, now)
+    return fingerprint
+
+
+def invalidate_checkpoint_fingerprints():
+    """Cache'lenmiş checkpoint parmak izlerini sil"""
+    with _fingerprints_lock:
+        _fingerprints.clear()
+
+
+def invalidate_result_caches(reason: str = ""):
+    """Süreçteki tüm sonuç cache'lerini ve checkpoint parmak izlerini temizle"""
+    invalidate_checkpoint_fingerprints()
+    for cache in list(_caches):
+        cache.clear()
+    logger.info(f"Sonuç cache'leri temizlendi{f' ({reason})' if reason else ''}")
+
+
+class ResultCache:
+    """Bellek içi LRU + isteğe bağlı disk katmanlı sonuç cache'i"""
+
+    def __init__(self,
+                 name: str,
+                 max_entries: int = None,
+                 disk_dir: Optional[str] = None,
+                 ttl_seconds: float = None,
+                 enabled: bool = None):
+        """
+        Args:
+            name: Cache adı (disk alt dizini ve istatistikler için)
+            max_entries: Bellek içi katmandaki en fazla sonuç sayısı
+            disk_dir: Disk katmanı kök dizini (boşsa disk katmanı kapalı)
+            ttl_seconds: Sonuçların geçerlilik süresi
+        """
+        self.name = name
+        self.max_entries = RESULT_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self.ttl_seconds = RESULT_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.enabled = RESULT_CACHE_ENABLED if enabled is None else enabled
+
+        disk_dir = RESULT_CACHE_DISK_DIR if disk_dir is None else disk_dir
+        self.disk_dir = Path(disk_dir) / name if disk_dir else None
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        # key -> (kayıt zamanı, sonuç)
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+
+        # İstatistikler
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        _caches.add(self)
+
+    def make_key(self,
+                 pixels: np.ndarray,
+                 model_version: str,
+                 params: Optional[Dict[str, Any]] = None) -> str:
+        """Decode edilmiş pikseller + model sürümü + parametrelerden anahtar"""
+        pixels = np.ascontiguousarray(pixels)
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{pixels.dtype.str}:{pixels.shape}".encode('utf-8'))
+        digest.update(memoryview(pixels).cast('B'))
+        digest.update(model_version.encode('utf-8'))
+        digest.update(json.dumps(params or {}, sort_keys=True, default=str).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Sonucu getir; yoksa ya da süresi dolmuşsa None"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self.entries[key]
+
+        value = self._read_disk(key, now)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, value, now)
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: Any):
+        """Sonucu iki katmana da yaz"""
+        if not self.enabled:
+            return
+
+        # Çağıran sonucu sonradan değiştirse de cache etkilenmesin
+        value = copy.deepcopy(value)
+        now = time.time()
+        with self.lock:
+            self._store(key, value, now)
+        self._write_disk(key, value)
+
+    def clear(self):
+        """Tüm sonuçları sil (bellek + disk)"""
+        with self.lock:
+            self.entries.clear()
+            self.invalidations += 1
+
+        if self.disk_dir is not None:
+            for file in self.disk_dir.glob('*/*.pkl'):
+                try:
+                    file.unlink()
+                except OSError:
+                    pass
+
+    def _store(self, key: str, value: Any, stored_at: float):
+        self.entries[key] = (stored_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_file(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.pkl"
+
+    def _read_disk(self, key: str, now: float) -> Optional[Any]:
+        if self.disk_dir is None:
+            return None
+
+        file = self._disk_file(key)
+        try:
+            if now - file.stat().st_mtime > self.ttl_seconds:
+                file.unlink()
+                return None
+            with open(file, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Disk cache okuma hatası ({self.name}): {e}")
+            return None
+
+    def _write_disk(self, key: str, value: Any):
+        if self.disk_dir is None:
+            return
+
+        file = self._disk_file(key)
+        try:
+            file.parent.mkdir(exist_ok=True)
+            # Yarım yazılmış dosya okunmasın: geçici dosya + atomik rename
+            tmp_file = file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, file)
+        except Exception as e:
+            logger.warning(f"Disk cache yazma hatası ({self.name}): {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache istatistikleri"""
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'name': self.name,
+                'enabled': self.enabled,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'disk_enabled': self.disk_dir is not None,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
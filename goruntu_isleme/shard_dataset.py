@@ -0,0 +1,347 @@
+"""
+Önceden Decode Edilmiş Parçalı (Shard) Eğitim Veri Seti
+=======================================================
+
+Eğitim veri setleri (MedicalImageDataset, RealMedicalDataset,
+TCIAImageDataset) her epoch'ta her görüntüyü diskten PNG/JPEG olarak
+decode edip normalize ediyordu. Bu modül görüntü listesini + etiketleri bir
+kez sabit boyutlu uint8 shard'lara derler; ShardedImageDataset shard'ları
+mmap ile açıp örnekleri doğrudan dilimler. Epoch süresi JPEG decode yerine
+hesaplamaya bağlı olur.
+
+Dizin yapısı:
+    <dizin>/shard_00000.npy  - (n, satır, sütun) uint8 görüntüler
+    <dizin>/labels.npy       - int64 etiketler (tüm shard'lar, sırayla)
+    <dizin>/sources.json     - her örneğin kaynak dosyası
+    <dizin>/index.json       - görüntü boyutu, shard listesi, atlanan dosyalar
+
+index.json en son yazılır; dizin yalnızca index.json varsa eksiksizdir.
+Decode edilemeyen ya da geçerlilik kontrolünden geçmeyen görüntüler derleme
+sırasında atlanır (eğitim sırasında rastgele başka dosya okunmaz).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import cv2
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import Dataset
+
+from imaging_kernels import minmax_normalize
+
+logger = logging.getLogger(__name__)
+
+
+# Boşsa eğiticiler eskisi gibi dosyalardan okur
+DATASET_SHARD_DIR = os.getenv("DATASET_SHARD_DIR", "")
+# Shard başına görüntü sayısı (512x512'de 256 görüntü = 64 MB)
+DATASET_SHARD_SIZE = int(os.getenv("DATASET_SHARD_SIZE", "256"))
+# Derleme sırasında paralel decode thread sayısı
+DATASET_COMPILE_WORKERS = int(os.getenv("DATASET_COMPILE_WORKERS") or os.cpu_count() or 1)
+
+SHARD_FORMAT_VERSION = 1
+
+
+def load_grayscale(image_path: str) -> Optional[np.ndarray]:
+    """Görüntüyü gri tonlamalı oku (cv2, olmazsa PIL)"""
+    image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        image = np.array(Image.open(image_path).convert('L'))
+    return image
+
+
+def to_shard_image(image: np.ndarray, image_size: Tuple[int, int]) -> np.ndarray:
+    """Görüntüyü shard biçimine getir: tek kanal, uint8, sabit boyut"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY if image.shape[2] == 3 else cv2.COLOR_BGRA2GRAY)
+    if image.dtype != np.uint8:
+        image = minmax_normalize(image)
+
+    height, width = image_size
+    if image.shape != (height, width):
+        downscale = image.shape[0] > height or image.shape[1] > width
+        image = cv2.resize(image, (width, height),
+                           interpolation=cv2.INTER_AREA if downscale else cv2.INTER_LINEAR)
+    return image
+
+
+def dataset_key(image_paths: Sequence[str], labels: Sequence[int],
+                image_size: Tuple[int, int], loader_name: str = "") -> str:
+    """Dosya listesi + boyut/mtime + etiketler + görüntü boyutundan derleme anahtarı"""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{SHARD_FORMAT_VERSION}:{image_size}:{loader_name}".encode('utf-8'))
+    for image_path, label in zip(image_paths, labels):
+        try:
+            stat = os.stat(image_path)
+            signature = f"{image_path}:{stat.st_size}:{stat.st_mtime_ns}:{label}"
+        except OSError:
+            signature = f"{image_path}::{label}"
+        digest.update(signature.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class ShardWriter:
+    """
+    Görüntüleri sırayla shard dizinine yazar
+
+    compile_image_dataset (dosyalardan) ve sentetik üretici (bellekteki
+    yığınlardan) ortak kullanır. Bellekte en fazla bir shard'lık tampon
+    tutulur; close() labels.npy, sources.json ve en son index.json'u yazar.
+    """
+
+    def __init__(self, output_dir: Union[str, Path],
+                 image_size: Tuple[int, int] = (512, 512),
+                 shard_size: Optional[int] = None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.image_size = tuple(image_size)
+        self.shard_size = shard_size or DATASET_SHARD_SIZE
+        self.buffer = np.empty((self.shard_size, *self.image_size), dtype=np.uint8)
+        self.filled = 0
+        self.shards: List[Dict[str, Any]] = []
+        self.labels: List[int] = []
+        self.sources: List[str] = []
+        self.skipped: List[Dict[str, str]] = []
+
+    def _flush(self):
+        shard_file = self.output_dir / f"shard_{len(self.shards):05d}.npy"
+        np.save(shard_file, self.buffer[:self.filled], allow_pickle=False)
+        self.shards.append({'file': shard_file.name, 'count': self.filled})
+        self.filled = 0
+
+    def add(self, image: np.ndarray, label: int, source: str = ""):
+        """Shard biçimindeki (uint8, image_size) tek görüntüyü ekle"""
+        self.buffer[self.filled] = image
+        self.filled += 1
+        self.labels.append(int(label))
+        self.sources.append(str(source))
+        if self.filled == self.shard_size:
+            self._flush()
+
+    def add_batch(self, images: np.ndarray, labels: Sequence[int],
+                  sources: Optional[Sequence[str]] = None):
+        """(n, satır, sütun) uint8 yığını ekle (shard tamponuna dilim kopyası)"""
+        if len(images) != len(labels):
+            raise ValueError("Görüntü ve etiket sayıları eşleşmiyor")
+        self.labels.extend(int(label) for label in labels)
+        if sources is None:
+            sources = [""] * len(images)
+        self.sources.extend(str(source) for source in sources)
+
+        position = 0
+        while position < len(images):
+            count = min(self.shard_size - self.filled, len(images) - position)
+            self.buffer[self.filled:self.filled + count] = images[position:position + count]
+            self.filled += count
+            position += count
+            if self.filled == self.shard_size:
+                self._flush()
+
+    def skip(self, source: str, error: str):
+        """Atlanan örneği index.json'a kaydet"""
+        self.skipped.append({'path': str(source), 'error': error})
+
+    def close(self, **extra: Any) -> Dict[str, Any]:
+        """
+        Kalan tamponu yaz ve indeks dosyalarını oluştur
+
+        extra alanları index.json'a eklenir (ör. sentetik üretim parametreleri).
+        """
+        if self.filled:
+            self._flush()
+
+        np.save(self.output_dir / "labels.npy", np.asarray(self.labels, dtype=np.int64), allow_pickle=False)
+        with open(self.output_dir / "sources.json", 'w', encoding='utf-8') as f:
+            json.dump(self.sources, f, ensure_ascii=False)
+
+        class_counts: Dict[str, int] = {}
+        for label in self.labels:
+            class_counts[str(label)] = class_counts.get(str(label), 0) + 1
+
+        index = {
+            'format_version': SHARD_FORMAT_VERSION,
+            'image_size': list(self.image_size),
+            'num_samples': len(self.labels),
+            'shard_size': self.shard_size,
+            'shards': self.shards,
+            'class_counts': class_counts,
+            'skipped': self.skipped,
+            'created_at': datetime.now().isoformat(),
+            **extra
+        }
+        with open(self.output_dir / "index.json", 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=2, ensure_ascii=False)
+
+        logger.info(f"Veri seti derlendi: {len(self.labels)} görüntü, {len(self.shards)} shard, "
+                    f"{len(self.skipped)} atlandı ({self.output_dir})")
+        return index
+
+
+def compile_image_dataset(image_paths: Sequence[str],
+                          labels: Sequence[int],
+                          output_dir: Union[str, Path],
+                          image_size: Tuple[int, int] = (512, 512),
+                          load_image: Optional[Callable[[str], np.ndarray]] = None,
+                          is_valid: Optional[Callable[[np.ndarray], bool]] = None,
+                          shard_size: Optional[int] = None,
+                          workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Görüntü listesini uint8 shard'lara derle
+
+    Args:
+        image_paths: Görüntü dosyaları
+        labels: Etiketler (image_paths ile aynı sırada)
+        output_dir: Shard dizini
+        image_size: (satır, sütun) sabit görüntü boyutu
+        load_image: Dosyayı diziye çeviren fonksiyon (varsayılan: gri
+            tonlamalı decode). Veri setinin kendi yükleyicisi verilirse
+            shard içeriği __getitem__'daki augmentasyon öncesi görüntüyle aynı olur.
+        is_valid: Görüntüyü kabul eden kontrol (False ise örnek atlanır)
+        shard_size: Shard başına görüntü sayısı
+        workers: Paralel decode thread sayısı
+
+    Returns:
+        index.json içeriği
+    """
+    if len(image_paths) != len(labels):
+        raise ValueError("Görüntü ve etiket sayıları eşleşmiyor")
+
+    load_image = load_image or load_grayscale
+    writer = ShardWriter(output_dir, image_size, shard_size)
+
+    def decode(image_path: str) -> Tuple[Optional[np.ndarray], Optional[str]]:
+        try:
+            image = load_image(image_path)
+            if image is None or image.size == 0:
+                return None, "decode edilemedi"
+            image = to_shard_image(np.asarray(image), image_size)
+            if is_valid is not None and not is_valid(image):
+                return None, "geçersiz görüntü"
+            return image, None
+        except Exception as e:
+            return None, str(e)
+
+    with ThreadPoolExecutor(max_workers=workers or DATASET_COMPILE_WORKERS) as executor:
+        # Shard boyutunda parçalar: bellekte en fazla ~iki shard'lık görüntü
+        for start in range(0, len(image_paths), writer.shard_size):
+            chunk_paths = list(image_paths[start:start + writer.shard_size])
+            chunk_labels = labels[start:start + writer.shard_size]
+            for image_path, label, (image, error) in zip(
+                    chunk_paths, chunk_labels, executor.map(decode, chunk_paths)):
+                if error is not None:
+                    writer.skip(image_path, error)
+                    continue
+                writer.add(image, label, image_path)
+
+    return writer.close()
+
+
+def build_cached(name: str, key: str,
+                 build: Callable[[Path], Any],
+                 root: Optional[Union[str, Path]] = None) -> Path:
+    """
+    <root>/<name>_<key> shard dizinini döndür; yoksa build(dizin) ile oluştur
+
+    Yarım derleme kullanılmasın diye build geçici dizine yazar, sonra dizin
+    atomik olarak yerine taşınır.
+    """
+    root = Path(root or DATASET_SHARD_DIR or "dataset_shards")
+    shard_dir = root / f"{name}_{key}"
+    if (shard_dir / "index.json").exists():
+        logger.info(f"Derlenmiş veri seti kullanılıyor: {shard_dir}")
+        return shard_dir
+
+    tmp_dir = root / f".{name}_{key}.{os.getpid()}.tmp"
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    build(tmp_dir)
+    try:
+        os.rename(tmp_dir, shard_dir)
+    except OSError:
+        # Başka bir süreç aynı veri setini önce derledi
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return shard_dir
+
+
+def compile_cached(image_paths: Sequence[str],
+                   labels: Sequence[int],
+                   name: str,
+                   image_size: Tuple[int, int] = (512, 512),
+                   load_image: Optional[Callable[[str], np.ndarray]] = None,
+                   is_valid: Optional[Callable[[np.ndarray], bool]] = None,
+                   root: Optional[Union[str, Path]] = None) -> Path:
+    """
+    Veri setini derle ya da aynı girdilerle derlenmiş shard dizinini kullan
+
+    Dizin adı dosya listesi, dosya boyut/mtime'ları, etiketler ve görüntü
+    boyutundan üretilir; girdiler değişirse yeniden derlenir.
+    """
+    loader_name = getattr(load_image, '__qualname__', '') if load_image else ''
+    key = dataset_key(image_paths, labels, image_size, loader_name)
+    return build_cached(
+        name, key,
+        lambda output_dir: compile_image_dataset(image_paths, labels, output_dir, image_size=image_size,
+                                                 load_image=load_image, is_valid=is_valid),
+        root=root)
+
+
+class ShardedImageDataset(Dataset):
+    """
+    Derlenmiş shard'lar üzerinde veri seti
+
+    Shard'lar her DataLoader worker'ında ilk erişimde mmap ile bir kez açılır;
+    örnek okuma tek bir (satır, sütun) dilim kopyasıdır.
+    """
+
+    def __init__(self, shard_dir: Union[str, Path], transform: Optional[Callable] = None):
+        self.shard_dir = Path(shard_dir)
+        self.transform = transform
+
+        with open(self.shard_dir / "index.json", 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+
+        self.image_size = tuple(self.index['image_size'])
+        self.shard_size = self.index['shard_size']
+        self.shard_files = [self.shard_dir / shard['file'] for shard in self.index['shards']]
+        self.labels: List[int] = np.load(self.shard_dir / "labels.npy").tolist()
+        self._shards: Dict[int, np.ndarray] = {}
+
+    def __getstate__(self):
+        # Worker süreçlerine mmap'ler taşınmaz, her worker kendisi açar
+        state = self.__dict__.copy()
+        state['_shards'] = {}
+        return state
+
+    def __len__(self):
+        return len(self.labels)
+
+    def sources(self) -> List[str]:
+        """Her örneğin kaynak dosyası (örnek sırasıyla)"""
+        with open(self.shard_dir / "sources.json", 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def read(self, idx: int) -> np.ndarray:
+        """Örneğin uint8 görüntüsü (yazılabilir kopya - augmentasyonlar değiştirebilir)"""
+        shard_index, offset = divmod(idx, self.shard_size)
+        shard = self._shards.get(shard_index)
+        if shard is None:
+            shard = np.load(self.shard_files[shard_index], mmap_mode='r', allow_pickle=False)
+            self._shards[shard_index] = shard
+        return np.array(shard[offset])
+
+    def __getitem__(self, idx):
+        image = self.read(idx)
+        if self.transform:
+            image = self.transform(image)
+        else:
+            image = torch.from_numpy(image).unsqueeze(0).float()
+        return image, self.labels[idx]
@@ -4,15 +4,23 @@ TCIA Veri İndirme Modülü
 
 The Cancer Imaging Archive'dan gerçek tıbbi verileri indirmek için
 otomatik sistem.
+
+Seriler sınırlı bir thread havuzunda paralel indirilir ve doğrudan diske
+akıtılır. Yarım kalan ZIP'ler (.part) HTTP Range ile kaldığı yerden devam
+ettirilir. Tamamlanan seriler SQLite manifest'ine (seri UID, boyut,
+SHA-256) yazılır; yeniden çalıştırmada atlanır.
 """
 
 import requests
 import os
+import sqlite3
+import threading
 import zipfile
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import time
 import hashlib
@@ -20,13 +28,111 @@ import hashlib
 logger = logging.getLogger(__name__)
 
 
+TCIA_DOWNLOAD_WORKERS = int(os.getenv("TCIA_DOWNLOAD_WORKERS", "4"))
+TCIA_DOWNLOAD_RETRIES = int(os.getenv("TCIA_DOWNLOAD_RETRIES", "3"))
+TCIA_CHUNK_SIZE = int(os.getenv("TCIA_CHUNK_SIZE", str(1024 * 1024)))
+
+SERIES_COMPLETE = "complete"
+SERIES_FAILED = "failed"
+
+
+class DownloadManifest:
+    """
+    İndirilen serilerin SQLite manifest'i (thread-safe)
+
+    Tablo:
+        series(series_uid, collection_id, path, size, sha256, files,
+               status, error, updated_at)
+        status: complete | failed
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS series (
+                series_uid TEXT PRIMARY KEY,
+                collection_id TEXT NOT NULL,
+                path TEXT,
+                size INTEGER,
+                sha256 TEXT,
+                files INTEGER,
+                status TEXT NOT NULL,
+                error TEXT,
+                updated_at TEXT NOT NULL
+            )
+        """)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, series_uid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT series_uid, collection_id, path, size, sha256, files, status, error "
+                "FROM series WHERE series_uid = ?", (series_uid,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ('series_uid', 'collection_id', 'path', 'size', 'sha256', 'files', 'status', 'error')
+        return dict(zip(keys, row))
+
+    def is_complete(self, series_uid: str) -> bool:
+        """Seri tamamlanmış ve çıkarılmış dosyaları hâlâ diskte mi"""
+        entry = self.get(series_uid)
+        if entry is None or entry['status'] != SERIES_COMPLETE:
+            return False
+        series_dir = Path(entry['path'])
+        return series_dir.is_dir() and sum(1 for _ in series_dir.rglob('*')) >= (entry['files'] or 0)
+
+    def mark_complete(self, series_uid: str, collection_id: str, path: str,
+                      size: int, sha256: str, files: int):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO series VALUES (?, ?, ?, ?, ?, ?, ?, NULL, ?)",
+                (series_uid, collection_id, path, size, sha256, files, SERIES_COMPLETE,
+                 datetime.now().isoformat())
+            )
+
+    def mark_failed(self, series_uid: str, collection_id: str, error: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO series (series_uid, collection_id, status, error, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (series_uid, collection_id, SERIES_FAILED, error, datetime.now().isoformat())
+            )
+
+    def entries(self, collection_id: Optional[str] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT series_uid FROM series WHERE 1 = 1"
+        params: List[Any] = []
+        if collection_id:
+            query += " AND collection_id = ?"
+            params.append(collection_id)
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            uids = [row[0] for row in self._conn.execute(query, params).fetchall()]
+        return [self.get(uid) for uid in uids]
+
+
 class TCIADataDownloader:
     """TCIA veri indirme sınıfı"""
     
-    def __init__(self, download_dir: str = "tcia_data"):
+    def __init__(self, download_dir: str = "tcia_data", workers: Optional[int] = None):
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(exist_ok=True)
         
+        # Paralel indirme: thread başına bir requests.Session (keep-alive)
+        self.workers = workers or TCIA_DOWNLOAD_WORKERS
+        self.max_retries = TCIA_DOWNLOAD_RETRIES
+        self.chunk_size = TCIA_CHUNK_SIZE
+        self.manifest = DownloadManifest(self.download_dir / "manifest.db")
+        self._local = threading.local()
+        
         # TCIA API endpoints
         self.base_url = "https://services.cancerimagingarchive.net/services/v4"
         self.nbia_url = "https://nbia.cancerimagingarchive.net/nbia-search/services"
@@ -154,46 +260,162 @@ class TCIADataDownloader:
             logger.error(f"Görüntü listesi alma hatası ({collection_id}): {str(e)}")
             raise
     
+    @property
+    def session(self) -> requests.Session:
+        """Thread'e özel HTTP oturumu (bağlantılar seriler arasında yeniden kullanılır)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            self._local.session = session
+        return session
+
     def download_image_series(self, series_uid: str, collection_id: str) -> str:
-        """Görüntü serisini indir"""
+        """
+        Görüntü serisini indir
+
+        Manifest'te tamamlanmış seriler atlanır. İndirme <uid>.zip.part
+        dosyasına akıtılır; bağlantı koparsa aynı dosyadan Range ile devam
+        edilir (en fazla max_retries yeniden deneme).
+        """
+        collection_dir = self.download_dir / collection_id
+        series_dir = collection_dir / series_uid
+
+        if self.manifest.is_complete(series_uid):
+            logger.info(f"Seri zaten indirilmiş, atlanıyor: {series_uid}")
+            return str(series_dir)
+
         try:
-            collection_dir = self.download_dir / collection_id
-            collection_dir.mkdir(exist_ok=True)
-            
-            series_dir = collection_dir / series_uid
-            series_dir.mkdir(exist_ok=True)
-            
-            # TCIA'dan DICOM serisini indir
-            url = f"{self.nbia_url}/getImage"
-            params = {
-                "SeriesInstanceUID": series_uid,
-                "format": "zip"
-            }
-            
+            series_dir.mkdir(parents=True, exist_ok=True)
+            part_file = series_dir / f"{series_uid}.zip.part"
+
             logger.info(f"Seri indiriliyor: {series_uid}")
-            response = requests.get(url, params=params, timeout=300, stream=True)
-            response.raise_for_status()
-            
-            # ZIP dosyasını kaydet
-            zip_file = series_dir / f"{series_uid}.zip"
-            with open(zip_file, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            # ZIP'i aç
-            with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-                zip_ref.extractall(series_dir)
-            
-            # ZIP dosyasını sil
-            zip_file.unlink()
-            
-            logger.info(f"Seri indirildi: {series_uid}")
+            for attempt in range(self.max_retries + 1):
+                try:
+                    size, checksum = self._stream_to_file(series_uid, part_file)
+                    break
+                except requests.RequestException as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = min(2 ** attempt, 30)
+                    logger.warning(f"Seri indirme kesildi ({series_uid}), {delay}s sonra devam edilecek: {e}")
+                    time.sleep(delay)
+
+            # ZIP'i doğrula ve aç
+            zip_file = part_file.with_suffix('')
+            part_file.replace(zip_file)
+            try:
+                with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+                    bad_member = zip_ref.testzip()
+                    if bad_member is not None:
+                        raise zipfile.BadZipFile(f"Bozuk ZIP üyesi: {bad_member}")
+                    zip_ref.extractall(series_dir)
+                    files = len(zip_ref.namelist())
+            finally:
+                # Bozuk arşiv yeniden çalıştırmada baştan indirilir
+                zip_file.unlink()
+
+            self.manifest.mark_complete(series_uid, collection_id, str(series_dir), size, checksum, files)
+            logger.info(f"Seri indirildi: {series_uid} ({size / 1024 ** 2:.1f} MB)")
             return str(series_dir)
-            
+
         except Exception as e:
+            self.manifest.mark_failed(series_uid, collection_id, str(e))
             logger.error(f"Seri indirme hatası ({series_uid}): {str(e)}")
             raise
-    
+
+    def _stream_to_file(self, series_uid: str, part_file: Path) -> Tuple[int, str]:
+        """
+        Seri ZIP'ini part_file'a akıt; dosya varsa Range ile kaldığı yerden devam et
+
+        Returns:
+            (toplam boyut, SHA-256)
+        """
+        url = f"{self.nbia_url}/getImage"
+        params = {
+            "SeriesInstanceUID": series_uid,
+            "format": "zip"
+        }
+
+        offset = part_file.stat().st_size if part_file.exists() else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+
+        with self.session.get(url, params=params, headers=headers, timeout=300, stream=True) as response:
+            if response.status_code == 416:
+                # Yarım dosya zaten tamamlanmış
+                total = offset
+            else:
+                response.raise_for_status()
+                if offset and response.status_code != 206:
+                    logger.info(f"Sunucu Range desteklemiyor, baştan indiriliyor: {series_uid}")
+                    offset = 0
+
+                expected = self._expected_size(response, offset)
+                with open(part_file, 'ab' if offset else 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        f.write(chunk)
+                total = part_file.stat().st_size
+                if expected is not None and total != expected:
+                    raise requests.ConnectionError(f"Eksik indirme: {total}/{expected} bayt")
+
+        if offset:
+            logger.info(f"Seri kaldığı yerden tamamlandı: {series_uid} ({offset} bayt atlandı)")
+
+        # Bütünlük özeti (devam edilen dosyalar için tüm dosya üzerinden)
+        checksum = hashlib.sha256()
+        with open(part_file, 'rb') as f:
+            for block in iter(lambda: f.read(self.chunk_size), b''):
+                checksum.update(block)
+        return total, checksum.hexdigest()
+
+    @staticmethod
+    def _expected_size(response: requests.Response, offset: int) -> Optional[int]:
+        """Content-Range / Content-Length'ten beklenen toplam dosya boyutu"""
+        content_range = response.headers.get('Content-Range', '')
+        if '/' in content_range and not content_range.endswith('/*'):
+            return int(content_range.rsplit('/', 1)[1])
+        content_length = response.headers.get('Content-Length')
+        if content_length is not None:
+            return offset + int(content_length)
+        return None
+
+    def download_series_parallel(self, images: List[Dict], collection_id: str) -> List[Dict]:
+        """
+        Serileri sınırlı thread havuzunda indir
+
+        Args:
+            images: TCIA görüntü listesi girdileri (SeriesInstanceUID içeren)
+            collection_id: Koleksiyon kimliği
+
+        Returns:
+            Başarıyla indirilen serilerin detayları (giriş sırasıyla)
+        """
+        series = [image for image in images if image.get('SeriesInstanceUID')]
+        downloaded: Dict[int, Dict] = {}
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="tcia-download") as executor:
+            futures = {
+                executor.submit(self.download_image_series, image['SeriesInstanceUID'], collection_id): i
+                for i, image in enumerate(series)
+            }
+            for future in as_completed(futures):
+                i = futures[future]
+                image = series[i]
+                try:
+                    series_path = future.result()
+                except Exception as e:
+                    logger.error(f"Seri indirme hatası: {str(e)}")
+                    continue
+                downloaded[i] = {
+                    "series_uid": image['SeriesInstanceUID'],
+                    "path": series_path,
+                    "patient_id": image.get('PatientID'),
+                    "study_date": image.get('StudyDate'),
+                    "modality": image.get('Modality')
+                }
+                logger.info(f"İndirilen seri {len(downloaded)}/{len(series)}: {image['SeriesInstanceUID']}")
+
+        return [downloaded[i] for i in sorted(downloaded)]
+
     def download_collection_sample(self, collection_id: str, max_series: int = 10) -> Dict:
         """Koleksiyondan örnek veri indir"""
         try:
@@ -208,28 +430,8 @@ class TCIADataDownloader:
             # Örnek serileri seç
             sample_series = images[:max_series]
             
-            downloaded_series = []
-            for i, image in enumerate(sample_series):
-                try:
-                    series_uid = image.get('SeriesInstanceUID')
-                    if series_uid:
-                        series_path = self.download_image_series(series_uid, collection_id)
-                        downloaded_series.append({
-                            "series_uid": series_uid,
-                            "path": series_path,
-                            "patient_id": image.get('PatientID'),
-                            "study_date": image.get('StudyDate'),
-                            "modality": image.get('Modality')
-                        })
-                        
-                        logger.info(f"İndirilen seri {i+1}/{len(sample_series)}: {series_uid}")
-                        
-                        # Rate limiting
-                        time.sleep(1)
-                        
-                except Exception as e:
-                    logger.error(f"Seri indirme hatası: {str(e)}")
-                    continue
+            # Paralel indirme (tamamlanmış seriler manifest'ten atlanır)
+            downloaded_series = self.download_series_parallel(sample_series, collection_id)
             
             result = {
                 "collection_id": collection_id,
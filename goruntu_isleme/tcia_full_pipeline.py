@@ -13,6 +13,7 @@ from pathlib import Path
 from datetime import datetime
 import json
 import sys
+from typing import Optional
 
 # Proje root'unu Python path'e ekle
 project_root = Path(__file__).parent
@@ -114,7 +115,7 @@ class TCIAFullPipeline:
             # 3. Eğitim Veri Seti Oluşturma
             try:
                 logger.info("📊 Adım 3: Eğitim Veri Seti Oluşturuluyor...")
-                dataset_results = self._create_training_dataset()
+                dataset_results = self._create_training_dataset(processing_results)
                 pipeline_results['dataset_results'] = dataset_results
                 pipeline_results['steps_completed'].append('dataset_creation')
                 logger.info("✅ Eğitim veri seti oluşturuldu")
@@ -181,7 +182,8 @@ class TCIAFullPipeline:
                 collection_dir = self.download_dir / collection_id
                 if collection_dir.exists():
                     logger.info(f"Koleksiyon işleniyor: {collection_id}")
-                    result = self.processor.batch_process_collection(str(collection_dir))
+                    # Slice PNG'leri yazılmaz; eğitim hacim deposunu mmap ile okur
+                    result = self.processor.batch_process_collection(str(collection_dir), output_format="volume")
                     processing_results[collection_id] = result
                 else:
                     logger.warning(f"Koleksiyon klasörü bulunamadı: {collection_dir}")
@@ -193,9 +195,19 @@ class TCIAFullPipeline:
         
         return processing_results
     
-    def _create_training_dataset(self) -> dict:
+    def _create_training_dataset(self, processing_results: Optional[dict] = None) -> dict:
         """Eğitim veri seti oluştur"""
         try:
+            # Hacim deposundaki serilerden manifesto (PNG kopyalamadan); depoda
+            # önceki çalıştırmalardan kalan koleksiyonlar veri setine karışmasın
+            if self.processor.volume_store.list_series():
+                collections = None
+                if processing_results is not None:
+                    collections = [collection_id for collection_id, result in processing_results.items()
+                                   if 'error' not in result]
+                return self.processor.create_volume_dataset(str(self.training_dir),
+                                                            collections=collections)
+            
             # İşlenmiş koleksiyon klasörlerini bul
             processed_dirs = []
             for item in self.processed_dir.iterdir():
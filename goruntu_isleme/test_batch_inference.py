@@ -0,0 +1,157 @@
+"""
+Dinamik Mikro-Batch Çıkarım Motoru - Test
+=========================================
+
+BatchInferenceEngine'in batch'i boyut dolunca ve bekleme penceresi
+bitince göndermesini, her isteğe kendi satırını döndürmesini ve iptal
+edilen çağıranların worker thread'ini bozmamasını sınar.
+
+Kullanım:
+    python -m pytest test_batch_inference.py
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+import torch
+import torch.nn as nn
+
+from batch_inference import BatchInferenceEngine
+
+pytestmark = pytest.mark.asyncio
+
+
+class RecordingModel(nn.Module):
+    """Girdinin toplamını döndüren, batch boyutlarını kaydeden model"""
+
+    def __init__(self):
+        super().__init__()
+        self.batch_sizes = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        self.batch_sizes.append(x.shape[0])
+        self.entered.set()
+        self.gate.wait()
+        return x.flatten(1).sum(dim=1, keepdim=True)
+
+
+def image(value: float) -> torch.Tensor:
+    return torch.full((1, 2, 2), value)
+
+
+@pytest.fixture
+def make_engine():
+    engines = []
+
+    def make(**kwargs):
+        model = RecordingModel()
+        engine = BatchInferenceEngine(model, name="test", **kwargs)
+        engine.start()
+        engines.append(engine)
+        return engine, model
+
+    yield make
+    for engine in engines:
+        engine.stop()
+
+
+async def test_flush_on_size(make_engine):
+    """Batch dolunca bekleme penceresi bitmeden gönderilir"""
+    engine, model = make_engine(max_batch_size=4, max_wait_ms=5000)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(engine.infer(image(i)) for i in range(4)))
+
+    assert time.perf_counter() - start < 2.0
+    assert model.batch_sizes == [4]
+    assert [r.item() for r in results] == [0.0, 4.0, 8.0, 12.0]
+
+
+async def test_flush_on_timeout(make_engine):
+    """Batch dolmasa da bekleme penceresi bitince gönderilir"""
+    engine, model = make_engine(max_batch_size=16, max_wait_ms=50)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(engine.infer(image(i)) for i in range(3)))
+
+    assert time.perf_counter() - start >= 0.04
+    assert model.batch_sizes == [3]
+    assert [r.item() for r in results] == [0.0, 4.0, 8.0]
+    assert engine.get_stats()['batch_size_histogram'] == {3: 1}
+
+
+async def test_cancelled_caller_is_skipped(make_engine):
+    """Kuyrukta iptal edilen istek forward pass'e girmez, diğerleri sonucunu alır"""
+    engine, model = make_engine(max_batch_size=4, max_wait_ms=1)
+    model.gate.clear()
+
+    first = asyncio.ensure_future(engine.infer(image(1)))
+    await asyncio.get_running_loop().run_in_executor(None, model.entered.wait, 2.0)
+
+    # Worker ilk batch'te meşgulken iki istek kuyruğa girer, biri iptal edilir
+    cancelled = asyncio.ensure_future(engine.infer(image(2)))
+    kept = asyncio.ensure_future(engine.infer(image(3)))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    await asyncio.sleep(0.01)
+    model.gate.set()
+
+    assert (await first).item() == 4.0
+    assert (await kept).item() == 12.0
+    assert cancelled.cancelled()
+    assert model.batch_sizes == [1, 1]
+
+
+async def test_cancel_during_forward_pass(make_engine):
+    """Forward pass sırasında iptal edilen çağıran motoru bozmaz"""
+    engine, model = make_engine(max_batch_size=4, max_wait_ms=1)
+    model.gate.clear()
+
+    task = asyncio.ensure_future(engine.infer(image(1)))
+    await asyncio.get_running_loop().run_in_executor(None, model.entered.wait, 2.0)
+    task.cancel()
+    model.gate.set()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert (await engine.infer(image(2))).item() == 8.0
+    assert engine.get_stats()['failed_batches'] == 0
+
+
+async def test_forward_error_reaches_every_caller(make_engine):
+    engine, model = make_engine(max_batch_size=4, max_wait_ms=20)
+
+    results = await asyncio.gather(
+        engine.infer(image(1)), engine.infer(torch.zeros(1, 3, 3)), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert engine.get_stats()['failed_batches'] == 1
+    assert (await engine.infer(image(1))).item() == 4.0
+
+
+async def test_stop_during_submissions_never_hangs(make_engine):
+    """stop() ile yarışan çağrılar ya sonuç ya hata alır, hiçbiri askıda kalmaz"""
+    engine, model = make_engine(max_batch_size=4, max_wait_ms=1)
+    loop = asyncio.get_running_loop()
+
+    async def submit(i):
+        await asyncio.sleep(0.0005 * (i % 20))
+        return await engine.infer(image(i))
+
+    tasks = [asyncio.ensure_future(submit(i)) for i in range(200)]
+    await asyncio.sleep(0.005)
+    await loop.run_in_executor(None, engine.stop)
+
+    done, pending = await asyncio.wait(tasks, timeout=5)
+    assert not pending
+    for task in done:
+        if task.exception() is not None:
+            assert isinstance(task.exception(), RuntimeError)
+    with pytest.raises(RuntimeError, match="çalışmıyor"):
+        await engine.infer(image(0))
@@ -0,0 +1,225 @@
+"""
+Klinik HTTP Taşıma Katmanı - Test
+=================================
+
+clinical_http ve PACS/FHIR entegrasyonlarının HTTP modunu yerel sahte
+sunucuya (clinical_mock_server) karşı sınar: keep-alive bağlantı yeniden
+kullanımı, host başına eşzamanlılık sınırı, 503 sonrası yeniden deneme
+(POST yalnızca gönderilemediğinde), STOW-RS DICOM JSON gövdesi ve yeniden
+gönderimde sabit SR UID'leri, FHIR transaction Bundle toplama ve uçtan uca
+workflow.
+
+Kullanım:
+    python -m pytest test_clinical_http.py
+"""
+
+import asyncio
+import socket
+
+import httpx
+import pytest
+
+from clinical_fakes import FastWorkflowManager, make_ai_result
+from clinical_http import ClinicalHTTPTransport, MicroBatcher
+from clinical_integration import (
+    COMPREHENSIVE_SR_SOP_CLASS, HL7FHIRIntegration, PACSIntegration, WorkflowStatus
+)
+from clinical_mock_server import MockClinicalServer, dicom_json_errors
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(scope="module")
+def server():
+    """Testler arasında paylaşılan sahte PACS/FHIR sunucusu (her test istatistikleri sıfırlar)"""
+    with MockClinicalServer() as mock_server:
+        yield mock_server
+
+
+async def test_keepalive(server: MockClinicalServer):
+    """Ardışık istekler havuzdaki tek bağlantıyı kullanır; keepalive=False ile her istek yeni bağlantı açar"""
+    for keepalive, expected in ((True, 1), (False, 10)):
+        server.reset_stats()
+        transport = ClinicalHTTPTransport(keepalive=keepalive)
+        for _ in range(10):
+            await transport.get_json(f"{server.dicomweb_url}/studies")
+        await transport.aclose()
+        connections = len(server.stats['connections'])
+        assert connections == expected, f"keepalive={keepalive}: {connections} bağlantı"
+
+
+async def test_per_host_limit(server: MockClinicalServer):
+    """Host başına sınır sunucudaki eşzamanlı istek sayısını aşmaz"""
+    server.reset_stats()
+    server.latency = 0.05
+    transport = ClinicalHTTPTransport(max_per_host=2)
+    try:
+        await asyncio.gather(*[transport.get_json(f"{server.dicomweb_url}/studies") for _ in range(10)])
+    finally:
+        server.latency = 0.0
+        await transport.aclose()
+    assert server.stats['max_in_flight'] == 2, server.stats['max_in_flight']
+
+
+async def test_retry(server: MockClinicalServer):
+    """503 yanıtları jitter'lı geri çekilmeyle yeniden denenir"""
+    server.reset_stats()
+    server.fail_every = 3
+    transport = ClinicalHTTPTransport(retries=3, backoff=0.01)
+    pacs = PACSIntegration({'http_enabled': True, 'dicomweb_url': server.dicomweb_url}, transport)
+    try:
+        studies = [await pacs.retrieve_study(f"1.2.3.{i}") for i in range(6)]
+    finally:
+        server.fail_every = 0
+        await transport.aclose()
+    assert all(study['patient_info']['patient_id'] for study in studies)
+    assert server.stats['rejected'] > 0 and transport.stats['retries'] == server.stats['rejected'], \
+        (server.stats['rejected'], transport.stats)
+
+
+async def test_post_not_retried(server: MockClinicalServer):
+    """POST 503 sonrası tekrarlanmaz (sunucu işlemiş olabilir); bağlantı kurulamazsa yeniden denenir"""
+    server.reset_stats()
+    server.fail_every = 1
+    transport = ClinicalHTTPTransport(retries=3, backoff=0.01)
+    try:
+        with pytest.raises(httpx.HTTPStatusError):
+            await transport.post_json(f"{server.fhir_url}/Observation", {'resourceType': 'Observation'})
+    finally:
+        server.fail_every = 0
+    assert server.stats['requests'] == 1 and transport.stats['retries'] == 0, \
+        (server.stats['requests'], transport.stats)
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        closed_port = sock.getsockname()[1]
+    try:
+        with pytest.raises(httpx.ConnectError):
+            await transport.post_json(f"http://127.0.0.1:{closed_port}/fhir/Observation", {})
+    finally:
+        await transport.aclose()
+    assert transport.stats['retries'] == 3, transport.stats
+
+
+async def test_stow_dicom_json(server: MockClinicalServer):
+    """STOW-RS gövdesi etiket anahtarlı DICOM JSON SR veri setidir"""
+    server.reset_stats()
+    requests = []
+
+    async def record(request):
+        requests.append(request)
+
+    transport = ClinicalHTTPTransport()
+    transport.client.event_hooks['request'].append(record)
+    pacs = PACSIntegration({'http_enabled': True, 'dicomweb_url': server.dicomweb_url}, transport)
+    try:
+        sent = await pacs.send_ai_results("1.2.3.99", make_ai_result("1.2.3.99"))
+    finally:
+        await transport.aclose()
+
+    assert sent, "STOW-RS reddedildi"
+    assert requests[0].headers['content-type'] == 'application/dicom+json', requests[0].headers
+    assert server.stats['stored'] == 1, server.stats
+
+    instance = server.stored_instances[0]
+    assert not dicom_json_errors(instance), dicom_json_errors(instance)
+    assert instance['00080016'] == {'vr': 'UI', 'Value': [COMPREHENSIVE_SR_SOP_CLASS]}
+    assert instance['0020000D']['Value'] == ["1.2.3.99"]
+    assert instance['00080060']['Value'] == ['SR']
+    assert instance['00100020']['Value'] == ["P-1.2.3.99"]
+    for tag in ('00080018', '0020000E'):
+        uid = instance[tag]['Value'][0]
+        assert uid.startswith('2.25.') and len(uid) <= 64, uid
+    content = instance['0040A730']['Value']
+    value_types = [item['0040A040']['Value'][0] for item in content]
+    assert value_types == ['TEXT', 'NUM', 'TEXT', 'CODE'], value_types
+    assert content[1]['0040A300']['Value'][0]['0040A30A']['Value'] == [0.9], content[1]
+
+
+async def test_stow_resend_reuses_uids(server: MockClinicalServer):
+    """Aynı sonucun yeniden gönderimi (iş kuyruğu yeniden denemesi) aynı SR UID'lerini taşır"""
+    server.reset_stats()
+    transport = ClinicalHTTPTransport()
+    pacs = PACSIntegration({'http_enabled': True, 'dicomweb_url': server.dicomweb_url}, transport)
+    try:
+        for case in ("1.2.3.98", "1.2.3.98", "1.2.3.97"):
+            assert await pacs.send_ai_results(case, make_ai_result(case))
+    finally:
+        await transport.aclose()
+
+    uids = [(i['00080018']['Value'][0], i['0020000E']['Value'][0]) for i in server.stored_instances[-3:]]
+    assert uids[0] == uids[1], uids
+    assert len({uid for pair in uids for uid in pair}) == 4, uids
+
+
+async def test_bundle_batching(server: MockClinicalServer):
+    """Eşzamanlı 10 çalışmanın 20 kaynağı 8'lik Bundle'larda 3 transaction ile gönderilir"""
+    server.reset_stats()
+    transport = ClinicalHTTPTransport()
+    fhir = HL7FHIRIntegration({'http_enabled': True, 'base_url': server.fhir_url,
+                               'bundle_max_entries': 8, 'bundle_max_delay': 0.05}, transport)
+    try:
+        records = await asyncio.gather(*[
+            fhir.create_ai_records(f"P{i}", make_ai_result(f"1.2.3.{i}")) for i in range(10)
+        ])
+    finally:
+        await transport.aclose()
+    assert server.stats['transactions'] == 3 and server.stats['bundle_entries'] == 20, server.stats
+    assert server.stats['resources'] == 0
+    for observation, report in records:
+        assert report['result'] == [{'reference': f"Observation/{observation['id']}"}], report['result']
+
+
+async def test_batcher_close():
+    """aclose bekleyen grubu gecikmeyi beklemeden gönderir ve gönderimin bitmesini bekler"""
+    sent = []
+
+    async def flush(items):
+        await asyncio.sleep(0.05)
+        sent.extend(items)
+        return items
+
+    batcher = MicroBatcher(flush, max_items=10, max_delay=60)
+    submitted = asyncio.ensure_future(batcher.submit([1, 2]))
+    await asyncio.sleep(0)
+    assert len(batcher._tasks) == 0
+    await batcher.aclose()
+    assert sent == [1, 2] and not batcher._tasks, (sent, batcher._tasks)
+    assert await submitted == [1, 2]
+
+
+async def test_bundle_retry_no_duplicates(server: MockClinicalServer):
+    """Aynı workflow'un yeniden gönderilen kayıtları koşullu create ile yeni kaynak oluşturmaz"""
+    server.reset_stats()
+    transport = ClinicalHTTPTransport()
+    fhir = HL7FHIRIntegration({'http_enabled': True, 'base_url': server.fhir_url}, transport)
+    ai_result = make_ai_result("1.2.3.7")
+    try:
+        first = await fhir.create_ai_records("P7", ai_result)
+        # Yanıtı kaybolan transaction'ın iş kuyruğunda yeniden denenmesi
+        second = await fhir.create_ai_records("P7", ai_result)
+    finally:
+        await transport.aclose()
+    assert server.stats['bundle_entries'] == 4 and len(server.fhir_identifiers) == 2, \
+        (server.stats, server.fhir_identifiers)
+    assert [r['id'] for r in first] == [r['id'] for r in second], (first, second)
+
+
+async def test_workflow(server: MockClinicalServer, tmp_path):
+    """Workflow HTTP modunda uçtan uca tamamlanır: 1 metadata, 1 STOW, 1 transaction / çalışma"""
+    server.reset_stats()
+    manager = FastWorkflowManager(
+        {'http_enabled': True, 'dicomweb_url': server.dicomweb_url},
+        {'http_enabled': True, 'base_url': server.fhir_url},
+        queue_db=str(tmp_path / "http.db"), workers=4
+    )
+    await manager.initialize_systems()
+    workflow_ids = await asyncio.gather(*[manager.process_study_workflow(f"1.2.3.{i}") for i in range(8)])
+    workflows = [manager.get_workflow_status(w) for w in workflow_ids]
+    await manager.shutdown()
+
+    assert all(w['status'] == WorkflowStatus.COMPLETED for w in workflows), \
+        [w.get('error') for w in workflows if w['status'] != WorkflowStatus.COMPLETED]
+    assert server.stats['stored'] == 8 and server.stats['bundle_entries'] == 16, server.stats
+    assert server.stats['transactions'] < 8, server.stats['transactions']
+
@@ -0,0 +1,183 @@
+"""
+Klinik İş Kuyruğu - Test
+========================
+
+ClinicalWorkflowManager'ın kuyruk davranışını yerel sahte (stub) PACS/FHIR
+uçlarına karşı sınar: öncelik sırası, bağımsız adımların eşzamanlılığı,
+yeniden deneme (geri çekilme, tamamlanan adımların atlanması), halka
+tampon ve çökme sonrası kurtarma.
+
+Kullanım:
+    python -m pytest test_clinical_job_queue.py
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from clinical_fakes import STEP_DELAY, FastWorkflowManager, StubFHIR, StubPACS
+from clinical_integration import PriorityLevel, WorkflowStatus
+from clinical_job_queue import Job, JobQueue
+
+pytestmark = pytest.mark.asyncio
+
+
+RETRY_BACKOFF = 0.1
+
+
+@pytest.fixture
+def create_manager(tmp_path):
+    """Sahte PACS/FHIR ve geçici kuyruk veritabanıyla workflow yöneticisi üretir"""
+    def create(name: str, **kwargs) -> FastWorkflowManager:
+        pacs = kwargs.pop('pacs', None) or StubPACS()
+        fhir = kwargs.pop('fhir', None) or StubFHIR()
+        manager = FastWorkflowManager({}, {}, queue_db=str(tmp_path / f"{name}.db"),
+                                      pacs=pacs, fhir=fhir, **kwargs)
+        manager.job_queue.retry_backoff = RETRY_BACKOFF
+        return manager
+    return create
+
+
+async def test_priority_order(create_manager):
+    """Tek worker: STAT, URGENT'tan; URGENT, ROUTINE'den önce işlenir"""
+    manager = create_manager("priority", workers=1)
+    await manager.initialize_systems()
+
+    # Hepsi worker'lar çalışmadan kuyruğa girer
+    order = [(PriorityLevel.ROUTINE, 'r1'), (PriorityLevel.URGENT, 'u1'),
+             (PriorityLevel.ROUTINE, 'r2'), (PriorityLevel.STAT, 's1')]
+    waits = [manager.process_study_workflow(uid, priority) for priority, uid in order]
+    await asyncio.gather(*waits)
+
+    retrieved = manager.pacs.retrieved
+    await manager.shutdown()
+    assert retrieved == ['s1', 'u1', 'r1', 'r2'], retrieved
+
+
+async def test_concurrent_steps(create_manager):
+    """PACS gönderimi ve iki FHIR çağrısı eşzamanlı: ~1 adım süresi"""
+    manager = create_manager("concurrency", workers=1)
+    start_time = time.perf_counter()
+    workflow_id = await manager.process_study_workflow('c1', PriorityLevel.URGENT)
+    elapsed = time.perf_counter() - start_time
+    workflow = manager.get_workflow_status(workflow_id)
+    await manager.shutdown()
+
+    assert workflow['status'] == WorkflowStatus.COMPLETED
+    assert elapsed < STEP_DELAY * 2, f"{elapsed:.2f}s"
+
+
+async def test_retry(create_manager):
+    """Geçici PACS hatası yeniden denenir; deneme hakkı bitince FAILED"""
+    manager = create_manager("retry", pacs=StubPACS(fail_retrievals=1))
+    workflow_id = await manager.process_study_workflow('t1')
+    workflow = manager.get_workflow_status(workflow_id)
+    assert workflow['status'] == WorkflowStatus.COMPLETED and workflow['attempts'] == 2, workflow
+
+    manager.pacs.fail_retrievals = manager.job_queue.max_attempts
+    workflow_id = await manager.process_study_workflow('t2')
+    workflow = manager.get_workflow_status(workflow_id)
+    failed_jobs = manager.job_queue.failed_jobs()
+    await manager.shutdown()
+    assert workflow['status'] == WorkflowStatus.FAILED, workflow
+    assert failed_jobs and failed_jobs[0]['job_id'] == workflow_id
+
+
+async def test_retry_failed_send(create_manager):
+    """False döndüren PACS gönderimi workflow'u tamamlamaz, iş yeniden denenir"""
+    manager = create_manager("send", pacs=StubPACS(fail_sends=1))
+    workflow_id = await manager.process_study_workflow('p1')
+    workflow = manager.get_workflow_status(workflow_id)
+    await manager.shutdown()
+
+    assert workflow['status'] == WorkflowStatus.COMPLETED and workflow['attempts'] == 2, workflow
+    assert manager.pacs.sent == ['p1'], manager.pacs.sent
+    statuses = {step['step']: step['status'] for step in workflow['steps']}
+    assert statuses['send_to_pacs'] == 'completed' and statuses['create_fhir_records'] == 'skipped', statuses
+
+
+async def test_retry_backoff(tmp_path):
+    """Başarısız iş geri çekilme süresi dolmadan alınmaz, süre her denemede ikiye katlanır, hak bitince failed"""
+    queue = JobQueue(tmp_path / "backoff.db", max_attempts=3, retry_backoff=0.2)
+    queue.enqueue('b1', 3, {'workflow_id': 'b1'})
+    job = queue.claim()
+    assert queue.fail(job, "hata") == 0.2
+    assert queue.claim() is None, "iş geri çekilme süresi dolmadan alındı"
+    assert 0.1 < queue.next_ready_in() <= 0.2, queue.next_ready_in()
+    await asyncio.sleep(0.25)
+    job = queue.claim()
+    assert job is not None and job.attempts == 2, job
+    assert queue.fail(job, "hata") == 0.4
+    assert queue.fail(Job('b1', 3, {}, 3), "hata") is None
+    assert [failed['job_id'] for failed in queue.failed_jobs()] == ['b1']
+    queue.close()
+
+
+async def test_retry_skips_completed_steps(create_manager):
+    """FHIR hatasıyla yeniden denenen workflow PACS'e ikinci kez göndermez, AI sonucunu yeniden kullanır"""
+    manager = create_manager("resume", fhir=StubFHIR(fail_observations=1))
+    start_time = time.perf_counter()
+    workflow_id = await manager.process_study_workflow('s1')
+    elapsed = time.perf_counter() - start_time
+    workflow = manager.get_workflow_status(workflow_id)
+    await manager.shutdown()
+
+    assert workflow['status'] == WorkflowStatus.COMPLETED and workflow['attempts'] == 2, workflow
+    # Çalışma verisi kaydedilmez, yeniden alınır; yan etkili adımlar atlanır
+    assert manager.pacs.retrieved == ['s1', 's1'] and manager.pacs.sent == ['s1'], \
+        (manager.pacs.retrieved, manager.pacs.sent)
+    statuses = {step['step']: step['status'] for step in workflow['steps']}
+    assert statuses == {'retrieve_study': 'completed', 'ai_analysis': 'skipped',
+                        'send_to_pacs': 'skipped', 'create_fhir_records': 'completed'}, statuses
+    assert workflow['results']['ai_result'].case_id == workflow_id
+    assert elapsed >= RETRY_BACKOFF, f"{elapsed:.2f}s"
+
+
+async def test_payload_excludes_study_data(create_manager):
+    """Kalıcı iş payload'ı hasta/görüntü verisini (retrieve_study sonucu) içermez"""
+    manager = create_manager("payload")
+    manager.pacs.fail_sends = manager.job_queue.max_attempts
+    workflow_id = await manager.process_study_workflow('d1')
+    failed_jobs = manager.job_queue.failed_jobs()
+    await manager.shutdown()
+
+    payload = next(job['payload'] for job in failed_jobs if job['job_id'] == workflow_id)
+    assert set(payload['completed_steps']) == {'ai_analysis', 'create_fhir_records'}, payload
+
+
+async def test_ring_buffer(create_manager):
+    """Geçmiş sınırlıdır, toplam sayaçlar doğru kalır"""
+    manager = create_manager("history", workers=2, history_size=3)
+    workflow_ids = await asyncio.gather(*[
+        manager.process_study_workflow(f"h{i}") for i in range(5)
+    ])
+    statistics = manager.get_workflow_statistics()
+    await manager.shutdown()
+
+    assert len(manager.workflow_history) == 3
+    assert statistics['total_workflows'] == 5 and statistics['completed_workflows'] == 5
+    assert sum(manager.get_workflow_status(w) is not None for w in workflow_ids) == 3
+
+
+async def test_recovery(tmp_path):
+    """Yarıda kalan iş yeniden başlatmada kuyruğa geri alınır ve tamamlanır"""
+    db_path = tmp_path / "recovery.db"
+    queue = JobQueue(db_path)
+    queue.enqueue('w-crashed', 3, {'workflow_id': 'w-crashed', 'study_uid': 'x1', 'priority': 'routine'})
+    assert queue.claim() is not None  # running kalır (çökme)
+    queue.close()
+
+    manager = FastWorkflowManager({}, {}, queue_db=str(db_path), pacs=StubPACS(), fhir=StubFHIR())
+    await manager.initialize_systems()
+    for _ in range(50):
+        if manager.get_workflow_status('w-crashed') and \
+                manager.get_workflow_status('w-crashed')['status'] == WorkflowStatus.COMPLETED:
+            break
+        await asyncio.sleep(0.05)
+    workflow = manager.get_workflow_status('w-crashed')
+    queue_status = manager.get_queue_status()
+    await manager.shutdown()
+    assert workflow is not None and workflow['status'] == WorkflowStatus.COMPLETED, workflow
+    assert not queue_status['queued'] and not queue_status['running'], queue_status
+
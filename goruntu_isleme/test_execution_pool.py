@@ -0,0 +1,75 @@
+"""
+Aşama Bazlı Yürütme Havuzu - Test
+=================================
+
+StageExecutor'ın kapasite sınırını ve slot muhasebesini sınar: çağıran
+iptal edildiğinde slot, thread'deki iş bitene kadar dolu kalmalıdır.
+
+Kullanım:
+    python -m pytest test_execution_pool.py
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from execution_pool import StageExecutor, StageSaturatedError
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def executor():
+    executor = StageExecutor({'work': {'max_workers': 1, 'max_queue': 0}})
+    yield executor
+    executor.shutdown()
+
+
+async def test_saturated_stage_rejects(executor):
+    """Kapasite dolduğunda yeni istek StageSaturatedError ile reddedilir"""
+    release = threading.Event()
+    running = asyncio.ensure_future(executor.run('work', release.wait))
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(StageSaturatedError):
+        await executor.run('work', lambda: None)
+
+    release.set()
+    await running
+    stats = executor.get_stats()['work']
+    assert stats['in_flight'] == 0
+    assert (stats['completed'], stats['rejected']) == (1, 1)
+
+
+async def test_cancelled_caller_keeps_slot_until_work_finishes(executor):
+    """İptal edilen çağrı, thread'deki iş bitmeden slotu bırakmaz"""
+    release = threading.Event()
+    task = asyncio.ensure_future(executor.run('work', release.wait))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert executor.get_stats()['work']['in_flight'] == 1
+    with pytest.raises(StageSaturatedError):
+        await executor.run('work', lambda: None)
+
+    release.set()
+    for _ in range(100):
+        if executor.get_stats()['work']['in_flight'] == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert executor.get_stats()['work']['in_flight'] == 0
+    assert await executor.run('work', lambda: 42) == 42
+
+
+async def test_failure_is_counted(executor):
+    """İşte oluşan hata çağırana iletilir ve başarısız sayılır"""
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await executor.run('work', fail)
+    stats = executor.get_stats()['work']
+    assert (stats['in_flight'], stats['failed']) == (0, 1)
@@ -0,0 +1,93 @@
+"""
+Kırık/Çıkık Ön İşleme - Test
+============================
+
+Çıkarım girdisinin eğitim dönüşümleriyle (MedicalImageDataset:
+min-max 0-255 + A.Normalize(mean=0.485, std=0.229)) aynı dağılımda
+olduğunu sınar: standardize çekirdeği albumentations ile karşılaştırılır,
+FractureDislocationDetector._preprocess_image tensörünün aralığı ve
+istatistikleri kontrol edilir. Ortak grayscale decode'un 4 kanallı (alfa)
+girdileri de tek kanala indirdiği sınanır.
+
+Kullanım:
+    python -m pytest test_fracture_preprocessing.py
+"""
+
+import logging
+
+import base64
+
+import cv2
+import numpy as np
+import pytest
+
+from imaging_kernels import TRAIN_NORMALIZE_MEAN, TRAIN_NORMALIZE_STD, decode_grayscale, standardize
+
+logging.basicConfig(level=logging.ERROR, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 0 ve 255 piksellerinin standardize edilmiş değerleri
+LOW = (0.0 - TRAIN_NORMALIZE_MEAN) / TRAIN_NORMALIZE_STD
+HIGH = (1.0 - TRAIN_NORMALIZE_MEAN) / TRAIN_NORMALIZE_STD
+
+
+def sample_image(height: int = 700, width: int = 600) -> np.ndarray:
+    """Kemik benzeri parlak bant içeren 12 bit görüntü"""
+    rng = np.random.default_rng(0)
+    image = rng.normal(800, 120, (height, width))
+    image[:, width // 3: width // 2] += 1800
+    return np.clip(image, 0, 4095).astype(np.uint16)
+
+
+@pytest.mark.parametrize('encode', ['array', 'png', 'base64'])
+def test_decode_grayscale_handles_alpha(encode):
+    """RGBA diziler ve alfa kanallı PNG'ler tek kanallı uint8 olarak çözülür"""
+    rgba = np.random.default_rng(2).integers(0, 256, (48, 40, 4)).astype(np.uint8)
+    rgba[..., 3] = 255
+    expected = cv2.cvtColor(rgba, cv2.COLOR_RGBA2GRAY)
+
+    source = rgba
+    if encode != 'array':
+        # cv2.imencode BGRA bekler; PNG içeriği yukarıdaki RGBA ile aynı olsun
+        _, png = cv2.imencode('.png', cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGRA))
+        source = png.tobytes() if encode == 'png' else base64.b64encode(png.tobytes()).decode()
+
+    result = decode_grayscale(source)
+    assert result.shape == (48, 40) and result.dtype == np.uint8
+    assert np.abs(result.astype(int) - expected.astype(int)).max() <= 1
+
+
+def test_decode_grayscale_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_grayscale(b'not an image')
+
+
+def test_standardize_matches_training_transform():
+    """standardize, eğitimdeki A.Normalize ile aynı sonucu verir"""
+    image = np.random.default_rng(1).integers(0, 256, (64, 64)).astype(np.float32)
+    result = standardize(image)
+    expected = (image / 255.0 - TRAIN_NORMALIZE_MEAN) / TRAIN_NORMALIZE_STD
+    assert result.dtype == np.float32, result.dtype
+    assert np.allclose(result, expected, atol=1e-5)
+
+    A = pytest.importorskip("albumentations")
+    albumentations_result = A.Normalize(mean=[TRAIN_NORMALIZE_MEAN], std=[TRAIN_NORMALIZE_STD])(image=image)['image']
+    assert np.allclose(result, albumentations_result, atol=1e-5)
+
+
+def test_detector_preprocess_distribution():
+    """_preprocess_image tensörü 0-255 değil, standardize edilmiş aralıktadır"""
+    torch = pytest.importorskip("torch")
+    FractureDislocationDetector = pytest.importorskip("fracture_dislocation_detector").FractureDislocationDetector
+
+    detector = FractureDislocationDetector.__new__(FractureDislocationDetector)
+    detector.device = torch.device('cpu')
+    tensor = detector._preprocess_image(sample_image())
+
+    assert tensor.shape == (1, 1, 512, 512), tensor.shape
+    assert tensor.dtype == torch.float32, tensor.dtype
+    assert abs(tensor.min().item() - LOW) < 1e-4, tensor.min().item()
+    assert abs(tensor.max().item() - HIGH) < 1e-4, tensor.max().item()
+    # 0-255 girdide ortalama ~100, std ~60 olurdu
+    assert LOW < tensor.mean().item() < HIGH, tensor.mean().item()
+    assert 0.2 < tensor.std().item() < 3.0, tensor.std().item()
+
@@ -0,0 +1,166 @@
+"""
+Model Cache - Test
+==================
+
+ModelCache'in byte bütçesini, çıkarma sırasını (LFU + yaşlandırma,
+eşitlikte en eski erişim) ve eşzamanlı cache miss'lerde tek yükleme
+(single-flight) davranışını sınar.
+
+Kullanım:
+    python -m pytest test_model_cache.py
+"""
+
+import threading
+import time
+
+import torch.nn as nn
+
+from models.model_loader import ModelCache
+
+# nn.Linear(256, 256): 256*256 ağırlık + 256 bias, float32
+MODEL_BYTES = (256 * 256 + 256) * 4
+
+
+def make_model() -> nn.Module:
+    return nn.Linear(256, 256)
+
+
+def make_cache(max_models: int = 10, budget_models: float = 3.5, **kwargs) -> ModelCache:
+    """Bütçesi yaklaşık budget_models kadar model alan cache"""
+    cache = ModelCache(max_models=max_models, max_memory_mb=1, **kwargs)
+    cache.max_memory_bytes = int(MODEL_BYTES * budget_models)
+    return cache
+
+
+def test_model_bytes_are_measured_from_tensors():
+    cache = make_cache()
+    cache.put('a', make_model())
+    assert cache.get_cache_stats()['total_bytes'] == MODEL_BYTES
+
+
+def test_byte_budget_is_enforced():
+    cache = make_cache(budget_models=2.5)
+    for name in 'abcd':
+        cache.put(name, make_model())
+
+    stats = cache.get_cache_stats()
+    assert stats['cached_models'] == 2
+    assert stats['total_bytes'] <= cache.max_memory_bytes
+    assert stats['evictions'] == 2
+
+
+def test_max_models_is_enforced():
+    cache = make_cache(max_models=2, budget_models=10)
+    for name in 'abc':
+        cache.put(name, make_model())
+    assert sorted(cache.get_cache_stats()['cached_model_names']) == ['b', 'c']
+
+
+def test_least_frequently_used_is_evicted_first():
+    cache = make_cache(budget_models=3.5)
+    for name in 'abc':
+        cache.put(name, make_model())
+    for _ in range(3):
+        cache.get('a')
+    cache.get('b')
+
+    cache.put('d', make_model())
+    assert sorted(cache.cache) == ['a', 'b', 'd']
+
+
+def test_equal_counts_evict_oldest_access():
+    cache = make_cache(budget_models=3.5)
+    for name in 'abc':
+        cache.put(name, make_model())
+    # Hepsi bir kez daha erişildi; en eski erişim 'b'
+    cache.get('b')
+    cache.get('c')
+    cache.get('a')
+
+    cache.put('d', make_model())
+    assert sorted(cache.cache) == ['a', 'c', 'd']
+
+
+def test_stale_popularity_decays():
+    """Eskiden popüler ama artık kullanılmayan model sonunda çıkarılır"""
+    cache = make_cache(budget_models=2.5, decay_interval=8)
+    cache.put('old', make_model())
+    for _ in range(20):
+        cache.get('old')
+
+    cache.put('new', make_model())
+    for _ in range(40):
+        cache.get('new')
+
+    assert cache.access_counts['new'] > cache.access_counts['old']
+    cache.put('incoming', make_model())
+    assert sorted(cache.cache) == ['incoming', 'new']
+
+
+def test_without_decay_stale_popularity_sticks():
+    cache = make_cache(budget_models=2.5, decay_interval=0)
+    cache.put('old', make_model())
+    for _ in range(20):
+        cache.get('old')
+    cache.put('new', make_model())
+    for _ in range(10):
+        cache.get('new')
+
+    cache.put('incoming', make_model())
+    assert sorted(cache.cache) == ['incoming', 'old']
+
+
+def test_concurrent_misses_load_once():
+    cache = make_cache()
+    calls = []
+
+    def loader():
+        calls.append(threading.get_ident())
+        time.sleep(0.1)
+        return make_model()
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load('a', loader)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(results) == 8 and all(model is results[0] for model in results)
+    stats = cache.get_cache_stats()
+    assert (stats['loads'], stats['misses'], stats['hits']) == (1, 1, 7)
+
+
+def test_failed_load_is_shared_and_retried():
+    cache = make_cache()
+    calls = []
+
+    def failing_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        raise RuntimeError("checkpoint okunamadı")
+
+    errors = []
+
+    def worker():
+        try:
+            cache.get_or_load('a', failing_loader)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1 and len(errors) == 4
+    assert cache.get_cache_stats()['loads_in_progress'] == 0
+
+    # Hata kalıcı değildir: sonraki çağrı yeniden yükler
+    model = cache.get_or_load('a', make_model)
+    assert cache.get('a') is model
@@ -0,0 +1,119 @@
+"""
+Çok Başlı Model - Test
+======================
+
+ModelManager'ın çok başlı tahmin yolunu rastgele ağırlıklı bir
+checkpoint ile sınar: batch tahminin görüntü başına sonuç döndürmesi ve
+tek tek tahminlerle aynı olması, predict_multi_head'in batch girdiyi
+reddetmesi, başlıkların doğrulama meta verisine göre (sentetik başlıklar,
+doğruluk eşiği) kabul/reddi ve sentetik başlık verisinde Normal dışı
+sınıfların birbirinden ayrışması.
+
+Kullanım:
+    python -m pytest test_multi_head_model.py
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pytest
+import torch
+
+from models.model_manager import ModelManager
+from models.multi_head_model import DEFAULT_HEAD_CONFIGS, MultiHeadRadiologyModel
+
+# ModelManager boş models dizininde yer tutucu model hatalarını loglar
+logging.basicConfig(level=logging.CRITICAL, format='%(asctime)s - %(levelname)s - %(message)s')
+
+IMAGE_SIZE = 64
+
+
+def make_manager(models_dir: Path, **metadata) -> ModelManager:
+    """Rastgele ağırlıklı çok başlı checkpoint yazıp ModelManager döndür"""
+    torch.manual_seed(0)
+    model = MultiHeadRadiologyModel(head_configs=DEFAULT_HEAD_CONFIGS, input_channels=1)
+    manager = ModelManager(str(models_dir))
+    torch.save({
+        'model_state_dict': model.state_dict(),
+        'head_configs': model.head_configs,
+        **metadata
+    }, models_dir / manager.multi_head_config['model_file'])
+    return manager
+
+
+@pytest.fixture
+def manager(tmp_path) -> ModelManager:
+    return make_manager(tmp_path)
+
+
+def test_batch_prediction(manager: ModelManager):
+    """Batch tahmin görüntü başına sonuç döndürür ve tekli tahminlerle aynıdır"""
+    images = torch.randn(3, 1, IMAGE_SIZE, IMAGE_SIZE)
+    heads = ['bone_fracture', 'joint_dislocation']
+
+    batch_results = manager.predict_multi_head_batch(images, heads=heads)
+    assert len(batch_results) == 3, len(batch_results)
+    for row, sample in enumerate(batch_results):
+        assert set(sample) == set(heads), sample.keys()
+        single = manager.predict_multi_head(images[row:row + 1], heads=heads)
+        for head in heads:
+            assert sample[head]['predicted_class'] == single[head]['predicted_class']
+            assert abs(sample[head]['confidence'] - single[head]['confidence']) < 1e-5
+            assert len(sample[head]['probabilities']) == len(DEFAULT_HEAD_CONFIGS[head])
+
+
+def test_single_rejects_batch(manager: ModelManager):
+    """predict_multi_head birden fazla görüntüde açık bir hata verir"""
+    with pytest.raises(ValueError, match='predict_multi_head_batch'):
+        manager.predict_multi_head(torch.randn(2, 1, IMAGE_SIZE, IMAGE_SIZE))
+
+
+@pytest.mark.parametrize('metadata, expected', [
+    ({}, False),  # meta verisiz eski checkpoint
+    ({'synthetic_heads': ['classification'], 'accuracies': {'classification': 99.0}}, False),
+    ({'synthetic_heads': [], 'accuracies': {'classification': 90.0}}, False),
+    ({'synthetic_heads': ['bone_fracture'], 'accuracies': {'classification': 97.5}}, True),
+])
+def test_head_validation(tmp_path, metadata, expected):
+    """Sınıflandırma başlığı yalnızca gerçek veriyle eğitilmiş ve eşiği geçmişse doğrulanmış sayılır"""
+    manager = make_manager(tmp_path, **metadata)
+    assert manager.is_head_validated('classification', 95.0) is expected, metadata
+
+
+ALL_ACCURACIES = {head: 99.0 for head in DEFAULT_HEAD_CONFIGS}
+
+
+@pytest.mark.parametrize('metadata, expected', [
+    ({'synthetic_heads': [], 'accuracies': ALL_ACCURACIES}, True),
+    ({'synthetic_heads': ['bone_fracture'], 'accuracies': ALL_ACCURACIES}, False),
+    ({'synthetic_heads': ['joint_dislocation'], 'accuracies': ALL_ACCURACIES}, False),
+    ({'synthetic_heads': [], 'accuracies': {**ALL_ACCURACIES, 'joint_dislocation': 80.0}}, False),
+    ({}, False),
+])
+def test_detector_serves_only_validated_heads(tmp_path, metadata, expected):
+    """Kırık/çıkık başlıkları da sınıflandırma gibi doğrulanmadan sunulmaz"""
+    detector_module = pytest.importorskip("fracture_dislocation_detector")
+    manager = make_manager(tmp_path, **metadata)
+    detector = detector_module.FractureDislocationDetector(str(tmp_path), multi_head_manager=manager)
+
+    assert detector.has_multi_head_model()
+    assert detector.uses_multi_head_orthopedic('general') is expected, metadata
+
+
+def test_synthetic_head_classes_are_distinct(tmp_path):
+    """Sentetik başlık verisinde her Normal dışı sınıfın kendi bulgu dağılımı vardır"""
+    train_models = pytest.importorskip("models.train_models")
+    trainer = train_models.ProfessionalModelTrainer(
+        str(tmp_path / "models"), str(tmp_path / "data"), str(tmp_path / "results")
+    )
+
+    signatures = []
+    for class_idx in range(1, 4):
+        rng = np.random.default_rng(0)
+        image = trainer._add_head_class_features(np.zeros((256, 256), dtype=np.uint8), class_idx, rng)
+        drawn = image[image > 0]
+        signatures.append((int(np.median(drawn)), drawn.size))
+
+    intensities = [intensity for intensity, _ in signatures]
+    assert len(set(intensities)) == len(intensities), signatures
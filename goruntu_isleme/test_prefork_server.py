@@ -0,0 +1,205 @@
+"""
+Prefork Sunucu - Test
+=====================
+
+PreforkServer'ı küçük bir FastAPI uygulamasıyla ayrı bir süreçte başlatır:
+ön yüklenen ağırlıkların master'da bir kez yüklenip worker'larda kopyalanmadan
+paylaşılması (/proc/<pid>/smaps_rollup), ölen worker'ın yeniden fork
+edilmesi, SIGTERM ile zarif kapanış ve master öldüğünde worker'ların
+kapanması.
+
+Linux 4.14+ gerekir (/proc/<pid>/smaps_rollup); yoksa testler atlanır.
+
+Kullanım:
+    python -m pytest test_prefork_server.py
+"""
+
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+pytestmark = pytest.mark.skipif(not Path('/proc/self/smaps_rollup').exists(),
+                                reason="/proc/self/smaps_rollup yok (Linux 4.14+ gerekir)")
+
+MODULE_DIR = Path(__file__).resolve().parent
+
+WEIGHTS_MB = 64
+
+SERVER_CODE = """
+import logging, os, sys
+import numpy as np
+from fastapi import FastAPI
+sys.path.insert(0, {module_dir!r})
+from prefork_server import PreforkServer
+
+logging.basicConfig(level=logging.ERROR)
+app = FastAPI()
+state = {{}}
+
+def load_weights():
+    state['weights'] = np.random.default_rng(0).random({weights_mb} * 1024 * 1024 // 8)
+    state['loaded_by'] = os.getpid()
+
+@app.get('/info')
+async def info():
+    return {{'pid': os.getpid(), 'worker_id': os.getenv('SERVER_WORKER_ID'),
+             'loaded_by': state.get('loaded_by'), 'checksum': float(state['weights'][:1000].sum())}}
+
+server = PreforkServer(app, workers={workers}, log_level='error')
+server.preload(load_weights)
+server.serve('127.0.0.1', {port})
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def child_pids(pid: int) -> List[int]:
+    """Sürecin doğrudan çocukları (/proc/*/stat ppid alanı)"""
+    children = []
+    for stat_path in Path('/proc').glob('[0-9]*/stat'):
+        try:
+            fields = stat_path.read_text().rsplit(')', 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[1]) == pid and fields[0] != 'Z':
+            children.append(int(stat_path.parent.name))
+    return sorted(children)
+
+
+def process_memory(pid: int) -> Dict[str, int]:
+    """/proc/<pid>/smaps_rollup alanları (kB): Rss, Pss, Private_Dirty, ..."""
+    memory = {}
+    for line in Path(f'/proc/{pid}/smaps_rollup').read_text().splitlines()[1:]:
+        key, value = line.split(':', 1)
+        memory[key] = int(value.split()[0])
+    return memory
+
+
+def get_json(url: str, timeout: float = 5.0) -> Dict:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def wait_for(condition, timeout: float = 30.0, interval: float = 0.1):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            value = condition()
+            if value:
+                return value
+        except OSError:
+            pass
+        time.sleep(interval)
+    raise AssertionError("zaman aşımı")
+
+
+class PreforkProcess:
+    """Test sunucusunu alt süreçte çalıştırır"""
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self.port = free_port()
+        code = SERVER_CODE.format(module_dir=str(MODULE_DIR), weights_mb=WEIGHTS_MB,
+                                  workers=workers, port=self.port)
+        # Kendi süreç grubunda: kapanışta master ve worker'lar birlikte öldürülebilir
+        self.process = subprocess.Popen([sys.executable, '-c', code], start_new_session=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def workers_ready(self) -> List[int]:
+        pids = child_pids(self.process.pid)
+        if len(pids) != self.workers:
+            return []
+        get_json(f"{self.url}/info", timeout=1.0)
+        return pids
+
+    def start(self) -> 'PreforkProcess':
+        wait_for(self.workers_ready)
+        return self
+
+    def stop(self):
+        """Master'ı SIGTERM ile zarifçe kapat; kapanmazsa tüm süreç grubunu öldür"""
+        if self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                pass
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        self.process.wait()
+
+
+@pytest.fixture
+def server():
+    """İki worker'lı prefork sunucusu; test sonunda süreç grubu kapatılır"""
+    process = PreforkProcess(workers=2)
+    try:
+        yield process.start()
+    finally:
+        process.stop()
+
+
+def test_shared_weights(server):
+    """Ağırlıklar master'da bir kez yüklenir; worker'ların özel belleği ağırlık boyutunun çok altında"""
+    responses = [get_json(f"{server.url}/info") for _ in range(20)]
+    workers = set(child_pids(server.process.pid))
+    assert {r['pid'] for r in responses} <= workers, responses
+    assert {r['loaded_by'] for r in responses} == {server.process.pid}, responses
+    assert len({r['checksum'] for r in responses}) == 1
+
+    for pid in workers:
+        memory = process_memory(pid)
+        private_mb = (memory['Private_Dirty'] + memory['Private_Clean']) / 1024
+        assert private_mb < WEIGHTS_MB / 2, f"worker {pid} özel bellek {private_mb:.0f}MB"
+        assert memory['Pss'] < memory['Rss'] * 0.75, memory
+
+
+def test_worker_restart(server):
+    """SIGKILL ile ölen worker yeniden fork edilir ve istek almaya devam eder"""
+    before = child_pids(server.process.pid)
+    os.kill(before[0], signal.SIGKILL)
+
+    def restarted():
+        pids = server.workers_ready()
+        return pids if pids and before[0] not in pids else None
+
+    after = wait_for(restarted)
+    assert before[1] in after, (before, after)
+    assert get_json(f"{server.url}/info")['loaded_by'] == server.process.pid
+
+
+def test_graceful_shutdown(server):
+    """SIGTERM master'ı ve tüm worker'ları kapatır"""
+    workers = child_pids(server.process.pid)
+    server.process.send_signal(signal.SIGTERM)
+    exit_code = server.process.wait(timeout=15)
+    assert exit_code == 0, exit_code
+    for pid in workers:
+        assert not Path(f'/proc/{pid}').exists(), f"worker {pid} hâlâ çalışıyor"
+
+
+def test_master_death(server):
+    """Master SIGKILL ile ölünce worker'lar sahipsiz kalmaz, kapanır"""
+    workers = child_pids(server.process.pid)
+    server.process.kill()
+    server.process.wait()
+    wait_for(lambda: not any(Path(f'/proc/{pid}').exists() for pid in workers), timeout=15)
+
@@ -0,0 +1,236 @@
+"""
+TCIA İndirici - Test
+====================
+
+TCIADataDownloader'ı sahte ZIP'ler sunan yerel bir HTTP sunucusuna (TCIA
+NBIA getImage taklidi) karşı sınar: paralel indirme ve worker sınırı,
+manifest ile yeniden çalıştırmada atlama, kopan bağlantının Range ile
+devamı ve bozuk arşivin manifest'e yazılmaması.
+
+Kullanım:
+    python -m pytest test_tcia_downloader.py
+"""
+
+import hashlib
+import io
+import json
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from tcia_data_downloader import SERIES_COMPLETE, SERIES_FAILED, TCIADataDownloader
+
+COLLECTION = "CPTAC-LUAD"
+
+
+def fake_series_zip(series_uid: str, instances: int = 3, size: int = 64 * 1024) -> bytes:
+    """Sıkıştırılamayan sahte DICOM dosyaları içeren ZIP"""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        for i in range(instances):
+            seed = f"{series_uid}-{i}".encode()
+            payload = (seed * (size // len(seed) + 1))[:size]
+            archive.writestr(f"{i + 1:04d}.dcm", payload)
+    return buffer.getvalue()
+
+
+class FakeTCIAServer:
+    """Arka plan thread'inde çalışan sahte NBIA sunucusu (Range destekli)"""
+
+    def __init__(self, series_uids: List[str], latency: float = 0.0):
+        self.payloads: Dict[str, bytes] = {uid: fake_series_zip(uid) for uid in series_uids}
+        self.latency = latency
+        self.truncate_once: Dict[str, int] = {}
+        self.requests: List[Dict] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def series_requests(self) -> List[Dict]:
+        return [r for r in self.requests if r['series_uid']]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                series_uid = query.get('SeriesInstanceUID')
+                with server._lock:
+                    server.requests.append({'path': parsed.path, 'series_uid': series_uid,
+                                            'range': self.headers.get('Range')})
+
+                if parsed.path.endswith('/getCollectionValues'):
+                    return self._send_json([{'Collection': query.get('Collection')}])
+                if not series_uid:
+                    return self._send_json([{'SeriesInstanceUID': uid, 'PatientID': f"P{i}",
+                                             'Modality': 'CT'}
+                                            for i, uid in enumerate(server.payloads)])
+
+                with server._lock:
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                try:
+                    self._send_series(series_uid)
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _send_series(self, series_uid: str):
+                if server.latency:
+                    time.sleep(server.latency)
+                payload = server.payloads.get(series_uid)
+                if payload is None:
+                    self.send_error(404)
+                    return
+
+                start = 0
+                range_header = self.headers.get('Range')
+                if range_header:
+                    start = int(range_header.split('=')[1].split('-')[0])
+                    if start >= len(payload):
+                        self.send_response(416)
+                        self.send_header('Content-Range', f"bytes */{len(payload)}")
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    self.send_response(206)
+                    self.send_header('Content-Range', f"bytes {start}-{len(payload) - 1}/{len(payload)}")
+                else:
+                    self.send_response(200)
+                body = payload[start:]
+                self.send_header('Content-Type', 'application/zip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+
+                cut = server.truncate_once.pop(series_uid, None)
+                if cut is not None:
+                    # Bağlantıyı yarıda kes
+                    self.wfile.write(body[:cut])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+        return Handler
+
+    def start(self) -> 'FakeTCIAServer':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def tcia_server():
+    """Sahte NBIA sunucusu başlatan fabrika; sunucular test sonunda kapatılır"""
+    servers = []
+
+    def start(series_uids: List[str], latency: float = 0.0) -> FakeTCIAServer:
+        server = FakeTCIAServer(series_uids, latency).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def make_downloader(download_dir: Path, server: FakeTCIAServer, workers: int = 4) -> TCIADataDownloader:
+    downloader = TCIADataDownloader(str(download_dir), workers=workers)
+    downloader.nbia_url = server.url
+    return downloader
+
+
+def test_parallel_and_rerun(tmp_path, tcia_server):
+    """8 seri 4 worker ile paralel indirilir; ikinci çalıştırma hiç seri isteği göndermez"""
+    uids = [f"1.2.840.{i}" for i in range(8)]
+    server = tcia_server(uids, latency=0.2)
+    downloader = make_downloader(tmp_path, server, workers=4)
+    start_time = time.perf_counter()
+    result = downloader.download_collection_sample(COLLECTION, max_series=8)
+    elapsed = time.perf_counter() - start_time
+
+    assert result['downloaded_series'] == 8, result['downloaded_series']
+    assert [d['series_uid'] for d in result['series_details']] == uids
+    assert server.max_in_flight == 4, server.max_in_flight
+    # Seri: 8 x 0.2s; paralel: ~2 x 0.2s
+    assert elapsed < 8 * server.latency * 0.6, f"{elapsed:.2f}s"
+    for uid in uids:
+        entry = downloader.manifest.get(uid)
+        assert entry['status'] == SERIES_COMPLETE and entry['files'] == 3, entry
+        assert entry['size'] == len(server.payloads[uid])
+        assert len(list(Path(entry['path']).glob('*.dcm'))) == 3
+        assert not list(Path(entry['path']).glob('*.zip*'))
+
+    series_requests = len(server.series_requests())
+    rerun = make_downloader(tmp_path, server).download_collection_sample(COLLECTION, max_series=8)
+    assert rerun['downloaded_series'] == 8
+    assert len(server.series_requests()) == series_requests, "tamamlanmış seriler yeniden indirildi"
+
+
+def test_resume(tmp_path, tcia_server):
+    """Kopan indirme aynı .part dosyasından Range ile tamamlanır"""
+    uid = "1.2.840.99"
+    server = tcia_server([uid])
+    payload = server.payloads[uid]
+    server.truncate_once[uid] = len(payload) // 2
+    downloader = make_downloader(tmp_path, server)
+    downloader.max_retries = 2
+    # Yarıda kalan son parça kaybolur; devam ofseti son tam parçanın sonu
+    downloader.chunk_size = 16 * 1024
+    path = downloader.download_image_series(uid, COLLECTION)
+
+    ranges = [r['range'] for r in server.series_requests()]
+    assert len(ranges) == 2 and ranges[0] is None, ranges
+    offset = int(ranges[1].split('=')[1].rstrip('-'))
+    assert 0 < offset <= len(payload) // 2, ranges
+    entry = downloader.manifest.get(uid)
+    assert entry['sha256'] == hashlib.sha256(payload).hexdigest()
+    assert len(list(Path(path).glob('*.dcm'))) == 3
+
+
+def test_corrupt_archive(tmp_path, tcia_server):
+    """Bozuk arşiv manifest'e tamamlanmış olarak yazılmaz ve sonraki çalıştırmada yeniden indirilir"""
+    uid = "1.2.840.98"
+    server = tcia_server([uid])
+    good_payload = server.payloads[uid]
+    server.payloads[uid] = b"not a zip" * 100
+    downloader = make_downloader(tmp_path, server)
+    with pytest.raises(zipfile.BadZipFile):
+        downloader.download_image_series(uid, COLLECTION)
+    assert downloader.manifest.get(uid)['status'] == SERIES_FAILED
+
+    server.payloads[uid] = good_payload
+    downloader.download_image_series(uid, COLLECTION)
+    assert downloader.manifest.is_complete(uid)
+
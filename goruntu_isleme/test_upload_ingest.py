@@ -0,0 +1,86 @@
+"""
+Yükleme Boyut Sınırı - Test
+===========================
+
+UploadSizeLimitMiddleware'i ham ASGI çağrılarıyla sınar: sınırlı yolda
+bildirilen ya da akan gövde limiti aşarsa 413, Content-Length başlığı
+bozuksa 400 döner; sınırsız yollar olduğu gibi geçer.
+
+Kullanım:
+    python -m pytest test_upload_ingest.py
+"""
+
+import json
+
+import pytest
+
+from upload_ingest import MULTIPART_OVERHEAD_BYTES, UploadSizeLimitMiddleware
+
+pytestmark = pytest.mark.asyncio
+
+
+MAX_BYTES = 1024
+
+
+async def echo_app(scope, receive, send):
+    """Gövdeyi sonuna kadar okuyup boyutunu döndüren uygulama"""
+    size = 0
+    while True:
+        message = await receive()
+        size += len(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    body = json.dumps({'size': size}).encode()
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'application/json')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def call(path: str, body: bytes, content_length=None):
+    """Middleware'i tek parça gövdeyle çağırıp (durum, JSON gövde) döndür"""
+    headers = []
+    if content_length is not None:
+        headers.append((b'content-length', content_length))
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'headers': headers}
+    chunks = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return chunks.pop(0) if chunks else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = UploadSizeLimitMiddleware(echo_app, {'/upload': MAX_BYTES})
+    await middleware(scope, receive, send)
+    status = sent[0]['status']
+    payload = json.loads(b''.join(m.get('body', b'') for m in sent[1:]))
+    return status, payload
+
+
+async def test_small_body_passes():
+    status, payload = await call('/upload', b'x' * 100, b'100')
+    assert (status, payload) == (200, {'size': 100})
+
+
+async def test_declared_oversize_is_rejected():
+    declared = str(MAX_BYTES + MULTIPART_OVERHEAD_BYTES + 1).encode()
+    status, _ = await call('/upload', b'', declared)
+    assert status == 413
+
+
+async def test_streamed_oversize_is_rejected():
+    status, _ = await call('/upload', b'x' * (MAX_BYTES + MULTIPART_OVERHEAD_BYTES + 1))
+    assert status == 413
+
+
+@pytest.mark.parametrize('content_length', [b'abc', b'-5', b'', b'1e3'])
+async def test_malformed_content_length_is_bad_request(content_length):
+    status, payload = await call('/upload', b'x', content_length)
+    assert status == 400
+    assert 'Content-Length' in payload['detail']
+
+
+async def test_unlimited_path_is_untouched():
+    status, payload = await call('/other', b'x' * 10, b'abc')
+    assert (status, payload) == (200, {'size': 10})
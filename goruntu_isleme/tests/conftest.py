@@ -0,0 +1,15 @@
+"""
+goruntu_isleme testleri için ortak pytest ayarları
+
+Modüller düz import'larla (from dicom_processor import ...) kullanıldığından
+paket dizini sys.path'e eklenir; testler hangi dizinden çalıştırılırsa
+çalıştırılsın aynı şekilde import edilir.
+"""
+
+import sys
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+if str(PACKAGE_DIR) not in sys.path:
+    sys.path.insert(0, str(PACKAGE_DIR))
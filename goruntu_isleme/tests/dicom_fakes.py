@@ -0,0 +1,114 @@
+"""
+DICOM Test Yardımcıları
+=======================
+
+DICOMProcessor / VolumeStore testlerinin paylaştığı, pydicom ile diske
+yazılan sentetik seriler. Dosya adları ve InstanceNumber bilerek slice
+konumundan farklı sıralanır; doğru hacim yalnızca ImagePositionPatient'a
+göre sıralamayla elde edilir.
+"""
+
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import ExplicitVRLittleEndian, MRImageStorage, generate_uid
+
+
+def write_series(series_dir: Union[str, Path],
+                 num_slices: int = 12,
+                 rows: int = 32,
+                 columns: int = 32,
+                 seed: int = 0,
+                 rescale: Optional[str] = None,
+                 patient_id: str = "P-TEST") -> np.ndarray:
+    """
+    Sentetik MR serisini series_dir altına .dcm dosyaları olarak yaz
+
+    Args:
+        series_dir: Seri klasörü (yoksa oluşturulur)
+        num_slices: Slice sayısı
+        rows, columns: Slice boyutu
+        seed: Piksel ve dosya sırası için tohum
+        rescale: None - rescale etiketi yok, "uniform" - tüm slice'larda
+            aynı slope/intercept, "mixed" - slice başına farklı, bazı
+            slice'larda hiç yok
+        patient_id: PatientID etiketi
+
+    Returns:
+        ImagePositionPatient sırasıyla beklenen (slice, satır, sütun)
+        float32 hacim (rescale uygulanmış)
+    """
+    series_dir = Path(series_dir)
+    series_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    series_uid = generate_uid()
+    study_uid = generate_uid()
+    # Dosya adı sırası konum sırasından farklı
+    file_order = rng.permutation(num_slices)
+    expected = np.empty((num_slices, rows, columns), dtype=np.float32)
+
+    for position in range(num_slices):
+        pixels = rng.integers(0, 4000, size=(rows, columns), dtype=np.uint16)
+        # Slice konumunu piksellere göm: sıralama hatası hacimde görünür
+        pixels[0, 0] = position
+
+        sop_uid = generate_uid()
+        meta = FileMetaDataset()
+        meta.MediaStorageSOPClassUID = MRImageStorage
+        meta.MediaStorageSOPInstanceUID = sop_uid
+        meta.TransferSyntaxUID = ExplicitVRLittleEndian
+
+        ds = Dataset()
+        ds.file_meta = meta
+        ds.SOPClassUID = MRImageStorage
+        ds.SOPInstanceUID = sop_uid
+        ds.StudyInstanceUID = study_uid
+        ds.SeriesInstanceUID = series_uid
+        ds.PatientID = patient_id
+        ds.Modality = "MR"
+        ds.StudyDate = "20240101"
+        # InstanceNumber ters sırada: konum yerine buna göre sıralayan yanlış hacim üretir
+        ds.InstanceNumber = num_slices - position
+        ds.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+        ds.ImagePositionPatient = [0.0, 0.0, -50.0 + 2.5 * position]
+        ds.SliceThickness = 2.5
+        ds.PixelSpacing = [0.8, 0.8]
+        ds.Rows = rows
+        ds.Columns = columns
+        ds.SamplesPerPixel = 1
+        ds.PhotometricInterpretation = "MONOCHROME2"
+        ds.BitsAllocated = 16
+        ds.BitsStored = 16
+        ds.HighBit = 15
+        ds.PixelRepresentation = 0
+        ds.PixelData = pixels.tobytes()
+
+        # "mixed": her üç slice'tan birinde rescale etiketi yok
+        rescaled = rescale == "uniform" or (rescale == "mixed" and position % 3 != 0)
+        slope, intercept = 1.0, 0.0
+        if rescale == "uniform":
+            slope, intercept = 2.0, -1024.0
+        elif rescaled:
+            slope, intercept = 1.0 + 0.5 * (position % 4), -100.0 * (position % 5)
+        if rescaled:
+            ds.RescaleSlope = slope
+            ds.RescaleIntercept = intercept
+
+        expected[position] = pixels.astype(np.float32) * slope + intercept
+        ds.save_as(series_dir / f"IM{file_order[position]:04d}.dcm", enforce_file_format=True)
+
+    return expected
+
+
+def write_collection(collection_dir: Union[str, Path], num_series: int = 2,
+                     num_slices: int = 12, seed: int = 0) -> Path:
+    """Her alt klasörü bir seri olan koleksiyon klasörü yaz"""
+    collection_dir = Path(collection_dir)
+    for index in range(num_series):
+        write_series(collection_dir / f"series_{index:02d}", num_slices=num_slices,
+                     seed=seed + index, patient_id=f"P-{index:02d}")
+    return collection_dir
+
@@ -0,0 +1,63 @@
+"""
+Paylaşımlı Toplu İş Yürütücüsü - Test
+=====================================
+
+BatchExecutor.run'ın sonuçları girdi sırasıyla döndürdüğünü, hazırlık
+hatalarını öğeye izole ettiğini ve infer_batch'in eksik/fazla sonuç
+döndürmesi halinde öğeleri sessizce düşürmek yerine tek tek yeniden
+denediğini sınar.
+
+Kullanım:
+    python -m pytest tests/test_batch_executor.py
+"""
+
+import pytest
+
+from batch_executor import BatchExecutor
+
+pytestmark = pytest.mark.asyncio
+
+
+def prepare(value):
+    if value < 0:
+        raise ValueError(f"geçersiz girdi: {value}")
+    return value
+
+
+@pytest.fixture
+def executor():
+    executor = BatchExecutor(max_concurrency=2)
+    yield executor
+    executor._executor.shutdown()
+
+
+async def test_results_follow_input_order(executor):
+    items = await executor.run([3, -1, 5], prepare, lambda values: [v * 10 for v in values])
+
+    assert [item.ok for item in items] == [True, False, True]
+    assert [items[0].value, items[2].value] == [30, 50]
+    assert isinstance(items[1].error, ValueError)
+
+
+async def test_short_batch_output_falls_back_per_item(executor):
+    """Eksik sonuç dönerse hiçbir öğe hazırlanmış girdisiyle 'başarılı' kalmaz"""
+    calls = []
+
+    def infer_batch(values):
+        calls.append(list(values))
+        outputs = [v * 10 for v in values]
+        return outputs[:-1] if len(values) > 1 else outputs
+
+    items = await executor.run([1, 2, 3], prepare, infer_batch)
+
+    assert [item.value for item in items] == [10, 20, 30]
+    assert all(item.ok for item in items)
+    assert calls[0] == [1, 2, 3] and sorted(calls[1:]) == [[1], [2], [3]]
+
+
+async def test_wrong_per_item_output_is_an_error(executor):
+    items = await executor.run([1, 2], prepare, lambda values: [])
+
+    assert not any(item.ok for item in items)
+    assert all(isinstance(item.error, ValueError) for item in items)
+    assert all(item.value is None for item in items)
@@ -0,0 +1,140 @@
+"""
+Koleksiyon İşleme (Süreç Havuzu) - Test
+=======================================
+
+DICOMProcessor.batch_process_collection'ın süreç havuzunda sıralı yolla
+aynı sonuçları ürettiğini, aynı anda en fazla max_in_flight seri
+gönderdiğini, her seri sonunda ilerleme geri çağrısını artan sayaçlarla
+çağırdığını ve başarısız seriyi manifestoya yazıp sonraki çalıştırmada
+yeniden denediğini sınar.
+
+Kullanım:
+    python -m pytest tests/test_dicom_collection.py
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("pydicom")
+dicom_processor = pytest.importorskip("dicom_processor")
+
+from dicom_fakes import write_collection
+from dicom_processor import DICOMProcessor
+
+NUM_SERIES = 5
+NUM_SLICES = 6
+
+
+@pytest.fixture
+def collection_dir(tmp_path):
+    return write_collection(tmp_path / "LUNG", num_series=NUM_SERIES, num_slices=NUM_SLICES)
+
+
+def make_processor(root):
+    root.mkdir(parents=True, exist_ok=True)
+    return DICOMProcessor(str(root / "processed"), volume_store_dir=str(root / "volume_store"))
+
+
+def series_summary(results):
+    return sorted((result['series_id'], result['num_slices']) for result in results['series_results'])
+
+
+def test_process_pool_matches_serial(collection_dir, tmp_path):
+    serial = make_processor(tmp_path / "serial").batch_process_collection(
+        str(collection_dir), output_format="volume", max_workers=1)
+    processor = make_processor(tmp_path / "parallel")
+    parallel = processor.batch_process_collection(
+        str(collection_dir), output_format="volume", max_workers=2)
+
+    assert parallel['processed_series'] == serial['processed_series'] == NUM_SERIES
+    assert parallel['failed_series'] == 0
+    assert series_summary(parallel) == series_summary(serial)
+    # Worker süreçleri aynı hacim deposuna yazar
+    assert len(processor.volume_store.list_series()) == NUM_SERIES
+
+    manifest_file = processor.output_dir / "LUNG_manifest.jsonl"
+    records = [json.loads(line) for line in manifest_file.read_text(encoding='utf-8').splitlines()]
+    assert len(records) == NUM_SERIES
+    assert all(record['status'] == 'done' for record in records)
+
+
+class CountingExecutor(ThreadPoolExecutor):
+    """Gönderilmiş ama tamamlanmamış iş sayısının en yüksek değerini tutar"""
+
+    peak = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._outstanding = 0
+
+    def submit(self, *args, **kwargs):
+        with self._lock:
+            self._outstanding += 1
+            CountingExecutor.peak = max(CountingExecutor.peak, self._outstanding)
+        future = super().submit(*args, **kwargs)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._outstanding -= 1
+
+
+def test_max_in_flight_bounds_submitted_series(collection_dir, tmp_path, monkeypatch):
+    # Havuz thread'lerle değiştirilir; gönderim sayacı aynı süreçte okunabilir
+    CountingExecutor.peak = 0
+    monkeypatch.setattr(dicom_processor, 'ProcessPoolExecutor', CountingExecutor)
+
+    results = make_processor(tmp_path).batch_process_collection(
+        str(collection_dir), output_format="volume", max_workers=4, max_in_flight=2)
+
+    assert results['processed_series'] == NUM_SERIES
+    assert CountingExecutor.peak == 2
+
+
+def test_progress_callback_reports_each_series(collection_dir, tmp_path):
+    reports = []
+    processor = make_processor(tmp_path)
+    processor.batch_process_collection(str(collection_dir), output_format="volume",
+                                       max_workers=2, progress_callback=reports.append)
+
+    assert [report['completed'] for report in reports] == list(range(1, NUM_SERIES + 1))
+    assert all(report['total'] == NUM_SERIES for report in reports)
+    slices = [report['slices'] for report in reports]
+    assert slices == sorted(slices)
+    assert slices[-1] > 0
+    assert all(report['series_per_second'] >= 0 for report in reports)
+
+    # Devam eden çalıştırmada toplam yalnızca bekleyen serilerdir
+    (collection_dir / "series_new").mkdir()
+    reports.clear()
+    results = processor.batch_process_collection(str(collection_dir), output_format="volume",
+                                                 max_workers=2, progress_callback=reports.append)
+    assert results['skipped_series'] == NUM_SERIES
+    assert [(report['completed'], report['total']) for report in reports] == [(1, 1)]
+
+
+def test_failed_series_is_recorded_and_retried(collection_dir, tmp_path):
+    # DICOM dosyası olmayan seri klasörü
+    (collection_dir / "series_empty").mkdir()
+    processor = make_processor(tmp_path)
+
+    first = processor.batch_process_collection(str(collection_dir), output_format="volume",
+                                               max_workers=2)
+    assert first['processed_series'] == NUM_SERIES
+    assert first['failed_series'] == 1
+
+    manifest_file = processor.output_dir / "LUNG_manifest.jsonl"
+    records = [json.loads(line) for line in manifest_file.read_text(encoding='utf-8').splitlines()]
+    failed = [record for record in records if record['status'] == 'failed']
+    assert [record['series_dir'] for record in failed] == [str(collection_dir / "series_empty")]
+    assert failed[0]['error']
+
+    rerun = processor.batch_process_collection(str(collection_dir), output_format="volume",
+                                               max_workers=2)
+    assert rerun['skipped_series'] == NUM_SERIES
+    assert rerun['failed_series'] == 1
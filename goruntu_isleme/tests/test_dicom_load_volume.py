@@ -0,0 +1,103 @@
+"""
+DICOM Hacim Yükleme (Paralel Decode) - Test
+===========================================
+
+DICOMProcessor.load_volume'un paylaşımlı bellekli paralel decode ile
+sıralı decode'da aynı hacmi ürettiğini; slice'ları dosya adı ya da
+InstanceNumber yerine ImagePositionPatient'a göre sıraladığını, slice
+başına farklı (ya da hiç olmayan) rescale slope/intercept'i doğru
+uyguladığını ve decode edilemeyen slice'ı iki yolda da aynı şekilde
+çıkardığını pydicom ile yazılmış serilerle sınar.
+
+Kullanım:
+    python -m pytest tests/test_dicom_load_volume.py
+"""
+
+import numpy as np
+import pytest
+
+pydicom = pytest.importorskip("pydicom")
+dicom_processor = pytest.importorskip("dicom_processor")
+
+from dicom_fakes import write_series
+from dicom_processor import DICOMProcessor
+
+NUM_SLICES = 9
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    # Küçük seriler de paralel yoldan geçsin
+    monkeypatch.setattr(dicom_processor, 'DICOM_PARALLEL_MIN_SLICES', 2)
+    return DICOMProcessor(str(tmp_path / "processed"), volume_store_dir=str(tmp_path / "volume_store"))
+
+
+@pytest.mark.parametrize("rescale", [None, "uniform", "mixed"])
+def test_parallel_decode_matches_serial(processor, tmp_path, monkeypatch, rescale):
+    series_dir = tmp_path / "series"
+    expected = write_series(series_dir, num_slices=NUM_SLICES, rescale=rescale)
+
+    parallel_calls = []
+    decode_parallel = processor._decode_parallel
+    monkeypatch.setattr(processor, '_decode_parallel',
+                        lambda *args: parallel_calls.append(args[-1]) or decode_parallel(*args))
+
+    serial, serial_metadata = processor.load_volume(str(series_dir), max_workers=1)
+    assert parallel_calls == []
+    parallel, parallel_metadata = processor.load_volume(str(series_dir), max_workers=3)
+    assert parallel_calls == [3]
+
+    assert serial.dtype == np.float32
+    np.testing.assert_array_equal(serial, expected)
+    np.testing.assert_array_equal(parallel, serial)
+    assert parallel_metadata == serial_metadata
+    assert serial_metadata['num_slices'] == NUM_SLICES
+
+
+def test_matches_dataset_path(processor, tmp_path):
+    series_dir = tmp_path / "series"
+    write_series(series_dir, num_slices=NUM_SLICES, rescale="mixed")
+
+    volume, metadata = processor.load_volume(str(series_dir), max_workers=3)
+    reference, reference_metadata = processor.convert_to_numpy_array(
+        processor.load_dicom_series(str(series_dir))
+    )
+
+    np.testing.assert_array_equal(volume, reference)
+    assert metadata == reference_metadata
+
+
+def test_slices_are_ordered_by_position(processor, tmp_path):
+    series_dir = tmp_path / "series"
+    write_series(series_dir, num_slices=NUM_SLICES)
+
+    headers = processor.load_dicom_headers(str(series_dir))
+    positions = [float(ds.ImagePositionPatient[2]) for _, ds in headers]
+    assert positions == sorted(positions)
+    # Dosya adı ve InstanceNumber sırası konum sırasından farklı
+    assert [int(ds.InstanceNumber) for _, ds in headers] == list(range(NUM_SLICES, 0, -1))
+    assert [path.name for path, _ in headers] != sorted(path.name for path, _ in headers)
+
+    volume, _ = processor.load_volume(str(series_dir), max_workers=3)
+    # write_series slice konumunu (0, 0) pikseline gömer
+    np.testing.assert_array_equal(volume[:, 0, 0], np.arange(NUM_SLICES, dtype=np.float32))
+
+
+def test_undecodable_slice_is_dropped_in_both_paths(processor, tmp_path):
+    series_dir = tmp_path / "series"
+    expected = write_series(series_dir, num_slices=NUM_SLICES)
+
+    headers = processor.load_dicom_headers(str(series_dir))
+    broken_index = 4
+    broken_path = headers[broken_index][0]
+    ds = pydicom.dcmread(broken_path)
+    ds.PixelData = b"\x00" * 10
+    ds.save_as(broken_path, enforce_file_format=True)
+
+    serial, serial_metadata = processor.load_volume(str(series_dir), max_workers=1)
+    parallel, parallel_metadata = processor.load_volume(str(series_dir), max_workers=3)
+
+    remaining = np.delete(expected, broken_index, axis=0)
+    np.testing.assert_array_equal(serial, remaining)
+    np.testing.assert_array_equal(parallel, remaining)
+    assert serial_metadata['num_slices'] == parallel_metadata['num_slices'] == NUM_SLICES - 1
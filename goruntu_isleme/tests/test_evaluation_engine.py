@@ -0,0 +1,131 @@
+"""
+Toplu Değerlendirme Motoru - Test
+=================================
+
+compute_metrics'in confusion matrisi ve eşik tablosundan çıkardığı
+metrikleri elle hesaplanmış değerlerle karşılaştırır (eşit skorlu örnekler
+dahil) ve run_inference'ın logit'leri batch sınırlarından bağımsız olarak
+örnek sırasıyla yazdığını sınar.
+
+Kullanım:
+    python -m pytest tests/test_evaluation_engine.py
+"""
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from models.evaluation_engine import DecodedTestSet, compute_metrics, run_inference
+
+
+def logits_for(probabilities):
+    """softmax'ı verilen olasılıkları döndüren logit'ler"""
+    return np.log(np.asarray(probabilities, dtype=np.float64))
+
+
+@pytest.fixture
+def binary_case():
+    # Pozitif sınıf skorları kalibrasyon kutularının sınırlarından uzak
+    scores = [0.15, 0.65, 0.85, 0.45, 0.95, 0.35]
+    labels = np.array([0, 0, 1, 1, 1, 0])
+    return labels, logits_for([[1 - score, score] for score in scores])
+
+
+@pytest.fixture
+def multiclass_case():
+    # 2. ve 4. satırlar aynı: eşik tablosunda eşit skorlu pozitif/negatif çifti
+    probabilities = [
+        [0.70, 0.20, 0.10],
+        [0.20, 0.50, 0.30],
+        [0.10, 0.30, 0.60],
+        [0.50, 0.15, 0.35],
+        [0.10, 0.30, 0.60],
+        [0.60, 0.25, 0.15],
+    ]
+    labels = np.array([0, 1, 2, 2, 1, 0])
+    return labels, logits_for(probabilities)
+
+
+def test_binary_confusion_and_threshold_metrics(binary_case):
+    labels, logits = binary_case
+    metrics = compute_metrics(labels, logits, ['negatif', 'pozitif'])
+
+    # Tahminler [0, 1, 1, 0, 1, 0]
+    assert metrics['confusion_matrix'] == [[2, 1], [1, 2]]
+    assert metrics['accuracy'] == pytest.approx(4 / 6)
+    assert metrics['precision'] == pytest.approx(2 / 3)
+    assert metrics['recall'] == pytest.approx(2 / 3)
+    assert metrics['f1_score'] == pytest.approx(2 / 3)
+    assert metrics['classification_report']['pozitif']['support'] == 3
+
+    # 9 pozitif-negatif çiftinin 8'inde pozitif skor daha yüksek
+    assert metrics['auc_roc'] == pytest.approx(8 / 9)
+    # Pozitiflerin sıraları 1, 2, 4: (1/1 + 2/2 + 3/4) / 3
+    assert metrics['auc_pr'] == pytest.approx(2.75 / 3)
+
+    calibration = metrics['calibration']
+    assert calibration['prob_pred'] == pytest.approx([0.15, 0.35, 0.45, 0.65, 0.85, 0.95])
+    assert calibration['prob_true'] == [0.0, 0.0, 1.0, 0.0, 1.0, 1.0]
+    assert calibration['calibration_error'] == pytest.approx(1.9 / 6)
+
+    confidence = metrics['confidence']
+    assert confidence['mean_confidence'] == pytest.approx(4.5 / 6)
+    assert confidence['correct_mean_confidence'] == pytest.approx(3.3 / 4)
+    assert confidence['incorrect_mean_confidence'] == pytest.approx(0.6)
+    assert confidence['confidence_gap'] == pytest.approx(0.225)
+
+
+def test_multiclass_confusion_and_threshold_metrics(multiclass_case):
+    labels, logits = multiclass_case
+    metrics = compute_metrics(labels, logits)
+
+    # Tahminler [0, 1, 2, 0, 2, 0]
+    assert metrics['confusion_matrix'] == [[2, 0, 0], [0, 1, 1], [1, 0, 1]]
+    assert metrics['accuracy'] == pytest.approx(4 / 6)
+
+    report = metrics['classification_report']
+    assert [report[f'class_{i}']['precision'] for i in range(3)] == pytest.approx([2 / 3, 1.0, 0.5])
+    assert [report[f'class_{i}']['recall'] for i in range(3)] == pytest.approx([1.0, 0.5, 0.5])
+    assert [report[f'class_{i}']['f1-score'] for i in range(3)] == pytest.approx([0.8, 2 / 3, 0.5])
+    # Destekler eşit: ağırlıklı ortalama = makro ortalama
+    assert metrics['precision'] == pytest.approx((2 / 3 + 1.0 + 0.5) / 3)
+    assert metrics['recall'] == pytest.approx(2 / 3)
+    assert metrics['f1_score'] == pytest.approx((0.8 + 2 / 3 + 0.5) / 3)
+
+    # One-vs-rest AUC: 8/8, 7.5/8 ve 6.5/8 (eşit skorlu çift yarım sayılır)
+    assert metrics['auc_roc'] == pytest.approx((1.0 + 0.9375 + 0.8125) / 3)
+    # AP: 1, (0.5 * 1 + 0.5 * 2/3), (0.5 * 0.5 + 0.5 * 2/3)
+    assert metrics['auc_pr'] == pytest.approx((1.0 + 5 / 6 + 7 / 12) / 3)
+    assert set(metrics['calibration']) == {'class_0', 'class_1', 'class_2'}
+
+
+def test_missing_class_disables_macro_auc(multiclass_case):
+    labels, logits = multiclass_case
+    # class_2 örneği yok: OvR makro AUC tanımsız
+    keep = labels != 2
+    metrics = compute_metrics(labels[keep], logits[keep])
+
+    assert metrics['auc_roc'] == 0.0
+    assert metrics['classification_report']['class_2']['support'] == 0
+    assert set(metrics['calibration']) == {'class_0', 'class_1'}
+
+
+def test_run_inference_keeps_sample_order():
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 256, size=(7, 4, 4), dtype=np.uint8)
+    labels = np.arange(7, dtype=np.int64) % 2
+    test_set = DecodedTestSet(images, labels)
+
+    model = torch.nn.Sequential(torch.nn.Flatten(), torch.nn.Linear(16, 2))
+    logits, seen_labels = run_inference({'linear': model}, test_set.batches(3), len(test_set),
+                                        torch.device('cpu'))
+
+    np.testing.assert_array_equal(seen_labels, labels)
+    full_batch, _ = next(iter(test_set.batches(len(test_set))))
+    expected, _ = run_inference({'linear': model}, [(full_batch, torch.from_numpy(labels))],
+                                len(test_set), torch.device('cpu'))
+    np.testing.assert_allclose(logits['linear'], expected['linear'], rtol=1e-5, atol=1e-6)
+
+    with pytest.raises(ValueError):
+        run_inference({'linear': model}, test_set.batches(3), len(test_set) + 1, torch.device('cpu'))
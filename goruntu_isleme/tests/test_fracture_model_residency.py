@@ -0,0 +1,147 @@
+"""
+Kırık/Çıkık Modellerinin Süreçte Kalıcılığı - Test
+==================================================
+
+FractureDislocationDetector'ın modeli checkpoint değişmedikçe bir kez
+yüklediğini, yalnızca mtime'ı değişen (içeriği aynı) checkpoint'te
+yeniden yüklemediğini, içerik değişince yeniden yüklediğini, eşzamanlı
+isteklerde tek yükleme yaptığını ve preload_models'ın cache'i ısıttığını
+sınar.
+
+Kullanım:
+    python -m pytest tests/test_fracture_model_residency.py
+"""
+
+import os
+import threading
+
+import pytest
+
+torch = pytest.importorskip("torch")
+fracture_dislocation_detector = pytest.importorskip("fracture_dislocation_detector")
+
+from fracture_dislocation_detector import FractureDislocationDetector
+
+MODEL_NAME = 'tiny_fracture'
+
+
+class TinyModel(torch.nn.Module):
+    def __init__(self, num_classes: int = 3, input_channels: int = 1):
+        super().__init__()
+        self.pool = torch.nn.AdaptiveAvgPool2d(1)
+        self.fc = torch.nn.Linear(input_channels, num_classes)
+
+    def forward(self, x):
+        return self.fc(self.pool(x).flatten(1))
+
+
+def save_checkpoint(models_dir, seed: int):
+    torch.manual_seed(seed)
+    torch.save({'model_state_dict': TinyModel().state_dict()},
+               models_dir / f"{MODEL_NAME}_best.pth")
+
+
+@pytest.fixture
+def detector(tmp_path, monkeypatch):
+    monkeypatch.setenv("MULTI_HEAD_MODEL_ENABLED", "false")
+    detector = FractureDislocationDetector(models_dir=str(tmp_path))
+    detector.model_configs = {
+        MODEL_NAME: {
+            'model_class': TinyModel,
+            'num_classes': 3,
+            'input_channels': 1,
+            'image_size': (32, 32),
+            'class_names': ['Normal', 'Simple_Fracture', 'Complex_Fracture'],
+            'description': 'test'
+        }
+    }
+    detector.device = torch.device('cpu')
+
+    builds = []
+    original = detector._build_model
+    monkeypatch.setattr(detector, '_build_model',
+                        lambda *args: builds.append(args[0]) or original(*args))
+    detector.builds = builds
+    return detector
+
+
+def test_model_is_loaded_once(detector, tmp_path):
+    save_checkpoint(tmp_path, seed=0)
+
+    first = detector._load_model(MODEL_NAME)
+    assert detector._load_model(MODEL_NAME) is first
+    assert not first.training
+    assert detector.builds == [MODEL_NAME]
+
+    stats = detector.model_cache.get_cache_stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+
+
+def test_touched_checkpoint_is_not_reloaded(detector, tmp_path):
+    save_checkpoint(tmp_path, seed=0)
+    first = detector._load_model(MODEL_NAME)
+
+    model_path = tmp_path / f"{MODEL_NAME}_best.pth"
+    stat = model_path.stat()
+    os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert detector._load_model(MODEL_NAME) is first
+    assert detector.builds == [MODEL_NAME]
+    # Yeni mtime kaydedilir; sonraki çağrı hızlı yoldan geçer
+    assert detector._checkpoint_signatures[MODEL_NAME][0] == model_path.stat().st_mtime_ns
+
+
+def test_changed_checkpoint_is_reloaded(detector, tmp_path):
+    save_checkpoint(tmp_path, seed=0)
+    first = detector._load_model(MODEL_NAME)
+
+    save_checkpoint(tmp_path, seed=1)
+    second = detector._load_model(MODEL_NAME)
+
+    assert second is not first
+    assert detector.builds == [MODEL_NAME, MODEL_NAME]
+    assert not torch.equal(first.fc.weight, second.fc.weight)
+
+
+def test_checkpoint_added_after_fallback_is_loaded(detector, tmp_path):
+    # Checkpoint yokken oluşturulan model, checkpoint gelene kadar kullanılır
+    fallback = detector._load_model(MODEL_NAME)
+    assert detector._load_model(MODEL_NAME) is fallback
+
+    save_checkpoint(tmp_path, seed=0)
+    assert detector._load_model(MODEL_NAME) is not fallback
+    assert len(detector.builds) == 2
+
+
+def test_concurrent_loads_build_once(detector, tmp_path):
+    save_checkpoint(tmp_path, seed=0)
+    barrier = threading.Barrier(8)
+    models = []
+
+    def load():
+        barrier.wait()
+        models.append(detector._load_model(MODEL_NAME))
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert detector.builds == [MODEL_NAME]
+    assert all(model is models[0] for model in models)
+    assert detector.model_cache.get_cache_stats()['misses'] == 1
+
+
+def test_preload_warms_cache(detector, tmp_path):
+    save_checkpoint(tmp_path, seed=0)
+
+    status = detector.preload_models()
+    assert status == {MODEL_NAME: True}
+    assert detector.model_cache.get_cache_stats()['cached_model_names'] == [MODEL_NAME]
+
+    detector._load_model(MODEL_NAME)
+    assert detector.builds == [MODEL_NAME]
+
+    assert detector.preload_models(['unknown_model']) == {'unknown_model': False}
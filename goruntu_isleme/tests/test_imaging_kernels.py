@@ -0,0 +1,62 @@
+"""
+Görüntüleme Çekirdekleri - Test
+===============================
+
+resize_slices'ın slice'ları kanal olarak yığarak yaptığı toplu
+boyutlandırmanın, slice slice cv2.resize ile aynı sonucu verdiğini sınar.
+INTER_AREA (küçültme) cv2'de en fazla 4 kanal kabul eder.
+
+Kullanım:
+    python -m pytest tests/test_imaging_kernels.py
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from imaging_kernels import estimate_noise_level, resize_slices
+
+
+def per_slice_resize(volume: np.ndarray, target_size, interpolation: int) -> np.ndarray:
+    height, width = target_size
+    return np.stack([cv2.resize(s, (width, height), interpolation=interpolation) for s in volume])
+
+
+@pytest.mark.parametrize('dtype', [np.uint8, np.float32])
+@pytest.mark.parametrize('target_size', [(256, 256), (350, 350), (300, 200)])
+def test_downscale_many_slices_matches_per_slice(dtype, target_size):
+    """4'ten fazla slice'ın küçültülmesi slice slice INTER_AREA ile aynıdır"""
+    rng = np.random.default_rng(0)
+    volume = (rng.random((11, 700, 700)) * 255).astype(dtype)
+
+    result = resize_slices(volume, target_size)
+    expected = per_slice_resize(volume, target_size, cv2.INTER_AREA)
+
+    assert result.shape == (11,) + target_size and result.dtype == volume.dtype
+    np.testing.assert_allclose(result, expected, atol=1e-5)
+
+
+def test_upscale_matches_per_slice():
+    volume = (np.random.default_rng(1).random((9, 64, 64)) * 255).astype(np.uint8)
+
+    result = resize_slices(volume, (128, 96))
+    np.testing.assert_array_equal(result, per_slice_resize(volume, (128, 96), cv2.INTER_LINEAR))
+
+
+def test_selected_indices_into_out():
+    volume = (np.random.default_rng(2).random((8, 100, 100)) * 255).astype(np.uint8)
+    out = np.zeros((3, 50, 50), dtype=np.uint8)
+
+    result = resize_slices(volume, (50, 50), indices=[6, 1, 3], out=out)
+
+    assert result is out
+    np.testing.assert_array_equal(out, per_slice_resize(volume[[6, 1, 3]], (50, 50), cv2.INTER_AREA))
+
+
+def test_estimate_noise_level_scale():
+    """Düz görüntüde 0, yoğun gürültüde 1'e doyan ortak gürültü tahmini"""
+    flat = np.full((64, 64), 128, dtype=np.uint8)
+    noisy = np.random.default_rng(3).integers(0, 256, (64, 64)).astype(np.uint8)
+
+    assert estimate_noise_level(flat) == 0.0
+    assert estimate_noise_level(noisy) == 1.0
@@ -0,0 +1,37 @@
+"""
+Çıkarım Backend'leri - Test
+===========================
+
+InferenceBackend arayüzünün eksik uygulamaları örnekleme anında
+reddettiğini ve PyTorch backend'inin modelle aynı çıktıyı verdiğini sınar.
+
+Kullanım:
+    python -m pytest tests/test_inference_backend.py
+"""
+
+import pytest
+import torch
+import torch.nn as nn
+
+from models.inference_backend import InferenceBackend, TorchBackend
+
+
+def test_backend_without_run_cannot_be_created():
+    class IncompleteBackend(InferenceBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError, match="run"):
+        IncompleteBackend()
+
+
+def test_torch_backend_matches_model():
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.Flatten(), nn.Linear(16, 3)).eval()
+    batch = torch.randn(2, 1, 4, 4)
+
+    backend = TorchBackend(model)
+    expected = model(batch).detach()
+
+    torch.testing.assert_close(backend.run(batch), expected)
+    torch.testing.assert_close(backend.run(batch.numpy()), expected)
+    assert backend.get_info()['backend'] == 'pytorch'
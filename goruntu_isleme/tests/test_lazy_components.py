@@ -0,0 +1,115 @@
+"""
+Tembel (Lazy) Bileşenler - Test
+===============================
+
+Temiz bir Python sürecinde `import api`'nin torch, torchvision, OpenCV ve
+dedektör modüllerini yüklemediğini (sys.modules) ve LazyComponent'in
+gerçek nesneyi yalnızca ilk öznitelik erişiminde, eşzamanlı erişimlerde
+bir kez oluşturduğunu sınar.
+
+Kullanım:
+    python -m pytest tests/test_lazy_components.py
+"""
+
+import json
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from lazy_components import ComponentRegistry
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = [
+    'torch', 'torchvision', 'cv2',
+    'fracture_dislocation_detector', 'respiratory_emergency_detector',
+    'image_processor', 'dicom_processor', 'real_data_training', 'batch_inference'
+]
+API_COMPONENTS = [
+    'fracture_detector', 'respiratory_detector', 'image_processor',
+    'dicom_processor', 'medical_ai_trainer'
+]
+
+CHILD_CODE = """
+import json, sys
+sys.path.insert(0, {package_dir!r})
+import api
+print(json.dumps({{
+    'modules': [name for name in {heavy!r} if name in sys.modules],
+    'components': [name for name in {components!r} if api.components.loaded(name)]
+}}))
+"""
+
+
+def test_api_import_does_not_load_heavy_modules(tmp_path):
+    pytest.importorskip("fastapi")
+    code = CHILD_CODE.format(package_dir=str(PACKAGE_DIR), heavy=HEAVY_MODULES,
+                             components=API_COMPONENTS)
+    completed = subprocess.run([sys.executable, "-c", code], cwd=tmp_path,
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr[-2000:]
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert result == {'modules': [], 'components': []}
+
+
+def test_component_is_created_on_first_attribute_access():
+    created = []
+
+    class Detector:
+        threshold = 0.5
+
+        def analyze(self, value):
+            return value * 2
+
+    registry = ComponentRegistry()
+    detector = registry.register('detector', lambda: created.append(1) or Detector())
+
+    assert not registry.loaded('detector')
+    assert created == []
+    assert detector.analyze(3) == 6
+    assert registry.loaded('detector')
+
+    detector.threshold = 0.7
+    assert detector.get().threshold == 0.7
+    assert created == [1]
+
+
+def test_concurrent_access_creates_once():
+    created = []
+    barrier = threading.Barrier(8)
+
+    def factory():
+        created.append(1)
+        return object()
+
+    component = ComponentRegistry().register('model', factory)
+    instances = []
+
+    def access():
+        barrier.wait()
+        instances.append(component.get())
+
+    threads = [threading.Thread(target=access) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert created == [1]
+    assert all(instance is instances[0] for instance in instances)
+
+
+def test_warmup_skips_failing_components():
+    warmed_up = []
+    registry = ComponentRegistry()
+    registry.register('ok', lambda: 'hazır', warmup=warmed_up.append)
+    registry.register('broken', lambda: 1 / 0)
+
+    assert registry.warmup(['ok', 'broken', 'unknown']) == ['ok']
+    assert warmed_up == ['hazır']
+    assert registry.status()['ok']['warmed_up']
+    assert registry.status()['broken']['error']
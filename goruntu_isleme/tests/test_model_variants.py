@@ -0,0 +1,186 @@
+"""
+TorchScript / INT8 Model Varyantları - Test
+===========================================
+
+resolve_model_variant'ın varyantı yalnızca dosyası, raporu, güncel
+checkpoint özeti ve doğruluk kapısı tutarsa servis ettiğini, aksi halde
+float32'ye düştüğünü; invalidate_model_variants'ın eski varyantları
+sildiğini ve ModelOptimizer.optimize_model'in yüklenebilir varyantlarla
+birlikte checkpoint özetini raporladığını sınar.
+
+Kullanım:
+    python -m pytest tests/test_model_variants.py
+"""
+
+import hashlib
+import json
+
+import cv2
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+from models.model_optimizer import (
+    ModelOptimizer, checkpoint_sha256, invalidate_model_variants, load_model_variant,
+    resolve_model_variant, variant_file, variant_report_file
+)
+
+MODEL_NAME = 'tiny'
+IMAGE_SIZE = (16, 16)
+CLASSES = ['normal', 'abnormal']
+
+
+class TinyModel(torch.nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.pool = torch.nn.AdaptiveAvgPool2d(4)
+        self.fc = torch.nn.Linear(16, len(CLASSES))
+
+    def forward(self, x):
+        return self.fc(self.pool(x).flatten(1))
+
+
+class FakeDataManager:
+    """İki sınıflı, diskte PNG'lerden oluşan küçük veri seti"""
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.known_datasets = {'toy': {'classes': CLASSES}}
+        (data_dir / 'toy').mkdir(parents=True)
+        rng = np.random.default_rng(0)
+        self.paths, self.labels = [], []
+        for index in range(24):
+            label = index % 2
+            image = rng.integers(0, 100, size=IMAGE_SIZE, dtype=np.uint8) + 150 * label
+            path = data_dir / 'toy' / f"{index}.png"
+            cv2.imwrite(str(path), image.astype(np.uint8))
+            self.paths.append(str(path))
+            self.labels.append(label)
+
+    def prepare_training_data(self, dataset_name):
+        return self.paths[:16], self.labels[:16], self.paths[16:], self.labels[16:]
+
+
+@pytest.fixture
+def served(tmp_path):
+    """Checkpoint + torchscript varyantı + doğruluk kapısından geçmiş rapor"""
+    checkpoint = tmp_path / f"{MODEL_NAME}_best.pth"
+    checkpoint.write_bytes(b"float32 agirliklari")
+    variant_file(tmp_path, MODEL_NAME, 'torchscript').write_bytes(b"ts")
+    variant_file(tmp_path, MODEL_NAME, 'int8_dynamic').write_bytes(b"int8")
+    report = {
+        'source_checkpoint': {'file': checkpoint.name, 'sha256': checkpoint_sha256(checkpoint)},
+        'variants': {
+            'float32': {'accuracy': 0.9, 'accuracy_delta': 0.0},
+            'torchscript': {'accuracy': 0.9, 'accuracy_delta': 0.0},
+            'int8_dynamic': {'accuracy': 0.85, 'accuracy_delta': -0.05}
+        }
+    }
+    variant_report_file(tmp_path, MODEL_NAME).write_text(json.dumps(report), encoding='utf-8')
+    return tmp_path, checkpoint
+
+
+def resolve(models_dir, checkpoint, requested, **kwargs):
+    return resolve_model_variant(models_dir, MODEL_NAME, checkpoint, requested=requested, **kwargs)
+
+
+def test_checkpoint_sha256(tmp_path):
+    checkpoint = tmp_path / "model.pth"
+    checkpoint.write_bytes(b"abc" * 1000)
+    assert checkpoint_sha256(checkpoint) == hashlib.sha256(b"abc" * 1000).hexdigest()
+    assert checkpoint_sha256(tmp_path / "missing.pth") is None
+
+
+def test_matching_variant_is_served(served):
+    models_dir, checkpoint = served
+    assert resolve(models_dir, checkpoint, 'torchscript') == 'torchscript'
+    assert resolve(models_dir, checkpoint, 'float32') == 'float32'
+    assert resolve(models_dir, checkpoint, 'int8_dynamic', max_accuracy_drop=0.1) == 'int8_dynamic'
+
+
+@pytest.mark.parametrize("requested, kwargs", [
+    ('bfloat16', {}),
+    ('int8_dynamic', {'device': 'cuda', 'max_accuracy_drop': 0.1}),
+    # Doğruluk kaybı (0.05) eşiği aşıyor
+    ('int8_dynamic', {'max_accuracy_drop': 0.01}),
+    # Dosyası olmayan varyant
+    ('int8_static', {}),
+])
+def test_unusable_variant_falls_back(served, requested, kwargs):
+    models_dir, checkpoint = served
+    assert resolve(models_dir, checkpoint, requested, **kwargs) == 'float32'
+
+
+def test_retrained_checkpoint_falls_back(served):
+    models_dir, checkpoint = served
+    checkpoint.write_bytes(b"yeniden egitilmis agirliklar")
+    assert resolve(models_dir, checkpoint, 'torchscript') == 'float32'
+
+
+@pytest.mark.parametrize("report_text", [
+    None,
+    "{bozuk json",
+    json.dumps({'variants': {'torchscript': {'accuracy_delta': 0.0}}}),
+])
+def test_missing_or_unreadable_report_falls_back(served, report_text):
+    models_dir, checkpoint = served
+    report_file = variant_report_file(models_dir, MODEL_NAME)
+    if report_text is None:
+        report_file.unlink()
+    else:
+        report_file.write_text(report_text, encoding='utf-8')
+    assert resolve(models_dir, checkpoint, 'torchscript') == 'float32'
+
+
+def test_variant_without_recorded_accuracy_falls_back(served):
+    models_dir, checkpoint = served
+    report_file = variant_report_file(models_dir, MODEL_NAME)
+    report = json.loads(report_file.read_text(encoding='utf-8'))
+    report['variants']['torchscript'] = {'error': 'trace hatası'}
+    report_file.write_text(json.dumps(report), encoding='utf-8')
+    assert resolve(models_dir, checkpoint, 'torchscript') == 'float32'
+
+
+def test_invalidate_removes_variants_and_report(served):
+    models_dir, checkpoint = served
+    removed = invalidate_model_variants(models_dir, MODEL_NAME)
+
+    assert {path.name for path in removed} == {
+        f"{MODEL_NAME}_torchscript.pt", f"{MODEL_NAME}_int8_dynamic.pt", f"{MODEL_NAME}_variants.json"
+    }
+    assert checkpoint.exists()
+    assert resolve(models_dir, checkpoint, 'torchscript') == 'float32'
+    assert invalidate_model_variants(models_dir, MODEL_NAME) == []
+
+
+def test_optimize_model_writes_servable_variants(tmp_path):
+    torch.manual_seed(0)
+    model = TinyModel().eval()
+    checkpoint = tmp_path / "models" / f"{MODEL_NAME}_best.pth"
+    checkpoint.parent.mkdir()
+    torch.save({'model_state_dict': model.state_dict()}, checkpoint)
+
+    optimizer = ModelOptimizer(str(tmp_path / "models"), data_manager=FakeDataManager(tmp_path / "data"))
+    report = optimizer.optimize_model(MODEL_NAME, model, checkpoint, 'toy', IMAGE_SIZE,
+                                      variants=['torchscript', 'int8_dynamic'],
+                                      num_calibration_samples=8, num_eval_samples=8)
+
+    assert report['source_checkpoint']['sha256'] == checkpoint_sha256(checkpoint)
+    assert report['variants']['torchscript']['accuracy_delta'] == pytest.approx(0.0)
+    assert report['variants']['torchscript']['agreement'] == pytest.approx(1.0)
+    assert 'accuracy_delta' in report['variants']['int8_dynamic']
+
+    models_dir = tmp_path / "models"
+    assert resolve(models_dir, checkpoint, 'torchscript') == 'torchscript'
+    scripted = load_model_variant(models_dir, MODEL_NAME, 'torchscript')
+    example = torch.rand(2, 1, *IMAGE_SIZE)
+    with torch.no_grad():
+        torch.testing.assert_close(scripted(example), model(example))
+
+
+def test_optimize_model_rejects_mismatched_classes(tmp_path):
+    optimizer = ModelOptimizer(str(tmp_path / "models"), data_manager=FakeDataManager(tmp_path / "data"))
+    with pytest.raises(ValueError):
+        optimizer.optimize_model(MODEL_NAME, TinyModel(), tmp_path / "missing.pth", 'toy', IMAGE_SIZE,
+                                 variants=['torchscript'], class_names=['a', 'b'])
@@ -0,0 +1,90 @@
+"""
+Tek Geçişli Solunum Özellik Çıkarımı - Test
+===========================================
+
+RespiratoryFeatureContext üzerinden hesaplanan özelliklerin eski (her
+yardımcının maskeyi ve kenar haritasını yeniden hesapladığı) uygulamayla
+aynı değerleri verdiğini ve Canny kenar haritasının görüntü başına bir kez
+üretildiğini sınar. Eski uygulama benchmark_respiratory_features.py'deki
+birebir kopyadır.
+
+Kullanım:
+    python -m pytest tests/test_respiratory_features.py
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+import respiratory_emergency_detector
+from benchmark_respiratory_features import legacy_extract_respiratory_features
+from respiratory_emergency_detector import RespiratoryEmergencyDetector, RespiratoryFeatureContext
+from test_respiratory_emergency import RespiratoryEmergencyTester
+
+SYNTHETIC_CASES = {
+    'normal': lambda tester: tester._create_normal_chest_xray(),
+    'pneumonia_mild': lambda tester: tester._create_pneumonia_xray(severity='mild'),
+    'pneumonia_severe': lambda tester: tester._create_pneumonia_xray(severity='severe'),
+    'pneumothorax': lambda tester: tester._create_pneumothorax_xray(),
+    'pleural_effusion': lambda tester: tester._create_pleural_effusion_xray(),
+}
+
+
+@pytest.fixture(scope='module')
+def detector():
+    return RespiratoryEmergencyDetector()
+
+
+@pytest.fixture(scope='module')
+def tester():
+    return RespiratoryEmergencyTester()
+
+
+@pytest.mark.parametrize("case", sorted(SYNTHETIC_CASES))
+def test_features_match_legacy_implementation(detector, tester, case):
+    image = detector._preprocess_image(SYNTHETIC_CASES[case](tester))
+
+    expected = legacy_extract_respiratory_features(image)
+    features = detector._extract_respiratory_features(image)
+
+    assert set(features) >= set(expected)
+    for key, value in expected.items():
+        assert float(features[key]) == pytest.approx(float(value), rel=1e-9, abs=1e-12), key
+
+
+def test_edge_map_is_computed_once(detector, tester, monkeypatch):
+    image = detector._preprocess_image(tester._create_pneumothorax_xray())
+    calls = []
+    canny = cv2.Canny
+    monkeypatch.setattr(respiratory_emergency_detector.cv2, 'Canny',
+                        lambda *args, **kwargs: calls.append(args) or canny(*args, **kwargs))
+
+    detector._extract_respiratory_features(image)
+    assert len(calls) == 1
+
+
+def test_context_statistics():
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, size=(64, 48), dtype=np.uint8)
+    lung_mask = np.zeros_like(image)
+    lung_mask[10:40, 5:20] = 255
+    lung_mask[12:50, 30:44] = 255
+
+    ctx = RespiratoryFeatureContext(image, lung_mask)
+
+    inside = image[lung_mask > 0]
+    assert ctx.lung_pixel_count == inside.size
+    np.testing.assert_array_equal(ctx.lung_values, inside)
+    np.testing.assert_array_equal(ctx.lung_region, cv2.bitwise_and(image, lung_mask))
+    assert ctx.density_mean == pytest.approx(inside.mean())
+    assert ctx.density_std == pytest.approx(inside.std())
+    assert ctx.edges is ctx.edges
+
+
+def test_empty_mask_statistics_are_nan():
+    image = np.full((32, 32), 100, dtype=np.uint8)
+    ctx = RespiratoryFeatureContext(image, np.zeros_like(image))
+
+    assert ctx.lung_pixel_count == 0
+    assert np.isnan(ctx.density_mean)
+    assert np.isnan(ctx.density_std)
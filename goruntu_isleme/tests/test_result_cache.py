@@ -0,0 +1,50 @@
+"""
+Sonuç Cache'i - Checkpoint Parmak İzi Testi
+===========================================
+
+cached_checkpoint_fingerprint'in dizini TTL boyunca yeniden taramadığını,
+invalidate_result_caches (register_checkpoint) sonrası ve TTL dolunca
+yeni checkpoint'i gördüğünü sınar.
+
+Kullanım:
+    python -m pytest tests/test_result_cache.py
+"""
+
+import pytest
+
+import result_cache
+from result_cache import (
+    cached_checkpoint_fingerprint, checkpoint_fingerprint, invalidate_result_caches
+)
+
+
+@pytest.fixture
+def models_dir(tmp_path):
+    (tmp_path / "a.pth").write_bytes(b"a")
+    yield tmp_path
+    result_cache.invalidate_checkpoint_fingerprints()
+
+
+def test_fingerprint_is_cached_until_invalidated(models_dir, monkeypatch):
+    first = cached_checkpoint_fingerprint([models_dir], ttl_seconds=3600)
+    assert first == checkpoint_fingerprint([models_dir])
+
+    calls = []
+    original = result_cache.checkpoint_fingerprint
+    monkeypatch.setattr(result_cache, 'checkpoint_fingerprint',
+                        lambda paths: calls.append(paths) or original(paths))
+
+    (models_dir / "b.pth").write_bytes(b"b")
+    assert cached_checkpoint_fingerprint([models_dir], ttl_seconds=3600) == first
+    assert calls == []
+
+    invalidate_result_caches("test")
+    updated = cached_checkpoint_fingerprint([models_dir], ttl_seconds=3600)
+    assert updated != first
+    assert len(calls) == 1
+
+
+def test_fingerprint_expires_after_ttl(models_dir):
+    first = cached_checkpoint_fingerprint([models_dir], ttl_seconds=0)
+    (models_dir / "b.pth").write_bytes(b"b")
+    assert cached_checkpoint_fingerprint([models_dir], ttl_seconds=0) != first
@@ -0,0 +1,143 @@
+"""
+Parçalı (Shard) Eğitim Veri Seti - Test
+=======================================
+
+ShardWriter ile yazılan görüntülerin ShardedImageDataset'ten birebir geri
+okunduğunu, compile_image_dataset'in bozuk/geçersiz dosyaları atladığını ve
+compile_cached'in girdiler değişmedikçe derlenmiş dizini yeniden
+kullandığını sınar.
+
+Kullanım:
+    python -m pytest tests/test_shard_dataset.py
+"""
+
+import os
+import pickle
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+import shard_dataset
+from shard_dataset import (
+    ShardedImageDataset, ShardWriter, compile_cached, compile_image_dataset
+)
+
+IMAGE_SIZE = (16, 12)
+
+
+@pytest.fixture
+def images():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(8, *IMAGE_SIZE), dtype=np.uint8)
+
+
+@pytest.fixture
+def image_files(tmp_path):
+    rng = np.random.default_rng(1)
+    paths = []
+    for index in range(5):
+        path = tmp_path / "images" / f"img_{index}.png"
+        path.parent.mkdir(exist_ok=True)
+        cv2.imwrite(str(path), rng.integers(0, 256, size=(32, 24), dtype=np.uint8))
+        paths.append(str(path))
+    return paths
+
+
+def test_writer_round_trip(tmp_path, images):
+    labels = [index % 3 for index in range(len(images))]
+    writer = ShardWriter(tmp_path / "shards", IMAGE_SIZE, shard_size=3)
+    writer.add(images[0], labels[0], "a.png")
+    # Tampondaki iki boş yeri doldurup sonraki shard'lara taşan yığın
+    writer.add_batch(images[1:], labels[1:], [f"{index}.png" for index in range(1, len(images))])
+    writer.skip("broken.png", "decode edilemedi")
+    index = writer.close(generator="test")
+
+    assert [shard['count'] for shard in index['shards']] == [3, 3, 2]
+    assert index['num_samples'] == 8
+    assert index['class_counts'] == {'0': 3, '1': 3, '2': 2}
+    assert index['skipped'] == [{'path': "broken.png", 'error': "decode edilemedi"}]
+    assert index['generator'] == "test"
+
+    dataset = ShardedImageDataset(tmp_path / "shards")
+    assert len(dataset) == 8
+    assert dataset.labels == labels
+    assert dataset.sources()[:2] == ["a.png", "1.png"]
+    for idx in range(len(images)):
+        np.testing.assert_array_equal(dataset.read(idx), images[idx])
+
+    tensor, label = dataset[4]
+    assert tuple(tensor.shape) == (1, *IMAGE_SIZE)
+    assert label == labels[4]
+    np.testing.assert_array_equal(tensor[0].numpy(), images[4].astype(np.float32))
+
+    # Okunan görüntü yazılabilir kopya; shard içeriği değişmez
+    copy = dataset.read(0)
+    copy[...] = 0
+    np.testing.assert_array_equal(dataset.read(0), images[0])
+
+
+def test_add_batch_rejects_mismatched_labels(tmp_path, images):
+    writer = ShardWriter(tmp_path / "shards", IMAGE_SIZE, shard_size=4)
+    with pytest.raises(ValueError):
+        writer.add_batch(images[:3], [0, 1])
+
+
+def test_dataset_pickles_without_open_shards(tmp_path, images):
+    writer = ShardWriter(tmp_path / "shards", IMAGE_SIZE, shard_size=4)
+    writer.add_batch(images, [0] * len(images))
+    writer.close()
+
+    dataset = ShardedImageDataset(tmp_path / "shards")
+    dataset.read(5)
+    assert dataset._shards
+
+    clone = pickle.loads(pickle.dumps(dataset))
+    assert clone._shards == {}
+    np.testing.assert_array_equal(clone.read(5), images[5])
+
+
+def test_compile_skips_broken_and_invalid_images(tmp_path, image_files):
+    broken = tmp_path / "images" / "broken.png"
+    broken.write_bytes(b"png degil")
+    paths = image_files + [str(broken)]
+    labels = list(range(len(paths)))
+
+    index = compile_image_dataset(paths, labels, tmp_path / "shards", image_size=IMAGE_SIZE,
+                                  is_valid=lambda image: image.mean() > 0,
+                                  shard_size=2, workers=2)
+
+    assert index['num_samples'] == len(image_files)
+    assert [skipped['path'] for skipped in index['skipped']] == [str(broken)]
+
+    dataset = ShardedImageDataset(tmp_path / "shards")
+    assert dataset.labels == labels[:len(image_files)]
+    expected = cv2.resize(cv2.imread(image_files[2], cv2.IMREAD_GRAYSCALE),
+                          IMAGE_SIZE[::-1], interpolation=cv2.INTER_AREA)
+    np.testing.assert_array_equal(dataset.read(2), expected)
+
+
+def test_compile_cached_reuses_until_inputs_change(tmp_path, image_files, monkeypatch):
+    root = tmp_path / "cache"
+    labels = [0, 1, 0, 1, 0]
+    first = compile_cached(image_files, labels, "train", image_size=IMAGE_SIZE, root=root)
+    assert (first / "index.json").exists()
+
+    def fail_compile(*args, **kwargs):
+        raise AssertionError("değişmemiş veri seti yeniden derlendi")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(shard_dataset, 'compile_image_dataset', fail_compile)
+        assert compile_cached(image_files, labels, "train", image_size=IMAGE_SIZE, root=root) == first
+
+    relabeled = compile_cached(image_files, [1, 1, 0, 1, 0], "train", image_size=IMAGE_SIZE, root=root)
+    assert relabeled != first
+
+    stat = os.stat(image_files[0])
+    os.utime(image_files[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    touched = compile_cached(image_files, labels, "train", image_size=IMAGE_SIZE, root=root)
+    assert touched not in (first, relabeled)
+
+    assert not list(root.glob(".*.tmp"))
@@ -0,0 +1,177 @@
+"""
+Hacim Deposu ve Koleksiyon Manifestosu - Test
+=============================================
+
+VolumeStore'un hacmi ve sidecar kaydını kayıpsız geri verdiğini, kaynak
+parmak izi değişmedikçe store_series'in DICOM decode'u atladığını,
+batch_process_collection'ın JSONL manifestodan devam ettiğini ve
+create_volume_dataset'in seçilen koleksiyonları seri düzeyinde böldüğünü
+sınar.
+
+Kullanım:
+    python -m pytest tests/test_volume_store.py
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from volume_store import VolumeStore, series_id_for, source_fingerprint
+
+
+@pytest.fixture
+def store(tmp_path):
+    return VolumeStore(tmp_path / "volume_store")
+
+
+@pytest.fixture
+def processor(tmp_path):
+    pytest.importorskip("pydicom")
+    dicom_processor = pytest.importorskip("dicom_processor")
+    return dicom_processor.DICOMProcessor(str(tmp_path / "processed"),
+                                          volume_store_dir=str(tmp_path / "volume_store"))
+
+
+def test_round_trip(store):
+    volume = np.arange(4 * 6 * 5, dtype=np.uint8).reshape(4, 6, 5)
+    metadata = {'patient_id': 'P-1', 'modality': 'MR'}
+    store.put("s1", volume, metadata, [0, 2, 3], source_path="/data/LUNG/s1",
+              fingerprint="abc", collection="LUNG")
+
+    entry = store.get_entry("s1")
+    assert entry['shape'] == [4, 6, 5]
+    assert np.dtype(entry['dtype']) == np.uint8
+    assert entry['metadata'] == metadata
+    assert entry['quality_slices'] == [0, 2, 3]
+    assert entry['collection'] == "LUNG"
+
+    mapped = store.open("s1")
+    assert isinstance(mapped, np.memmap)
+    assert not mapped.flags.writeable
+    np.testing.assert_array_equal(mapped, volume)
+
+    slices = list(store.iter_slices("s1"))
+    assert [index for index, _ in slices] == [0, 2, 3]
+    np.testing.assert_array_equal(slices[1][1], volume[2])
+    assert len(list(store.iter_slices("s1", quality_only=False))) == 4
+
+    assert store.list_series() == ["s1"]
+    assert [entry['series_id'] for entry in store.entries()] == ["s1"]
+    assert not list(store.root.glob("*.tmp"))
+
+    store.remove("s1")
+    assert store.list_series() == []
+    assert store.get_entry("s1") is None
+
+
+def test_has_checks_fingerprint(store):
+    store.put("s1", np.zeros((2, 3, 3), dtype=np.uint8), {}, [0], fingerprint="abc")
+
+    assert store.has("s1")
+    assert store.has("s1", "abc")
+    assert not store.has("s1", "other")
+    assert not store.has("missing")
+
+    # Hacmi olmayan sidecar eksik seri sayılır
+    (store.root / "s1.npy").unlink()
+    assert not store.has("s1")
+    assert store.list_series() == []
+
+
+def test_source_fingerprint_tracks_changes(tmp_path):
+    series_dir = tmp_path / "series"
+    series_dir.mkdir()
+    (series_dir / "a.dcm").write_bytes(b"a")
+    first = source_fingerprint(series_dir)
+    assert source_fingerprint(series_dir) == first
+
+    (series_dir / "b.dcm").write_bytes(b"b")
+    second = source_fingerprint(series_dir)
+    assert second != first
+
+    stat = (series_dir / "a.dcm").stat()
+    os.utime(series_dir / "a.dcm", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert source_fingerprint(series_dir) != second
+
+
+def test_store_series_reuses_unchanged_source(processor, tmp_path, monkeypatch):
+    from dicom_fakes import write_series
+
+    series_dir = tmp_path / "LUNG" / "series_00"
+    write_series(series_dir)
+    first = processor.store_series(str(series_dir))
+    assert first['series_id'] == series_id_for(series_dir)
+    assert first['collection'] == "LUNG"
+
+    def fail_load(*args, **kwargs):
+        raise AssertionError("değişmemiş seri yeniden decode edildi")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(processor, 'load_volume', fail_load)
+        reused = processor.store_series(str(series_dir))
+    assert reused['stored_at'] == first['stored_at']
+
+    # Kaynak değişince seri yeniden decode edilir
+    for file in series_dir.glob("*.dcm"):
+        file.unlink()
+    write_series(series_dir, seed=1)
+    calls = []
+    original = processor.load_volume
+    monkeypatch.setattr(processor, 'load_volume',
+                        lambda *args, **kwargs: calls.append(args) or original(*args, **kwargs))
+    refreshed = processor.store_series(str(series_dir))
+    assert len(calls) == 1
+    assert refreshed['source_fingerprint'] != first['source_fingerprint']
+
+
+def test_collection_resumes_from_manifest(processor, tmp_path, monkeypatch):
+    from dicom_fakes import write_collection
+
+    collection_dir = write_collection(tmp_path / "LUNG", num_series=2)
+    first = processor.batch_process_collection(str(collection_dir), output_format="volume",
+                                               max_workers=1)
+    assert first['processed_series'] == 2
+    assert first['skipped_series'] == 0
+
+    manifest_file = processor.output_dir / "LUNG_manifest.jsonl"
+    records = [json.loads(line) for line in manifest_file.read_text(encoding='utf-8').splitlines()]
+    assert [record['status'] for record in records] == ["done", "done"]
+
+    # Çökme sırasında yarım kalmış son satır yok sayılır
+    with open(manifest_file, 'a', encoding='utf-8') as f:
+        f.write('{"series_dir": "yarım')
+
+    def fail_process(*args, **kwargs):
+        raise AssertionError("manifestoda tamamlanmış seri yeniden işlendi")
+
+    monkeypatch.setattr(processor, 'process_dicom_series', fail_process)
+    rerun = processor.batch_process_collection(str(collection_dir), output_format="volume",
+                                               max_workers=1)
+    assert rerun['processed_series'] == 0
+    assert rerun['skipped_series'] == 2
+    assert rerun['failed_series'] == 0
+    assert ({result['series_id'] for result in rerun['series_results']}
+            == {result['series_id'] for result in first['series_results']})
+
+
+def test_volume_dataset_splits_by_series(processor, tmp_path):
+    store = processor.volume_store
+    for collection, sizes in [("CPTAC-LUAD", [5, 3, 4, 2]), ("OLD-LUNG", [6])]:
+        for index, size in enumerate(sizes):
+            store.put(f"{collection}_{index}", np.zeros((size, 2, 2), dtype=np.uint8), {},
+                      list(range(size)), collection=collection)
+
+    info = processor.create_volume_dataset(str(tmp_path / "dataset"), collections=["CPTAC-LUAD"])
+    assert info['num_series'] == 4
+    assert (info['train_images'], info['val_images'], info['test_images']) == (8, 4, 2)
+
+    manifest = json.loads((tmp_path / "dataset" / "volume_dataset.json").read_text(encoding='utf-8'))
+    split_series = {split: {sample[0] for sample in samples}
+                    for split, samples in manifest['splits'].items()}
+    assert split_series == {
+        "train": {"CPTAC-LUAD_0", "CPTAC-LUAD_1"},
+        "val": {"CPTAC-LUAD_2"},
+        "test": {"CPTAC-LUAD_3"}
+    }
@@ -32,6 +32,8 @@ warnings.filterwarnings('ignore')
 from models.radiology_models import RadiologyCNN, DenseNetRadiology, ResNetRadiology
 from models.model_manager import ModelManager
 from dicom_processor import DICOMProcessor
+from volume_store import VolumeStore
+from shard_dataset import DATASET_SHARD_DIR, ShardedImageDataset, compile_cached
 
 logger = logging.getLogger(__name__)
 
@@ -63,8 +65,7 @@ class TCIAImageDataset(Dataset):
         
         # Görüntüyü yükle
         try:
-            image = Image.open(image_path).convert('L')  # Grayscale
-            image = np.array(image)
+            image = self._load_image(image_path)
             
             # Görüntü kalitesini kontrol et
             if self._is_valid_image(image):
@@ -84,7 +85,12 @@ class TCIAImageDataset(Dataset):
             logger.warning(f"Görüntü yükleme hatası ({image_path}): {str(e)}")
             return self._get_random_valid_image()
     
-    def _is_valid_image(self, image: np.ndarray) -> bool:
+    def _load_image(self, image_path) -> np.ndarray:
+        """Gri tonlamalı görüntüyü yükle"""
+        return np.array(Image.open(image_path).convert('L'))
+    
+    @staticmethod
+    def _is_valid_image(image: np.ndarray) -> bool:
         """Görüntü kalitesini kontrol et"""
         if image is None or image.size == 0:
             return False
@@ -105,6 +111,48 @@ class TCIAImageDataset(Dataset):
         return self.__getitem__(random_idx)
 
 
+class TCIAVolumeDataset(TCIAImageDataset):
+    """
+    Hacim deposundaki slice'lar üzerinde veri seti
+    
+    Örnekler (seri kimliği, slice indeksi) çiftleridir. Her seri DataLoader
+    worker'ı içinde ilk erişimde mmap ile bir kez açılır; slice okuma
+    PNG decode etmeden sayfa önbelleğinden kopyasız yapılır.
+    """
+    
+    def __init__(self, volume_store: VolumeStore, samples: List[Tuple[str, int]],
+                 labels: List[int], transform=None, is_training: bool = True):
+        super().__init__(samples, labels, transform=transform, is_training=is_training)
+        self.volume_store = volume_store
+        self._volumes: Dict[str, np.ndarray] = {}
+    
+    def __getstate__(self):
+        # Worker süreçlerine mmap'ler değil yalnızca örnek listesi taşınır
+        state = self.__dict__.copy()
+        state['_volumes'] = {}
+        return state
+    
+    def _load_image(self, sample) -> np.ndarray:
+        series_id, slice_index = sample
+        volume = self._volumes.get(series_id)
+        if volume is None:
+            volume = self.volume_store.open(series_id)
+            self._volumes[series_id] = volume
+        return np.asarray(volume[slice_index])
+
+
+class TCIAShardDataset(TCIAImageDataset):
+    """Önceden decode edilmiş uint8 shard'lar üzerinde veri seti (bkz. shard_dataset)"""
+    
+    def __init__(self, shards: ShardedImageDataset, transform=None, is_training: bool = True):
+        super().__init__(list(range(len(shards))), shards.labels,
+                         transform=transform, is_training=is_training)
+        self.shards = shards
+    
+    def _load_image(self, index) -> np.ndarray:
+        return self.shards.read(index)
+
+
 class TCIAImageTransforms:
     """TCIA görüntüleri için transform'lar"""
     
@@ -191,6 +239,11 @@ class TCIAModelTrainer:
         try:
             logger.info("Veri seti yükleniyor...")
             
+            # DICOMProcessor.create_volume_dataset manifestosu varsa hacim deposu kullanılır
+            volume_manifest = self.data_dir / "volume_dataset.json"
+            if volume_manifest.exists():
+                return self._load_volume_dataset(volume_manifest)
+            
             # Sınıf klasörlerini bul
             train_dir = self.data_dir / "train"
             val_dir = self.data_dir / "val"
@@ -237,6 +290,37 @@ class TCIAModelTrainer:
             logger.error(f"Veri seti yükleme hatası: {str(e)}")
             raise
     
+    def _load_volume_dataset(self, manifest_path: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Hacim deposu manifestosundan (seri, slice) örneklerini yükle"""
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        
+        splits = manifest['splits']
+        class_names = sorted({sample[2] for split in splits.values() for sample in split})
+        class_mapping = {class_name: i for i, class_name in enumerate(class_names)}
+        for class_name, i in class_mapping.items():
+            logger.info(f"Sınıf {i}: {class_name}")
+        
+        datasets = {}
+        for split in ('train', 'val', 'test'):
+            samples = [(series_id, slice_index) for series_id, slice_index, _ in splits[split]]
+            labels = [class_mapping[class_name] for _, _, class_name in splits[split]]
+            datasets[split] = (samples, labels)
+        
+        dataset_info = {
+            'train_size': len(datasets['train'][0]),
+            'val_size': len(datasets['val'][0]),
+            'test_size': len(datasets['test'][0]),
+            'num_classes': len(class_mapping),
+            'class_mapping': class_mapping,
+            'class_names': class_names,
+            'volume_store': manifest['dataset_info']['volume_store']
+        }
+        
+        logger.info(f"Hacim veri seti yüklendi: Train={dataset_info['train_size']}, "
+                    f"Val={dataset_info['val_size']}, Test={dataset_info['test_size']}")
+        return datasets, dataset_info
+    
     def _load_class_images(self, data_dir: Path, class_mapping: Dict[str, int]) -> Tuple[List[str], List[int]]:
         """Sınıf görüntülerini yükle"""
         images = []
@@ -262,22 +346,31 @@ class TCIAModelTrainer:
             # Veri setlerini yükle
             datasets, info = self.load_dataset()
             
-            # Dataset'leri oluştur
-            train_dataset = TCIAImageDataset(
+            # Dataset'leri oluştur (hacim deposu varsa slice'lar mmap ile okunur)
+            if 'volume_store' in info:
+                volume_store = VolumeStore(info['volume_store'])
+                dataset_factory = lambda *args, **kwargs: TCIAVolumeDataset(volume_store, *args, **kwargs)
+            elif DATASET_SHARD_DIR:
+                # Görüntüler bir kez shard'lara derlenir, epoch'lar decode etmez
+                dataset_factory = self._create_shard_dataset
+            else:
+                dataset_factory = TCIAImageDataset
+            
+            train_dataset = dataset_factory(
                 datasets['train'][0], datasets['train'][1], 
                 transform=train_transform, is_training=True
             )
-            val_dataset = TCIAImageDataset(
+            val_dataset = dataset_factory(
                 datasets['val'][0], datasets['val'][1],
                 transform=val_transform, is_training=False
             )
-            test_dataset = TCIAImageDataset(
+            test_dataset = dataset_factory(
                 datasets['test'][0], datasets['test'][1],
                 transform=val_transform, is_training=False
             )
             
             # Class weights hesapla (imbalanced data için)
-            train_labels = np.array(datasets['train'][1])
+            train_labels = np.array(train_dataset.labels)
             class_counts = np.bincount(train_labels)
             class_weights = 1.0 / class_counts
             class_weights = class_weights / class_weights.sum() * len(class_weights)
@@ -322,6 +415,16 @@ class TCIAModelTrainer:
             logger.error(f"Data loader oluşturma hatası: {str(e)}")
             raise
     
+    def _create_shard_dataset(self, image_paths: List[str], labels: List[int],
+                              transform=None, is_training: bool = True) -> TCIAShardDataset:
+        """Görüntüleri (değişmediyse bir kez) shard'lara derleyip veri seti oluştur"""
+        shard_dir = compile_cached(
+            image_paths, labels, "tcia",
+            image_size=(512, 512),
+            is_valid=TCIAImageDataset._is_valid_image
+        )
+        return TCIAShardDataset(ShardedImageDataset(shard_dir), transform=transform, is_training=is_training)
+    
     def train_model(self, model_name: str, train_loader: DataLoader, val_loader: DataLoader) -> nn.Module:
         """Model eğit"""
         try:
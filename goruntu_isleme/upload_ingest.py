@@ -0,0 +1,189 @@
+"""
+Akışlı Dosya Yükleme Alımı
+==========================
+
+/analyze/upload ve /mobile/upload-analyze için yükleme yolu. Amaç dosyayı
+belleğe bir kez bile tam kopyalamadan görüntü pipeline'ına vermektir:
+
+    - UploadSizeLimitMiddleware istek gövdesini akarken sayar; Content-Length
+      ya da alınan byte'lar limiti aşarsa gövdenin geri kalanı okunmadan 413
+      döner (eskiden 50 MB'lık dosya tamamen okunduktan sonra reddediliyordu).
+    - Starlette multipart gövdesini parça parça SpooledTemporaryFile'a yazar;
+      UploadBuffer bu dosyayı mmap ile salt okunur memoryview olarak açar.
+      mmap mümkün değilse dosya boyutunda önceden ayrılmış tek bir tampona
+      parça parça okunur.
+    - Görüntü memoryview'dan doğrudan decode edilir; base64 kodlaması ve
+      ara byte kopyaları yoktur. Yükleme başına tepe bellek ~3x yerine ~1x
+      dosya boyutudur.
+"""
+
+import logging
+import mmap
+import os
+from typing import Dict, Optional
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+
+# Multipart sınırları ve form alanları için gövde limitine eklenen pay
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Yüklenen dosya boyut limitini aşıyor"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"Dosya boyutu {max_bytes // (1024 * 1024)}MB'dan büyük olamaz")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Belirli yollar için istek gövdesi boyutunu akış sırasında sınırlayan ASGI middleware
+
+    Args:
+        app: ASGI uygulaması
+        limits: Yol -> izin verilen dosya boyutu (byte)
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['path'] not in self.limits:
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = self.limits[scope['path']]
+        body_limit = max_bytes + MULTIPART_OVERHEAD_BYTES
+
+        content_length = dict(scope['headers']).get(b'content-length')
+        if content_length is not None:
+            try:
+                declared_length = int(content_length)
+                if declared_length < 0:
+                    raise ValueError(content_length)
+            except ValueError:
+                await self._bad_request(scope, receive, send, content_length)
+                return
+            if declared_length > body_limit:
+                await self._reject(scope, receive, send, max_bytes)
+                return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > body_limit and not rejected:
+                    rejected = True
+                    await self._reject(scope, receive, send, max_bytes)
+                    raise UploadTooLargeError(max_bytes)
+            return message
+
+        async def guarded_send(message):
+            # 413 gönderildikten sonra uygulamanın ürettiği yanıt atılır
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except UploadTooLargeError:
+            if not rejected:
+                raise
+
+    @staticmethod
+    async def _reject(scope, receive, send, max_bytes: int):
+        logger.warning(f"Yükleme reddedildi ({scope['path']}): limit {max_bytes} byte")
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": str(UploadTooLargeError(max_bytes))}
+        )
+        await response(scope, receive, send)
+
+    @staticmethod
+    async def _bad_request(scope, receive, send, content_length: bytes):
+        logger.warning(f"Geçersiz Content-Length ({scope['path']}): {content_length!r}")
+        response = JSONResponse(
+            status_code=400,
+            content={"detail": "Geçersiz Content-Length başlığı"}
+        )
+        await response(scope, receive, send)
+
+
+class UploadBuffer:
+    """Yüklenen dosyanın kopyasız, salt okunur memoryview görünümü"""
+
+    def __init__(self, file_obj, size: int, chunk_size: Optional[int] = None):
+        self.file = file_obj
+        self.size = size
+        self.chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+        self._mmap = None
+        self._buffer = None
+        self._view = None
+
+    def __enter__(self) -> memoryview:
+        try:
+            # SpooledTemporaryFile.fileno() bellekteki küçük dosyayı diske aktarır
+            self._mmap = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)
+        except (AttributeError, OSError, ValueError):
+            # Dosya tanımlayıcısı yoksa tek tampona parça parça oku
+            self._buffer = bytearray(self.size)
+            view = memoryview(self._buffer)
+            self.file.seek(0)
+            offset = 0
+            while offset < self.size:
+                read = self.file.readinto(view[offset:offset + self.chunk_size])
+                if not read:
+                    break
+                offset += read
+            view.release()
+            self._view = memoryview(self._buffer)[:offset]
+        return self._view
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._view is not None:
+                self._view.release()
+            if self._mmap is not None:
+                self._mmap.close()
+        except BufferError:
+            # Hata traceback'i decode tamponunu hâlâ tutuyorsa GC kapatır
+            pass
+        self._view = None
+        self._mmap = None
+        self._buffer = None
+
+
+def _file_size(file_obj) -> int:
+    file_obj.seek(0, os.SEEK_END)
+    size = file_obj.tell()
+    file_obj.seek(0)
+    return size
+
+
+async def open_upload(upload: UploadFile, max_bytes: int) -> UploadBuffer:
+    """
+    Yüklenen dosyayı boyut kontrolüyle aç
+
+    Kullanım:
+        with await open_upload(file, 50 * 1024 * 1024) as image_view:
+            ...
+    """
+    size = await run_in_threadpool(_file_size, upload.file)
+    if size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+    if size == 0:
+        raise ValueError("Boş dosya yüklendi")
+    return UploadBuffer(upload.file, size)
@@ -0,0 +1,175 @@
+"""
+Bellek Eşlemeli Hacim Deposu
+============================
+
+DICOMProcessor'ın normalize ettiği 3D hacimleri seri başına bir kez .npy
+olarak yazar; eğitim, validasyon ve slice çıkarımı hacmi np.load(mmap_mode='r')
+ile kopyasız açar. Aynı TCIA koleksiyonları üzerinde tekrarlanan deneylerde
+DICOM decode, normalizasyon ve PNG okuma maliyeti ortadan kalkar.
+
+Dizin yapısı:
+    <root>/<series_id>.npy   - normalize edilmiş (slice, satır, sütun) hacim
+    <root>/<series_id>.json  - sidecar indeks kaydı: extract_dicom_metadata
+                               çıktısı, şekil/dtype, kaliteli slice indeksleri,
+                               koleksiyon adı, kaynak seri yolu ve parmak izi
+
+Sidecar dosyası hacimden sonra yazılır; sidecar'ı olan her seri eksiksizdir.
+Seri başına ayrı sidecar kullanıldığı için birden fazla süreç aynı depoya
+kilit olmadan yazabilir.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Boşsa DICOMProcessor çıktı klasörü altındaki volume_store kullanılır
+VOLUME_STORE_DIR = os.getenv("VOLUME_STORE_DIR", "")
+
+
+def series_id_for(series_path: Union[str, Path]) -> str:
+    """Seri klasöründen kararlı seri kimliği (klasör adı + yol özeti)"""
+    series_path = Path(series_path).resolve()
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', series_path.name).strip('_') or 'series'
+    digest = hashlib.blake2b(str(series_path).encode('utf-8'), digest_size=4).hexdigest()
+    return f"{name}_{digest}"
+
+
+def source_fingerprint(series_path: Union[str, Path]) -> str:
+    """
+    Seri klasöründeki dosyaların ad/boyut/mtime parmak izi
+
+    Yalnızca stat okur; dosya eklendiğinde ya da değiştiğinde değişir.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for file in sorted(p for p in Path(series_path).rglob('*') if p.is_file()):
+        stat = file.stat()
+        digest.update(f"{file.name}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class VolumeStore:
+    """Seri başına .npy hacim + JSON sidecar deposu"""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _volume_file(self, series_id: str) -> Path:
+        return self.root / f"{series_id}.npy"
+
+    def _sidecar_file(self, series_id: str) -> Path:
+        return self.root / f"{series_id}.json"
+
+    def put(self,
+            series_id: str,
+            volume: np.ndarray,
+            metadata: Dict[str, Any],
+            quality_slices: List[int],
+            source_path: Optional[str] = None,
+            fingerprint: Optional[str] = None,
+            collection: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Hacmi ve sidecar kaydını yaz
+
+        Args:
+            series_id: Seri kimliği
+            volume: Normalize edilmiş (slice, satır, sütun) hacim
+            metadata: extract_dicom_metadata çıktısı
+            quality_slices: Kalite kontrolünden geçen slice indeksleri
+            source_path: Kaynak DICOM seri klasörü
+            fingerprint: Kaynak serinin parmak izi (yeniden kullanım kontrolü)
+            collection: Serinin ait olduğu koleksiyon adı (sınıf etiketi için)
+        """
+        volume = np.ascontiguousarray(volume)
+        volume_file = self._volume_file(series_id)
+
+        # Yarım yazılmış dosya okunmasın: geçici dosya + atomik rename
+        tmp_volume = volume_file.with_name(f"{volume_file.name}.{os.getpid()}.tmp")
+        with open(tmp_volume, 'wb') as f:
+            np.save(f, volume, allow_pickle=False)
+        os.replace(tmp_volume, volume_file)
+
+        entry = {
+            'series_id': series_id,
+            'volume_file': volume_file.name,
+            'shape': list(volume.shape),
+            'dtype': volume.dtype.str,
+            'metadata': metadata,
+            'quality_slices': [int(i) for i in quality_slices],
+            'source_path': source_path,
+            'source_fingerprint': fingerprint,
+            'collection': collection,
+            'stored_at': datetime.now().isoformat()
+        }
+        sidecar_file = self._sidecar_file(series_id)
+        tmp_sidecar = sidecar_file.with_name(f"{sidecar_file.name}.{os.getpid()}.tmp")
+        with open(tmp_sidecar, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_sidecar, sidecar_file)
+
+        logger.info(f"Hacim depoya yazıldı: {series_id} {volume.shape}")
+        return entry
+
+    def get_entry(self, series_id: str) -> Optional[Dict[str, Any]]:
+        """Sidecar kaydını getir; seri yoksa None"""
+        try:
+            with open(self._sidecar_file(series_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def has(self, series_id: str, fingerprint: Optional[str] = None) -> bool:
+        """Seri depoda mı (parmak izi verilirse kaynak değişmemiş mi)"""
+        entry = self.get_entry(series_id)
+        if entry is None or not self._volume_file(series_id).exists():
+            return False
+        return fingerprint is None or entry.get('source_fingerprint') == fingerprint
+
+    def open(self, series_id: str) -> np.ndarray:
+        """Hacmi salt okunur bellek eşlemeli olarak aç (kopyasız)"""
+        return np.load(self._volume_file(series_id), mmap_mode='r', allow_pickle=False)
+
+    def iter_slices(self, series_id: str,
+                    quality_only: bool = True) -> Iterator[Tuple[int, np.ndarray]]:
+        """(slice indeksi, slice görünümü) çiftleri"""
+        volume = self.open(series_id)
+        if quality_only:
+            indices = self.get_entry(series_id)['quality_slices']
+        else:
+            indices = range(volume.shape[0])
+        for index in indices:
+            yield index, volume[index]
+
+    def list_series(self) -> List[str]:
+        """Depodaki eksiksiz serilerin kimlikleri"""
+        return sorted(
+            file.stem for file in self.root.glob('*.json')
+            if self._volume_file(file.stem).exists()
+        )
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Tüm sidecar kayıtları"""
+        entries = []
+        for series_id in self.list_series():
+            entry = self.get_entry(series_id)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def remove(self, series_id: str):
+        """Seriyi depodan sil"""
+        for file in (self._sidecar_file(series_id), self._volume_file(series_id)):
+            try:
+                file.unlink()
+            except FileNotFoundError:
+                pass
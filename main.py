@@ -18,15 +18,26 @@ if __name__ == "__main__":
     
     # Import the main FastAPI app from goruntu_isleme module
     try:
-        from goruntu_isleme.api import app
+        from goruntu_isleme.api import app, preload_models
+        from goruntu_isleme.prefork_server import SERVER_PRELOAD, SERVER_WORKERS, PreforkServer
         
-        import uvicorn
-        uvicorn.run(
-            app, 
-            host="0.0.0.0", 
-            port=port,
-            log_level="info"
-        )
+        if SERVER_WORKERS != 1:
+            # Multi-worker: load models once in the master, fork workers
+            # that share the weights copy-on-write
+            import logging
+            logging.basicConfig(level=logging.INFO)
+            server = PreforkServer(app)
+            if SERVER_PRELOAD:
+                server.preload(preload_models)
+            server.serve("0.0.0.0", port)
+        else:
+            import uvicorn
+            uvicorn.run(
+                app, 
+                host="0.0.0.0", 
+                port=port,
+                log_level="info"
+            )
     except ImportError:
         # Fallback: create a simple health check app
         from fastapi import FastAPI